@@ -28,10 +28,20 @@ from sqlalchemy import create_engine, text  # type: ignore
 # before the core/redis_subscriber imports below, which can log at import time.
 from utils.clip_auth import get_clip_api_key  # noqa: E402
 from utils.log_context import clear_server, server_context, set_server  # noqa: E402
+from utils.http_pool import http_pool, http_session  # noqa: E402
 from utils.logging_config import setup_logging  # noqa: E402
-from utils.redis_signing import sign_payload  # noqa: E402
 from utils.server_urls import get_server_base_url, get_server_public_page_url  # noqa: E402
-from utils.subscription_tier import server_has_feature, upgrade_message  # noqa: E402
+from utils.conversion_totals import (  # noqa: E402
+    migrate_add_points_conversion_totals,
+    migrate_add_raffle_conversion_totals,
+    reconcile_conversion_totals,
+)
+from utils.subscription_tier import cached_server_has_feature, server_has_feature, upgrade_message  # noqa: E402
+from utils.watchtime_accrual import (  # noqa: E402
+    bulk_award_points,
+    bulk_upsert_watchtime_queue_roles,
+    load_points_rates,
+)
 
 # Platform that the chat message currently being handled arrived on ('kick' |
 # 'twitch'). Set at the top of _handle_incoming_message so send_kick_message can
@@ -46,10 +56,23 @@ logging.getLogger("discord.gateway").setLevel(logging.ERROR)
 
 setup_logging("kick_bot", log_level=os.getenv("LOG_LEVEL", "INFO"), source_tag="BOT")
 
+from core.chat_commands import ChatCommandRouter, ChatMessage
+from core.chat_outbox import PRIORITY_ANNOUNCEMENT, PRIORITY_REPLY, PRIORITY_TIMED, chat_outbox
+from core.chat_recorder import chat_recorder
+from core.db_executor import db_executor
+from core.identity_index import identity_index
 from core.kick_api import USER_AGENTS, KickAPI, check_stream_live, fetch_chatroom_id  # Consolidated Kick API module
+from core.kick_channels import kick_channels
+from core.kick_chat_sender import KickChatSender
+from core.loop_monitor import loop_lag_monitor
+from core.pusher_multiplexer import PusherMultiplexer
+from core.role_sync import QUEUE_TABLE_DDL as ROLE_SYNC_QUEUE_DDL
+from core.role_sync import role_sync
+from core.twitch_api import app_client_stats as twitch_app_client_stats
+from core.twitch_api import close_app_client as close_twitch_app_client
 
 # Custom commands import
-from features.custom_commands import CustomCommandsManager
+from features.custom_commands import CustomCommandsManager, bind_write_hook as bind_custom_commands_write_hook
 from features.discord_app_commands import register_wagerlabs_slash_commands, sync_global_slash_commands
 from features.games.gambling import setup_gambling
 from features.games.gtb_panel import setup_gtb_panel
@@ -94,6 +117,7 @@ from raffle_system.database import (
     setup_raffle_database,
 )
 from raffle_system.gifted_sub_tracker import setup_gifted_sub_handler
+from raffle_system.leaderboard_cache import leaderboard_cache
 from raffle_system.migrations.add_commit_reveal_to_periods import migrate_add_commit_reveal_to_periods
 from raffle_system.migrations.add_platform_to_links import migrate_add_platform_to_links
 from raffle_system.migrations.add_provably_fair_to_draws import migrate_add_provably_fair_to_draws
@@ -105,6 +129,10 @@ from redis_subscriber import start_redis_subscriber
 
 # Bot settings manager - loads settings from database with env var fallbacks
 from utils.bot_settings import BotSettingsManager
+from utils.redis_publisher import buffered_redis_publisher
+from utils.redis_signing import sign_payload
+from utils.settings_store import settings_store
+from utils.shop_mosaic import create_shop_mosaic_image
 
 # Clip service moved to Dashboard - bot now calls Dashboard API
 
@@ -182,9 +210,15 @@ else:
 
 
 def publish_redis_event(channel: str, action: str, data: dict = None):
-    """Publish an event to Redis for dashboard real-time updates"""
+    """Publish a signed event for the dashboard.
+
+    Once the bot's loop is bound this only queues it (flushed in batches by
+    utils/redis_publisher.py); before that it is published directly.
+    """
     if not redis_client:
         return False
+    if buffered_redis_publisher.publish(channel, action, data, signed=True):
+        return True
     try:
         payload = sign_payload(
             {"action": action, "data": data or {}, "timestamp": datetime.now(timezone.utc).isoformat()}
@@ -210,8 +244,16 @@ if DATABASE_URL.startswith("postgres://"):
 logger.debug(f"📊 Using database: {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'SQLite (local)'}")
 
 WATCH_INTERVAL_SECONDS = int(os.getenv("WATCH_INTERVAL_SECONDS", "60"))
-ROLE_UPDATE_INTERVAL_SECONDS = int(os.getenv("ROLE_UPDATE_INTERVAL_SECONDS", "600"))
+# Roles are granted as soon as a watchtime tick crosses a threshold (core/role_sync.py);
+# the full scan only reconciles misses, so it runs rarely. ROLE_UPDATE_INTERVAL_SECONDS
+# is the old name of this setting and is still honoured.
+ROLE_RECONCILE_INTERVAL_SECONDS = int(
+    os.getenv("ROLE_RECONCILE_INTERVAL_SECONDS", os.getenv("ROLE_UPDATE_INTERVAL_SECONDS", "21600"))
+)
 CODE_EXPIRY_MINUTES = int(os.getenv("CODE_EXPIRY_MINUTES", "10"))
+# How long a confirmed Twitch bot authorization is trusted before send_twitch_message
+# re-checks twitch_oauth_tokens (the row is written by the OAuth web flow).
+TWITCH_BOT_AUTH_CACHE_SECONDS = float(os.getenv("TWITCH_BOT_AUTH_CACHE_SECONDS", "600"))
 
 # Slot call tracker configuration
 # Can also be configured via dashboard
@@ -369,8 +411,8 @@ class KickWebSocketManager:
     def __init__(self):
         self.connections = {}  # guild_id -> KickAPI instance
         self.connection_tasks = {}  # guild_id -> asyncio.Task
-        self.message_queues = {}  # guild_id -> asyncio.Queue
         self.connected_channels = {}  # guild_id -> kick channel username
+        self.chat_sender = KickChatSender(self._load_chat_token, self._refresh_oauth_token, self._streamer_chat_token)
 
     async def ensure_connection(self, guild_id: int, guild_name: str) -> bool:
         """Ensure there's an active websocket connection for this guild"""
@@ -414,25 +456,23 @@ class KickWebSocketManager:
 
             # Initialize kickpython API WITHOUT any credentials for chatroom_id fetch
             # kickpython will use public non-OAuth API to fetch chatroom_id (more reliable)
-            # We only need auth when SENDING messages (handled in _message_sender)
+            # We only need auth when SENDING messages (handled in deliver)
             api = KickAPI()
 
             # DON'T set access_token or credentials here - let kickpython use public API
             # (OAuth tokens can expire, causing 401 errors during chatroom_id fetch)
-            # We'll fetch fresh tokens in _message_sender when actually sending messages
+            # We'll fetch fresh tokens in deliver when actually sending messages
 
             # Attach a chat message handler before connecting
             async def _on_message(msg: dict):
                 try:
+                    chat_recorder.record(guild_id, guild_name, msg, source="kickpython")
                     await self._handle_incoming_message(guild_id, guild_name, msg)
                 except Exception as e:
                     logger.info(f"❌ Error in message handler: {e}")
 
             api.add_message_handler(_on_message)
 
-            # Create message queue for this guild
-            self.message_queues[guild_id] = asyncio.Queue()
-
             # Connect to chatroom via websocket
             logger.info(f"🔌 Connecting to Kick websocket for channel: {kick_username} with BOT token from env...")
 
@@ -454,10 +494,10 @@ class KickWebSocketManager:
             return False
 
     async def disconnect(self, guild_id: int):
-        """Tear down a guild's websocket connection, tasks and queue.
+        """Tear down a guild's websocket connection, task and outbound Kick lane.
 
-        Called on guild removal so the per-guild connection + its maintain/sender
-        tasks don't keep running (and reconnecting) forever after the bot leaves.
+        Called on guild removal so the per-guild connection + its maintain task
+        don't keep running (and reconnecting) forever after the bot leaves.
         """
         task = self.connection_tasks.pop(guild_id, None)
         if task and not task.done():
@@ -469,6 +509,7 @@ class KickWebSocketManager:
             except Exception as e:
                 logger.info(f"⚠️ Error awaiting cancelled kick task for guild {guild_id}: {e}")
         api = self.connections.pop(guild_id, None)
+        self.chat_sender.forget(guild_id)
         if api is not None:
             close_fn = getattr(api, "disconnect", None) or getattr(api, "close", None)
             if close_fn:
@@ -478,19 +519,14 @@ class KickWebSocketManager:
                         await result
                 except Exception as e:
                     logger.info(f"⚠️ Error closing kick api for guild {guild_id}: {e}")
-        self.message_queues.pop(guild_id, None)
+        chat_outbox.discard(guild_id, "kick")
         self.connected_channels.pop(guild_id, None)
         logger.info(f"🔌 Tore down Kick websocket for guild {guild_id}")
 
     async def _maintain_connection(self, guild_id: int, guild_name: str, api, kick_username: str):
-        """Maintain websocket connection and process message queue"""
+        """Maintain the websocket connection (outbound chat is sent by deliver, via chat_outbox)"""
         set_server(guild_id, guild_name)  # tag this per-guild task's logging
         try:
-            logger.debug(f"🔌 Starting message sender task in background...")
-
-            # Start the message sender as a separate task
-            sender_task = asyncio.create_task(self._message_sender(guild_id, guild_name, api))
-
             # DON'T set access_token before connecting!
             # kickpython will fetch chatroom_id using PUBLIC API: /api/v2/channels/{channel}/chatroom
             # We only need token for SENDING messages (done in post_chat method)
@@ -538,8 +574,6 @@ class KickWebSocketManager:
                     await asyncio.sleep(reconnect_delay)
                     reconnect_delay = min(reconnect_delay * 2, max_reconnect_delay)
 
-            sender_task.cancel()
-
         except Exception as e:
             logger.info(f"❌ Websocket connection lost: {e}")
             import traceback
@@ -627,7 +661,7 @@ class KickWebSocketManager:
             }
 
             logger.info(f"🔄 Refreshing OAuth 2.1 token...")
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     "https://id.kick.com/oauth/token",
                     data=data,
@@ -676,274 +710,34 @@ class KickWebSocketManager:
             traceback.print_exc()
             return None
 
-    async def _message_sender(self, guild_id: int, guild_name: str, api):
-        """Process message queue and send via kickpython (multiserver support)"""
-        set_server(guild_id, guild_name)  # tag this per-guild task's logging
-        logger.debug(f"📨 Message sender task started!")
-
-        try:
-            # Load OAuth 2.1 token ONCE at startup for performance
-            oauth_token = None
-            try:
-                logger.debug(f"🔍 Loading kick_oauth_token from database...")
-                with engine.connect() as conn:
-                    result = conn.execute(
-                        text(
-                            """
-                        SELECT kot.access_token
-                        FROM bot_settings bs
-                        JOIN kick_oauth_tokens kot
-                          ON LOWER(kot.kick_username) = LOWER(bs.value)
-                        WHERE bs.key = 'kick_channel'
-                          AND bs.discord_server_id = :guild_id
-                        ORDER BY kot.updated_at DESC
-                        LIMIT 1
-                    """
-                        ),
-                        {"guild_id": guild_id},
-                    ).fetchone()
-
-                    if not result or not result[0]:
-                        # Legacy fallback if guild has not been mapped into kick_oauth_tokens yet
-                        result = conn.execute(
-                            text(
-                                """
-                            SELECT value FROM bot_settings
-                            WHERE key = 'kick_oauth_token'
-                              AND discord_server_id = :guild_id
-                            LIMIT 1
-                        """
-                            ),
-                            {"guild_id": guild_id},
-                        ).fetchone()
-
-                    if result and result[0]:
-                        oauth_token = result[0]
-                        api.access_token = oauth_token
-                        logger.debug(f"✅ OAuth token loaded successfully")
-                    else:
-                        logger.warning(f"⚠️ No kick_oauth_token found - messages will fail!")
-                        # Debug: Check what keys exist
-                        all_keys = conn.execute(
-                            text(
-                                """
-                            SELECT key FROM bot_settings WHERE discord_server_id = :guild_id
-                        """
-                            ),
-                            {"guild_id": guild_id},
-                        ).fetchall()
-                        logger.debug(f"🔍 Available keys: {[row[0] for row in all_keys]}")
-            except Exception as e:
-                logger.info(f"❌ Error loading OAuth token: {e}")
-                import traceback
-
-                traceback.print_exc()
-
-            logger.debug(f"🔄 Starting message processing loop...")
-
-            while True:
-                try:
-                    # Wait for message from queue (timeout allows checking for cancellation)
-                    try:
-                        message, channel_id = await asyncio.wait_for(self.message_queues[guild_id].get(), timeout=5.0)
-                    except asyncio.TimeoutError:
-                        # No message in queue, keep waiting
-                        continue
-
-                    # Reload token from database before each send (in case proactive refresh updated it)
-                    try:
-                        with engine.connect() as conn:
-                            result = conn.execute(
-                                text(
-                                    """
-                                SELECT kot.access_token
-                                FROM bot_settings bs
-                                JOIN kick_oauth_tokens kot
-                                  ON LOWER(kot.kick_username) = LOWER(bs.value)
-                                WHERE bs.key = 'kick_channel'
-                                  AND bs.discord_server_id = :guild_id
-                                ORDER BY kot.updated_at DESC
-                                LIMIT 1
-                            """
-                                ),
-                                {"guild_id": guild_id},
-                            ).fetchone()
-
-                            if not result or not result[0]:
-                                result = conn.execute(
-                                    text(
-                                        """
-                                    SELECT value FROM bot_settings
-                                    WHERE key = 'kick_oauth_token'
-                                      AND discord_server_id = :guild_id
-                                    LIMIT 1
-                                """
-                                    ),
-                                    {"guild_id": guild_id},
-                                ).fetchone()
-
-                            if result and result[0]:
-                                api.access_token = result[0]
-                    except Exception as e:
-                        logger.info(f"⚠️ Error reloading token: {e}")
-
-                    # Debug: Log what we're about to send
-                    logger.info(f"📤 Preparing to send message:")
-                    logger.info(f"   Message: {message[:100]}...")
-                    logger.info(f"   Channel ID: {channel_id}")
-                    logger.info(f"   Token loaded: {'YES' if api.access_token else 'NO'}")
-
-                    # Send via direct HTTP request to Kick API
-                    import aiohttp
-
-                    headers = {
-                        "Authorization": f"Bearer {api.access_token}",
-                        "Accept": "application/json",
-                        "Content-Type": "application/json",
-                        "User-Agent": "LeleBot/1.0",
-                    }
-
-                    # Use bot mode - broadcaster_user_id not needed, message sent to channel attached to token
-                    payload = {"content": message, "type": "bot"}  # bot mode instead of 'message'
-
-                    url = "https://api.kick.com/public/v1/chat"
-
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(url, headers=headers, json=payload, timeout=10) as resp:
-                            response_text = await resp.text()
-                            logger.info(f"📡 Kick API Response: HTTP {resp.status}")
-                            logger.info(f"📡 Response body: {response_text[:500]}")
-
-                            if resp.status in [200, 201]:
-                                logger.info(f"✅ Message sent successfully!")
-                            elif resp.status == 401:
-                                raise Exception(f"HTTP 401 Unauthorized - token may have expired")
-                            else:
-                                raise Exception(f"HTTP {resp.status}: {response_text}")
-
-                except asyncio.CancelledError:
-                    logger.info(f"🛑 Message sender cancelled")
-                    break
-                except Exception as send_error:
-                    error_str = str(send_error)
-                    logger.info(f"⚠️ Send failed: {error_str}")
-
-                    # If sending fails with 401, try refreshing token
-                    if "401" in error_str or "Unauthorized" in error_str:
-                        logger.info(f"🔄 Token expired, attempting refresh...")
-                        refreshed = await self._refresh_oauth_token(guild_id, guild_name)
-                        if refreshed:
-                            api.access_token = refreshed
-                            logger.info(f"🔄 Retrying with refreshed token...")
-
-                            # Retry with refreshed token
-                            import aiohttp
-
-                            headers = {
-                                "Authorization": f"Bearer {api.access_token}",
-                                "Accept": "application/json",
-                                "Content-Type": "application/json",
-                                "User-Agent": "LeleBot/1.0",
-                            }
-                            payload = {"content": message, "type": "bot"}
-                            url = "https://api.kick.com/public/v1/chat"
-
-                            async with aiohttp.ClientSession() as session:
-                                async with session.post(url, headers=headers, json=payload, timeout=10) as resp:
-                                    response_text = await resp.text()
-                                    logger.info(f"📡 Retry response: HTTP {resp.status} - {response_text[:200]}")
-                                    if resp.status not in [200, 201]:
-                                        # Try streamer OAuth as final fallback
-                                        logger.info(f"⚠️ Trying streamer OAuth as fallback...")
-                                        from utils.kick_oauth import get_kick_token_for_server
-
-                                        token_data = get_kick_token_for_server(engine, guild_id)
-                                        if token_data and token_data.get("access_token"):
-                                            api.access_token = token_data["access_token"]
-                                            headers["Authorization"] = f"Bearer {api.access_token}"
-                                            async with session.post(
-                                                url, headers=headers, json=payload, timeout=10
-                                            ) as fallback_resp:
-                                                fallback_text = await fallback_resp.text()
-                                                logger.info(
-                                                    f"📡 Streamer OAuth: HTTP {fallback_resp.status} - {fallback_text[:200]}"
-                                                )
-                        else:
-                            logger.info(f"❌ Token refresh failed")
-                    else:
-                        import traceback
-
-                        traceback.print_exc()
-
-        except asyncio.CancelledError:
-            logger.info(f"🛑 Message sender task cancelled")
-        except Exception as e:
-            logger.info(f"❌ FATAL: Message sender crashed: {e}")
-            import traceback
-
-            traceback.print_exc()
-
-    async def send_message(self, message: str, guild_id: int, guild_name: str) -> bool:
-        """Queue a message to be sent via websocket"""
-        try:
-            # Ensure connection exists
-            if not await self.ensure_connection(guild_id, guild_name):
-                return False
-
-            # Get API instance
-            api = self.connections.get(guild_id)
-            if not api:
-                logger.info(f"⚠️ No API instance found")
-                return False
-
-            # Get chatroom ID - prioritize in-memory value from kickpython
-            chatroom_id = None
-
-            # PRIORITY 1: Get from kickpython's in-memory chatroom_id (most reliable)
-            if hasattr(api, "chatroom_id") and api.chatroom_id:
-                chatroom_id = int(api.chatroom_id)
-                logger.info(f"📋 Using chatroom_id from kickpython: {chatroom_id}")
-
-            # PRIORITY 2: Fall back to database (for reconnections)
-            if not chatroom_id:
-                with engine.connect() as conn:
-                    result = conn.execute(
-                        text(
-                            """
-                        SELECT value FROM bot_settings
-                        WHERE key = 'kick_chatroom_id'
-                        AND discord_server_id = :guild_id
-                        LIMIT 1
-                    """
-                        ),
-                        {"guild_id": guild_id},
-                    ).fetchone()
-
-                    if result and result[0]:
-                        try:
-                            chatroom_id = int(result[0])
-                            logger.info(f"📋 Using chatroom_id from database: {chatroom_id}")
+    async def deliver(self, guild_id: int, message: str) -> bool:
+        """
+        POST one chat line to Kick as the bot. chat_outbox calls this for the
+        guild's Kick lane, already paced and prioritized; token handling and the
+        401 retry live in core/kick_chat_sender.py.
+        """
+        if guild_id not in self.connections:
+            logger.info(f"⚠️ No Kick connection for this server - message dropped")
+            return False
+        guild = bot.get_guild(guild_id)
+        guild_name = guild.name if guild else str(guild_id)
+        set_server(guild_id, guild_name)
+        return await self.chat_sender.deliver(guild_id, guild_name, message)
 
-                            # HOTFIX: 152837 is broadcaster_user_id, not chatroom_id!
-                            if chatroom_id == 152837:
-                                logger.info(f"⚠️ Invalid chatroom_id (152837 is broadcaster_user_id, not chatroom_id)")
-                                chatroom_id = None
-                        except (ValueError, TypeError):
-                            logger.info(f"⚠️ Invalid chatroom_id format")
-                            chatroom_id = None
+    async def _load_chat_token(self, guild_id: int) -> Optional[str]:
+        return await db_executor.run(guild_id, _fetch_kick_chat_token, guild_id, label="kick_token")
 
-            if not chatroom_id:
-                logger.info(f"⚠️ Chatroom ID not configured")
-                return False
+    async def _streamer_chat_token(self, guild_id: int) -> Optional[str]:
+        from utils.kick_oauth import get_kick_token_for_server
 
-            # Add to queue
-            await self.message_queues[guild_id].put((message, chatroom_id))
-            logger.info(f"📤 Queued message for websocket (chatroom: {chatroom_id})")
-            return True
+        token_data = get_kick_token_for_server(engine, guild_id)
+        return token_data.get("access_token") if token_data else None
 
-        except Exception as e:
-            logger.info(f"❌ Failed to queue message: {e}")
+    async def send_message(self, message: str, guild_id: int, guild_name: str, priority: int = PRIORITY_REPLY) -> bool:
+        """Queue a message for this guild's Kick chat (sent by deliver, via chat_outbox)"""
+        if not await self.ensure_connection(guild_id, guild_name):
             return False
+        return chat_outbox.submit(guild_id, "kick", message, priority=priority)
 
     async def _handle_incoming_message(self, guild_id: int, guild_name: str, msg: dict):
         """Handle inbound chat messages from kickpython websocket."""
@@ -975,8 +769,7 @@ class KickWebSocketManager:
                 if chatter_id and chatter_id == str(twitch_bot_id):
                     return
 
-            # Debug: Log every incoming message
-            logger.info(f"💬 Received {platform} message: {username}: {content[:100]}")
+            logger.debug(f"💬 Received {platform} message: {username}: {content[:100]}")
 
             # Update watchtime tracking (per-guild)
             now = datetime.now(timezone.utc)
@@ -1057,509 +850,17 @@ class KickWebSocketManager:
                     except Exception as e:
                         logger.info(f"⚠️ Giveaway tracking error: {e}")
 
-            # Process commands from Kick chat
-            content_stripped = content.strip()
-            logger.info(f"🔍 Processing message: '{content_stripped[:50]}...'")
-
-            # Custom commands (from dashboard) — Tier 2+ feature.
-            if (
-                hasattr(bot, "custom_commands_managers")
-                and guild_id in bot.custom_commands_managers
-                and server_has_feature(engine, guild_id, "commands")
-            ):
-                try:
-                    commands_manager = bot.custom_commands_managers[guild_id]
-                    original_guild_id = getattr(commands_manager, "discord_server_id", None)
-                    try:
-                        commands_manager.discord_server_id = guild_id
-                        commands_manager.send_message_callback = lambda msg: send_kick_message(msg, guild_id=guild_id)
-                        handled = await commands_manager.handle_message(
-                            content,
-                            username,
-                            platform=platform,
-                            display_name=display_username,
-                        )
-                    finally:
-                        commands_manager.discord_server_id = original_guild_id
-                    if handled:
-                        logger.info(f"✅ Custom command handled")
-                        return  # Command was handled, don't process further
-                except Exception as e:
-                    logger.info(f"⚠️ Custom command error: {e}")
-
-            # !points command
-            if content_stripped.lower() == "!points":
-                logger.info(f"💰 Processing !points command from {username}")
-                # Point shop is a Tier 2+ feature.
-                if not server_has_feature(engine, guild_id, "point_shop"):
-                    logger.info(f"🔒 !points blocked: server tier lacks point_shop")
-                    await send_kick_message(upgrade_message(username, "point_shop"), guild_id=guild_id)
-                    return
-                try:
-                    with engine.connect() as conn:
-                        # Points are shared across a person's linked platforms and
-                        # accrue under a single canonical username. Resolve the
-                        # chatter's canonical account (via their discord_id) so a
-                        # request from their non-canonical platform still reads the
-                        # right balance; fall back to their own handle if unlinked.
-                        canonical = username.lower()
-                        did_row = conn.execute(
-                            text(
-                                """
-                            SELECT discord_id FROM links
-                            WHERE LOWER(kick_name) = :u AND discord_server_id = :guild_id
-                              AND discord_id IS NOT NULL
-                            LIMIT 1
-                        """
-                            ),
-                            {"u": username.lower(), "guild_id": guild_id},
-                        ).fetchone()
-                        if did_row:
-                            names = conn.execute(
-                                text(
-                                    """
-                                SELECT LOWER(kick_name) FROM links
-                                WHERE discord_id = :d AND discord_server_id = :guild_id
-                                  AND kick_name IS NOT NULL
-                            """
-                                ),
-                                {"d": did_row[0], "guild_id": guild_id},
-                            ).fetchall()
-                            handles = [r[0] for r in names if r[0]]
-                            if handles:
-                                canonical = min(handles)
-
-                        result = conn.execute(
-                            text(
-                                """
-                            SELECT points FROM user_points
-                            WHERE LOWER(kick_username) = :username AND discord_server_id = :guild_id
-                        """
-                            ),
-                            {"username": canonical, "guild_id": guild_id},
-                        ).fetchone()
-
-                        if result and result[0] is not None:
-                            points_balance = int(result[0])
-                            await send_kick_message(
-                                f"@{display_username}, You currently have {points_balance:,} points.",
-                                guild_id=guild_id,
-                            )
-                        else:
-                            await send_kick_message(
-                                f"@{display_username}, You currently have 0 points. Start watching to earn points!",
-                                guild_id=guild_id,
-                            )
-                except Exception as e:
-                    logger.info(f"❌ Error fetching points for {username}: {e}")
-                    await send_kick_message(
-                        f"@{display_username}, Unable to retrieve points balance at this time.", guild_id=guild_id
-                    )
-
-            # !current / !slot — what slot is the streamer playing right now?
-            # Reads the latest current_slot_history row (written by the browser
-            # extension's dashboard push on every game-page change). Ungated:
-            # the write path is already tier-gated, so servers without the
-            # extension feature simply have no rows.
-            elif content_stripped.lower() in ("!current", "!slot"):
-                logger.info(f"🎰 Processing !current command from {username}")
-                try:
-                    with engine.connect() as conn:
-                        result = conn.execute(
-                            text(
-                                """
-                            SELECT slot_name, provider FROM current_slot_history
-                            WHERE discord_server_id = :guild_id
-                            ORDER BY started_at DESC, id DESC
-                            LIMIT 1
-                        """
-                            ),
-                            {"guild_id": guild_id},
-                        ).fetchone()
-
-                    if result and result[0]:
-                        slot_name, provider = result[0], result[1]
-                        suffix = f" ({provider})" if provider else ""
-                        await send_kick_message(
-                            f"@{display_username} Currently playing: {slot_name}{suffix}",
-                            guild_id=guild_id,
-                        )
-                    else:
-                        await send_kick_message(
-                            f"@{display_username} No slot tracked yet.",
-                            guild_id=guild_id,
-                        )
-                except Exception as e:
-                    logger.info(f"❌ Error fetching current slot: {e}")
-
-            # !call / !sr commands (slot requests)
-            elif content_stripped.startswith(("!call", "!sr")):
-                logger.info(f"🎰 Detected slot command: {content_stripped[:50]}")
-                # Slot requests are a Tier 1 (free) feature — gated for
-                # uniformity / future suspended-server handling.
-                if not server_has_feature(engine, guild_id, "slot_requests"):
-                    logger.info(f"🔒 !sr blocked: server tier lacks slot_requests")
-                    await send_kick_message(upgrade_message(username, "slot_requests"), guild_id=guild_id)
-                    return
-                # Anti-multi-account: require a link on the chatter's own platform when enabled.
-                if not require_link_ok(guild_id, username, platform):
-                    await send_kick_message(
-                        f"@{display_username} Link your {platform.capitalize()} account (!link in Discord) to request slots.",
-                        guild_id=guild_id,
-                    )
-                    return
-                logger.info(f"🔍 Has slot_trackers: {hasattr(bot, 'slot_trackers')}")
-
-                # Use guild-specific tracker (check both naming conventions).
-                # Look up tolerant of int/str key type so a guild_id arriving as a
-                # different type (e.g. from the Twitch redis path) still matches.
-                def _tracker_for(registry):
-                    if not isinstance(registry, dict):
-                        return None
-                    if guild_id in registry:
-                        return registry[guild_id]
-                    return registry.get(int(guild_id), registry.get(str(guild_id)))
-
-                tracker = None
-                _byg = getattr(bot, "slot_call_trackers_by_guild", None)
-                _alt = getattr(bot, "slot_trackers", None)
-                if _tracker_for(_byg) is not None:
-                    tracker = _tracker_for(_byg)
-                    logger.info(f"✅ Found guild-specific tracker (slot_call_trackers_by_guild)")
-                elif _tracker_for(_alt) is not None:
-                    tracker = _tracker_for(_alt)
-                    logger.info(f"✅ Found guild-specific tracker (slot_trackers)")
-                elif hasattr(bot, "slot_call_tracker"):
-                    tracker = bot.slot_call_tracker
-                    logger.info(f"⚠️ Using fallback global tracker")
-
-                if tracker:
-                    logger.info(f"🔍 Slot tracker enabled: {tracker.enabled}")
-                    logger.info(f"🔍 Slot tracker guild_id: {getattr(tracker, 'discord_server_id', 'NOT SET')}")
-                    # Check if slot requests are enabled first
-                    if not tracker.enabled:
-                        logger.info(f"❌ Slot requests disabled, sending rejection message")
-                        await send_kick_message(
-                            f"@{display_username} Slot requests are not open at the moment.", guild_id=guild_id
-                        )
-                    else:
-                        logger.info(f"✅ Slot requests enabled, processing command")
-                        slot_call = (
-                            content_stripped[5:].strip()[:200]
-                            if content_stripped.startswith("!call")
-                            else content_stripped[3:].strip()[:200]
-                        )
-                        if slot_call:
-                            # Fetch avatar from Kick API (same method as giveaway entries - proven to work!)
-                            avatar_url = None
-                            try:
-                                from core.kick_api import get_channel_info
-
-                                channel_data = await get_channel_info(username)
-                                if channel_data and "user" in channel_data:
-                                    avatar_url = channel_data["user"].get("profile_pic")
-                                    if avatar_url:
-                                        logger.info(f"✅ Fetched avatar from Kick API for {username}: {avatar_url}")
-                                    else:
-                                        logger.warning(f"⚠️ No profile_pic in Kick API response for {username}")
-                                else:
-                                    logger.warning(f"⚠️ No user data in Kick API response for {username}")
-                            except Exception as e:
-                                logger.error(f"❌ Failed to fetch avatar for {username}: {e}")
-
-                            original_guild_id = getattr(tracker, "discord_server_id", None)
-                            tracker.discord_server_id = guild_id
-                            try:
-                                await tracker.handle_slot_call(
-                                    username,
-                                    slot_call,
-                                    avatar_url=avatar_url,
-                                    platform=platform,
-                                    display_username=display_username,
-                                )
-                                logger.info(f"✅ Slot call processed: {username} - {slot_call}")
-                            finally:
-                                if original_guild_id:
-                                    tracker.discord_server_id = original_guild_id
-                        else:
-                            await send_kick_message(f"@{display_username} Please specify a slot!", guild_id=guild_id)
-                else:
-                    logger.info(f"❌ No slot tracker found for this guild")
-
-            # !gtb command
-            elif content_stripped.lower().startswith("!gtb"):
-                logger.info(f"🎲 Processing !gtb command from {username}")
-                # Guess the Balance is a Tier 1 (free) feature — gated for
-                # uniformity / future suspended-server handling.
-                if not server_has_feature(engine, guild_id, "gtb"):
-                    logger.info(f"🔒 !gtb blocked: server tier lacks gtb")
-                    await send_kick_message(upgrade_message(username, "gtb"), guild_id=guild_id)
-                    return
-                # Anti-multi-account: require a link on the chatter's own platform when enabled.
-                if not require_link_ok(guild_id, username, platform):
-                    await send_kick_message(
-                        f"@{display_username} Link your {platform.capitalize()} account (!link in Discord) to guess.",
-                        guild_id=guild_id,
-                    )
-                    return
-                parts = content_stripped.split(maxsplit=1)
-                if len(parts) == 2:
-                    amount = parse_amount(parts[1])
-                    if amount is not None:
-                        # Use per-guild GTB manager
-                        gtb_mgr = (
-                            bot.gtb_managers_by_guild.get(guild_id) if hasattr(bot, "gtb_managers_by_guild") else None
-                        )
-                        if gtb_mgr:
-                            success, message = gtb_mgr.add_guess(username, amount, display_name=display_username)
-                            response = f"@{display_username} {message}" + (" Good luck! 🎰" if success else "")
-                            await send_kick_message(response, guild_id=guild_id)
-                            logger.info(f"✅ GTB guess processed: {username} - ${amount}")
-                        else:
-                            await send_kick_message(
-                                f"@{display_username} GTB system not initialized", guild_id=guild_id
-                            )
-                            logger.info(f"❌ GTB system not initialized")
-                    else:
-                        await send_kick_message(
-                            f"@{display_username} Invalid amount. Use: !gtb <amount>", guild_id=guild_id
-                        )
-                else:
-                    await send_kick_message(
-                        f"@{display_username} Usage: !gtb <amount> (e.g., !gtb 1234.56)", guild_id=guild_id
-                    )
-
-            # !clip command
-            elif content_stripped.lower().startswith("!clip"):
-                clip_title = content_stripped[5:].strip()  # Remove "!clip" and trim
-                if not clip_title:
-                    # No title provided - generate default
-                    timestamp = datetime.now().strftime("%b %d, %Y %H:%M")
-                    clip_title = f"Clip by {username} - {timestamp}"
-
-                logger.info(f"🎬 {username} requested clip: {clip_title}")
-
-                # Create clip via Dashboard API (background task)
-                async def create_clip_background(user: str, title: str):
-                    try:
-                        # Get kick channel
-                        kick_channel = self.connected_channels.get(guild_id)
-                        if not kick_channel:
-                            logger.info(f"[Clip] ❌ No channel configured")
-                            return
-
-                        # Check if stream is live FIRST (async function returning bool)
-                        try:
-                            is_live = await check_stream_live(kick_channel)
-                            if not is_live:
-                                logger.info(f"[Clip] ❌ Stream is offline")
-                                await send_kick_message(
-                                    f"@{user} Stream is not live! Can't create clip when offline.", guild_id=guild_id
-                                )
-                                return
-                        except Exception as live_check_err:
-                            logger.info(f"[Clip] ⚠️ Could not verify stream status: {live_check_err}")
-                            # Continue anyway - dashboard will verify
-
-                        # Get settings from bot_settings
-                        dashboard_url = None
-                        api_key = None
-                        clip_duration = 30
-
-                        with engine.connect() as conn:
-                            settings_result = conn.execute(
-                                text(
-                                    """
-                                SELECT key, value FROM bot_settings
-                                WHERE discord_server_id = :guild_id
-                                AND key IN ('dashboard_url', 'bot_api_key', 'clip_duration')
-                            """
-                                ),
-                                {"guild_id": guild_id},
-                            ).fetchall()
-
-                            for key, value in settings_result:
-                                if key == "dashboard_url":
-                                    dashboard_url = value
-                                elif key == "bot_api_key":
-                                    api_key = value
-                                elif key == "clip_duration":
-                                    clip_duration = int(value) if value else 30
-
-                        # Prefer the derived per-server base (servers.subdomain +
-                        # public domain); the stored dashboard_url is only a
-                        # fallback and may be stale (pre-rebrand host).
-                        dashboard_url = get_server_base_url(engine, guild_id) or dashboard_url
-
-                        # Env-controlled system secret takes precedence over the legacy
-                        # per-server bot_settings value.
-                        api_key = get_clip_api_key(api_key)
-
-                        if not dashboard_url or not api_key:
-                            logger.info(f"[Clip] ❌ Dashboard URL or API key not configured")
-                            await send_kick_message(f"@{user} Clip service not configured!", guild_id=guild_id)
-                            return
-
-                        # Call Dashboard API
-                        import aiohttp
-
-                        async with aiohttp.ClientSession() as session:
-                            async with session.post(
-                                f"{dashboard_url}/api/clips/create",
-                                headers={"X-API-Key": api_key, "Content-Type": "application/json"},
-                                json={
-                                    "channel": kick_channel,
-                                    "duration": clip_duration,
-                                    "username": user,
-                                    "title": title,
-                                    "discord_server_id": guild_id,
-                                },
-                                timeout=10,
-                            ) as resp:
-                                if resp.status == 200:
-                                    result = await resp.json()
-                                    logger.info(f"[Clip] ✅ Clip created for {user}")
-                                    clip_url = result.get("clip_url", "")
-                                    await send_kick_message(f"@{user} Clip created! 🎬 {clip_url}", guild_id=guild_id)
-                                else:
-                                    error_data = await resp.json()
-                                    error_msg = error_data.get("message", "Unknown error")
-                                    logger.info(f"[Clip] ❌ Failed: HTTP {resp.status} - {error_msg}")
-
-                                    # Provide helpful error messages
-                                    if "no_buffer" in error_msg or "not_recording" in error_msg:
-                                        await send_kick_message(
-                                            f"@{user} Clip buffer is starting up, try again in 30 seconds!",
-                                            guild_id=guild_id,
-                                        )
-                                    elif "no_segments" in error_msg:
-                                        await send_kick_message(
-                                            f"@{user} Buffer still filling, try again in a few seconds!",
-                                            guild_id=guild_id,
-                                        )
-                                    else:
-                                        await send_kick_message(f"@{user} Clip failed: {error_msg}", guild_id=guild_id)
-                    except Exception as e:
-                        logger.info(f"[Clip] ❌ Error: {e}")
-                        await send_kick_message(f"@{user} Clip error: {str(e)}", guild_id=guild_id)
-
-                asyncio.create_task(create_clip_background(username, clip_title))
-
-            # !fair / !pf — how to verify a provably-fair draw. Links the
-            # server's public /provably-fair page (subdomain host, or the apex
-            # with ?server=<slug> for subdomain-less workspaces).
-            elif content_stripped.lower() in ("!fair", "!pf"):
-                logger.info(f"🎲 Processing !fair command from {username}")
-                try:
-                    fair_url = get_server_public_page_url(engine, guild_id, "/provably-fair")
-                    await send_kick_message(
-                        f"@{username} All draws are provably fair (commit-reveal + SHA-256). "
-                        f"Verify any result yourself: {fair_url}",
-                        guild_id=guild_id,
-                    )
-                except Exception as e:
-                    logger.error(f"Error processing !fair command: {e}")
-
-            # !tickets command
-            elif content_stripped.lower() == "!tickets":
-                logger.info(f"🎟️ Processing !tickets command from {username}")
-                try:
-                    with engine.connect() as conn:
-                        # Check if user is linked
-                        link_result = conn.execute(
-                            text(
-                                """
-                            SELECT discord_id FROM links
-                            WHERE LOWER(kick_name) = :username AND discord_server_id = :guild_id
-                        """
-                            ),
-                            {"username": username.lower(), "guild_id": guild_id},
-                        ).fetchone()
-
-                        if not link_result:
-                            await send_kick_message(
-                                f"@{username}, You need to link your account first! Use !link in Discord.",
-                                guild_id=guild_id,
-                            )
-                        else:
-                            discord_id = link_result[0]
-
-                            # Get current raffle period
-                            period_result = conn.execute(
-                                text(
-                                    """
-                                SELECT id FROM raffle_periods
-                                WHERE status = 'active' AND discord_server_id = :guild_id
-                                LIMIT 1
-                            """
-                                ),
-                                {"guild_id": guild_id},
-                            ).fetchone()
-
-                            if not period_result:
-                                await send_kick_message(
-                                    f"@{username}, No active raffle period right now.", guild_id=guild_id
-                                )
-                            else:
-                                period_id = period_result[0]
-
-                                # Get ticket balance
-                                ticket_result = conn.execute(
-                                    text(
-                                        """
-                                    SELECT
-                                        total_tickets,
-                                        watchtime_tickets,
-                                        gifted_sub_tickets,
-                                        shuffle_wager_tickets,
-                                        bonus_tickets
-                                    FROM raffle_tickets
-                                    WHERE period_id = :period_id
-                                    AND discord_id = :discord_id
-                                    AND discord_server_id = :guild_id
-                                """
-                                    ),
-                                    {"period_id": period_id, "discord_id": discord_id, "guild_id": guild_id},
-                                ).fetchone()
-
-                                if not ticket_result or ticket_result[0] == 0:
-                                    await send_kick_message(
-                                        f"@{username}, You currently have 0 raffle tickets. Watch streams, gift subs, or wager to earn tickets!",
-                                        guild_id=guild_id,
-                                    )
-                                else:
-                                    total_tickets = ticket_result[0] or 0
-                                    watchtime = ticket_result[1] or 0
-                                    gifted_subs = ticket_result[2] or 0
-                                    wager = ticket_result[3] or 0
-                                    bonus = ticket_result[4] or 0
-
-                                    # Calculate win probability
-                                    total_pool = conn.execute(
-                                        text(
-                                            """
-                                        SELECT COALESCE(SUM(total_tickets), 0)
-                                        FROM raffle_tickets
-                                        WHERE period_id = :period_id AND discord_server_id = :guild_id
-                                    """
-                                        ),
-                                        {"period_id": period_id, "guild_id": guild_id},
-                                    ).scalar()
-
-                                    win_prob = (total_tickets / total_pool * 100) if total_pool > 0 else 0
-
-                                    await send_kick_message(
-                                        f"@{username}, You have {int(total_tickets):,} tickets "
-                                        f"(Watch: {int(watchtime)} | Subs: {int(gifted_subs)} | Wager: {int(wager)} | Bonus: {int(bonus)}) "
-                                        f"Win chance: {win_prob:.2f}% 🎟️",
-                                        guild_id=guild_id,
-                                    )
-                                    logger.info(f"✅ Sent ticket balance to {username}")
-                except Exception as e:
-                    logger.info(f"❌ Error fetching tickets for {username}: {e}")
-                    await send_kick_message(
-                        f"@{username}, Unable to retrieve ticket balance at this time.", guild_id=guild_id
-                    )
+            # Commands (custom + built-in) — see the "Chat commands" section below.
+            await chat_router.dispatch(
+                ChatMessage(
+                    guild_id,
+                    guild_name,
+                    username,
+                    content,
+                    platform=platform,
+                    display_username=display_username,
+                )
+            )
 
         except Exception as e:
             logger.info(f"❌ Error handling incoming message: {e}")
@@ -1569,14 +870,22 @@ class KickWebSocketManager:
 kick_ws_manager = KickWebSocketManager()
 
 
-async def send_kick_message(message: str, guild_id: int = None) -> bool:
+async def send_kick_message(
+    message: str,
+    guild_id: int = None,
+    coalesce_key: Optional[str] = None,
+    fragment: Optional[str] = None,
+) -> bool:
     """
     Send a message to the originating platform's chat (for COMMAND REPLIES).
 
     Despite the name (kept for back-compat with ~30 call sites in the chat
     handler), this routes the reply to whichever platform the message being
     handled arrived on, via the _reply_platform contextvar. Twitch → Helix send;
-    Kick → kickpython queue (the original behavior, and the default).
+    Kick → kickpython connection (the original behavior, and the default).
+    Both go through chat_outbox at reply priority; replies passing the same
+    `coalesce_key` (e.g. "!points") within a short window are merged into one
+    line, each contributing its short `fragment`.
 
     NOTE: announcements (slot picks, GTB, winners, timed messages) must NOT use
     this — they run outside the chat handler where the contextvar may carry a
@@ -1587,56 +896,38 @@ async def send_kick_message(message: str, guild_id: int = None) -> bool:
     """
     # Reply on the platform the current message came from.
     if _reply_platform.get() == "twitch":
-        return await send_twitch_message(message, guild_id=guild_id)
-    return await _send_kick_message_raw(message, guild_id=guild_id)
-
+        return await send_twitch_message(message, guild_id=guild_id, coalesce_key=coalesce_key, fragment=fragment)
+    return await _send_kick_message_raw(message, guild_id=guild_id, coalesce_key=coalesce_key, fragment=fragment)
 
-async def _send_kick_message_raw(message: str, guild_id: int = None) -> bool:
-    """Send a message to KICK chat unconditionally (no platform contextvar).
-    The actual kickpython-queue delivery used by both command replies (via
-    send_kick_message) and announcements (via send_stream_message)."""
-    # Get guild name for logging
-    guild_name = "Unknown"
-    if guild_id:
-        guild = bot.get_guild(guild_id)
-        guild_name = guild.name if guild else str(guild_id)
-
-    try:
-        # Check if kickpython connection exists for this guild, auto-connect if not
-        if guild_id not in kick_ws_manager.message_queues:
-            logger.info(f"🔌 No kickpython connection - attempting auto-connect...")
-            logger.info(f"🔍 guild_id={guild_id}")
-            success = await kick_ws_manager.ensure_connection(guild_id, guild_name)
-            if not success:
-                logger.info(f"❌ Failed to auto-connect kickpython")
-                return False
-            logger.info(f"✅ Auto-connected kickpython successfully")
-
-        # Get broadcaster_user_id (channel_id for kickpython)
-        with engine.connect() as conn:
-            result = conn.execute(
-                text(
-                    """
-                SELECT value FROM bot_settings
-                WHERE key = 'kick_broadcaster_user_id'
-                AND discord_server_id = :guild_id
-                LIMIT 1
-            """
-                ),
-                {"guild_id": guild_id},
-            ).fetchone()
 
-            if not result or not result[0]:
-                logger.info(f"⚠️ broadcaster_user_id not configured - use Sync button in dashboard")
+async def _send_kick_message_raw(
+    message: str,
+    guild_id: int = None,
+    priority: int = PRIORITY_REPLY,
+    coalesce_key: Optional[str] = None,
+    fragment: Optional[str] = None,
+) -> bool:
+    """Queue a message for KICK chat unconditionally (no platform contextvar).
+    The chat_outbox entry point used by both command replies (via
+    send_kick_message) and announcements (via send_stream_message); the
+    guild's Kick lane delivers it through KickWebSocketManager.deliver."""
+    try:
+        # Check if kickpython connection exists for this guild, auto-connect if not
+        if guild_id not in kick_ws_manager.connections:
+            guild = bot.get_guild(guild_id) if guild_id else None
+            guild_name = guild.name if guild else str(guild_id)
+            logger.info(f"🔌 No kickpython connection - attempting auto-connect...")
+            logger.info(f"🔍 guild_id={guild_id}")
+            success = await kick_ws_manager.ensure_connection(guild_id, guild_name)
+            if not success:
+                logger.info(f"❌ Failed to auto-connect kickpython")
                 return False
+            logger.info(f"✅ Auto-connected kickpython successfully")
 
-            channel_id = int(result[0])
-
-        # Queue message for kickpython to send
-        logger.info(f"📨 Queueing message via kickpython: {message[:50]}...")
-        await kick_ws_manager.message_queues[guild_id].put((message, channel_id))
-        logger.info(f"✅ Message queued")
-        return True
+        logger.debug(f"📨 Queueing Kick message: {message[:50]}...")
+        return chat_outbox.submit(
+            guild_id, "kick", message, priority=priority, coalesce_key=coalesce_key, fragment=fragment
+        )
 
     except Exception as e:
         logger.info(f"❌ Failed to queue message: {e}")
@@ -1646,9 +937,26 @@ async def _send_kick_message_raw(message: str, guild_id: int = None) -> bool:
         return False
 
 
-async def send_twitch_message(message: str, guild_id: int = None) -> bool:
+async def send_twitch_message(
+    message: str,
+    guild_id: int = None,
+    priority: int = PRIORITY_REPLY,
+    coalesce_key: Optional[str] = None,
+    fragment: Optional[str] = None,
+) -> bool:
+    """
+    Queue a message for Twitch chat. The guild's Twitch lane in chat_outbox
+    delivers it with _deliver_twitch_message. Returns True if queued.
+    """
+    return chat_outbox.submit(
+        guild_id, "twitch", message, priority=priority, coalesce_key=coalesce_key, fragment=fragment
+    )
+
+
+async def _deliver_twitch_message(guild_id: int, message: str) -> bool:
     """
-    Send a message to Twitch chat via the Helix Send Chat Message API.
+    Send a message to Twitch chat via the Helix Send Chat Message API
+    (chat_outbox's Twitch sender; callers use send_twitch_message).
 
     IMPORTANT — chatbot badge: to receive the Twitch "chatbot" badge, the send MUST
     use an APP ACCESS TOKEN (not the bot's user token), per
@@ -1661,85 +969,94 @@ async def send_twitch_message(message: str, guild_id: int = None) -> bool:
     user:bot) — that authorization is a prerequisite; the SEND itself is app-token.
 
     Resolves the broadcaster id from bot_settings(twitch_broadcaster_user_id) and
-    the bot sender id from TWITCH_BOT_USER_ID. Returns True on success.
+    the bot sender id from TWITCH_BOT_USER_ID. Sends through the process-wide app
+    client (cached app token, keep-alive session), so a warm send is one Helix POST.
+    Returns True on success.
     """
     try:
         import os as _os
 
-        from sqlalchemy import text as _text
-
         bot_user_id = _os.getenv("TWITCH_BOT_USER_ID")
         if not bot_user_id:
             logger.info("[Twitch Send] TWITCH_BOT_USER_ID not set")
             return False
 
-        bot_uid = int(bot_user_id) if str(bot_user_id).isdigit() else 0
-        with engine.connect() as conn:
-            row = conn.execute(
-                _text(
-                    "SELECT value FROM bot_settings WHERE key = 'twitch_broadcaster_user_id' AND discord_server_id = :g"
-                ),
-                {"g": guild_id},
-            ).fetchone()
-            broadcaster_id = row[0] if row else None
-            # The bot account must have authorized once (prerequisite for the badge
-            # + chat grants). We don't SEND with this token, but its presence tells
-            # us the bot is set up. Global row → discord_server_id = 0.
-            authorized = conn.execute(
-                _text("SELECT 1 FROM twitch_oauth_tokens WHERE user_id = :u AND discord_server_id = 0 LIMIT 1"),
-                {"u": bot_uid},
-            ).fetchone()
-
+        broadcaster_id = settings_store.get(guild_id, "twitch_broadcaster_user_id")
         if not broadcaster_id:
             logger.info("[Twitch Send] No twitch_broadcaster_user_id for this server — cannot send")
             return False
-        if not authorized:
+        if not await _twitch_bot_authorized(bot_user_id):
             logger.info("[Twitch Send] Bot account not authorized (no token row) — authorize it in SuperAdmin")
             return False
 
-        from core.twitch_api import TwitchAPI
+        from core.twitch_api import get_app_client
 
         # Send with an APP ACCESS TOKEN so the message earns the chatbot badge.
-        api = TwitchAPI()
-        try:
-            tokens = await api.get_app_token()
-            api.access_token = tokens.access_token
-            logger.info(
-                f"[Twitch Send] POST broadcaster_id={broadcaster_id} sender_id={bot_user_id} msg={message[:40]!r}"
-            )
-            result = await api.send_chat_message(broadcaster_id, bot_user_id, message)
-            logger.info(f"[Twitch Send] Helix result: {result}")
-            if result.get("is_sent"):
-                return True
-            logger.info(f"[Twitch Send] Not sent: drop_reason={result.get('drop_reason')}")
-            return False
-        finally:
-            await api.close()
+        api = get_app_client()
+        logger.debug(f"[Twitch Send] POST broadcaster_id={broadcaster_id} sender_id={bot_user_id} msg={message[:40]!r}")
+        result = await api.send_chat_message(broadcaster_id, bot_user_id, message)
+        logger.debug(f"[Twitch Send] Helix result: {result}")
+        if result.get("is_sent"):
+            return True
+        logger.info(f"[Twitch Send] Not sent: drop_reason={result.get('drop_reason')}")
+        return False
     except Exception as e:
+        # e.g. 403 after the bot's grant was revoked: re-check the token row next time.
+        _twitch_bot_authorized_until.pop(str(bot_user_id), None)
         logger.info(f"[Twitch Send] Failed: {e}")
         return False
 
 
-async def send_stream_message(message: str, guild_id: int = None) -> bool:
+# bot user id -> monotonic deadline until which its token row is assumed present.
+# The row is written by the OAuth web flow (another process), so it is re-checked
+# every TWITCH_BOT_AUTH_CACHE_SECONDS rather than on every chat line.
+_twitch_bot_authorized_until: dict = {}
+
+
+async def _twitch_bot_authorized(bot_user_id: str) -> bool:
+    """True if the bot account's global twitch_oauth_tokens row exists (cached)."""
+    key = str(bot_user_id)
+    if _twitch_bot_authorized_until.get(key, 0) > time.monotonic():
+        return True
+    bot_uid = int(key) if key.isdigit() else 0
+
+    def _lookup():
+        with engine.connect() as conn:
+            # The bot account must have authorized once (prerequisite for the badge
+            # + chat grants). We don't SEND with this token, but its presence tells
+            # us the bot is set up. Global row → discord_server_id = 0.
+            return conn.execute(
+                text("SELECT 1 FROM twitch_oauth_tokens WHERE user_id = :u AND discord_server_id = 0 LIMIT 1"),
+                {"u": bot_uid},
+            ).fetchone()
+
+    if not await db_executor.run(None, _lookup, label="twitch_bot_authorized"):
+        return False
+    _twitch_bot_authorized_until[key] = time.monotonic() + TWITCH_BOT_AUTH_CACHE_SECONDS
+    return True
+
+
+async def send_stream_message(message: str, guild_id: int = None, priority: int = PRIORITY_ANNOUNCEMENT) -> bool:
     """
     Send a chat message to whichever stream platform(s) the server runs (per the
-    `stream_platforms` setting). Sends to each active platform; returns True if any
-    send succeeded. Use this for cross-platform announcements (raffle winners, etc.)
-    instead of send_kick_message directly.
+    `stream_platforms` setting). Queues on each active platform's chat_outbox lane
+    (announcement priority unless told otherwise); returns True if any accepted it.
+    Use this for cross-platform announcements (raffle winners, etc.) instead of
+    send_kick_message directly.
     """
     from utils.bot_settings import BotSettingsManager
 
     platforms_raw = BotSettingsManager(engine, guild_id).get("stream_platforms", "kick") or "kick"
     active = [p.strip().lower() for p in str(platforms_raw).split(",") if p.strip()] or ["kick"]
-    logger.info(f"[StreamSend] guild={guild_id} active_platforms={active} msg={message[:40]!r}")
+    logger.debug(f"[StreamSend] guild={guild_id} active_platforms={active} msg={message[:40]!r}")
     kick_ok = twitch_ok = None
     if "kick" in active:
         # Raw Kick sender (NOT send_kick_message) so announcements never get
         # mis-routed by a stale _reply_platform contextvar.
-        kick_ok = await _send_kick_message_raw(message, guild_id=guild_id)
+        kick_ok = await _send_kick_message_raw(message, guild_id=guild_id, priority=priority)
     if "twitch" in active:
-        twitch_ok = await send_twitch_message(message, guild_id=guild_id)
-    logger.info(f"[StreamSend] result kick={kick_ok} twitch={twitch_ok}")
+        twitch_ok = await send_twitch_message(message, guild_id=guild_id, priority=priority)
+    logger.debug(f"[StreamSend] result kick={kick_ok} twitch={twitch_ok}")
     return bool(kick_ok) or bool(twitch_ok)
 
 
@@ -1770,6 +1087,556 @@ def require_link_ok(guild_id: int, username: str, platform: str) -> bool:
         return True
 
 
+# Blocking lookups behind chat commands. The chat handler runs these through
+# db_executor so a slow query never stalls the event loop.
+
+
+async def _has_feature(guild_id: int, feature_key: str) -> bool:
+    """server_has_feature off the event loop (the tier lookup hits the DB on a cache miss)."""
+    return await db_executor.run(guild_id, server_has_feature, engine, guild_id, feature_key, label="tier_check")
+
+
+def _fetch_bot_setting(guild_id: int, key: str) -> Optional[str]:
+    """Raw bot_settings value for one key, or None (DB only on a settings-store miss)."""
+    return settings_store.get(guild_id, key)
+
+
+def _fetch_kick_chat_token(guild_id: int) -> Optional[str]:
+    """The OAuth token Kick chat lines are sent with, or None if the server has none."""
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(
+                """
+            SELECT kot.access_token
+            FROM bot_settings bs
+            JOIN kick_oauth_tokens kot
+              ON LOWER(kot.kick_username) = LOWER(bs.value)
+            WHERE bs.key = 'kick_channel'
+              AND bs.discord_server_id = :guild_id
+            ORDER BY kot.updated_at DESC
+            LIMIT 1
+        """
+            ),
+            {"guild_id": guild_id},
+        ).fetchone()
+
+        if not result or not result[0]:
+            # Legacy fallback if guild has not been mapped into kick_oauth_tokens yet
+            result = conn.execute(
+                text(
+                    """
+                SELECT value FROM bot_settings
+                WHERE key = 'kick_oauth_token'
+                  AND discord_server_id = :guild_id
+                LIMIT 1
+            """
+                ),
+                {"guild_id": guild_id},
+            ).fetchone()
+    return result[0] if result and result[0] else None
+
+
+def _fetch_points_balance(guild_id: int, username: str) -> Optional[int]:
+    """Points balance for a chatter, or None if they have no row."""
+    # Points are shared across a person's linked platforms and
+    # accrue under a single canonical username. Resolve the
+    # chatter's canonical account (via their discord_id) so a
+    # request from their non-canonical platform still reads the
+    # right balance; fall back to their own handle if unlinked.
+    canonical = identity_index.accrual_username(guild_id, username)
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(
+                """
+            SELECT points FROM user_points
+            WHERE LOWER(kick_username) = :username AND discord_server_id = :guild_id
+        """
+            ),
+            {"username": canonical, "guild_id": guild_id},
+        ).fetchone()
+    if result and result[0] is not None:
+        return int(result[0])
+    return None
+
+
+def _fetch_current_slot(guild_id: int):
+    """Latest (slot_name, provider) from current_slot_history, or None."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                """
+            SELECT slot_name, provider FROM current_slot_history
+            WHERE discord_server_id = :guild_id
+            ORDER BY started_at DESC, id DESC
+            LIMIT 1
+        """
+            ),
+            {"guild_id": guild_id},
+        ).fetchone()
+
+
+def _fetch_clip_settings(guild_id: int) -> list:
+    """(key, value) rows for the clip command's bot_settings."""
+    values = settings_store.guild_values(guild_id)
+    return [(key, values[key]) for key in ("dashboard_url", "bot_api_key", "clip_duration") if key in values]
+
+
+def _fetch_ticket_summary(guild_id: int, username: str):
+    """
+    Raffle ticket breakdown for !tickets.
+
+    Returns:
+        None if the chatter isn't linked, "no_period" if no raffle is active,
+        otherwise {"tickets": row or None, "pool": total tickets in the period}
+    """
+    with engine.connect() as conn:
+        # Check if user is linked
+        link_result = conn.execute(
+            text(
+                """
+            SELECT discord_id FROM links
+            WHERE LOWER(kick_name) = :username AND discord_server_id = :guild_id
+        """
+            ),
+            {"username": username.lower(), "guild_id": guild_id},
+        ).fetchone()
+        if not link_result:
+            return None
+        discord_id = link_result[0]
+
+        # Get current raffle period
+        period_result = conn.execute(
+            text(
+                """
+            SELECT id FROM raffle_periods
+            WHERE status = 'active' AND discord_server_id = :guild_id
+            LIMIT 1
+        """
+            ),
+            {"guild_id": guild_id},
+        ).fetchone()
+        if not period_result:
+            return "no_period"
+        period_id = period_result[0]
+
+        # Get ticket balance
+        ticket_result = conn.execute(
+            text(
+                """
+            SELECT
+                total_tickets,
+                watchtime_tickets,
+                gifted_sub_tickets,
+                shuffle_wager_tickets,
+                bonus_tickets
+            FROM raffle_tickets
+            WHERE period_id = :period_id
+            AND discord_id = :discord_id
+            AND discord_server_id = :guild_id
+        """
+            ),
+            {"period_id": period_id, "discord_id": discord_id, "guild_id": guild_id},
+        ).fetchone()
+        if not ticket_result or ticket_result[0] == 0:
+            return {"tickets": ticket_result, "pool": 0}
+
+        # Total pool for the win probability
+        total_pool = conn.execute(
+            text(
+                """
+            SELECT COALESCE(SUM(total_tickets), 0)
+            FROM raffle_tickets
+            WHERE period_id = :period_id AND discord_server_id = :guild_id
+        """
+            ),
+            {"period_id": period_id, "guild_id": guild_id},
+        ).scalar()
+        return {"tickets": ticket_result, "pool": total_pool}
+
+
+# -------------------------
+# Chat commands (Kick + Twitch)
+# -------------------------
+# Routed by core/chat_commands.py from KickWebSocketManager._handle_incoming_message.
+# Each handler gets a ChatMessage; tier gates are declared on the decorator and
+# checked by the router (against the subscription tier cache) before the handler runs.
+
+
+async def _reply_upgrade_required(msg: ChatMessage, feature: str):
+    await send_kick_message(upgrade_message(msg.username, feature), guild_id=msg.guild_id)
+
+
+chat_router = ChatCommandRouter(
+    feature_check=_has_feature, on_locked=_reply_upgrade_required, cached_check=cached_server_has_feature
+)
+
+
+async def _custom_chat_command(msg: ChatMessage) -> bool:
+    """Dashboard-defined custom commands (Tier 2+); they take precedence over the built-ins."""
+    guild_id = msg.guild_id
+    commands_manager = getattr(bot, "custom_commands_managers", {}).get(guild_id)
+    if commands_manager is None:
+        return False
+    original_guild_id = getattr(commands_manager, "discord_server_id", None)
+    try:
+        commands_manager.discord_server_id = guild_id
+        commands_manager.send_message_callback = lambda text: send_kick_message(text, guild_id=guild_id)
+        handled = await commands_manager.handle_message(
+            msg.content,
+            msg.username,
+            platform=msg.platform,
+            display_name=msg.display_username,
+        )
+    finally:
+        commands_manager.discord_server_id = original_guild_id
+    if handled:
+        logger.info(f"✅ Custom command handled")
+    return handled
+
+
+chat_router.set_custom_handler(_custom_chat_command, feature="commands")
+
+
+@chat_router.command("!points", feature="point_shop", exact=True)
+async def _chat_points(msg: ChatMessage):
+    guild_id, username, display_username = msg.guild_id, msg.username, msg.display_username
+    logger.info(f"💰 Processing !points command from {username}")
+    try:
+        points_balance = await db_executor.run(guild_id, _fetch_points_balance, guild_id, username, label="!points")
+        if points_balance is not None:
+            await send_kick_message(
+                f"@{display_username}, You currently have {points_balance:,} points.",
+                guild_id=guild_id,
+                coalesce_key="!points",
+                fragment=f"@{display_username} {points_balance:,} pts",
+            )
+        else:
+            await send_kick_message(
+                f"@{display_username}, You currently have 0 points. Start watching to earn points!",
+                guild_id=guild_id,
+                coalesce_key="!points",
+                fragment=f"@{display_username} 0 pts",
+            )
+    except Exception as e:
+        logger.info(f"❌ Error fetching points for {username}: {e}")
+        await send_kick_message(
+            f"@{display_username}, Unable to retrieve points balance at this time.", guild_id=guild_id
+        )
+
+
+@chat_router.command("!current", "!slot", exact=True)
+async def _chat_current_slot(msg: ChatMessage):
+    """
+    What slot is the streamer playing right now? Reads the latest
+    current_slot_history row (written by the browser extension's dashboard push
+    on every game-page change). Ungated: the write path is already tier-gated,
+    so servers without the extension feature simply have no rows.
+    """
+    guild_id, display_username = msg.guild_id, msg.display_username
+    logger.info(f"🎰 Processing !current command from {msg.username}")
+    try:
+        result = await db_executor.run(guild_id, _fetch_current_slot, guild_id, label="!current")
+
+        if result and result[0]:
+            slot_name, provider = result[0], result[1]
+            suffix = f" ({provider})" if provider else ""
+            await send_kick_message(
+                f"@{display_username} Currently playing: {slot_name}{suffix}",
+                guild_id=guild_id,
+            )
+        else:
+            await send_kick_message(
+                f"@{display_username} No slot tracked yet.",
+                guild_id=guild_id,
+            )
+    except Exception as e:
+        logger.info(f"❌ Error fetching current slot: {e}")
+
+
+def _slot_tracker_for_guild(guild_id: int):
+    """Guild-specific slot call tracker (either registry), else the legacy global one."""
+
+    # Look up tolerant of int/str key type so a guild_id arriving as a
+    # different type (e.g. from the Twitch redis path) still matches.
+    def _tracker_for(registry):
+        if not isinstance(registry, dict):
+            return None
+        if guild_id in registry:
+            return registry[guild_id]
+        return registry.get(int(guild_id), registry.get(str(guild_id)))
+
+    _byg = getattr(bot, "slot_call_trackers_by_guild", None)
+    _alt = getattr(bot, "slot_trackers", None)
+    if _tracker_for(_byg) is not None:
+        logger.info(f"✅ Found guild-specific tracker (slot_call_trackers_by_guild)")
+        return _tracker_for(_byg)
+    if _tracker_for(_alt) is not None:
+        logger.info(f"✅ Found guild-specific tracker (slot_trackers)")
+        return _tracker_for(_alt)
+    if hasattr(bot, "slot_call_tracker"):
+        logger.info(f"⚠️ Using fallback global tracker")
+        return bot.slot_call_tracker
+    return None
+
+
+# Slot requests are a Tier 1 (free) feature — gated for uniformity / future
+# suspended-server handling.
+@chat_router.command("!call", "!sr", feature="slot_requests", prefix=True)
+async def _chat_slot_request(msg: ChatMessage):
+    guild_id, username, display_username, platform = msg.guild_id, msg.username, msg.display_username, msg.platform
+    content_stripped = msg.content
+    logger.info(f"🎰 Detected slot command: {content_stripped[:50]}")
+    # Anti-multi-account: require a link on the chatter's own platform when enabled.
+    if not await db_executor.run(guild_id, require_link_ok, guild_id, username, platform):
+        await send_kick_message(
+            f"@{display_username} Link your {platform.capitalize()} account (!link in Discord) to request slots.",
+            guild_id=guild_id,
+        )
+        return
+
+    tracker = _slot_tracker_for_guild(guild_id)
+    if not tracker:
+        logger.info(f"❌ No slot tracker found for this guild")
+        return
+
+    logger.info(f"🔍 Slot tracker enabled: {tracker.enabled}")
+    # Check if slot requests are enabled first
+    if not tracker.enabled:
+        logger.info(f"❌ Slot requests disabled, sending rejection message")
+        await send_kick_message(f"@{display_username} Slot requests are not open at the moment.", guild_id=guild_id)
+        return
+
+    slot_call = content_stripped[len(msg.command) :].strip()[:200]
+    if not slot_call:
+        await send_kick_message(f"@{display_username} Please specify a slot!", guild_id=guild_id)
+        return
+
+    # Fetch avatar from the shared Kick channel cache (same source as giveaway entries)
+    avatar_url = None
+    try:
+        avatar_url = await kick_channels.avatar(username)
+        if avatar_url:
+            logger.info(f"✅ Fetched avatar from Kick API for {username}: {avatar_url}")
+        else:
+            logger.warning(f"⚠️ No profile_pic from Kick API for {username}")
+    except Exception as e:
+        logger.error(f"❌ Failed to fetch avatar for {username}: {e}")
+
+    original_guild_id = getattr(tracker, "discord_server_id", None)
+    tracker.discord_server_id = guild_id
+    try:
+        await tracker.handle_slot_call(
+            username,
+            slot_call,
+            avatar_url=avatar_url,
+            platform=platform,
+            display_username=display_username,
+        )
+        logger.info(f"✅ Slot call processed: {username} - {slot_call}")
+    finally:
+        if original_guild_id:
+            tracker.discord_server_id = original_guild_id
+
+
+# Guess the Balance is a Tier 1 (free) feature — gated for uniformity / future
+# suspended-server handling.
+@chat_router.command("!gtb", feature="gtb", prefix=True)
+async def _chat_gtb(msg: ChatMessage):
+    guild_id, username, display_username, platform = msg.guild_id, msg.username, msg.display_username, msg.platform
+    logger.info(f"🎲 Processing !gtb command from {username}")
+    # Anti-multi-account: require a link on the chatter's own platform when enabled.
+    if not await db_executor.run(guild_id, require_link_ok, guild_id, username, platform):
+        await send_kick_message(
+            f"@{display_username} Link your {platform.capitalize()} account (!link in Discord) to guess.",
+            guild_id=guild_id,
+        )
+        return
+    parts = msg.content.split(maxsplit=1)
+    if len(parts) != 2:
+        await send_kick_message(f"@{display_username} Usage: !gtb <amount> (e.g., !gtb 1234.56)", guild_id=guild_id)
+        return
+    amount = parse_amount(parts[1])
+    if amount is None:
+        await send_kick_message(f"@{display_username} Invalid amount. Use: !gtb <amount>", guild_id=guild_id)
+        return
+    # Use per-guild GTB manager
+    gtb_mgr = bot.gtb_managers_by_guild.get(guild_id) if hasattr(bot, "gtb_managers_by_guild") else None
+    if gtb_mgr:
+        success, message = gtb_mgr.add_guess(username, amount, display_name=display_username)
+        response = f"@{display_username} {message}" + (" Good luck! 🎰" if success else "")
+        await send_kick_message(response, guild_id=guild_id)
+        logger.info(f"✅ GTB guess processed: {username} - ${amount}")
+    else:
+        await send_kick_message(f"@{display_username} GTB system not initialized", guild_id=guild_id)
+        logger.info(f"❌ GTB system not initialized")
+
+
+@chat_router.command("!clip", prefix=True)
+async def _chat_clip(msg: ChatMessage):
+    guild_id, username = msg.guild_id, msg.username
+    clip_title = msg.content[5:].strip()  # Remove "!clip" and trim
+    if not clip_title:
+        # No title provided - generate default
+        timestamp = datetime.now().strftime("%b %d, %Y %H:%M")
+        clip_title = f"Clip by {username} - {timestamp}"
+
+    logger.info(f"🎬 {username} requested clip: {clip_title}")
+
+    # Create clip via Dashboard API (background task)
+    async def create_clip_background(user: str, title: str):
+        try:
+            # Get kick channel
+            kick_channel = kick_ws_manager.connected_channels.get(guild_id)
+            if not kick_channel:
+                logger.info(f"[Clip] ❌ No channel configured")
+                return
+
+            # Check if stream is live FIRST (async function returning bool)
+            try:
+                is_live = await check_stream_live(kick_channel)
+                if not is_live:
+                    logger.info(f"[Clip] ❌ Stream is offline")
+                    await send_kick_message(
+                        f"@{user} Stream is not live! Can't create clip when offline.", guild_id=guild_id
+                    )
+                    return
+            except Exception as live_check_err:
+                logger.info(f"[Clip] ⚠️ Could not verify stream status: {live_check_err}")
+                # Continue anyway - dashboard will verify
+
+            # Get settings from bot_settings
+            dashboard_url = None
+            api_key = None
+            clip_duration = 30
+
+            settings_result = await db_executor.run(guild_id, _fetch_clip_settings, guild_id, label="!clip settings")
+            for key, value in settings_result:
+                if key == "dashboard_url":
+                    dashboard_url = value
+                elif key == "bot_api_key":
+                    api_key = value
+                elif key == "clip_duration":
+                    clip_duration = int(value) if value else 30
+
+            # Prefer the derived per-server base (servers.subdomain +
+            # public domain); the stored dashboard_url is only a
+            # fallback and may be stale (pre-rebrand host).
+            dashboard_url = await db_executor.run(guild_id, get_server_base_url, engine, guild_id) or dashboard_url
+
+            # Env-controlled system secret takes precedence over the legacy
+            # per-server bot_settings value.
+            api_key = get_clip_api_key(api_key)
+
+            if not dashboard_url or not api_key:
+                logger.info(f"[Clip] ❌ Dashboard URL or API key not configured")
+                await send_kick_message(f"@{user} Clip service not configured!", guild_id=guild_id)
+                return
+
+            # Call Dashboard API
+            import aiohttp
+
+            async with http_session() as session:
+                async with session.post(
+                    f"{dashboard_url}/api/clips/create",
+                    headers={"X-API-Key": api_key, "Content-Type": "application/json"},
+                    json={
+                        "channel": kick_channel,
+                        "duration": clip_duration,
+                        "username": user,
+                        "title": title,
+                        "discord_server_id": guild_id,
+                    },
+                    timeout=10,
+                ) as resp:
+                    if resp.status == 200:
+                        result = await resp.json()
+                        logger.info(f"[Clip] ✅ Clip created for {user}")
+                        clip_url = result.get("clip_url", "")
+                        await send_kick_message(f"@{user} Clip created! 🎬 {clip_url}", guild_id=guild_id)
+                    else:
+                        error_data = await resp.json()
+                        error_msg = error_data.get("message", "Unknown error")
+                        logger.info(f"[Clip] ❌ Failed: HTTP {resp.status} - {error_msg}")
+
+                        # Provide helpful error messages
+                        if "no_buffer" in error_msg or "not_recording" in error_msg:
+                            await send_kick_message(
+                                f"@{user} Clip buffer is starting up, try again in 30 seconds!",
+                                guild_id=guild_id,
+                            )
+                        elif "no_segments" in error_msg:
+                            await send_kick_message(
+                                f"@{user} Buffer still filling, try again in a few seconds!",
+                                guild_id=guild_id,
+                            )
+                        else:
+                            await send_kick_message(f"@{user} Clip failed: {error_msg}", guild_id=guild_id)
+        except Exception as e:
+            logger.info(f"[Clip] ❌ Error: {e}")
+            await send_kick_message(f"@{user} Clip error: {str(e)}", guild_id=guild_id)
+
+    asyncio.create_task(create_clip_background(username, clip_title))
+
+
+# !fair / !pf — how to verify a provably-fair draw. Links the server's public
+# /provably-fair page (subdomain host, or the apex with ?server=<slug> for
+# subdomain-less workspaces).
+@chat_router.command("!fair", "!pf", exact=True)
+async def _chat_fair(msg: ChatMessage):
+    guild_id, username = msg.guild_id, msg.username
+    logger.info(f"🎲 Processing !fair command from {username}")
+    try:
+        fair_url = get_server_public_page_url(engine, guild_id, "/provably-fair")
+        await send_kick_message(
+            f"@{username} All draws are provably fair (commit-reveal + SHA-256). "
+            f"Verify any result yourself: {fair_url}",
+            guild_id=guild_id,
+        )
+    except Exception as e:
+        logger.error(f"Error processing !fair command: {e}")
+
+
+@chat_router.command("!tickets", exact=True)
+async def _chat_tickets(msg: ChatMessage):
+    guild_id, username = msg.guild_id, msg.username
+    logger.info(f"🎟️ Processing !tickets command from {username}")
+    try:
+        summary = await db_executor.run(guild_id, _fetch_ticket_summary, guild_id, username, label="!tickets")
+        if summary is None:
+            await send_kick_message(
+                f"@{username}, You need to link your account first! Use !link in Discord.",
+                guild_id=guild_id,
+            )
+        elif summary == "no_period":
+            await send_kick_message(f"@{username}, No active raffle period right now.", guild_id=guild_id)
+        elif not summary["tickets"] or summary["tickets"][0] == 0:
+            await send_kick_message(
+                f"@{username}, You currently have 0 raffle tickets. Watch streams, gift subs, or wager to earn tickets!",
+                guild_id=guild_id,
+            )
+        else:
+            ticket_result = summary["tickets"]
+            total_tickets = ticket_result[0] or 0
+            watchtime = ticket_result[1] or 0
+            gifted_subs = ticket_result[2] or 0
+            wager = ticket_result[3] or 0
+            bonus = ticket_result[4] or 0
+            total_pool = summary["pool"]
+
+            win_prob = (total_tickets / total_pool * 100) if total_pool > 0 else 0
+
+            await send_kick_message(
+                f"@{username}, You have {int(total_tickets):,} tickets "
+                f"(Watch: {int(watchtime)} | Subs: {int(gifted_subs)} | Wager: {int(wager)} | Bonus: {int(bonus)}) "
+                f"Win chance: {win_prob:.2f}% 🎟️",
+                guild_id=guild_id,
+            )
+            logger.info(f"✅ Sent ticket balance to {username}")
+    except Exception as e:
+        logger.info(f"❌ Error fetching tickets for {username}: {e}")
+        await send_kick_message(f"@{username}, Unable to retrieve ticket balance at this time.", guild_id=guild_id)
+
+
 # -------------------------
 # -------------------------
 # Database setup and utilities
@@ -2002,6 +1869,9 @@ try:
                 )
             logger.info("✅ Default watchtime roles created")
 
+        # Pending watchtime role grants (core/role_sync.py); survives restarts
+        conn.execute(text(ROLE_SYNC_QUEUE_DDL))
+
         # Create Guess the Balance tables
         conn.execute(
             text(
@@ -2405,12 +2275,33 @@ def _merge_cross_platform_points():
 
 _merge_cross_platform_points()
 
+# Running per-user totals for points_watchtime_converted. The watchtime tick reads
+# them instead of SUM()ing the ever-growing log, so they must exist (and be
+# backfilled) before the first tick.
+migrate_add_points_conversion_totals(engine)
+
+# Chat identity resolution (username <-> discord_id) reads `links` from memory;
+# see core/identity_index.py for how it stays fresh.
+identity_index.bind(engine)
+
+# Raffle standings (!raffleboard, auto-leaderboard, {raffle_rank}) are served from
+# memory and updated by TicketManager writes; see raffle_system/leaderboard_cache.py.
+leaderboard_cache.bind(engine)
+
+# Custom commands cache {points}/{tickets}/{watchtime} briefly; commits that write
+# those tables drop the cached values (features/custom_commands/manager.py).
+bind_custom_commands_write_hook(engine)
+
 # -------------------------
 # Bot Settings Manager
 # -------------------------
 # Multi-server support: Per-guild settings managers
 # MULTISERVER: Initialize settings manager without guild-specific configuration
 # Guild settings are loaded dynamically via get_guild_settings(guild_id)
+# Every guild's bot_settings rows are loaded once here; BotSettingsManager.refresh()
+# and the per-key lookups below read from this snapshot until the dashboard (via
+# Redis) or a local write invalidates it.
+settings_store.bind(engine)
 bot_settings = BotSettingsManager(engine)
 logger.debug("✅ Multiserver bot initialized")
 logger.debug("   Each Discord server configures via Dashboard → Profile Settings")
@@ -2477,36 +2368,16 @@ async def ensure_chatroom_id(guild_id: int, guild_name: str) -> None:
     """Ensure chatroom_id exists in DB for this guild; resolve via kickpython-backed core API if missing."""
     try:
         # Check existing setting
-        with engine.connect() as conn:
-            row = conn.execute(
-                text(
-                    """
-                SELECT value FROM bot_settings
-                WHERE key = 'kick_chatroom_id' AND discord_server_id = :gid
-                LIMIT 1
-            """
-                ),
-                {"gid": guild_id},
-            ).fetchone()
-            if row and row[0]:
-                logger.info(f"📦 chatroom_id already set: {row[0]}")
-                return
+        existing = settings_store.get(guild_id, "kick_chatroom_id")
+        if existing:
+            logger.info(f"📦 chatroom_id already set: {existing}")
+            return
 
         # Need to resolve: get channel username
         kick_username = None
-        with engine.connect() as conn:
-            row = conn.execute(
-                text(
-                    """
-                SELECT value FROM bot_settings
-                WHERE key = 'kick_channel' AND discord_server_id = :gid
-                LIMIT 1
-            """
-                ),
-                {"gid": guild_id},
-            ).fetchone()
-            if row and row[0]:
-                kick_username = str(row[0]).strip()
+        stored_channel = settings_store.get(guild_id, "kick_channel")
+        if stored_channel:
+            kick_username = str(stored_channel).strip()
 
         if not kick_username:
             logger.info(f"⚠️ Cannot resolve chatroom_id: no kick_channel configured")
@@ -2852,13 +2723,28 @@ intents.message_content = True
 intents.members = True
 intents.reactions = True  # Enable reaction events
 
+
+class _Bot(commands.Bot):
+    async def setup_hook(self):
+        # Dashboard events are buffered and flushed on the bot's own loop.
+        buffered_redis_publisher.bind()
+
+    async def close(self):
+        # Shutdown: after discord.py has closed, drain buffered dashboard events and
+        # release the shared outbound HTTP pool and the Twitch app-token client.
+        await super().close()
+        await buffered_redis_publisher.close()
+        await http_pool.close()
+        await close_twitch_app_client()
+
+
 # Safe default mentions: never let user/chat-derived text ping @everyone/@here or
 # roles. Individual user mentions are still allowed (needed for reply pings); pass an
 # explicit allowed_mentions on a specific send only when that send needs different rules.
 # max_messages=None disables the default 1000-entry message cache: only
 # on_raw_reaction_add / on_command_error are used (no message edit/delete or non-raw
 # reaction handlers), so nothing reads the cache - it is pure resident memory.
-bot = commands.Bot(
+bot = _Bot(
     command_prefix="!",
     intents=intents,
     allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=True),
@@ -2870,6 +2756,12 @@ bot = commands.Bot(
 # bot connects, making them available in every server that installs Wagerlabs.
 register_wagerlabs_slash_commands(bot, engine)
 
+# Watchtime roles are granted from a persistent per-guild queue fed by the
+# watchtime tick; see core/role_sync.py.
+role_sync.bind(engine, bot)
+chat_outbox.register_sender("kick", kick_ws_manager.deliver)
+chat_outbox.register_sender("twitch", _deliver_twitch_message)
+
 
 @bot.before_invoke
 async def deduplicate_command(ctx):
@@ -3104,7 +2996,7 @@ async def get_kick_bot_token() -> Optional[str]:
 
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(token_url, data=payload, headers=headers, timeout=10) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -3168,7 +3060,7 @@ async def refresh_kick_oauth_token() -> bool:
             "client_secret": KICK_CLIENT_SECRET,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(token_url, data=token_data, timeout=10) as response:
                 if response.status == 200:
                     token_response = await response.json()
@@ -3239,9 +3131,48 @@ BROWSER_HEADERS = {
     "Origin": "https://kick.com",
 }
 
+# Shared Pusher sockets for every guild's kick_chat_loop (created on first use, inside the bot loop)
+_kick_pusher: Optional[PusherMultiplexer] = None
+
+
+def get_kick_pusher() -> PusherMultiplexer:
+    """Return the process-wide Kick Pusher multiplexer, creating it on first use."""
+    global _kick_pusher
+    if _kick_pusher is None:
+        ws_url = (
+            f"{KICK_CHAT_WS}"
+            f"?protocol={PUSHER_CONFIG['protocol']}"
+            f"&client=js"
+            f"&version={PUSHER_CONFIG['version']}"
+            f"&flash=false"
+            f"&cluster={PUSHER_CONFIG['cluster']}"
+        )
+        logger.info(f"[Kick] Pusher WebSocket: {ws_url}")
+
+        # Verify TLS certificates. Pusher/Kick present valid public certs, and this
+        # chat feed drives points/commands/clips, so a MITM here would mean forged
+        # economy actions. create_default_context() enables verification + hostname
+        # checking; do not disable it (fix cert issues via the trust store, not here).
+        ssl_context = ssl.create_default_context()
+
+        def connect():
+            return websockets.connect(
+                ws_url,
+                max_size=None,
+                ssl=ssl_context,
+                additional_headers={
+                    "User-Agent": BROWSER_HEADERS["User-Agent"],
+                    "Origin": "https://kick.com",
+                    "Sec-WebSocket-Extensions": "permessage-deflate; client_max_window_bits",
+                },
+            )
+
+        _kick_pusher = PusherMultiplexer(ws_url, connect=connect)
+    return _kick_pusher
+
 
 async def kick_chat_loop(channel_name: str, guild_id: int):
-    """Connect to Kick's Pusher WebSocket to read ALL chat messages and events (no webhooks)."""
+    """Read a guild's Kick chat messages and events from the shared Pusher sockets (no webhooks)."""
     global kick_chatroom_id_global
 
     # Get guild name for logging
@@ -3308,7 +3239,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                     except Exception as e:
                         logger.info(f"[Kick] Could not get OAuth token: {e}")
 
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         headers = {
                             "User-Agent": random.choice(USER_AGENTS),
                             "Accept": "application/json",
@@ -3342,17 +3273,13 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                     logger.info(f"[Kick] ⚠️ Official API error: HTTP {response.status}")
                         else:
                             # Fallback to unofficial API without auth (may be blocked)
-                            headers["Referer"] = "https://kick.com/"
-                            url = f"https://kick.com/api/v2/channels/{channel_to_use}"
-                            async with session.get(
-                                url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
-                            ) as response:
-                                if response.status == 200:
-                                    data = await response.json()
-                                    channel_id = str(data.get("id"))
-                                    logger.info(f"[Kick] ✅ Fetched channel ID: {channel_id}")
-                                else:
-                                    logger.info(f"[Kick] ⚠️ Could not fetch channel ID (HTTP {response.status})")
+                            ids = await kick_channels.ids(channel_to_use)
+                            if ids and ids.get("channel_id"):
+                                channel_id = ids["channel_id"]
+                                logger.info(f"[Kick] ✅ Fetched channel ID: {channel_id}")
+                            else:
+                                failure = kick_channels.last_failure(channel_to_use) or "no data"
+                                logger.info(f"[Kick] ⚠️ Could not fetch channel ID ({failure})")
                 except Exception as e:
                     logger.info(f"[Kick] ⚠️ Error fetching channel ID: {e}")
             else:
@@ -3369,7 +3296,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                     if KICK_CLIENT_ID and KICK_CLIENT_SECRET:
                         try:
                             logger.info(f"[Kick] 🔐 Fetching token via Client Credentials for channel lookup...")
-                            async with aiohttp.ClientSession() as session:
+                            async with http_session() as session:
                                 payload = {
                                     "grant_type": "client_credentials",
                                     "client_id": KICK_CLIENT_ID,
@@ -3402,7 +3329,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                         except Exception as e:
                             logger.info(f"[Kick] Could not get streamer OAuth token: {e}")
 
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         headers = {
                             "User-Agent": random.choice(USER_AGENTS),
                             "Accept": "application/json",
@@ -3445,32 +3372,21 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                         # Fallback to public API if no auth or auth failed
                         if not access_token or not chatroom_id:
                             logger.info(f"[Kick] 🔍 Falling back to public API (subscription events may not work)")
-                            headers = {
-                                "User-Agent": random.choice(USER_AGENTS),
-                                "Accept": "application/json",
-                                "Referer": "https://kick.com/",
-                            }
-                            url = f"https://kick.com/api/v2/channels/{channel_to_use}"
-                            async with session.get(
-                                url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)
-                            ) as response:
-                                if response.status == 200:
-                                    data = await response.json()
-                                    chatroom_id = str(data.get("chatroom", {}).get("id"))
-                                    channel_id = str(data.get("id"))
-                                    kick_chatroom_ids[guild_id] = chatroom_id
-                                    logger.info(
-                                        f"[Kick] ✅ Public API - chatroom: {chatroom_id}, channel: {channel_id}"
-                                    )
-                                    logger.info(
-                                        f"[Kick] ⚠️ Note: Subscription events may not work without authentication"
-                                    )
-                                elif response.status == 403:
+                            ids = await kick_channels.ids(channel_to_use)
+                            if ids and ids.get("chatroom_id"):
+                                chatroom_id = ids["chatroom_id"]
+                                channel_id = ids.get("channel_id")
+                                kick_chatroom_ids[guild_id] = chatroom_id
+                                logger.info(f"[Kick] ✅ Public API - chatroom: {chatroom_id}, channel: {channel_id}")
+                                logger.info(f"[Kick] ⚠️ Note: Subscription events may not work without authentication")
+                            else:
+                                failure = kick_channels.last_failure(channel_to_use) or "no data"
+                                if "403" in failure:
                                     logger.info(f"[Kick] ❌ Cloudflare blocked request (403). SOLUTION:")
                                     logger.info(f"[Kick]    1. Link Kick account in dashboard (provides OAuth token)")
                                     logger.info(f"[Kick]    2. Or set KICK_CHATROOM_ID environment variable")
                                 else:
-                                    logger.info(f"[Kick] Failed to fetch channel data: HTTP {response.status}")
+                                    logger.info(f"[Kick] Failed to fetch channel data: {failure}")
                 except Exception as e:
                     logger.error(f"[Kick] Error fetching channel data: {e}")
                     import traceback
@@ -3491,74 +3407,20 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
             # Store current chatroom_id for change detection
             current_chatroom_id = chatroom_id
 
-            logger.info(f"Pusher: Connecting to chatroom {chatroom_id} for channel {channel_to_use}...")
-
-            # Build WebSocket URL matching successful connection pattern
-            ws_url = (
-                f"{KICK_CHAT_WS}"
-                f"?protocol={PUSHER_CONFIG['protocol']}"
-                f"&client=js"
-                f"&version={PUSHER_CONFIG['version']}"
-                f"&flash=false"
-                f"&cluster={PUSHER_CONFIG['cluster']}"
-            )
-            logger.info(f"[Kick] Connecting to WebSocket: {ws_url}")
-
-            # Verify TLS certificates. Pusher/Kick present valid public certs, and this
-            # chat feed drives points/commands/clips, so a MITM here would mean forged
-            # economy actions. create_default_context() enables verification + hostname
-            # checking; do not disable it (fix cert issues via the trust store, not here).
-            ssl_context = ssl.create_default_context()
+            logger.info(f"Pusher: Subscribing to chatroom {chatroom_id} for channel {channel_to_use}...")
 
-            # Connect to Pusher WebSocket with headers
-            async with websockets.connect(
-                ws_url,
-                max_size=None,
-                ssl=ssl_context,
-                additional_headers={
-                    "User-Agent": BROWSER_HEADERS["User-Agent"],
-                    "Origin": "https://kick.com",
-                    "Sec-WebSocket-Extensions": "permessage-deflate; client_max_window_bits",
-                },
-            ) as ws:
-                logger.info("[Kick] WebSocket connected, waiting for server response...")
-
-                # Wait for connection established
-                response = await ws.recv()
-                logger.info(f"[Kick] Initial response: {response}")
-                response_data = json.loads(response)
-
-                # Handle connection errors
-                if response_data.get("event") == "pusher:error":
-                    error_data = response_data.get("data", {})
-                    error_code = error_data.get("code")
-                    error_message = error_data.get("message")
-                    raise Exception(f"WebSocket error code {error_code}: {error_message}")
-
-                # Handle successful connection
-                if response_data.get("event") == "pusher:connection_established":
-                    socket_details = json.loads(response_data["data"])
-                    socket_id = socket_details["socket_id"]
-                    logger.info(f"[Kick] Got socket_id: {socket_id}")
-
-                    # Subscribe to the chatroom channel (for chat messages)
-                    subscribe_msg = json.dumps(
-                        {"event": "pusher:subscribe", "data": {"auth": "", "channel": f"chatrooms.{chatroom_id}.v2"}}
-                    )
-                await ws.send(subscribe_msg)
-                logger.info(f"[Kick] ✅ Subscribed to chatrooms.{chatroom_id}.v2")
+            # Chatroom channel carries chat messages; channel.{id} carries subscriptions,
+            # raids, follows, etc. Both ride the shared Pusher sockets (see get_kick_pusher).
+            channels = [f"chatrooms.{chatroom_id}.v2"]
+            if channel_id:
+                channels.append(f"channel.{channel_id}")
+            else:
+                logger.info(f"[Kick] ⚠️ Channel ID not available - subscription events may not be received")
 
-                # Subscribe to channel events (for subscriptions, raids, follows, etc.)
-                if channel_id:
-                    channel_events_msg = json.dumps(
-                        {"event": "pusher:subscribe", "data": {"auth": "", "channel": f"channel.{channel_id}"}}
-                    )
-                    await ws.send(channel_events_msg)
-                    logger.info(f"[Kick] ✅ Subscribed to channel.{channel_id} (for subscription events)")
-                else:
-                    logger.info(f"[Kick] ⚠️ Channel ID not available - subscription events may not be received")
+            async with get_kick_pusher().subscription(guild_id, channels) as frames:
+                logger.info(f"[Kick] ✅ Subscribed to {', '.join(channels)}")
 
-                    # Initialize last_chat_activity to assume stream is live when we connect
+                # Initialize last_chat_activity to assume stream is live when we connect
                 last_chat_activity_by_guild[guild_id] = datetime.now(timezone.utc)
                 logger.info(f"Pusher: Initialized chat activity tracking")
 
@@ -3568,7 +3430,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
 
                 while True:
                     try:
-                        msg = await asyncio.wait_for(ws.recv(), timeout=30)
+                        msg = await asyncio.wait_for(frames.get(), timeout=30)
 
                         # Periodically check if chatroom_id has changed in settings
                         now = datetime.now(timezone.utc)
@@ -3620,11 +3482,6 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                     f"[KICK EVENT] Data keys: {list(json.loads(data.get('data', '{}')).keys()) if data.get('data') else 'No data'}"
                                 )
 
-                            # Respond to ping
-                            if event_type == "pusher:ping":
-                                await ws.send(json.dumps({"event": "pusher:pong"}))
-                                continue
-
                             # Skip chat messages if kickpython is handling them
                             # Only process subscription events from Pusher when kickpython is enabled
                             if KICK_USE_KICKPYTHON_WS and event_type == "App\\Events\\ChatMessageEvent":
@@ -3653,6 +3510,18 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                     if not username or not content_text:
                                         continue
 
+                                    chat_recorder.record(
+                                        guild_id,
+                                        guild_name,
+                                        {
+                                            "sender_username": username,
+                                            "content": content_text,
+                                            "chat_id": event_data.get("id"),
+                                            "user": {"id": event_data.get("sender", {}).get("id")},
+                                        },
+                                        source="pusher",
+                                    )
+
                                     # Update watchtime tracking
                                     now = datetime.now(timezone.utc)
                                     last_chat_activity_by_guild[guild_id] = now
@@ -3860,17 +3729,9 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                         # Get clip duration from bot_settings (default 30 seconds)
                                         clip_duration = 30
                                         try:
-                                            with engine.connect() as conn:
-                                                result = conn.execute(
-                                                    text(
-                                                        """
-                                                    SELECT value FROM bot_settings WHERE key = 'clip_duration' AND discord_server_id = :guild_id
-                                                """
-                                                    ),
-                                                    {"guild_id": guild_id},
-                                                ).fetchone()
-                                                if result:
-                                                    clip_duration = int(result[0])
+                                            stored_duration = settings_store.get(guild_id, "clip_duration")
+                                            if stored_duration is not None:
+                                                clip_duration = int(stored_duration)
                                         except Exception as e:
                                             logger.info(f"[Clip] Using default duration, couldn't load from DB: {e}")
 
@@ -3915,7 +3776,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                                     return
 
                                                 # Create clip via Dashboard API
-                                                async with aiohttp.ClientSession() as http_session:
+                                                async with http_session() as http:
                                                     headers = {"Content-Type": "application/json", "X-API-Key": api_key}
                                                     payload = {
                                                         "channel": KICK_CHANNEL,
@@ -3924,7 +3785,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                                         "title": title,
                                                     }
 
-                                                    async with http_session.post(
+                                                    async with http.post(
                                                         f"{dashboard_url}/api/clips/create",
                                                         json=payload,
                                                         headers=headers,
@@ -3981,17 +3842,11 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                                                             # Post clip embed to Discord channel if configured
                                                             try:
                                                                 clip_channel_id = None
-                                                                with engine.connect() as conn:
-                                                                    result = conn.execute(
-                                                                        text(
-                                                                            """
-                                                                        SELECT value FROM bot_settings WHERE key = 'clip_channel_id' AND discord_server_id = :guild_id
-                                                                    """
-                                                                        ),
-                                                                        {"guild_id": guild_id},
-                                                                    ).fetchone()
-                                                                    if result and result[0]:
-                                                                        clip_channel_id = int(result[0])
+                                                                stored_channel = settings_store.get(
+                                                                    guild_id, "clip_channel_id"
+                                                                )
+                                                                if stored_channel:
+                                                                    clip_channel_id = int(stored_channel)
 
                                                                 if clip_channel_id:
                                                                     discord_channel = bot.get_channel(clip_channel_id)
@@ -4177,12 +4032,6 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
                             )
                             break  # Break inner loop to reconnect
 
-                        # Send ping to keep connection alive
-                        try:
-                            await ws.send(json.dumps({"event": "pusher:ping"}))
-                        except:
-                            break
-
         except websockets.exceptions.WebSocketException as e:
             logger.info(f"[Kick] WebSocket error: {e}. Reconnecting in 10s.")
             await asyncio.sleep(10)
@@ -4194,7 +4043,7 @@ async def kick_chat_loop(channel_name: str, guild_id: int):
 # -------------------------
 # Point Reward System
 # -------------------------
-def dedupe_active_users_by_person(conn, active_users: dict, guild_id) -> dict:
+def dedupe_active_users_by_person(active_users: dict, guild_id) -> dict:
     """Collapse the active-viewer set to one entry per linked person so a viewer
     watching a simultaneous Kick+Twitch stream can't earn watchtime/points twice.
 
@@ -4213,41 +4062,14 @@ def dedupe_active_users_by_person(conn, active_users: dict, guild_id) -> dict:
     if not active_users:
         return active_users
 
-    names = list(active_users.keys())
-    # Map active usernames -> discord_id.
-    active_rows = conn.execute(
-        text(
-            """
-            SELECT LOWER(kick_name) AS uname, discord_id
-            FROM links
-            WHERE discord_server_id = :sid AND LOWER(kick_name) = ANY(:names)
-            """
-        ),
-        {"sid": guild_id, "names": names},
-    ).fetchall()
-    username_to_did = {row[0]: row[1] for row in active_rows if row[1] is not None}
+    # Map active usernames -> discord_id (core/identity_index.py, no queries
+    # once the guild is loaded).
+    username_to_did = identity_index.discord_ids(guild_id, active_users.keys())
 
-    # For the people who are active, fetch ALL their linked usernames so the
+    # For the people who are active, use ALL their linked usernames so the
     # canonical pick is stable across intervals (independent of which account
     # was active now).
-    dids = list({did for did in username_to_did.values()})
-    canonical_for_did = {}
-    if dids:
-        all_rows = conn.execute(
-            text(
-                """
-                SELECT discord_id, LOWER(kick_name) AS uname
-                FROM links
-                WHERE discord_server_id = :sid AND discord_id = ANY(:dids)
-                """
-            ),
-            {"sid": guild_id, "dids": dids},
-        ).fetchall()
-        per_person = {}
-        for did, uname in all_rows:
-            if uname:
-                per_person.setdefault(did, []).append(uname)
-        canonical_for_did = {did: min(unames) for did, unames in per_person.items()}
+    canonical_for_did = identity_index.accrual_usernames(guild_id, set(username_to_did.values()))
 
     kept = {}
     handled_person = set()
@@ -4267,12 +4089,30 @@ def dedupe_active_users_by_person(conn, active_users: dict, guild_id) -> dict:
     return kept
 
 
+def _award_watchtime_points(active_usernames: list, server_id: int) -> list:
+    """Blocking part of award_points_for_watchtime (runs on db_executor)."""
+    with engine.connect() as conn:
+        points_per_5min, sub_points_per_5min = load_points_rates(conn, server_id)
+
+    if points_per_5min == 0 and sub_points_per_5min == 0:
+        return []  # Points system disabled
+
+    # TODO: Check if user is subscriber for bonus points
+    # For now, use regular points rate
+    linked = identity_index.discord_ids(server_id, active_usernames)
+    with engine.begin() as conn:
+        return bulk_award_points(conn, active_usernames, server_id, points_per_5min, linked=linked)
+
+
 async def award_points_for_watchtime(active_usernames: list, guild_id: Optional[int] = None):
     """
     Award points to users based on their new watchtime.
     Similar to raffle ticket system but tracks points separately.
     Only awards points for NEW watchtime since last conversion.
 
+    Set-based: the whole batch is converted in a handful of statements
+    (see utils/watchtime_accrual.py) rather than ~6 round-trips per user.
+
     Args:
         active_usernames: List of usernames to award points to
         guild_id: Discord guild/server ID for multi-server support
@@ -4284,149 +4124,15 @@ async def award_points_for_watchtime(active_usernames: list, guild_id: Optional[
             return
         server_id = guild_id
 
-        # Get point settings from database
-        points_per_5min = 1  # Default: 1 point per 5 minutes
-        sub_points_per_5min = 2  # Default: 2 points per 5 minutes for subs
-
-        with engine.connect() as conn:
-            # Load settings (multiserver: filter by server_id)
-            result = conn.execute(
-                text(
-                    """
-                SELECT key, value FROM point_settings
-                WHERE key IN ('points_per_5min', 'sub_points_per_5min')
-                AND (discord_server_id = :sid OR discord_server_id IS NULL)
-                ORDER BY discord_server_id NULLS FIRST
-            """
-                ),
-                {"sid": server_id},
-            ).fetchall()
-
-            for key, value in result:
-                if key == "points_per_5min":
-                    points_per_5min = int(value)
-                elif key == "sub_points_per_5min":
-                    sub_points_per_5min = int(value)
-
-        if points_per_5min == 0 and sub_points_per_5min == 0:
-            return  # Points system disabled
-
-        with engine.begin() as conn:
-            for username in active_usernames:
-                try:
-                    # Get current total watchtime for user (multiserver: filter by server_id)
-                    result = conn.execute(
-                        text(
-                            """
-                        SELECT minutes FROM watchtime
-                        WHERE username = :u AND discord_server_id = :sid
-                    """
-                        ),
-                        {"u": username, "sid": server_id},
-                    ).fetchone()
-
-                    if not result:
-                        continue
-
-                    total_minutes = result[0]
-
-                    # Get how many minutes have already been converted to points (multiserver)
-                    converted_result = conn.execute(
-                        text(
-                            """
-                        SELECT COALESCE(SUM(minutes_converted), 0)
-                        FROM points_watchtime_converted
-                        WHERE kick_username = :u AND discord_server_id = :sid
-                    """
-                        ),
-                        {"u": username, "sid": server_id},
-                    ).fetchone()
-
-                    minutes_already_converted = converted_result[0] if converted_result else 0
-
-                    # Get discord_id to write to permanent log later
-                    link_result = conn.execute(
-                        text(
-                            """
-                        SELECT discord_id FROM links
-                        WHERE LOWER(kick_name) = LOWER(:u) AND discord_server_id = :sid
-                    """
-                        ),
-                        {"u": username, "sid": server_id},
-                    ).fetchone()
-                    discord_id = link_result[0] if link_result else None
-
-                    # Calculate new minutes since last conversion
-                    new_minutes = total_minutes - minutes_already_converted
-
-                    # Only award if we have at least 5 new minutes
-                    if new_minutes >= 5:
-                        # Calculate points (5 minutes = 1 interval)
-                        intervals = int(new_minutes // 5)
-                        minutes_to_convert = intervals * 5
-
-                        # TODO: Check if user is subscriber for bonus points
-                        # For now, use regular points rate
-                        points_to_award = intervals * points_per_5min
-
-                        if points_to_award > 0:
-                            # discord_id already retrieved above for verification
-
-                            # Update or insert user points (multiserver: composite PK with discord_server_id)
-                            conn.execute(
-                                text(
-                                    """
-                                INSERT INTO user_points (kick_username, discord_id, points, total_earned, discord_server_id, last_updated)
-                                VALUES (:u, :d, :p, :p, :sid, CURRENT_TIMESTAMP)
-                                ON CONFLICT(kick_username, discord_server_id) DO UPDATE SET
-                                    points = user_points.points + :p,
-                                    total_earned = user_points.total_earned + :p,
-                                    discord_id = COALESCE(:d, user_points.discord_id),
-                                    last_updated = CURRENT_TIMESTAMP
-                            """
-                                ),
-                                {"u": username, "d": discord_id, "p": points_to_award, "sid": server_id},
-                            )
-
-                            # Log the conversion (multiserver: add discord_server_id)
-                            conn.execute(
-                                text(
-                                    """
-                                INSERT INTO points_watchtime_converted
-                                (kick_username, minutes_converted, points_awarded, discord_server_id)
-                                VALUES (:u, :m, :p, :sid)
-                            """
-                                ),
-                                {"u": username, "m": minutes_to_convert, "p": points_to_award, "sid": server_id},
-                            )
-
-                            # ALSO log to permanent watchtime_conversion_logs (NEVER deleted)
-                            if discord_id:
-                                conn.execute(
-                                    text(
-                                        """
-                                    INSERT INTO watchtime_conversion_logs
-                                        (discord_id, kick_name, discord_server_id, raffle_minutes, points_minutes, converted_at)
-                                    VALUES
-                                        (:discord_id, :kick_name, :server_id, 0, :minutes, NOW())
-                                """
-                                    ),
-                                    {
-                                        "discord_id": discord_id,
-                                        "kick_name": username,
-                                        "server_id": server_id,
-                                        "minutes": minutes_to_convert,
-                                    },
-                                )
-
-                            if watchtime_debug_enabled:
-                                logger.info(
-                                    f"[Points] ✅ {username}: +{points_to_award} points ({minutes_to_convert} min converted)"
-                                )
+        awarded = await db_executor.run(
+            server_id, _award_watchtime_points, active_usernames, server_id, label="points_award"
+        )
 
-                except Exception as e:
-                    logger.info(f"[Points] ⚠️ Error awarding points to {username}: {e}")
-                    continue
+        if watchtime_debug_enabled:
+            for award in awarded:
+                logger.info(
+                    f"[Points] ✅ {award['kick_name']}: +{award['points']} points ({award['minutes']} min converted)"
+                )
 
     except Exception as e:
         logger.info(f"[Points] ⚠️ Error in points award task: {e}")
@@ -4435,6 +4141,22 @@ async def award_points_for_watchtime(active_usernames: list, guild_id: Optional[
 # -------------------------
 # Watchtime updater task
 # -------------------------
+def _record_watchtime(active_users: dict, server_id: int, minutes_to_add: float) -> tuple:
+    """Upsert one guild's watchtime tick (runs on db_executor).
+
+    Returns the deduped viewers and how many role grants the tick queued."""
+    # The effective roles, including the WATCHTIME_ROLES defaults when the table is empty
+    roles = load_watchtime_roles()
+    with engine.begin() as conn:
+        # Collapse dual-platform viewers (Kick + Twitch) to one entry per
+        # linked person so simultaneous cross-platform watching can't
+        # double-count watchtime (and therefore points). Unlinked viewers
+        # pass through and keep earning per-platform.
+        active_users = dedupe_active_users_by_person(active_users, server_id)
+        roles_queued = bulk_upsert_watchtime_queue_roles(conn, active_users, server_id, minutes_to_add, roles)
+    return active_users, roles_queued
+
+
 @tasks.loop(seconds=WATCH_INTERVAL_SECONDS)
 async def update_watchtime_task():
     """Update watchtime for active viewers (only when tracking is enabled and stream has real activity)."""
@@ -4539,31 +4261,22 @@ async def update_watchtime_task():
             if not active_users:
                 continue
 
-            # Update all active users for this guild
-            with engine.begin() as conn:
-                # Collapse dual-platform viewers (Kick + Twitch) to one entry per
-                # linked person so simultaneous cross-platform watching can't
-                # double-count watchtime (and therefore points). Unlinked viewers
-                # pass through and keep earning per-platform.
-                active_users = dedupe_active_users_by_person(conn, active_users, server_id)
+            # Update all active users for this guild in one multi-row upsert
+            try:
+                active_users, roles_queued = await db_executor.run(
+                    server_id,
+                    _record_watchtime,
+                    active_users,
+                    server_id,
+                    minutes_to_add,
+                    label="watchtime_update",
+                )
+            except Exception as e:
+                logger.error(f"⚠️ Error updating watchtime for {len(active_users)} viewer(s): {e}")
+                continue  # Skip this guild but continue with others
 
-                for user, last_seen in active_users.items():
-                    try:
-                        conn.execute(
-                            text(
-                                """
-                            INSERT INTO watchtime (username, minutes, last_active, discord_server_id)
-                            VALUES (:u, :m, :t, :sid)
-                            ON CONFLICT(username, discord_server_id) DO UPDATE SET
-                                minutes = watchtime.minutes + :m,
-                                last_active = :t
-                        """
-                            ),
-                            {"u": user, "m": minutes_to_add, "t": last_seen.isoformat(), "sid": server_id},
-                        )
-                    except Exception as e:
-                        logger.error(f"⚠️ Error updating watchtime for {user}: {e}")
-                        continue  # Skip this user but continue with others
+            if roles_queued:
+                role_sync.wake(server_id)
 
             # Award points for new watchtime (runs after watchtime update).
             # active_users is already deduped to one canonical username per person.
@@ -4592,13 +4305,105 @@ async def update_watchtime_task_error(error):
 
 
 # -------------------------
-# Role updater task
+# Role reconcile task
 # -------------------------
-@tasks.loop(seconds=ROLE_UPDATE_INTERVAL_SECONDS)
+def _fetch_linked_watchtime(guild_id: int) -> list:
+    """Every linked viewer's watchtime in a guild (runs on db_executor)."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                """
+            SELECT l.discord_id, w.minutes, l.kick_name
+            FROM links l
+            JOIN watchtime w ON l.kick_name = w.username AND l.discord_server_id = w.discord_server_id
+            WHERE l.discord_server_id = :sid
+        """
+            ),
+            {"sid": guild_id},
+        ).fetchall()
+
+
+def _fetch_member_watchtime(guild_id: int, discord_id: int) -> list:
+    """_fetch_linked_watchtime for one member (runs on db_executor)."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                """
+            SELECT l.discord_id, w.minutes, l.kick_name
+            FROM links l
+            JOIN watchtime w ON l.kick_name = w.username AND l.discord_server_id = w.discord_server_id
+            WHERE l.discord_server_id = :sid AND l.discord_id = :did
+        """
+            ),
+            {"sid": guild_id, "did": discord_id},
+        ).fetchall()
+
+
+def _missing_role_jobs(guild, current_roles, rows, warn: bool = True) -> list:
+    """role_sync jobs for the watchtime roles these (discord_id, minutes, kick_name) rows qualify for but lack."""
+    # Cache role objects and validate they exist
+    roles_by_name = {}
+    for role in guild.roles:
+        roles_by_name.setdefault(role.name, role)
+    role_cache = {}
+    for role_info in current_roles:
+        role = roles_by_name.get(role_info["name"])
+        if not role:
+            if warn:
+                logger.warning(f"⚠️ Role {role_info['name']} not found in server!")
+            continue
+        role_cache[role_info["name"]] = role
+
+    jobs = []
+    for discord_id, minutes, kick_name in rows:
+        member = guild.get_member(int(discord_id))
+        if not member:
+            continue
+        for role_info in current_roles:
+            role = role_cache.get(role_info["name"])
+            if role and minutes >= role_info["minutes"] and member.get_role(role.id) is None:
+                jobs.append(
+                    {
+                        "discord_id": int(discord_id),
+                        "role_name": role.name,
+                        "kick_name": kick_name,
+                        "minutes": int(minutes),
+                    }
+                )
+    return jobs
+
+
+async def queue_member_watchtime_roles(guild, discord_id: int) -> int:
+    """Queue the watchtime roles a newly linked member already qualifies for.
+
+    Viewers who watched before linking never cross a threshold in a later tick,
+    so without this they would wait for the next full reconcile.
+    """
+    if not guild.me.guild_permissions.manage_roles:
+        return 0
+    rows = await db_executor.run(guild.id, _fetch_member_watchtime, guild.id, discord_id, label="role_link_check")
+    current_roles = await db_executor.run(guild.id, load_watchtime_roles, label="role_link_check")
+    jobs = _missing_role_jobs(guild, current_roles, rows, warn=False)
+    if not jobs:
+        return 0
+    logger.info(f"🎯 Queued {len(jobs)} watchtime role(s) for newly linked member {discord_id}")
+    return await role_sync.enqueue(guild.id, jobs)
+
+
+@tasks.loop(seconds=ROLE_RECONCILE_INTERVAL_SECONDS)
 async def update_roles_task():
-    """Update Discord roles based on watchtime."""
+    """Queue any watchtime roles members qualify for but don't hold.
+
+    Threshold crossings are queued by the watchtime tick itself; this full
+    scan only catches what that misses (roles created or renamed later,
+    members who rejoined, jobs dropped after repeated failures). Grants and
+    DMs are applied by the role_sync workers, not inline here.
+    """
     try:
-        # Multiserver: Update roles for all guilds
+        # Load current role configuration from database (once for all guilds)
+        current_roles = load_watchtime_roles()
+
+        # Multiserver: Reconcile roles for all guilds
         for guild in bot.guilds:
             set_server(guild.id, guild.name)  # tag this guild's iteration logging
             try:
@@ -4607,77 +4412,15 @@ async def update_roles_task():
                     logger.warning(f"⚠️ Bot lacks manage_roles permission!")
                     continue
 
-                # Load current role configuration from database
-                current_roles = load_watchtime_roles()
-
-                # Cache role objects and validate they exist
-                role_cache = {}
-                for role_info in current_roles:
-                    role = discord.utils.get(guild.roles, name=role_info["name"])
-                    if not role:
-                        logger.warning(f"⚠️ Role {role_info['name']} not found in server!")
-                        continue
-                    role_cache[role_info["name"]] = role
-
-                # Get linked users with watchtime for this guild
-                with engine.connect() as conn:
-                    rows = conn.execute(
-                        text(
-                            """
-                        SELECT l.discord_id, w.minutes, l.kick_name
-                        FROM links l
-                        JOIN watchtime w ON l.kick_name = w.username AND l.discord_server_id = w.discord_server_id
-                        WHERE l.discord_server_id = :sid
-                    """
-                        ),
-                        {"sid": guild.id},
-                    ).fetchall()
-
-                # Update roles for each user
-                for discord_id, minutes, kick_name in rows:
-                    member = guild.get_member(int(discord_id))
-                    if not member:
-                        continue
-
-                    # Assign all eligible roles
-                    for role_info in current_roles:
-                        role = role_cache.get(role_info["name"])
-                        if role and minutes >= role_info["minutes"] and role not in member.roles:
-                            try:
-                                await member.add_roles(role, reason=f"Reached {role_info['minutes']} min watchtime")
-                                logger.info(f"Assigned {role.name} to {member.display_name} ({kick_name})")
-
-                                # Send DM notification to user
-                                try:
-                                    hours = minutes / 60
-                                    embed = discord.Embed(
-                                        title="🎉 New Role Unlocked!",
-                                        description=f"Congratulations! You've earned the **{role.name}** role!",
-                                        color=0x53FC18,
-                                    )
-                                    embed.add_field(
-                                        name="Your Watchtime",
-                                        value=f"{minutes:.0f} minutes ({hours:.1f} hours)",
-                                        inline=False,
-                                    )
-                                    embed.add_field(
-                                        name="Keep Watching",
-                                        value="Continue watching to unlock more exclusive roles!",
-                                        inline=False,
-                                    )
-                                    embed.set_footer(text=f"Kick: {kick_name}")
-
-                                    await member.send(embed=embed)
-                                    logger.info(f"Sent role notification DM to {member.display_name}")
-                                except discord.Forbidden:
-                                    pass  # User has DMs disabled
-                                except Exception as dm_error:
-                                    logger.debug(f"Error sending DM: {dm_error}")
+                rows = await db_executor.run(guild.id, _fetch_linked_watchtime, guild.id, label="role_reconcile")
+                jobs = _missing_role_jobs(guild, current_roles, rows)
 
-                            except discord.Forbidden:
-                                logger.warning(f"Missing permission to assign {role.name}")
-                            except Exception as e:
-                                logger.warning(f"Error assigning role: {e}")
+                if jobs:
+                    logger.info(f"🎯 Role reconcile queued {len(jobs)} missing role grant(s)")
+                    await role_sync.enqueue(guild.id, jobs)
+                else:
+                    # Still drain anything left from before a restart
+                    role_sync.wake(guild.id)
 
             except Exception as guild_error:
                 logger.warning(f"⚠️ Role update error: {guild_error}")
@@ -4894,248 +4637,258 @@ async def before_update_discord_usernames():
     await bot.wait_until_ready()
 
 
-# -------------------------
-# Cleanup expired verification codes and old chat data
-# -------------------------
+# -------------------------
+# Cleanup expired verification codes and old chat data
+# -------------------------
+def _fetch_pending_oauth_notifications() -> list:
+    """Oldest unprocessed OAuth link notifications (runs on db_executor)."""
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                """
+            SELECT id, discord_id, kick_username, channel_id, message_id, discord_server_id, platform
+            FROM oauth_notifications
+            WHERE processed = FALSE AND kick_username != ''
+            ORDER BY created_at ASC
+            LIMIT 10
+        """
+            )
+        ).fetchall()
+
+
+def _mark_oauth_notification_processed(notification_id) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            UPDATE oauth_notifications
+            SET processed = TRUE
+            WHERE id = :id
+        """
+            ),
+            {"id": notification_id},
+        )
+
+
+def _cache_link_discord_username(name: str, discord_id: int, guild_id: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                UPDATE links SET discord_username = :n
+                WHERE discord_id = :d AND discord_server_id = :sid
+                """
+            ),
+            {"n": name, "d": discord_id, "sid": guild_id},
+        )
+
+
 @tasks.loop(seconds=5)  # Check every 5 seconds for fast response
 async def check_oauth_notifications_task():
     """Check for OAuth link success notifications and send Discord messages."""
     try:
-        with engine.begin() as conn:
-            # Get unprocessed notifications
-            notifications = conn.execute(
-                text(
-                    """
-                SELECT id, discord_id, kick_username, channel_id, message_id, discord_server_id, platform
-                FROM oauth_notifications
-                WHERE processed = FALSE AND kick_username != ''
-                ORDER BY created_at ASC
-                LIMIT 10
-            """
-                )
-            ).fetchall()
+        # The 5-second poll is usually empty; keep even that round-trip off the loop.
+        notifications = await db_executor.run(None, _fetch_pending_oauth_notifications)
+
+        for (
+            notification_id,
+            discord_id,
+            kick_username,
+            channel_id,
+            message_id,
+            guild_id,
+            link_platform,
+        ) in notifications:
+            # Tag this notification's logging with its server.
+            _g = bot.get_guild(int(guild_id)) if guild_id else None
+            set_server(guild_id, _g.name if _g else None)
+            try:
+                # Check if this is a failed attempt (kick_username starts with "FAILED:")
+                is_failed = kick_username.startswith("FAILED:")
+                actual_kick_username = None
+                error_message = None
+
+                if is_failed:
+                    # Parse failed attempt: "FAILED:<username>:<error>"
+                    parts = kick_username.split(":", 2)
+                    actual_kick_username = parts[1] if len(parts) > 1 else "unknown"
+                    error_type = parts[2] if len(parts) > 2 else "unknown_error"
+
+                    if error_type == "already_linked":
+                        error_message = "This Kick account is already linked to another Discord user"
+                    else:
+                        error_message = f"Error: {error_type}"
+                else:
+                    actual_kick_username = kick_username
 
-            for (
-                notification_id,
-                discord_id,
-                kick_username,
-                channel_id,
-                message_id,
-                guild_id,
-                link_platform,
-            ) in notifications:
-                # Tag this notification's logging with its server.
-                _g = bot.get_guild(int(guild_id)) if guild_id else None
-                set_server(guild_id, _g.name if _g else None)
-                try:
-                    # Check if this is a failed attempt (kick_username starts with "FAILED:")
-                    is_failed = kick_username.startswith("FAILED:")
-                    actual_kick_username = None
-                    error_message = None
+                # Delete the original "Link with Kick OAuth" message if we have the IDs
+                if channel_id and message_id:
+                    try:
+                        channel = bot.get_channel(int(channel_id))
+                        if channel:
+                            try:
+                                original_message = await channel.fetch_message(int(message_id))
+                                await original_message.delete()
+                                logger.info(f"🗑️ Deleted original OAuth message")
+                            except (discord.NotFound, discord.Forbidden):
+                                pass
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not delete original message: {e}")
 
+                # Get the user
+                user = await bot.fetch_user(int(discord_id))
+                if user:
+                    # Platform-aware label (Twitch links share this path).
+                    _plat_label = "Twitch" if link_platform == "twitch" else "Kick"
                     if is_failed:
-                        # Parse failed attempt: "FAILED:<username>:<error>"
-                        parts = kick_username.split(":", 2)
-                        actual_kick_username = parts[1] if len(parts) > 1 else "unknown"
-                        error_type = parts[2] if len(parts) > 2 else "unknown_error"
-
-                        if error_type == "already_linked":
-                            error_message = "This Kick account is already linked to another Discord user"
-                        else:
-                            error_message = f"Error: {error_type}"
+                        # Send failure message via DM
+                        try:
+                            await user.send(
+                                f"❌ **Link Failed**\n\n{error_message}\n\n{_plat_label} account: **{actual_kick_username}**"
+                            )
+                        except discord.Forbidden:
+                            pass  # User has DMs disabled
+
+                        # Log the failed attempt
+                        await log_link_attempt(
+                            user,
+                            actual_kick_username,
+                            success=False,
+                            error_message=error_message,
+                            guild_id=guild_id,
+                            platform=link_platform,
+                        )
                     else:
-                        actual_kick_username = kick_username
-
-                    # Delete the original "Link with Kick OAuth" message if we have the IDs
-                    if channel_id and message_id:
+                        # Immediately cache the Discord display name on the
+                        # new link row(s) so the dashboard has it without
+                        # waiting for the periodic backfill. Best-effort.
                         try:
-                            channel = bot.get_channel(int(channel_id))
-                            if channel:
-                                try:
-                                    original_message = await channel.fetch_message(int(message_id))
-                                    await original_message.delete()
-                                    logger.info(f"🗑️ Deleted original OAuth message")
-                                except (discord.NotFound, discord.Forbidden):
-                                    pass
-                        except Exception as e:
-                            logger.warning(f"⚠️ Could not delete original message: {e}")
-
-                    # Get the user
-                    user = await bot.fetch_user(int(discord_id))
-                    if user:
-                        # Platform-aware label (Twitch links share this path).
-                        _plat_label = "Twitch" if link_platform == "twitch" else "Kick"
-                        if is_failed:
-                            # Send failure message via DM
-                            try:
-                                await user.send(
-                                    f"❌ **Link Failed**\n\n{error_message}\n\n{_plat_label} account: **{actual_kick_username}**"
+                            _dname = getattr(user, "global_name", None) or user.name
+                            if _dname and guild_id:
+                                await db_executor.run(
+                                    guild_id, _cache_link_discord_username, _dname, int(discord_id), int(guild_id)
                                 )
-                            except discord.Forbidden:
-                                pass  # User has DMs disabled
-
-                            # Log the failed attempt
-                            await log_link_attempt(
-                                user,
-                                actual_kick_username,
-                                success=False,
-                                error_message=error_message,
-                                guild_id=guild_id,
-                                platform=link_platform,
+                        except Exception as _name_err:
+                            logger.debug(f"[DiscordNames] immediate cache skipped: {_name_err}")
+
+                        # The OAuth server wrote the link in its own process.
+                        if guild_id:
+                            identity_index.invalidate(int(guild_id))
+                            # Watchtime earned before linking: grant its roles now, not at
+                            # the next reconcile.
+                            _link_guild = bot.get_guild(int(guild_id))
+                            if _link_guild:
+                                try:
+                                    await queue_member_watchtime_roles(_link_guild, int(discord_id))
+                                except Exception as _role_err:
+                                    logger.warning(f"⚠️ Could not queue watchtime roles for new link: {_role_err}")
+
+                        # Send success message via DM
+                        try:
+                            await user.send(
+                                f"✅ **Verification Successful!**\n\nYour Discord account has been linked to {_plat_label} account **{actual_kick_username}**."
                             )
-                        else:
-                            # Immediately cache the Discord display name on the
-                            # new link row(s) so the dashboard has it without
-                            # waiting for the periodic backfill. Best-effort.
-                            try:
-                                _dname = getattr(user, "global_name", None) or user.name
-                                if _dname and guild_id:
-                                    with engine.begin() as _conn:
-                                        _conn.execute(
-                                            text(
-                                                """
-                                                UPDATE links SET discord_username = :n
-                                                WHERE discord_id = :d AND discord_server_id = :sid
-                                                """
+                        except discord.Forbidden:
+                            # If DM fails, try to find a guild channel
+                            # Multiserver: Try all guilds where the user is a member
+                            for guild in bot.guilds:
+                                if not guild:
+                                    continue
+                                member = guild.get_member(int(discord_id))
+                                if member:
+                                    # Try to send in the same channel as original message, or system channel
+                                    target_channel = bot.get_channel(int(channel_id)) if channel_id else None
+                                    if not target_channel or not target_channel.permissions_for(guild.me).send_messages:
+                                        target_channel = guild.system_channel or next(
+                                            (
+                                                ch
+                                                for ch in guild.text_channels
+                                                if ch.permissions_for(guild.me).send_messages
                                             ),
-                                            {"n": _dname, "d": int(discord_id), "sid": int(guild_id)},
+                                            None,
                                         )
-                            except Exception as _name_err:
-                                logger.debug(f"[DiscordNames] immediate cache skipped: {_name_err}")
 
-                            # Send success message via DM
+                                    if target_channel:
+                                        await target_channel.send(
+                                            f"{member.mention} ✅ **Verification Successful!** Your account has been linked to {_plat_label} **{actual_kick_username}**."
+                                        )
+
+                        # Log the successful link attempt
+                        await log_link_attempt(
+                            user, actual_kick_username, success=True, guild_id=guild_id, platform=link_platform
+                        )
+
+                        # Grant linked role if configured
+                        if guild_id:
                             try:
-                                await user.send(
-                                    f"✅ **Verification Successful!**\n\nYour Discord account has been linked to {_plat_label} account **{actual_kick_username}**."
+                                logger.info(
+                                    f"🔍 Attempting to grant linked role for guild_id={guild_id}, discord_id={discord_id}"
                                 )
-                            except discord.Forbidden:
-                                # If DM fails, try to find a guild channel
-                                # Multiserver: Try all guilds where the user is a member
-                                for guild in bot.guilds:
-                                    if not guild:
-                                        continue
+                                guild = bot.get_guild(int(guild_id))
+                                if not guild:
+                                    logger.warning(f"⚠️ Guild {guild_id} not found in bot")
+                                else:
                                     member = guild.get_member(int(discord_id))
-                                    if member:
-                                        # Try to send in the same channel as original message, or system channel
-                                        target_channel = bot.get_channel(int(channel_id)) if channel_id else None
-                                        if (
-                                            not target_channel
-                                            or not target_channel.permissions_for(guild.me).send_messages
-                                        ):
-                                            target_channel = guild.system_channel or next(
-                                                (
-                                                    ch
-                                                    for ch in guild.text_channels
-                                                    if ch.permissions_for(guild.me).send_messages
-                                                ),
-                                                None,
+                                    if not member:
+                                        logger.warning(f"⚠️ Member {discord_id} not found in guild {guild.name}")
+                                    else:
+                                        # Get linked role ID from bot_settings — platform-aware
+                                        # (twitch_linked_role_id for Twitch links, else kick_linked_role_id).
+                                        role_setting_key = (
+                                            "twitch_linked_role_id"
+                                            if link_platform == "twitch"
+                                            else "kick_linked_role_id"
+                                        )
+                                        try:
+                                            linked_role_id = await db_executor.run(
+                                                guild_id, _fetch_bot_setting, guild_id, role_setting_key
                                             )
-
-                                        if target_channel:
-                                            await target_channel.send(
-                                                f"{member.mention} ✅ **Verification Successful!** Your account has been linked to {_plat_label} **{actual_kick_username}**."
+                                            logger.info(
+                                                f"📋 Linked role ID ({role_setting_key}) from DB: {linked_role_id!r}"
                                             )
+                                        except Exception as query_err:
+                                            logger.error(f"❌ Failed to query linked role ID: {query_err}")
+                                            linked_role_id = None
 
-                            # Log the successful link attempt
-                            await log_link_attempt(
-                                user, actual_kick_username, success=True, guild_id=guild_id, platform=link_platform
-                            )
-
-                            # Grant linked role if configured
-                            if guild_id:
-                                try:
-                                    logger.info(
-                                        f"🔍 Attempting to grant linked role for guild_id={guild_id}, discord_id={discord_id}"
-                                    )
-                                    guild = bot.get_guild(int(guild_id))
-                                    if not guild:
-                                        logger.warning(f"⚠️ Guild {guild_id} not found in bot")
-                                    else:
-                                        member = guild.get_member(int(discord_id))
-                                        if not member:
-                                            logger.warning(f"⚠️ Member {discord_id} not found in guild {guild.name}")
-                                        else:
-                                            # Get linked role ID from bot_settings — platform-aware
-                                            # (twitch_linked_role_id for Twitch links, else kick_linked_role_id).
-                                            role_setting_key = (
-                                                "twitch_linked_role_id"
-                                                if link_platform == "twitch"
-                                                else "kick_linked_role_id"
-                                            )
+                                        if linked_role_id and linked_role_id.strip():
                                             try:
-                                                linked_role_id = conn.execute(
-                                                    text(
-                                                        """
-                                                        SELECT value FROM bot_settings
-                                                        WHERE key = :role_key AND discord_server_id = :guild_id
-                                                    """
-                                                    ),
-                                                    {"role_key": role_setting_key, "guild_id": guild_id},
-                                                ).scalar()
-                                                logger.info(
-                                                    f"📋 Linked role ID ({role_setting_key}) from DB: {linked_role_id!r}"
-                                                )
-                                            except Exception as query_err:
-                                                logger.error(f"❌ Failed to query linked role ID: {query_err}")
-                                                linked_role_id = None
-
-                                            if linked_role_id and linked_role_id.strip():
-                                                try:
-                                                    role = guild.get_role(int(linked_role_id))
-                                                    if not role:
-                                                        logger.warning(
-                                                            f"⚠️ Linked role ID {linked_role_id} not found in guild {guild.name}"
-                                                        )
-                                                    elif role in member.roles:
-                                                        logger.info(
-                                                            f"ℹ️ Member {member.display_name} already has role '{role.name}'"
-                                                        )
-                                                    else:
-                                                        _plat_label = "Twitch" if link_platform == "twitch" else "Kick"
-                                                        await member.add_roles(
-                                                            role,
-                                                            reason=f"Linked {_plat_label} account: {actual_kick_username}",
-                                                        )
-                                                        logger.info(
-                                                            f"✅ Granted role '{role.name}' to {member.display_name} for {_plat_label} link"
-                                                        )
-                                                except ValueError as val_err:
-                                                    logger.error(f"❌ Invalid role ID {linked_role_id}: {val_err}")
-                                            else:
-                                                logger.warning(f"⚠️ No linked role configured for guild {guild_id}")
-                                except Exception as role_error:
-                                    import traceback
+                                                role = guild.get_role(int(linked_role_id))
+                                                if not role:
+                                                    logger.warning(
+                                                        f"⚠️ Linked role ID {linked_role_id} not found in guild {guild.name}"
+                                                    )
+                                                elif role in member.roles:
+                                                    logger.info(
+                                                        f"ℹ️ Member {member.display_name} already has role '{role.name}'"
+                                                    )
+                                                else:
+                                                    _plat_label = "Twitch" if link_platform == "twitch" else "Kick"
+                                                    await member.add_roles(
+                                                        role,
+                                                        reason=f"Linked {_plat_label} account: {actual_kick_username}",
+                                                    )
+                                                    logger.info(
+                                                        f"✅ Granted role '{role.name}' to {member.display_name} for {_plat_label} link"
+                                                    )
+                                            except ValueError as val_err:
+                                                logger.error(f"❌ Invalid role ID {linked_role_id}: {val_err}")
+                                        else:
+                                            logger.warning(f"⚠️ No linked role configured for guild {guild_id}")
+                            except Exception as role_error:
+                                import traceback
 
-                                    logger.error(f"❌ Error granting linked role: {role_error}")
-                                    traceback.print_exc()
+                                logger.error(f"❌ Error granting linked role: {role_error}")
+                                traceback.print_exc()
 
-                    # Mark as processed
-                    conn.execute(
-                        text(
-                            """
-                        UPDATE oauth_notifications
-                        SET processed = TRUE
-                        WHERE id = :id
-                    """
-                        ),
-                        {"id": notification_id},
-                    )
+                # Mark as processed
+                await db_executor.run(guild_id, _mark_oauth_notification_processed, notification_id)
 
-                    logger.info(f"✅ Sent OAuth notification to Discord {discord_id}")
+                logger.info(f"✅ Sent OAuth notification to Discord {discord_id}")
 
-                except Exception as e:
-                    logger.error(f"⚠️ Error sending OAuth notification to {discord_id}: {e}")
-                    # Mark as processed anyway to avoid retry loops
-                    conn.execute(
-                        text(
-                            """
-                        UPDATE oauth_notifications
-                        SET processed = TRUE
-                        WHERE id = :id
-                    """
-                        ),
-                        {"id": notification_id},
-                    )
+            except Exception as e:
+                logger.error(f"⚠️ Error sending OAuth notification to {discord_id}: {e}")
+                # Mark as processed anyway to avoid retry loops
+                await db_executor.run(guild_id, _mark_oauth_notification_processed, notification_id)
 
     except Exception as e:
         logger.error(f"⚠️ Error in OAuth notifications task: {e}")
@@ -5405,7 +5158,7 @@ async def refresh_kick_oauth_token_for_user(user_id: int, kick_username: str, re
             "client_secret": KICK_CLIENT_SECRET,
         }
 
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(token_url, data=token_data, timeout=10) as response:
                 if response.status == 200:
                     token_response = await response.json()
@@ -5606,27 +5359,12 @@ async def clip_buffer_management_task():
             # Default True: only the explicit string 'false' disables auto-start.
             auto_start_buffer = True
 
-            with engine.connect() as conn:
-                settings = conn.execute(
-                    text(
-                        """
-                    SELECT key, value FROM bot_settings
-                    WHERE discord_server_id = :guild_id
-                    AND key IN ('kick_channel', 'dashboard_url', 'bot_api_key', 'clips_auto_start_on_live')
-                """
-                    ),
-                    {"guild_id": guild_id},
-                ).fetchall()
-
-                for key, value in settings:
-                    if key == "kick_channel":
-                        kick_channel = value
-                    elif key == "dashboard_url":
-                        dashboard_url = value
-                    elif key == "bot_api_key":
-                        bot_api_key = value
-                    elif key == "clips_auto_start_on_live":
-                        auto_start_buffer = str(value).lower() != "false"
+            settings = settings_store.guild_values(guild_id)
+            kick_channel = settings.get("kick_channel")
+            dashboard_url = settings.get("dashboard_url")
+            bot_api_key = settings.get("bot_api_key")
+            if "clips_auto_start_on_live" in settings:
+                auto_start_buffer = str(settings["clips_auto_start_on_live"]).lower() != "false"
 
             # Prefer the derived per-server base (servers.subdomain + public
             # domain); the stored dashboard_url is only a stale-prone fallback.
@@ -5677,7 +5415,7 @@ async def clip_buffer_management_task():
             if is_live and not clip_buffer_active and not should_start_buffer:
                 # Verify buffer status with dashboard
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         async with session.get(
                             f"{dashboard_url}/api/clips/buffer/status?channel={kick_channel}",
                             timeout=aiohttp.ClientTimeout(total=10),
@@ -5700,7 +5438,7 @@ async def clip_buffer_management_task():
             # Periodic verification: Even if we think buffer is active, verify with dashboard
             elif is_live and clip_buffer_active:
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         async with session.get(
                             f"{dashboard_url}/api/clips/buffer/status?channel={kick_channel}",
                             timeout=aiohttp.ClientTimeout(total=10),
@@ -5749,7 +5487,7 @@ async def clip_buffer_management_task():
                     logger.info(f"[Clip Buffer] ⚠️ Error fetching playback URL: {e}")
 
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         headers = {"X-API-Key": bot_api_key, "Content-Type": "application/json"}
                         payload = {"channel": kick_channel}
                         if playback_url:
@@ -5777,7 +5515,7 @@ async def clip_buffer_management_task():
             elif not is_live and last_stream_live_state:
                 logger.info(f"[Clip Buffer] 🔴 Stream went OFFLINE! Stopping clip buffer...")
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         headers = {"X-API-Key": bot_api_key, "Content-Type": "application/json"}
                         async with session.post(
                             f"{dashboard_url}/api/clips/buffer/stop",
@@ -5841,13 +5579,10 @@ async def before_clip_buffer_task():
 # ---------------------------------------------------------------------------
 def _lb_bot_settings(conn, server_id, keys):
     """Read per-server bot_settings for the given keys. Returns {key: value}."""
-    rows = conn.execute(
-        text("SELECT key, value FROM bot_settings WHERE discord_server_id = :sid AND key = ANY(:keys)"),
-        {"keys": list(keys), "sid": server_id},
-    ).fetchall()
+    values = settings_store.guild_values(server_id)
     out = {}
-    for k, v in rows:
-        val = (v or "").strip()
+    for k in keys:
+        val = (values.get(k) or "").strip()
         if val:
             out[k] = val
     return out
@@ -6086,6 +5821,97 @@ def _sync_active_leaderboard_baselines(conn, guild_id, now):
             _ensure_leaderboard_baselines(conn, pid, totals, identity)
 
 
+def _sync_guild_leaderboard(guild_id: int, now) -> None:
+    """One guild's leaderboard_sync_task tick (blocking; runs on db_executor)."""
+    with engine.begin() as conn:
+        # 0) Keep active shuffle periods' baselines seeded.
+        _sync_active_leaderboard_baselines(conn, guild_id, now)
+
+        period = conn.execute(
+            text(
+                """
+                SELECT id, start_date, end_date, winner_count, auto_renew,
+                       site, title, prize_pool, stats_url, join_code, cta_url
+                FROM wager_leaderboard_periods
+                WHERE discord_server_id = :sid
+                  AND status = 'active'
+                  AND end_date <= :now
+                ORDER BY end_date ASC
+                LIMIT 1
+                """
+            ),
+            {"sid": guild_id, "now": now},
+        ).fetchone()
+
+        if not period:
+            return
+
+        (
+            pid,
+            start_dt,
+            end_dt,
+            winner_count,
+            auto_renew,
+            site,
+            title,
+            prize_pool,
+            stats_url,
+            join_code,
+            cta_url,
+        ) = period
+
+        # 1) Freeze the finished period (platform-correct source).
+        count = _freeze_leaderboard_snapshot(conn, pid, guild_id, start_dt, end_dt, winner_count, site=site)
+        conn.execute(
+            text("UPDATE wager_leaderboard_periods " "SET status = 'ended', frozen_at = NOW() WHERE id = :pid"),
+            {"pid": pid},
+        )
+        logger.info(f"[Leaderboard] Froze period {pid} ({count} winners)")
+
+        # 2) Roll over if auto-renew is on. Back-to-back, same duration.
+        if auto_renew:
+            duration = end_dt - start_dt
+            new_start = end_dt
+            new_end = end_dt + duration
+            new_id = conn.execute(
+                text(
+                    """
+                    INSERT INTO wager_leaderboard_periods
+                        (discord_server_id, site, title, prize_pool, winner_count,
+                         start_date, end_date, stats_url, join_code, cta_url,
+                         auto_renew, status)
+                    VALUES (:sid, :site, :title, :pool, :wc, :start, :end,
+                            :stats, :join, :cta, TRUE, 'active')
+                    RETURNING id
+                    """
+                ),
+                {
+                    "sid": guild_id,
+                    "site": site,
+                    "title": title,
+                    "pool": prize_pool,
+                    "wc": winner_count,
+                    "start": new_start,
+                    "end": new_end,
+                    "stats": stats_url,
+                    "join": join_code,
+                    "cta": cta_url,
+                },
+            ).scalar()
+            # Copy the prize grid into the new period.
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO wager_leaderboard_prizes (period_id, rank, amount)
+                    SELECT :new_id, rank, amount
+                    FROM wager_leaderboard_prizes WHERE period_id = :old_id
+                    """
+                ),
+                {"new_id": new_id, "old_id": pid},
+            )
+            logger.info(f"[Leaderboard] Auto-renewed period {pid} -> {new_id}")
+
+
 @tasks.loop(minutes=2)
 async def leaderboard_sync_task():
     """Keep leaderboard periods current: snapshot shuffle baselines for active
@@ -6099,93 +5925,7 @@ async def leaderboard_sync_task():
         guild_id = guild.id
         set_server(guild_id, guild.name)
         try:
-            with engine.begin() as conn:
-                # 0) Keep active shuffle periods' baselines seeded.
-                _sync_active_leaderboard_baselines(conn, guild_id, now)
-
-                period = conn.execute(
-                    text(
-                        """
-                        SELECT id, start_date, end_date, winner_count, auto_renew,
-                               site, title, prize_pool, stats_url, join_code, cta_url
-                        FROM wager_leaderboard_periods
-                        WHERE discord_server_id = :sid
-                          AND status = 'active'
-                          AND end_date <= :now
-                        ORDER BY end_date ASC
-                        LIMIT 1
-                        """
-                    ),
-                    {"sid": guild_id, "now": now},
-                ).fetchone()
-
-                if not period:
-                    continue
-
-                (
-                    pid,
-                    start_dt,
-                    end_dt,
-                    winner_count,
-                    auto_renew,
-                    site,
-                    title,
-                    prize_pool,
-                    stats_url,
-                    join_code,
-                    cta_url,
-                ) = period
-
-                # 1) Freeze the finished period (platform-correct source).
-                count = _freeze_leaderboard_snapshot(conn, pid, guild_id, start_dt, end_dt, winner_count, site=site)
-                conn.execute(
-                    text("UPDATE wager_leaderboard_periods " "SET status = 'ended', frozen_at = NOW() WHERE id = :pid"),
-                    {"pid": pid},
-                )
-                logger.info(f"[Leaderboard] Froze period {pid} ({count} winners)")
-
-                # 2) Roll over if auto-renew is on. Back-to-back, same duration.
-                if auto_renew:
-                    duration = end_dt - start_dt
-                    new_start = end_dt
-                    new_end = end_dt + duration
-                    new_id = conn.execute(
-                        text(
-                            """
-                            INSERT INTO wager_leaderboard_periods
-                                (discord_server_id, site, title, prize_pool, winner_count,
-                                 start_date, end_date, stats_url, join_code, cta_url,
-                                 auto_renew, status)
-                            VALUES (:sid, :site, :title, :pool, :wc, :start, :end,
-                                    :stats, :join, :cta, TRUE, 'active')
-                            RETURNING id
-                            """
-                        ),
-                        {
-                            "sid": guild_id,
-                            "site": site,
-                            "title": title,
-                            "pool": prize_pool,
-                            "wc": winner_count,
-                            "start": new_start,
-                            "end": new_end,
-                            "stats": stats_url,
-                            "join": join_code,
-                            "cta": cta_url,
-                        },
-                    ).scalar()
-                    # Copy the prize grid into the new period.
-                    conn.execute(
-                        text(
-                            """
-                            INSERT INTO wager_leaderboard_prizes (period_id, rank, amount)
-                            SELECT :new_id, rank, amount
-                            FROM wager_leaderboard_prizes WHERE period_id = :old_id
-                            """
-                        ),
-                        {"new_id": new_id, "old_id": pid},
-                    )
-                    logger.info(f"[Leaderboard] Auto-renewed period {pid} -> {new_id}")
+            await db_executor.run(guild_id, _sync_guild_leaderboard, guild_id, now, label="leaderboard_sync")
         except Exception as e:
             # Fail safe: skip this guild and retry next tick. Never end/create
             # from a partial read (the raffle period-rollover lesson).
@@ -6374,6 +6114,7 @@ async def cmd_unlink(ctx, member: discord.Member = None):
             text("DELETE FROM pending_links WHERE discord_id = :d AND discord_server_id = :guild_id"),
             {"d": discord_id, "guild_id": guild_id},
         )
+    identity_index.on_unlink(guild_id, discord_id, "kick")
 
     await ctx.send(
         f"🔓 Admin action: {member.mention}'s Kick account **{kick_name}** has been unlinked.\n"
@@ -6713,6 +6454,7 @@ async def cmd_update_kick(ctx, member: discord.Member, new_kick_username: str):
         )
         if result.rowcount > 0:
             tables_updated.append(f"raffle_shuffle_wagers ({result.rowcount})")
+    identity_index.invalidate(guild_id)
 
     await status_msg.edit(
         content=f"✅ Updated {member.mention}'s Kick username:\n"
@@ -6746,16 +6488,7 @@ async def cmd_grant_link_role(ctx, member: discord.Member = None):
     guild_id = ctx.guild.id if ctx.guild else None
 
     # Get the configured linked role ID
-    with engine.connect() as conn:
-        linked_role_id = conn.execute(
-            text(
-                """
-                SELECT value FROM bot_settings
-                WHERE key = 'kick_linked_role_id' AND discord_server_id = :guild_id
-            """
-            ),
-            {"guild_id": guild_id},
-        ).scalar()
+    linked_role_id = settings_store.get(guild_id, "kick_linked_role_id") if guild_id else None
 
     if not linked_role_id or not linked_role_id.strip():
         await ctx.send("❌ No linked role configured. Set it in Dashboard → Profile Settings → Kick Link Settings.")
@@ -7835,6 +7568,55 @@ async def fix_watchtime_for_current_period_error(ctx, error):
         await ctx.send("❌ You need administrator permissions to use this command.")
 
 
+@bot.command(name="reconcileconversions", aliases=["checkconversions"])
+@commands.has_permissions(administrator=True)
+async def reconcile_conversions(ctx, action: str = None):
+    """
+    [ADMIN] Check the points/raffle conversion running totals against their logs
+    Usage: !reconcileconversions        - report drift for this server
+           !reconcileconversions fix    - rebuild this server's totals from the logs
+    """
+    if not engine:
+        await ctx.send("❌ Database not initialized!")
+        return
+
+    repair = (action or "").lower() in ("fix", "repair", "rebuild")
+
+    try:
+        report = await asyncio.to_thread(reconcile_conversion_totals, engine, ctx.guild.id, repair)
+
+        in_sync = all(result["drift"] == 0 for result in report.values())
+        embed = discord.Embed(
+            title="✅ Conversion Totals In Sync" if in_sync else "⚠️ Conversion Totals Drift",
+            description="Running totals compared against points_watchtime_converted / raffle_watchtime_converted",
+            color=discord.Color.green() if in_sync else discord.Color.orange(),
+            timestamp=datetime.utcnow(),
+        )
+        for ledger, result in report.items():
+            lines = [f"Mismatched users: **{result['drift']}**"]
+            for row in result["sample"][:5]:
+                lines.append(
+                    f"`{row['username']}` log {row['logged_minutes']}m vs total {row['materialized_minutes']}m"
+                )
+            if repair and result["drift"]:
+                lines.append(f"🔧 Rebuilt {result['rebuilt']} row(s)")
+            embed.add_field(name=ledger.title(), value="\n".join(lines), inline=False)
+
+        if not in_sync and not repair:
+            embed.set_footer(text="Run !reconcileconversions fix to rebuild from the logs")
+
+        await ctx.send(embed=embed)
+
+    except Exception as e:
+        await ctx.send(f"❌ Error: {str(e)}")
+
+
+@reconcile_conversions.error
+async def reconcile_conversions_error(ctx, error):
+    if isinstance(error, commands.MissingPermissions):
+        await ctx.send("❌ You need administrator permissions to use this command.")
+
+
 @bot.command(name="checkwatchtime")
 async def check_watchtime_conversion(ctx, kick_username: str = None):
     """
@@ -8038,7 +7820,8 @@ async def admin_command_list(ctx):
             "`!rafflegive <@user> <amount> [reason]` - Award tickets\n"
             "`!raffleremove <@user> <amount> [reason]` - Remove tickets\n"
             "`!convertwatchtime` - Manually convert watchtime\n"
-            "`!fixwatchtime` - Fix watchtime tracking"
+            "`!fixwatchtime` - Fix watchtime tracking\n"
+            "`!reconcileconversions [fix]` - Check/rebuild conversion totals"
         ),
         inline=False,
     )
@@ -8299,6 +8082,8 @@ async def health_check(ctx):
     - OAuth configuration
     - Background tasks status
     - WebSocket connection
+    - Custom command latency
+    - Twitch app-token client usage
     """
 
     embed = discord.Embed(title="🏥 System Health Check", description="Checking all bot systems...", color=0x3498DB)
@@ -8463,6 +8248,25 @@ async def health_check(ctx):
         minutes, seconds = divmod(remainder, 60)
         checks.append(f"⏱️ **Uptime**: {hours}h {minutes}m {seconds}s")
 
+    # 9. Custom command latency (recent sample window)
+    commands_manager = getattr(bot, "custom_commands_managers", {}).get(ctx.guild.id) if ctx.guild else None
+    latency = commands_manager.get_latency_stats() if commands_manager else {}
+    if latency:
+        slowest, worst = max(latency.items(), key=lambda item: item[1]["p99_ms"])
+        checks.append(
+            f"📊 **Custom Commands**: {sum(stats['count'] for stats in latency.values())} recent runs, "
+            f"slowest p99 !{slowest} {worst['p99_ms']}ms (p50 {worst['p50_ms']}ms), variable cache "
+            f"{commands_manager.cache_hits} hits / {commands_manager.cache_misses} misses"
+        )
+
+    # 10. Twitch app-token client (token refreshes vs sends since startup)
+    twitch_stats = twitch_app_client_stats()
+    if twitch_stats:
+        checks.append(
+            f"🟣 **Twitch API**: {twitch_stats['sends']} chat sends, {twitch_stats['requests']} Helix requests, "
+            f"{twitch_stats['token_refreshes']} token refreshes ({twitch_stats['reauths']} after a 401)"
+        )
+
     # Determine overall status
     if has_errors:
         overall_status = "❌ System Issues Detected"
@@ -8759,19 +8563,7 @@ async def on_ready():
             set_server(guild.id, guild.name)  # tag this guild's iteration logging
             kick_channel = None
             try:
-                with engine.connect() as conn:
-                    row = conn.execute(
-                        text(
-                            """
-                        SELECT value FROM bot_settings
-                        WHERE key = 'kick_channel' AND discord_server_id = :gid
-                        LIMIT 1
-                    """
-                        ),
-                        {"gid": guild.id},
-                    ).fetchone()
-                    if row and row[0]:
-                        kick_channel = row[0]
+                kick_channel = settings_store.get(guild.id, "kick_channel") or None
             except Exception as e:
                 logger.info(f"⚠️ Error loading kick_channel: {e}")
 
@@ -8787,19 +8579,7 @@ async def on_ready():
             set_server(guild.id, guild.name)  # tag this guild's iteration logging
             kick_channel = None
             try:
-                with engine.connect() as conn:
-                    row = conn.execute(
-                        text(
-                            """
-                        SELECT value FROM bot_settings
-                        WHERE key = 'kick_channel' AND discord_server_id = :gid
-                        LIMIT 1
-                    """
-                        ),
-                        {"gid": guild.id},
-                    ).fetchone()
-                    if row and row[0]:
-                        kick_channel = row[0]
+                kick_channel = settings_store.get(guild.id, "kick_channel") or None
             except Exception as e:
                 logger.info(f"⚠️ Error loading kick_channel: {e}")
 
@@ -8889,7 +8669,10 @@ async def on_ready():
                     ADD COLUMN IF NOT EXISTS client_seed TEXT,
                     ADD COLUMN IF NOT EXISTS nonce TEXT,
                     ADD COLUMN IF NOT EXISTS proof_hash TEXT,
-                    ADD COLUMN IF NOT EXISTS random_value NUMERIC(5,2)
+                    ADD COLUMN IF NOT EXISTS random_value NUMERIC(5,2),
+                    ADD COLUMN IF NOT EXISTS winning_ticket BIGINT,
+                    ADD COLUMN IF NOT EXISTS total_tickets BIGINT,
+                    ADD COLUMN IF NOT EXISTS draw_algorithm TEXT
                 """
                     )
                 )
@@ -8935,6 +8718,8 @@ async def on_ready():
         clear_server()
 
         # Start background tasks (guarded: tasks already check is_running())
+        loop_lag_monitor.start()
+
         if not update_watchtime_task.is_running():
             update_watchtime_task.start()
             logger.debug("✅ Watchtime updater started")
@@ -9004,6 +8789,9 @@ async def on_ready():
             # Enforce one active raffle period per server (safety net behind the
             # transient-DB-error fix). Must run before the per-guild loop below.
             migrate_one_active_period_per_server(engine)
+            # Running per-(period, user) totals for raffle_watchtime_converted; the
+            # watchtime converter reads these. Needs raffle_periods (created above).
+            migrate_add_raffle_conversion_totals(engine)
 
             # Initialize per-guild trackers and managers (without adding cogs yet)
             for guild in bot.guilds:
@@ -9279,8 +9067,10 @@ async def on_ready():
 
             # Setup timed messages system with per-guild instances.
             # Platform-aware: send_stream_message fans out to the server's active
-            # platform(s); each platform sender no-ops if that platform isn't set up.
-            timed_messages_managers = await setup_timed_messages(bot, engine, kick_send_callback=send_stream_message)
+            # platform(s); timed messages take the lowest chat_outbox priority.
+            timed_messages_managers = await setup_timed_messages(
+                bot, engine, kick_send_callback=partial(send_stream_message, priority=PRIORITY_TIMED)
+            )
             # Store as bot attribute for Redis subscriber and commands
             bot.timed_messages_managers = timed_messages_managers
 
@@ -10092,6 +9882,7 @@ async def fixlinks_backfill(ctx):
                 {"sid": DISCORD_GUILD_ID},
             )
 
+            identity_index.invalidate()
             await ctx.send(
                 f"✅ **Backfill Complete**\n" f"Updated {missing_count} rows with server ID `{DISCORD_GUILD_ID}`"
             )
@@ -10221,6 +10012,7 @@ async def fixlinks_resolve(ctx, kick_name: str, keep_server_id: int):
             ).fetchall()
 
             deleted_info = ", ".join([f"Server {r[0]} (<@{r[1]}>)" for r in deleted])
+            identity_index.invalidate()
 
             await ctx.send(
                 f"✅ **Duplicate Resolved**\n"
@@ -11131,231 +10923,6 @@ class ShopLayoutView(discord.ui.LayoutView):
         return cls(items=[], force_select=True)
 
 
-async def create_shop_mosaic_image(items, max_width=2400):
-    """Create a grid mosaic image from shop item images, preserving original aspect ratios
-
-    Layout per item:
-    ┌─────────────┐
-    │ Item Name   │  <- Title above image (no number)
-    ├─────────────┤
-    │   IMAGE     │  <- Much larger, high quality image
-    │             │
-    ├─────────────┤
-    │ 500 pts     │  <- Bigger price
-    │ In-stock: 10│  <- Full stock text
-    └─────────────┘
-
-    Args:
-        items: List of shop items
-        max_width: Maximum width of the entire mosaic (default 2400px for very large images)
-    """
-    import io
-    import math
-
-    import aiohttp
-    from PIL import Image, ImageDraw, ImageFont
-
-    # Filter items with images
-    items_with_images = [(i, item) for i, item in enumerate(items) if item[5]]  # item[5] is image_url
-
-    if not items_with_images:
-        return None
-
-    # Settings - VERY LARGE sizes for maximum visibility
-    COLS = min(len(items_with_images), 3)  # Max 3 columns
-    PADDING = 30
-    TITLE_HEIGHT = 100  # Title above image
-    FOOTER_HEIGHT = 210  # Price + stock below image
-    # Sized so text stays readable after Discord downscales the 2400px canvas ~4x to chat width
-    TITLE_FONT_SIZE = 64
-    PRICE_FONT_SIZE = 72
-    STOCK_FONT_SIZE = 52
-    BG_COLOR = (30, 30, 35)
-    TITLE_BG_COLOR = (45, 45, 55)
-    FOOTER_BG_COLOR = (50, 50, 60)
-    TEXT_COLOR = (255, 255, 255)
-    PRICE_COLOR = (255, 215, 0)  # Gold for price
-    STOCK_COLOR = (100, 200, 100)  # Green for stock
-    SOLDOUT_COLOR = (255, 100, 100)  # Red for sold out
-
-    # Calculate cell width based on max_width and columns (very large cells)
-    cell_width = (max_width - (COLS + 1) * PADDING) // COLS
-
-    # Try to load fonts - prefer bold/semi-bold for titles
-    try:
-        title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", TITLE_FONT_SIZE)
-        price_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", PRICE_FONT_SIZE)
-        stock_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", STOCK_FONT_SIZE)
-    except:
-        try:
-            title_font = ImageFont.truetype("arialbd.ttf", TITLE_FONT_SIZE)  # Arial Bold
-            price_font = ImageFont.truetype("arialbd.ttf", PRICE_FONT_SIZE)
-            stock_font = ImageFont.truetype("arial.ttf", STOCK_FONT_SIZE)
-        except:
-            try:
-                title_font = ImageFont.truetype("arial.ttf", TITLE_FONT_SIZE)
-                price_font = ImageFont.truetype("arial.ttf", PRICE_FONT_SIZE)
-                stock_font = ImageFont.truetype("arial.ttf", STOCK_FONT_SIZE)
-            except:
-                title_font = ImageFont.load_default()
-                price_font = title_font
-                stock_font = title_font
-
-    # First pass: download all images and calculate row heights
-    downloaded_images = []
-    async with aiohttp.ClientSession() as session:
-        for item_idx, item in items_with_images:
-            item_id, name, description, price, stock, image_url, is_active, requirement_title, requirement_footer = (
-                item[:9]
-            )
-
-            try:
-                async with session.get(image_url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
-                    if resp.status == 200:
-                        img_data = await resp.read()
-                        img = Image.open(io.BytesIO(img_data))
-
-                        # Convert to RGB if necessary
-                        if img.mode in ("RGBA", "P"):
-                            bg = Image.new("RGB", img.size, BG_COLOR)
-                            if img.mode == "P":
-                                img = img.convert("RGBA")
-                            bg.paste(img, mask=img.split()[3] if len(img.split()) > 3 else None)
-                            img = bg
-                        elif img.mode != "RGB":
-                            img = img.convert("RGB")
-
-                        # Scale image to fit cell width while preserving aspect ratio
-                        orig_w, orig_h = img.size
-                        scale = cell_width / orig_w
-                        new_h = int(orig_h * scale)
-                        img = img.resize((cell_width, new_h), Image.Resampling.LANCZOS)
-
-                        downloaded_images.append((item_idx, item, img))
-                    else:
-                        downloaded_images.append((item_idx, item, None))
-            except Exception as e:
-                logger.info(f"[Point Shop Mosaic] Failed to load image for {name}: {e}")
-                downloaded_images.append((item_idx, item, None))
-
-    if not downloaded_images:
-        return None
-
-    # Group into rows and calculate height per row
-    rows_data = [downloaded_images[i : i + COLS] for i in range(0, len(downloaded_images), COLS)]
-    row_heights = []
-
-    for row in rows_data:
-        # Find max image height in this row
-        max_img_height = 0
-        for item_idx, item, img in row:
-            if img:
-                max_img_height = max(max_img_height, img.size[1])
-            else:
-                max_img_height = max(max_img_height, 500)  # Very large placeholder height
-        row_heights.append(max_img_height)
-
-    # Calculate total canvas size (title + image + footer per row)
-    total_height = PADDING
-    for rh in row_heights:
-        total_height += TITLE_HEIGHT + rh + FOOTER_HEIGHT + PADDING
-
-    canvas_width = COLS * cell_width + (COLS + 1) * PADDING
-    canvas = Image.new("RGB", (canvas_width, total_height), BG_COLOR)
-    draw = ImageDraw.Draw(canvas)
-
-    # Second pass: place images on canvas
-    current_y = PADDING
-    for row_idx, row in enumerate(rows_data):
-        row_height = row_heights[row_idx]
-
-        for col_idx, (item_idx, item, img) in enumerate(row):
-            item_id, name, description, price, stock, image_url, is_active, requirement_title, requirement_footer = (
-                item[:9]
-            )
-
-            x = PADDING + col_idx * (cell_width + PADDING)
-
-            # Draw TITLE background (above image)
-            draw.rectangle([x, current_y, x + cell_width, current_y + TITLE_HEIGHT], fill=TITLE_BG_COLOR)
-
-            # Draw item title (no item number, just the name), trimmed by
-            # measured width so it can't overflow the cell at any font size
-            name_text = name
-            if draw.textlength(name_text, font=title_font) > cell_width - 20:
-                while name_text and draw.textlength(name_text + "…", font=title_font) > cell_width - 20:
-                    name_text = name_text[:-1]
-                name_text += "…"
-            # Center the title text in its band
-            bbox = draw.textbbox((0, 0), name_text, font=title_font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            text_x = x + (cell_width - text_width) // 2
-            text_y = current_y + (TITLE_HEIGHT - text_height) // 2 - bbox[1]
-            draw.text((text_x, text_y), name_text, fill=TEXT_COLOR, font=title_font)
-
-            # IMAGE area starts after title
-            img_y = current_y + TITLE_HEIGHT
-
-            if img:
-                # Center image vertically in its cell if shorter than row height
-                img_h = img.size[1]
-                y_offset = (row_height - img_h) // 2
-                canvas.paste(img, (x, img_y + y_offset))
-
-                # Draw sold out overlay if applicable
-                if stock == 0:
-                    overlay = Image.new("RGBA", img.size, (0, 0, 0, 150))
-                    composited = Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
-                    canvas.paste(composited, (x, img_y + y_offset))
-
-                    # Draw "SOLD OUT" text centered on image
-                    sold_text = "SOLD OUT"
-                    bbox = draw.textbbox((0, 0), sold_text, font=price_font)
-                    tw = bbox[2] - bbox[0]
-                    th = bbox[3] - bbox[1]
-                    draw.text(
-                        (x + (cell_width - tw) // 2, img_y + y_offset + (img_h - th) // 2),
-                        sold_text,
-                        fill=SOLDOUT_COLOR,
-                        font=price_font,
-                    )
-            else:
-                # Draw placeholder
-                draw.rectangle([x, img_y, x + cell_width, img_y + row_height], fill=(60, 60, 70))
-                draw.text((x + 10, img_y + row_height // 2), "No Image", fill=TEXT_COLOR, font=title_font)
-
-            # Draw FOOTER background (below image)
-            footer_y = img_y + row_height
-            draw.rectangle([x, footer_y, x + cell_width, footer_y + FOOTER_HEIGHT], fill=FOOTER_BG_COLOR)
-
-            # Line 1: Price (big, gold)
-            price_text = f"{price:,} pts"
-            draw.text((x + 10, footer_y + 18), price_text, fill=PRICE_COLOR, font=price_font)
-
-            # Line 2: Stock text
-            if stock < 0:
-                stock_text = "In-stock: ∞"
-                stock_color = STOCK_COLOR
-            elif stock == 0:
-                stock_text = "In-stock: SOLD OUT"
-                stock_color = SOLDOUT_COLOR
-            else:
-                stock_text = f"In-stock: {stock}"
-                stock_color = STOCK_COLOR
-
-            draw.text((x + 10, footer_y + 115), stock_text, fill=stock_color, font=stock_font)
-
-        current_y += TITLE_HEIGHT + row_height + FOOTER_HEIGHT + PADDING
-
-    # Save to bytes with high quality
-    output = io.BytesIO()
-    canvas.save(output, format="PNG", optimize=False)  # No optimization for better quality
-    output.seek(0)
-
-    return output
-
-
 async def post_point_shop_to_discord(
     bot, guild_id: int = None, channel_id: int = None, update_existing: bool = True, use_components_v2: bool = True
 ):
@@ -0,0 +1,187 @@
+"""
+Per-Channel Event Dispatcher
+Runs Redis pub/sub handlers on independent worker lanes per channel.
+
+redis_subscriber.py used to await every handler inline in its listen loop, so a
+slow raffle draw or shop render on one dashboard channel held up Twitch chat
+arriving on bot_events. Events are now submitted here instead:
+
+- Each channel gets its own set of worker lanes (REDIS_SUB_CONCURRENCY, default
+  2, overridable per channel with REDIS_SUB_CHANNEL_CONCURRENCY, e.g.
+  "bot_events=8,dashboard:raffle=1"), so channels never wait on each other.
+- Events carrying the same key (the guild id) always land on the same lane, so
+  a guild's events are still handled in the order they were published.
+- Queue lag (publish to handler start) and handler duration are tracked per
+  channel and logged every STATS_LOG_EVERY events.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from utils.percentiles import percentile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("REDIS_SUB_CONCURRENCY", "2"))
+
+# Chat forwarded from the webhook process is the latency-sensitive channel.
+DEFAULT_CHANNEL_CONCURRENCY = {"bot_events": 8}
+
+# Events buffered per lane before the oldest is dropped.
+LANE_QUEUE_SIZE = 1000
+
+LATENCY_SAMPLE_WINDOW = 500
+STATS_LOG_EVERY = 200
+
+
+def parse_channel_concurrency(raw: Optional[str]) -> Dict[str, int]:
+    """Parse "channel=n,channel=n" into a dict, ignoring malformed entries."""
+    result = dict(DEFAULT_CHANNEL_CONCURRENCY)
+    for part in (raw or "").split(","):
+        channel, _, value = part.strip().rpartition("=")
+        if channel and value.isdigit() and int(value) > 0:
+            result[channel] = int(value)
+    return result
+
+
+class _ChannelStats:
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.lag_ms = deque(maxlen=LATENCY_SAMPLE_WINDOW)
+        self.handler_ms = deque(maxlen=LATENCY_SAMPLE_WINDOW)
+
+    def snapshot(self, queue_depth):
+        lag, handler = list(self.lag_ms), list(self.handler_ms)
+        return {
+            "queue_depth": queue_depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "lag_p50_ms": round(percentile(lag, 50), 2) if lag else None,
+            "lag_p99_ms": round(percentile(lag, 99), 2) if lag else None,
+            "handler_p50_ms": round(percentile(handler, 50), 2) if handler else None,
+            "handler_p99_ms": round(percentile(handler, 99), 2) if handler else None,
+        }
+
+
+class ChannelDispatcher:
+    """Worker lanes per channel with key-affine routing; see module docstring."""
+
+    def __init__(
+        self,
+        name: str,
+        default_concurrency: int = DEFAULT_CONCURRENCY,
+        channel_concurrency: Optional[Dict[str, int]] = None,
+        queue_size: int = LANE_QUEUE_SIZE,
+    ):
+        """
+        Args:
+            name: Used in log lines
+            default_concurrency: Lanes per channel
+            channel_concurrency: Per-channel lane overrides
+            queue_size: Events buffered per lane before dropping the oldest
+        """
+        self.name = name
+        self.default_concurrency = max(1, default_concurrency)
+        self.channel_concurrency = (
+            channel_concurrency
+            if channel_concurrency is not None
+            else parse_channel_concurrency(os.getenv("REDIS_SUB_CHANNEL_CONCURRENCY"))
+        )
+        self.queue_size = queue_size
+        self._lanes: Dict[str, list] = {}  # channel -> [(queue, task), ...]
+        self._stats: Dict[str, _ChannelStats] = {}
+
+    def submit(self, channel: str, key, handler: Callable[[], Awaitable], label: str = "") -> bool:
+        """
+        Queue a handler on the channel's lane for ``key``. Must be called on the event loop.
+
+        Args:
+            channel: Channel the event arrived on
+            key: Ordering key (guild id); None shares one lane
+            handler: Zero-arg callable returning the coroutine to run
+            label: Short description used in error logs
+
+        Returns:
+            bool: False if the lane was full and its oldest event was dropped
+        """
+        lanes = self._lanes.get(channel)
+        if lanes is None:
+            lanes = self._start_channel(channel)
+        queue = lanes[hash(key) % len(lanes) if key is not None else 0][0]
+
+        accepted = True
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            stats = self._stats[channel]
+            stats.dropped += 1
+            accepted = False
+            logger.warning(f"[{self.name}] ⚠️ {channel} lane full, dropped oldest event (total {stats.dropped})")
+        queue.put_nowait((time.perf_counter(), handler, label))
+        return accepted
+
+    def _start_channel(self, channel):
+        count = max(1, self.channel_concurrency.get(channel, self.default_concurrency))
+        self._stats[channel] = _ChannelStats()
+        lanes = []
+        for index in range(count):
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            task = asyncio.create_task(self._work(channel, queue), name=f"{self.name}:{channel}:{index}")
+            lanes.append((queue, task))
+        self._lanes[channel] = lanes
+        logger.debug(f"[{self.name}] Started {count} lane(s) for {channel}")
+        return lanes
+
+    async def _work(self, channel, queue):
+        stats = self._stats[channel]
+        while True:
+            enqueued_at, handler, label = await queue.get()
+            started = time.perf_counter()
+            stats.lag_ms.append((started - enqueued_at) * 1000)
+            try:
+                await handler()
+                stats.processed += 1
+            except Exception as e:
+                stats.failed += 1
+                logger.error(f"[{self.name}] ❌ {channel} handler error for {label}: {type(e).__name__}: {e}")
+            finally:
+                stats.handler_ms.append((time.perf_counter() - started) * 1000)
+                queue.task_done()
+
+            if (stats.processed + stats.failed) % STATS_LOG_EVERY == 0:
+                s = self.channel_stats(channel)
+                logger.info(
+                    f"[{self.name}] 📊 {channel}: depth={s['queue_depth']} done={s['processed']} "
+                    f"failed={s['failed']} dropped={s['dropped']} lag p50={s['lag_p50_ms']}ms "
+                    f"p99={s['lag_p99_ms']}ms handler p50={s['handler_p50_ms']}ms p99={s['handler_p99_ms']}ms"
+                )
+
+    def channel_stats(self, channel: str) -> dict:
+        """Queue depth, counters and lag/handler percentiles for one channel."""
+        depth = sum(queue.qsize() for queue, _ in self._lanes.get(channel, []))
+        return self._stats.get(channel, _ChannelStats()).snapshot(depth)
+
+    def stats(self) -> dict:
+        """channel_stats() for every channel seen so far."""
+        return {channel: self.channel_stats(channel) for channel in self._lanes}
+
+    async def drain(self):
+        """Wait until every queued event has been handled (tests, shutdown)."""
+        for lanes in list(self._lanes.values()):
+            for queue, _ in lanes:
+                await queue.join()
+
+    async def close(self):
+        """Cancel all lanes; queued events are discarded."""
+        tasks = [task for lanes in self._lanes.values() for _, task in lanes]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._lanes.clear()
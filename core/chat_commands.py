@@ -0,0 +1,270 @@
+"""
+Chat Command Router
+Routes Kick/Twitch chat lines to command handlers by their first token.
+
+KickWebSocketManager._handle_incoming_message used to walk a long if/elif chain
+for every chat line. It also awaited a tier check (a db_executor hop) and
+logged at INFO before knowing whether the line was a command at all. Most
+lines are plain chat, so the router is built around rejecting them cheaply:
+
+- Lines that don't start with "!" return after one character check.
+- Otherwise the first token (lowercased) is looked up in a dict. Commands
+  registered with ``prefix=True`` also match tokens that merely start with
+  their name (e.g. "!callSweet"). ``exact=True`` commands only fire without
+  arguments ("!points", not "!points please").
+- Tier gates are answered from the tier cache (utils/subscription_tier.py)
+  when it holds the guild, on the event loop. Only a miss pays the
+  feature_check hop. The router keeps no cache of its own, so a dashboard tier
+  change (which drops that cache) applies to the next line, and a fail-open
+  answer from a DB error is not reused.
+- An optional custom-command hook (dashboard commands) runs before the
+  built-ins so a server can override them, as before.
+
+Handlers are plain ``async def handler(msg: ChatMessage)`` callables, testable
+on their own. stats() exposes per-command counts, errors and a latency
+histogram.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class ChatMessage:
+    """One inbound chat line, as handed to command handlers."""
+
+    __slots__ = ("guild_id", "guild_name", "username", "display_username", "platform", "content", "command", "args")
+
+    def __init__(
+        self,
+        guild_id: int,
+        guild_name: str,
+        username: str,
+        content: str,
+        platform: str = "kick",
+        display_username: Optional[str] = None,
+    ):
+        self.guild_id = guild_id
+        self.guild_name = guild_name
+        self.username = username
+        self.display_username = display_username or username
+        self.platform = platform
+        self.content = content.strip()
+        self.command = None  # matched command name, set by the router
+        self.args = ""
+
+
+class ChatCommand:
+    __slots__ = ("name", "handler", "feature", "exact", "prefix", "locked_reply")
+
+    def __init__(self, name, handler, feature, exact, prefix, locked_reply):
+        self.name = name
+        self.handler = handler
+        self.feature = feature
+        self.exact = exact
+        self.prefix = prefix
+        self.locked_reply = locked_reply
+
+
+class _CommandStats:
+    __slots__ = ("count", "errors", "locked", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.locked = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, elapsed_ms: float):
+        self.count += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "locked": self.locked,
+            "latency": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+def split_command(content: str) -> Optional[Tuple[str, str]]:
+    """("!token" lowercased, rest) for a command line, or None for plain chat."""
+    if not content or content[0] != "!":
+        return None
+    parts = content.split(maxsplit=1)
+    return parts[0].lower(), (parts[1].strip() if len(parts) > 1 else "")
+
+
+class ChatCommandRouter:
+    """First-token dispatch for chat commands; see module docstring."""
+
+    def __init__(
+        self,
+        feature_check: Callable[[int, str], Awaitable[bool]],
+        on_locked: Optional[Callable[["ChatMessage", str], Awaitable[None]]] = None,
+        cached_check: Optional[Callable[[int, str], Optional[bool]]] = None,
+    ):
+        """
+        Args:
+            feature_check: ``await feature_check(guild_id, feature)`` -> bool (the tier check)
+            on_locked: Called when a gated command is used on a tier without the feature
+            cached_check: ``cached_check(guild_id, feature)`` -> bool, or None when the
+                answer isn't cached; must not block (runs on the event loop)
+        """
+        self.feature_check = feature_check
+        self.on_locked = on_locked
+        self.cached_check = cached_check
+        self._exact: Dict[str, ChatCommand] = {}
+        self._prefixes = []  # prefix commands, in registration order
+        self._custom = None  # (handler, feature)
+        self._stats: Dict[str, _CommandStats] = {}
+        self.plain_messages = 0
+        self.unknown_commands = 0
+        self.gate_checks = 0
+
+    # -------------------------
+    # Registration
+    # -------------------------
+
+    def command(
+        self,
+        *names: str,
+        feature: Optional[str] = None,
+        exact: bool = False,
+        prefix: bool = False,
+        locked_reply: bool = True,
+    ):
+        """
+        Decorator registering a handler for one or more "!names".
+
+        Args:
+            feature: Tier feature the guild needs (None = ungated)
+            exact: Only match when the command has no arguments
+            prefix: Also match tokens that start with the name ("!callSweet")
+            locked_reply: Call on_locked when the gate fails (else ignore the line)
+        """
+
+        def decorator(handler):
+            for name in names:
+                cmd = ChatCommand(name.lower(), handler, feature, exact, prefix, locked_reply)
+                self._exact[cmd.name] = cmd
+                if prefix:
+                    self._prefixes.append(cmd)
+            return handler
+
+        return decorator
+
+    def set_custom_handler(self, handler: Callable[["ChatMessage"], Awaitable[bool]], feature: Optional[str] = None):
+        """Hook run for every command line before the built-ins; returning True stops routing."""
+        self._custom = (handler, feature)
+
+    # -------------------------
+    # Dispatch
+    # -------------------------
+
+    def match(self, content: str) -> Optional[Tuple[ChatCommand, str]]:
+        """(command, args) for a built-in command line, else None. Pure; no gates or stats."""
+        parsed = split_command(content)
+        if parsed is None:
+            return None
+        token, args = parsed
+        cmd = self._exact.get(token)
+        if cmd is not None:
+            if cmd.exact and args:
+                return None
+            return cmd, args
+        for cmd in self._prefixes:
+            if token.startswith(cmd.name):
+                return cmd, args
+        return None
+
+    async def allowed(self, guild_id: int, feature: Optional[str]) -> bool:
+        """Tier gate: the cached answer when there is one, else feature_check."""
+        if feature is None:
+            return True
+        if self.cached_check is not None:
+            cached = self.cached_check(guild_id, feature)
+            if cached is not None:
+                return cached
+        self.gate_checks += 1
+        return bool(await self.feature_check(guild_id, feature))
+
+    async def dispatch(self, msg: ChatMessage) -> Optional[str]:
+        """
+        Route one chat line.
+
+        Returns:
+            Name of the command that handled it ("custom" for dashboard commands), or None
+        """
+        parsed = split_command(msg.content)
+        if parsed is None:
+            self.plain_messages += 1
+            return None
+        msg.command, msg.args = parsed
+
+        if self._custom is not None:
+            handler, feature = self._custom
+            if await self.allowed(msg.guild_id, feature):
+                started = time.perf_counter()
+                try:
+                    handled = await handler(msg)
+                except Exception as e:
+                    self._stats_for("custom").errors += 1
+                    logger.info(f"⚠️ Custom command error: {e}")
+                    handled = False
+                if handled:
+                    self._stats_for("custom").observe((time.perf_counter() - started) * 1000)
+                    return "custom"
+
+        matched = self.match(msg.content)
+        if matched is None:
+            self.unknown_commands += 1
+            return None
+        cmd, msg.args = matched
+        msg.command = cmd.name
+        stats = self._stats_for(cmd.name)
+
+        if not await self.allowed(msg.guild_id, cmd.feature):
+            stats.locked += 1
+            logger.info(f"🔒 {cmd.name} blocked: server tier lacks {cmd.feature}")
+            if cmd.locked_reply and self.on_locked is not None:
+                await self.on_locked(msg, cmd.feature)
+            return cmd.name
+
+        started = time.perf_counter()
+        try:
+            await cmd.handler(msg)
+        except Exception as e:
+            stats.errors += 1
+            logger.info(f"❌ Error handling {cmd.name}: {e}")
+        stats.observe((time.perf_counter() - started) * 1000)
+        return cmd.name
+
+    def _stats_for(self, name: str) -> _CommandStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = _CommandStats()
+        return stats
+
+    def reset_stats(self):
+        """Zero the counters and latency histograms."""
+        self._stats.clear()
+        self.plain_messages = 0
+        self.unknown_commands = 0
+        self.gate_checks = 0
+
+    def stats(self) -> dict:
+        return {
+            "plain_messages": self.plain_messages,
+            "unknown_commands": self.unknown_commands,
+            "gate_checks": self.gate_checks,
+            "commands": {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
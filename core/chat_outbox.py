@@ -0,0 +1,282 @@
+"""
+Outbound Chat Scheduler
+Every line the bot writes to Kick or Twitch chat goes through one ChatOutbox.
+
+Before this, command replies, raffle/slot announcements and timed messages were
+handed straight to the platform (a kickpython queue per guild, or a Helix POST)
+in arrival order. A burst of "!points" filled that queue with near-identical
+replies, announcements waited behind them, and Kick started throttling us.
+
+The outbox keeps one lane per (guild, platform):
+
+- Items carry a priority class: ANNOUNCEMENT (winners, slot picks, GTB),
+  REPLY (command answers) and TIMED (timed messages). A lane always sends the
+  oldest item of the best class that is ready.
+- Sends are paced by a token bucket per lane sized to the platform's chat
+  limits (CHAT_<PLATFORM>_RATE messages/second, CHAT_<PLATFORM>_BURST).
+- Replies submitted with a ``coalesce_key`` (e.g. "!points") are held for
+  COALESCE_WINDOW seconds; further replies with the same key are folded into
+  the pending line ("@a 120 pts · @b 40 pts") while it still fits
+  MAX_MESSAGE_LENGTH.
+- A full lane evicts the oldest item of its lowest class (or refuses the new
+  item if that one ranks lowest). Replies and timed messages expire after
+  REPLY_TTL / TIMED_TTL seconds in the queue; announcements never expire.
+
+stats() reports queue depth per class, waits, merges and drops for each lane.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from core.role_sync import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ANNOUNCEMENT = 0
+PRIORITY_REPLY = 1
+PRIORITY_TIMED = 2
+PRIORITY_NAMES = {PRIORITY_ANNOUNCEMENT: "announcement", PRIORITY_REPLY: "reply", PRIORITY_TIMED: "timed"}
+
+# Messages/second and burst per lane. Kick does not publish a bot limit; one
+# line a second keeps us clear of its throttling. Twitch allows 20 lines per
+# 30s for a non-moderator bot.
+PLATFORM_RATES = {
+    "kick": (float(os.getenv("CHAT_KICK_RATE", "1")), int(os.getenv("CHAT_KICK_BURST", "3"))),
+    "twitch": (float(os.getenv("CHAT_TWITCH_RATE", "0.6")), int(os.getenv("CHAT_TWITCH_BURST", "5"))),
+}
+COALESCE_WINDOW = float(os.getenv("CHAT_COALESCE_WINDOW", "1.0"))
+MAX_QUEUE_DEPTH = int(os.getenv("CHAT_MAX_QUEUE_DEPTH", "100"))
+MAX_MESSAGE_LENGTH = 500  # Kick and Twitch both cap a chat line at 500 characters
+REPLY_TTL = float(os.getenv("CHAT_REPLY_TTL", "30"))
+TIMED_TTL = float(os.getenv("CHAT_TIMED_TTL", "120"))
+COALESCE_SEPARATOR = " · "
+
+Sender = Callable[[int, str], Awaitable[bool]]
+
+
+class _Item:
+    __slots__ = ("text", "priority", "coalesce_key", "fragments", "queued_at", "ready_at", "expires_at")
+
+    def __init__(self, text, priority, coalesce_key, fragment, now, window):
+        self.text = text
+        self.priority = priority
+        self.coalesce_key = coalesce_key
+        self.fragments = [fragment or text]
+        self.queued_at = now
+        self.ready_at = now + window if coalesce_key else now
+        ttl = {PRIORITY_REPLY: REPLY_TTL, PRIORITY_TIMED: TIMED_TTL}.get(priority)
+        self.expires_at = now + ttl if ttl else None
+
+    def render(self) -> str:
+        if len(self.fragments) == 1:
+            return self.text
+        return COALESCE_SEPARATOR.join(self.fragments)
+
+    def try_merge(self, fragment: str) -> bool:
+        merged = len(COALESCE_SEPARATOR.join(self.fragments)) + len(COALESCE_SEPARATOR) + len(fragment)
+        if merged > MAX_MESSAGE_LENGTH:
+            return False
+        self.fragments.append(fragment)
+        return True
+
+
+class _Lane:
+    def __init__(self, rate: float, burst: int):
+        self.queues = {priority: deque() for priority in PRIORITY_NAMES}
+        self.bucket = TokenBucket(rate, burst)
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+        self.dropped_full = 0
+        self.dropped_expired = 0
+        self.wait_total = {priority: 0.0 for priority in PRIORITY_NAMES}
+        self.wait_max = {priority: 0.0 for priority in PRIORITY_NAMES}
+        self.sent_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def pending(self, coalesce_key: str) -> Optional[_Item]:
+        for item in reversed(self.queues[PRIORITY_REPLY]):
+            if item.coalesce_key == coalesce_key:
+                return item
+        return None
+
+    def expire(self, now: float):
+        # A class shares one TTL and is FIFO, so expired items are always at the head.
+        for queue in self.queues.values():
+            while queue and queue[0].expires_at is not None and queue[0].expires_at <= now:
+                queue.popleft()
+                self.dropped_expired += 1
+
+    def next_ready(self, now: float) -> Tuple[Optional[_Item], Optional[float]]:
+        """(item to send now, or None; earliest time a held item becomes ready)."""
+        soonest = None
+        for priority in sorted(self.queues):
+            for item in self.queues[priority]:
+                if item.ready_at <= now:
+                    return item, None
+                soonest = item.ready_at if soonest is None else min(soonest, item.ready_at)
+        return None, soonest
+
+
+class ChatOutbox:
+    """Per-guild, per-platform outbound chat lanes; see module docstring."""
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        coalesce_window: float = COALESCE_WINDOW,
+        max_depth: int = MAX_QUEUE_DEPTH,
+    ):
+        self.rates = dict(rates or PLATFORM_RATES)
+        self.coalesce_window = coalesce_window
+        self.max_depth = max_depth
+        self._senders: Dict[str, Sender] = {}
+        self._lanes: Dict[Tuple[int, str], _Lane] = {}
+
+    def register_sender(self, platform: str, sender: Sender):
+        """``await sender(guild_id, text)`` delivers one line to ``platform`` and returns success."""
+        self._senders[platform] = sender
+
+    def submit(
+        self,
+        guild_id: int,
+        platform: str,
+        text: str,
+        priority: int = PRIORITY_REPLY,
+        coalesce_key: Optional[str] = None,
+        fragment: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue one chat line.
+
+        Args:
+            guild_id: Discord server the line belongs to
+            platform: "kick" or "twitch" (must have a registered sender)
+            text: The line as sent when nothing is merged into it
+            priority: PRIORITY_ANNOUNCEMENT, PRIORITY_REPLY or PRIORITY_TIMED
+            coalesce_key: Replies sharing this key within the window are merged
+            fragment: This reply's short form in a merged line (defaults to ``text``)
+
+        Returns:
+            True if queued or merged, False if refused (no sender, or the lane is full)
+        """
+        if platform not in self._senders:
+            logger.info(f"⚠️ No chat sender registered for {platform}")
+            return False
+        lane = self._lane(guild_id, platform)
+        now = time.monotonic()
+        lane.expire(now)
+
+        if coalesce_key is not None and priority == PRIORITY_REPLY:
+            pending = lane.pending(coalesce_key)
+            if pending is not None and pending.try_merge(fragment or text):
+                lane.merged += 1
+                return True
+        else:
+            coalesce_key = None
+
+        if lane.depth() >= self.max_depth:
+            lowest = max(p for p, queue in lane.queues.items() if queue)
+            lane.dropped_full += 1
+            if lowest < priority:
+                logger.info(f"⚠️ Chat outbox full for {guild_id}/{platform}; dropped new {PRIORITY_NAMES[priority]}")
+                return False
+            lane.queues[lowest].popleft()
+
+        lane.queues[priority].append(_Item(text, priority, coalesce_key, fragment, now, self.coalesce_window))
+        lane.wakeup.set()
+        return True
+
+    def discard(self, guild_id: int, platform: Optional[str] = None):
+        """Drop a guild's lanes (e.g. after the bot leaves the server)."""
+        for key in [key for key in self._lanes if key[0] == guild_id and platform in (None, key[1])]:
+            lane = self._lanes.pop(key)
+            if lane.task is not None:
+                lane.task.cancel()
+
+    def _lane(self, guild_id: int, platform: str) -> _Lane:
+        key = (guild_id, platform)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane(*self.rates.get(platform, PLATFORM_RATES["kick"]))
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self._worker(guild_id, platform, lane))
+        return lane
+
+    async def _worker(self, guild_id: int, platform: str, lane: _Lane):
+        while True:
+            now = time.monotonic()
+            lane.expire(now)
+            item, ready_at = lane.next_ready(now)
+            if item is None:
+                lane.wakeup.clear()
+                timeout = None if ready_at is None else max(0.0, ready_at - now)
+                try:
+                    await asyncio.wait_for(lane.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await lane.bucket.acquire()
+            # Something more urgent may have arrived while we waited for the bucket.
+            now = time.monotonic()
+            lane.expire(now)
+            item, _ = lane.next_ready(now)
+            if item is None:
+                continue
+            lane.queues[item.priority].remove(item)
+
+            waited = now - item.queued_at
+            lane.wait_total[item.priority] += waited
+            lane.wait_max[item.priority] = max(lane.wait_max[item.priority], waited)
+            lane.sent_by_priority[item.priority] += 1
+            try:
+                ok = await self._senders[platform](guild_id, item.render())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"❌ {platform} chat send failed for {guild_id}: {e}")
+                ok = False
+            if ok:
+                lane.sent += 1
+            else:
+                lane.failed += 1
+
+    def stats(self) -> dict:
+        lanes = {}
+        for (guild_id, platform), lane in self._lanes.items():
+            waits = {}
+            for priority, name in PRIORITY_NAMES.items():
+                count = lane.sent_by_priority[priority]
+                if count:
+                    waits[name] = {
+                        "avg_ms": round(lane.wait_total[priority] / count * 1000, 1),
+                        "max_ms": round(lane.wait_max[priority] * 1000, 1),
+                    }
+            lanes[f"{guild_id}:{platform}"] = {
+                "depth": {name: len(lane.queues[priority]) for priority, name in PRIORITY_NAMES.items()},
+                "sent": lane.sent,
+                "merged": lane.merged,
+                "failed": lane.failed,
+                "dropped_full": lane.dropped_full,
+                "dropped_expired": lane.dropped_expired,
+                "wait": waits,
+            }
+        return {
+            "lanes": lanes,
+            "depth": sum(lane.depth() for lane in self._lanes.values()),
+            "sent": sum(lane.sent for lane in self._lanes.values()),
+            "merged": sum(lane.merged for lane in self._lanes.values()),
+            "dropped": sum(lane.dropped_full + lane.dropped_expired for lane in self._lanes.values()),
+        }
+
+
+chat_outbox = ChatOutbox()
@@ -0,0 +1,183 @@
+"""
+Chat Recorder
+Captures inbound chat lines to a compact JSONL file for replaying under load.
+
+Off unless CHAT_RECORD_PATH is set. When set, every chat line the bot
+receives is appended as one JSON object:
+
+    {"t": 12.345, "g": 123, "gn": "Guild", "src": "pusher", "p": "kick",
+     "u": "viewer", "d": "Viewer", "c": "!points", "id": "msg-id", "uid": "42"}
+
+- ``t`` is seconds since recording started.
+- ``src`` is where the line came from:
+  - "pusher": kick_chat_loop's ChatMessageEvent frames
+  - "kickpython": the kickpython websocket handler
+  - "twitch": EventSub chat, after normalize_twitch_chat_event and identity
+    canonicalization
+- Paths ending in ".gz" are gzip-compressed.
+
+scripts/benchmarks/bench_chat_replay.py reads these files back with
+read_recording() and replays them through
+KickWebSocketManager._handle_incoming_message.
+
+Recording costs one json.dumps and a buffered write per line. Lines are
+flushed every CHAT_RECORD_FLUSH_EVERY lines (default 100) and on exit.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD_PATH = os.getenv("CHAT_RECORD_PATH", "")
+FLUSH_EVERY = int(os.getenv("CHAT_RECORD_FLUSH_EVERY", "100"))
+
+
+class RecordedMessage:
+    """One recorded chat line; to_msg() rebuilds the dict _handle_incoming_message takes."""
+
+    __slots__ = (
+        "offset",
+        "guild_id",
+        "guild_name",
+        "source",
+        "platform",
+        "username",
+        "display_username",
+        "content",
+        "chat_id",
+        "user_id",
+    )
+
+    def __init__(self, entry: dict):
+        self.offset = float(entry.get("t", 0.0))
+        self.guild_id = int(entry["g"])
+        self.guild_name = entry.get("gn") or str(self.guild_id)
+        self.source = entry.get("src", "kickpython")
+        self.platform = entry.get("p", "kick")
+        self.username = entry.get("u", "")
+        self.display_username = entry.get("d") or self.username
+        self.content = entry.get("c", "")
+        self.chat_id = entry.get("id")
+        self.user_id = entry.get("uid")
+
+    def to_msg(self) -> dict:
+        msg = {
+            "sender_username": self.username,
+            "username": self.username,
+            "content": self.content,
+            "chat_id": self.chat_id,
+            "id": self.chat_id,
+            "user": {"id": self.user_id, "username": self.username, "slug": self.username},
+            "_platform": self.platform,
+        }
+        if self.display_username != self.username:
+            msg["display_username"] = self.display_username
+        return msg
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class ChatRecorder:
+    """Appends chat lines to a JSONL recording; see module docstring."""
+
+    def __init__(self, path: str = RECORD_PATH, flush_every: int = FLUSH_EVERY):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self._file = None
+        self._started = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, guild_id: int, guild_name: Optional[str], msg: dict, source: str):
+        """
+        Append one chat line. No-op when recording is off.
+
+        Args:
+            guild_id: Discord guild the line belongs to
+            guild_name: Guild name (for readable replays)
+            msg: Chat dict in the _handle_incoming_message shape
+            source: "pusher", "kickpython" or "twitch"
+        """
+        if not self.path:
+            return
+        username = msg.get("sender_username") or msg.get("username") or ""
+        entry = {
+            "g": guild_id,
+            "gn": guild_name,
+            "src": source,
+            "p": (msg.get("_platform") or "kick").lower(),
+            "u": username,
+            "c": msg.get("content") or "",
+            "id": msg.get("chat_id") or msg.get("id"),
+        }
+        display_username = msg.get("display_username")
+        if display_username and display_username != username:
+            entry["d"] = display_username
+        user_id = (msg.get("user") or {}).get("id")
+        if user_id is not None:
+            entry["uid"] = str(user_id)
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._file = _open(self.path, "a")
+                    self._started = time.monotonic()
+                    atexit.register(self.close)
+                    logger.info(f"🎙️ Recording chat to {self.path}")
+                entry["t"] = round(time.monotonic() - self._started, 3)
+                self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                self.recorded += 1
+                self._pending += 1
+                if self._pending >= self.flush_every:
+                    self._file.flush()
+                    self._pending = 0
+        except Exception as e:
+            logger.warning(f"⚠️ Chat recording disabled after write error: {e}")
+            self.path = ""
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+chat_recorder = ChatRecorder()
+
+
+def read_recording(path: str) -> Iterator[RecordedMessage]:
+    """Yield the lines of a recording in order, skipping blank or malformed ones."""
+    with _open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield RecordedMessage(json.loads(line))
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+def write_recording(path: str, entries) -> int:
+    """Write pre-built entry dicts (module docstring format) to ``path``; returns the count."""
+    count = 0
+    with _open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            count += 1
+    return count
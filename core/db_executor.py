@@ -0,0 +1,163 @@
+"""
+Guild-Fair Database Executor
+Runs blocking SQLAlchemy work on a bounded thread pool, one guild at a time per slot.
+
+bot.py's chat handler and periodic tasks used to run synchronous queries
+straight on the event loop, so one slow Postgres round-trip froze Discord
+heartbeats and every guild's chat together. Callers now do
+
+    balance = await db_executor.run(guild_id, fetch_balance, guild_id, username, label="!points")
+
+and the work runs on a worker thread instead:
+
+- At most DB_EXECUTOR_THREADS (default 8) calls run at once, which also caps
+  how many pooled connections the bot holds for this work.
+- Each guild has its own FIFO queue and the queues are served round-robin,
+  with at most DB_EXECUTOR_PER_GUILD (default 2) calls in flight per guild, so
+  a guild with a deep backlog can't starve the others.
+- contextvars (the per-server logging tag) are copied into the worker thread.
+- Queue wait and run time are tracked per label for stats().
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from utils.percentiles import percentile
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("DB_EXECUTOR_THREADS", "8"))
+PER_GUILD_LIMIT = int(os.getenv("DB_EXECUTOR_PER_GUILD", "2"))
+
+LATENCY_SAMPLE_WINDOW = 200
+
+
+class GuildFairExecutor:
+    """Bounded thread pool with round-robin per-guild queues; see module docstring."""
+
+    def __init__(self, name: str = "DB", max_workers: int = MAX_WORKERS, per_guild_limit: int = PER_GUILD_LIMIT):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.per_guild_limit = max(1, per_guild_limit)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-executor")
+        self._queues = {}  # guild key -> deque of pending jobs
+        self._ready = deque()  # guild keys with pending jobs, in round-robin order
+        self._in_flight = 0
+        self._in_flight_by_guild = {}
+        self._run_ms = {}  # label -> deque of run times
+        self._wait_ms = {}  # label -> deque of queue waits
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, guild_id, fn: Callable, *args, label: Optional[str] = None, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on a worker thread and return its result.
+
+        Args:
+            guild_id: Fairness key (None for global work, which shares one queue)
+            fn: Blocking callable (typically opens its own engine connection)
+            label: Call-site name for stats; defaults to the function name
+
+        Returns:
+            Whatever ``fn`` returns; exceptions propagate to the caller.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job = (future, contextvars.copy_context(), fn, args, kwargs, label or fn.__name__, time.perf_counter())
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = deque()
+            self._ready.append(guild_id)
+        queue.append(job)
+        self._pump(loop)
+        return await future
+
+    def _pump(self, loop):
+        """Start queued jobs round-robin across guilds while worker slots are free."""
+        skipped = 0
+        while self._in_flight < self.max_workers and self._ready and skipped < len(self._ready):
+            key = self._ready.popleft()
+            if self._in_flight_by_guild.get(key, 0) >= self.per_guild_limit:
+                self._ready.append(key)
+                skipped += 1
+                continue
+            skipped = 0
+            queue = self._queues[key]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(key)
+            else:
+                del self._queues[key]
+
+            future, ctx, fn, args, kwargs, label, enqueued_at = job
+            if future.cancelled():
+                continue
+            self._in_flight += 1
+            self._in_flight_by_guild[key] = self._in_flight_by_guild.get(key, 0) + 1
+            started = time.perf_counter()
+            self._sample(self._wait_ms, label, (started - enqueued_at) * 1000)
+            work = self._pool.submit(ctx.run, fn, *args, **kwargs)
+            work.add_done_callback(
+                lambda done, key=key, job=job, started=started: loop.call_soon_threadsafe(
+                    self._finish, loop, key, job, started, done
+                )
+            )
+
+    def _finish(self, loop, key, job, started, done):
+        future, label = job[0], job[5]
+        self._in_flight -= 1
+        remaining = self._in_flight_by_guild.get(key, 1) - 1
+        if remaining:
+            self._in_flight_by_guild[key] = remaining
+        else:
+            self._in_flight_by_guild.pop(key, None)
+        self._sample(self._run_ms, label, (time.perf_counter() - started) * 1000)
+
+        error = done.exception()
+        if error is None:
+            self.completed += 1
+            if not future.cancelled():
+                future.set_result(done.result())
+        else:
+            self.failed += 1
+            if not future.cancelled():
+                future.set_exception(error)
+        self._pump(loop)
+
+    @staticmethod
+    def _sample(store, label, value):
+        samples = store.get(label)
+        if samples is None:
+            samples = store[label] = deque(maxlen=LATENCY_SAMPLE_WINDOW)
+        samples.append(value)
+
+    def stats(self) -> dict:
+        """Pool occupancy plus per-label wait/run percentiles."""
+        by_label = {}
+        for label, runs in self._run_ms.items():
+            runs, waits = list(runs), list(self._wait_ms.get(label, ()))
+            by_label[label] = {
+                "run_p50_ms": round(percentile(runs, 50), 2),
+                "run_p99_ms": round(percentile(runs, 99), 2),
+                "wait_p99_ms": round(percentile(waits, 99), 2) if waits else None,
+            }
+        return {
+            "in_flight": self._in_flight,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "guilds_waiting": len(self._queues),
+            "completed": self.completed,
+            "failed": self.failed,
+            "by_label": by_label,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+db_executor = GuildFairExecutor()
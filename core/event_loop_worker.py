@@ -0,0 +1,167 @@
+"""
+Background Event Loop Worker
+One long-lived asyncio loop thread per gunicorn worker for webhook dispatch.
+
+The Flask webhook routes are synchronous, so they used to spin up a fresh event
+loop per delivery (asyncio.new_event_loop() + run_until_complete + close). That
+made the provider wait on all downstream processing before getting its 2xx, and
+any aiohttp session / Redis client a handler created died with the loop.
+
+Routes now submit the handler coroutine here and return immediately. The loop
+thread starts lazily (after gunicorn forks) and keeps running for the life of
+the worker, so clients created on it can be reused across events. Submissions
+are bounded: when MAX_PENDING coroutines are already queued or running,
+submit() refuses the new one so the route can answer 503 and let the provider
+retry later, instead of growing memory without limit during a flood.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Coroutine, Optional
+
+from utils.percentiles import percentile
+
+logger = logging.getLogger(__name__)
+
+# Queued + running coroutines allowed before submissions are refused.
+MAX_PENDING = int(os.getenv("WEBHOOK_DISPATCH_MAX_PENDING", "1000"))
+
+# Handlers run concurrently up to this limit; the rest wait in the queue.
+MAX_CONCURRENCY = int(os.getenv("WEBHOOK_DISPATCH_CONCURRENCY", "32"))
+
+# Rolling window for handler latency percentiles, and how often to log stats.
+LATENCY_SAMPLE_WINDOW = 1000
+STATS_LOG_EVERY = 500
+
+
+class EventLoopWorker:
+    """A daemon thread running one asyncio loop, fed through a bounded submission count."""
+
+    def __init__(self, name: str, max_pending: int = MAX_PENDING, max_concurrency: int = MAX_CONCURRENCY):
+        self.name = name
+        self.max_pending = max_pending
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._latency_ms = deque(maxlen=LATENCY_SAMPLE_WINDOW)
+
+    def _ensure_started(self):
+        """Start the loop thread on first use, and again in a forked child (threads don't survive fork)."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            ready = threading.Event()
+            self._pid = os.getpid()
+            self._pending = 0
+            self._running = 0
+            self._loop = asyncio.new_event_loop()
+
+            def run():
+                asyncio.set_event_loop(self._loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=f"{self.name}-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info(f"[{self.name}] ✅ Event loop worker started (pid {self._pid})")
+
+    def submit(self, coro: Coroutine, label: str = "") -> bool:
+        """
+        Schedule a coroutine on the worker loop without waiting for it.
+
+        Args:
+            coro: Coroutine to run
+            label: Short description used in error logs (e.g. the event type)
+
+        Returns:
+            bool: False if the worker is saturated and the coroutine was dropped
+        """
+        self._ensure_started()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                dropped = self.dropped
+                accepted = False
+            else:
+                self._pending += 1
+                self.submitted += 1
+                accepted = True
+        if not accepted:
+            coro.close()
+            logger.warning(
+                f"[{self.name}] ⚠️ Dispatch queue full ({self.max_pending}), dropped {label} (total {dropped})"
+            )
+            return False
+
+        asyncio.run_coroutine_threadsafe(self._run(coro, label), self._loop)
+        return True
+
+    async def _run(self, coro, label):
+        try:
+            async with self._semaphore:
+                self._running += 1
+                started = time.perf_counter()
+                try:
+                    await coro
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.error(f"[{self.name}] ❌ Handler error for {label}: {type(e).__name__}: {e}")
+                finally:
+                    self._running -= 1
+                    self._latency_ms.append((time.perf_counter() - started) * 1000)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        if (self.completed + self.failed) % STATS_LOG_EVERY == 0:
+            stats = self.stats()
+            logger.info(
+                f"[{self.name}] 📊 depth={stats['queue_depth']} in_flight={stats['in_flight']} "
+                f"done={stats['completed']} failed={stats['failed']} dropped={stats['dropped']} "
+                f"p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms"
+            )
+
+    def stats(self) -> dict:
+        """Back-pressure and latency counters for this worker."""
+        samples = list(self._latency_ms)
+        return {
+            "queue_depth": max(0, self._pending - self._running),
+            "in_flight": self._running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "p50_ms": round(percentile(samples, 50), 2) if samples else None,
+            "p99_ms": round(percentile(samples, 99), 2) if samples else None,
+        }
+
+
+_webhook_worker: Optional[EventLoopWorker] = None
+_webhook_worker_lock = threading.Lock()
+
+
+def get_webhook_worker() -> EventLoopWorker:
+    """The shared dispatch worker used by the Kick and Twitch webhook routes."""
+    global _webhook_worker
+    with _webhook_worker_lock:
+        if _webhook_worker is None:
+            _webhook_worker = EventLoopWorker("Webhook Dispatch")
+        return _webhook_worker
@@ -0,0 +1,249 @@
+"""
+Identity Index
+In-memory view of each guild's `links` rows for resolving chat usernames.
+
+Chat handling used to resolve identity with several `links` queries per
+message or tick. !points ran two to find the canonical username, the watchtime
+dedupe ran two per tick, forwarded Twitch chat ran two per message, and the
+points award joined every link row of the guild. Most of those filter on
+LOWER(kick_name), which a plain index can't serve. Once bound to the bot's
+engine, all of those read from here instead:
+
+- A guild's rows are loaded with one query the first time it is resolved.
+- upsert_link()/remove_link() (core/stream_links.py) apply their change to
+  the loaded guild directly. Raw-SQL writers and the OAuth link notifications
+  call invalidate() so the guild reloads on the next lookup.
+- A guild older than IDENTITY_INDEX_MAX_AGE seconds (default 600) reloads on
+  read. That catches writers outside the bot process (dashboard admin
+  tools). Any drift found on such a reload is counted and logged.
+- verify() compares a guild's index with the database, and
+  scripts/benchmarks/bench_identity_index.py measures resolutions per second.
+
+Two canonical-username rules exist and both are kept. Accrual (watchtime,
+points) uses the alphabetically-first of the person's linked names.
+resolve_canonical_identity uses the Kick link first, then the earliest link.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = float(os.getenv("IDENTITY_INDEX_MAX_AGE", "600"))
+
+
+class _GuildIdentities:
+    """One guild's links, keyed both ways."""
+
+    __slots__ = ("rows", "by_platform_name", "by_name", "names_by_did", "loaded_at", "_next_rank")
+
+    def __init__(self, rows: List[Tuple[int, str, str]]):
+        # rows: (discord_id, kick_name as stored, platform), oldest link first
+        self.rows = {}  # (discord_id, platform) -> (name, rank)
+        for rank, (discord_id, name, platform) in enumerate(rows):
+            self.rows[(discord_id, platform)] = (name, rank)
+        self._next_rank = len(rows)
+        self.loaded_at = time.monotonic()
+        self._reindex()
+
+    def _reindex(self):
+        # Built in locals and swapped in whole: lookups run without the lock, so
+        # they must never see a half-filled map.
+        by_platform_name, by_name, names_by_did = {}, {}, {}
+        for (discord_id, platform), (name, rank) in self.rows.items():
+            lowered = name.lower()
+            by_platform_name[(platform, lowered)] = discord_id
+            current = by_name.get(lowered)
+            if current is None or discord_id < current:
+                by_name[lowered] = discord_id
+            names_by_did.setdefault(discord_id, []).append((platform != "kick", rank, name))
+        for entries in names_by_did.values():
+            entries.sort()
+        self.by_platform_name, self.by_name, self.names_by_did = by_platform_name, by_name, names_by_did
+
+    def link(self, discord_id: int, name: str, platform: str):
+        self.rows[(discord_id, platform)] = (name, self._next_rank)
+        self._next_rank += 1
+        self._reindex()
+
+    def unlink(self, discord_id: int, platform: Optional[str]):
+        for key in [key for key in self.rows if key[0] == discord_id and (platform is None or key[1] == platform)]:
+            del self.rows[key]
+        self._reindex()
+
+    def row_set(self) -> set:
+        return {(discord_id, platform, name) for (discord_id, platform), (name, _) in self.rows.items()}
+
+
+class IdentityIndex:
+    """Per-guild username <-> discord_id maps over `links`; see module docstring."""
+
+    def __init__(self, max_age: float = MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._engine = None
+        self._guilds: Dict[int, _GuildIdentities] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.loads = 0
+        self.stale_reloads = 0
+        self.invalidations = 0
+        self.drift_detected = 0
+
+    def bind(self, engine):
+        """Serve lookups for this engine (the bot's) from memory."""
+        self._engine = engine
+
+    def is_bound_to(self, engine) -> bool:
+        return self._engine is not None and engine is self._engine
+
+    # -------------------------
+    # Loading
+    # -------------------------
+
+    def _fetch_rows(self, guild_id: int) -> List[Tuple[int, str, str]]:
+        with self._engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    """
+                    SELECT discord_id, kick_name, COALESCE(platform, 'kick')
+                    FROM links
+                    WHERE discord_server_id = :gid AND discord_id IS NOT NULL AND kick_name IS NOT NULL
+                    ORDER BY linked_at ASC NULLS LAST
+                    """
+                ),
+                {"gid": guild_id},
+            ).fetchall()
+        return [(int(row[0]), row[1], row[2]) for row in rows]
+
+    def _guild(self, guild_id: int) -> _GuildIdentities:
+        guild_id = int(guild_id)
+        entry = self._guilds.get(guild_id)
+        if entry is not None and time.monotonic() - entry.loaded_at <= self.max_age:
+            self.hits += 1
+            return entry
+
+        fresh = _GuildIdentities(self._fetch_rows(guild_id))
+        with self._lock:
+            self.loads += 1
+            if entry is not None:
+                self.stale_reloads += 1
+                if entry.row_set() != fresh.row_set():
+                    self.drift_detected += 1
+                    logger.warning(f"[Identity] Guild {guild_id} links changed outside the index; reloaded")
+            self._guilds[guild_id] = fresh
+        return fresh
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def discord_id(self, guild_id: int, username: str, platform: Optional[str] = None) -> Optional[int]:
+        """discord_id linked to ``username`` (on ``platform``, or any platform when None)."""
+        entry = self._guild(guild_id)
+        name = (username or "").lower()
+        if platform is None:
+            return entry.by_name.get(name)
+        return entry.by_platform_name.get((platform, name))
+
+    def discord_ids(self, guild_id: int, usernames: Iterable[str]) -> Dict[str, int]:
+        """{lowercased username: discord_id} for the linked ones among ``usernames`` (any platform)."""
+        by_name = self._guild(guild_id).by_name
+        found = {}
+        for username in usernames:
+            name = (username or "").lower()
+            discord_id = by_name.get(name)
+            if discord_id is not None:
+                found[name] = discord_id
+        return found
+
+    def accrual_username(self, guild_id: int, username: str) -> str:
+        """Name a chatter's watchtime/points accrue under: the person's alphabetically-first linked name."""
+        entry = self._guild(guild_id)
+        name = (username or "").lower()
+        discord_id = entry.by_name.get(name)
+        # A relink can swap the maps between these two reads; fall back to the name itself.
+        entries = entry.names_by_did.get(discord_id) if discord_id is not None else None
+        if not entries:
+            return name
+        return min(linked.lower() for _, _, linked in entries)
+
+    def accrual_usernames(self, guild_id: int, discord_ids: Iterable[int]) -> Dict[int, str]:
+        """{discord_id: accrual username} for the given linked people."""
+        names_by_did = self._guild(guild_id).names_by_did
+        return {
+            discord_id: min(name.lower() for _, _, name in names_by_did[discord_id])
+            for discord_id in discord_ids
+            if discord_id in names_by_did
+        }
+
+    def primary_username(self, guild_id: int, discord_id: int) -> Optional[str]:
+        """A person's Kick link if any, else their earliest link (resolve_canonical_identity's rule)."""
+        entries = self._guild(guild_id).names_by_did.get(discord_id)
+        return entries[0][2] if entries else None
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def on_link(self, guild_id: int, discord_id: int, username: str, platform: str = "kick"):
+        """Record a new/changed link in a loaded guild (unloaded guilds pick it up on first load)."""
+        if guild_id is None:
+            return
+        with self._lock:
+            entry = self._guilds.get(int(guild_id))
+            if entry is not None:
+                entry.link(int(discord_id), username.lower(), platform)
+
+    def on_unlink(self, guild_id: int, discord_id: int, platform: Optional[str] = None):
+        """Drop a person's link on ``platform`` (all platforms when None) from a loaded guild."""
+        if guild_id is None:
+            return
+        with self._lock:
+            entry = self._guilds.get(int(guild_id))
+            if entry is not None:
+                entry.unlink(int(discord_id), platform)
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Reload one guild (or every guild when None) on its next lookup."""
+        with self._lock:
+            self.invalidations += 1
+            if guild_id is None:
+                self._guilds.clear()
+            else:
+                self._guilds.pop(int(guild_id), None)
+
+    # -------------------------
+    # Consistency / stats
+    # -------------------------
+
+    def verify(self, guild_id: int) -> dict:
+        """
+        Compare a guild's index with the database.
+
+        Returns:
+            dict: ``missing`` (in DB, not indexed) and ``extra`` (indexed, not in DB) as
+            sorted (discord_id, platform, name) lists; both empty when consistent.
+        """
+        indexed = self._guild(guild_id).row_set()
+        actual = _GuildIdentities(self._fetch_rows(int(guild_id))).row_set()
+        return {"missing": sorted(actual - indexed), "extra": sorted(indexed - actual)}
+
+    def stats(self) -> dict:
+        return {
+            "guilds": len(self._guilds),
+            "links": sum(len(entry.rows) for entry in self._guilds.values()),
+            "hits": self.hits,
+            "loads": self.loads,
+            "stale_reloads": self.stale_reloads,
+            "invalidations": self.invalidations,
+            "drift_detected": self.drift_detected,
+        }
+
+
+identity_index = IdentityIndex()
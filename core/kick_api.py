@@ -18,6 +18,8 @@ from typing import Any, Dict, List, Optional
 
 import aiohttp
 
+from utils.http_pool import http_pool, http_session
+
 logger = logging.getLogger(__name__)
 
 # Import official API client for authenticated requests
@@ -95,7 +97,7 @@ class KickAPI:
             try:
                 logger.info(f"[Kick] Attempt {attempt + 1}/{max_retries}: Fetching chatroom ID for {channel_name}")
 
-                async with aiohttp.ClientSession() as session:
+                async with http_session() as session:
                     headers = {
                         "User-Agent": random.choice(USER_AGENTS),
                         "Accept": "application/json",
@@ -199,8 +201,17 @@ async def fetch_chatroom_id(channel_name: str, max_retries: int = 5) -> Optional
     if not _api:
         _api = KickAPI()
 
+    from core.kick_channels import kick_channels
+
+    cached = await kick_channels.chatroom_id(channel_name)
+    if cached:
+        return cached
+
     try:
-        return await _api.fetch_chatroom_id(channel_name, max_retries)
+        chatroom_id = await _api.fetch_chatroom_id(channel_name, max_retries)
+        if chatroom_id:
+            kick_channels.remember_ids(channel_name, chatroom_id=chatroom_id)
+        return chatroom_id
     except Exception as e:
         logger.error(f"[Kick] Error in fetch_chatroom_id: {type(e).__name__}: {str(e)}")
         # Reset API instance on error
@@ -216,6 +227,9 @@ async def check_stream_live(channel_name: str) -> bool:
 
     NOTE: This may be blocked by Cloudflare. If it fails, the bot will
     continue operating and rely on admin manual control via !tracking command.
+    The answer comes from the shared channel cache (core/kick_channels), so
+    repeated checks within KICK_CHANNEL_LIVE_TTL cost no request, and a failed
+    check is not retried until KICK_CHANNEL_NEGATIVE_TTL has passed.
 
     Args:
         channel_name: The Kick channel name
@@ -226,42 +240,17 @@ async def check_stream_live(channel_name: str) -> bool:
     Raises:
         Exception: If API request fails (Cloudflare block, timeout, etc.)
     """
-    try:
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "User-Agent": random.choice(USER_AGENTS),
-                "Accept": "application/json",
-                "Referer": "https://kick.com/",
-            }
-            async with session.get(
-                f"https://kick.com/api/v2/channels/{channel_name}",
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Check if livestream exists and is active
-                    livestream = data.get("livestream")
-                    if livestream and isinstance(livestream, dict):
-                        # If livestream object exists and has data, stream is live
-                        return True
-                    return False
-                elif response.status == 403:
-                    # Cloudflare block - raise exception so caller can handle gracefully
-                    raise Exception(f"Cloudflare blocked stream status check (403)")
-                else:
-                    # Other error status - raise exception
-                    raise Exception(f"HTTP {response.status}")
-    except asyncio.TimeoutError:
-        raise Exception("API request timed out")
-    except Exception as e:
-        # Re-raise with context
-        raise Exception(f"Stream status check failed: {type(e).__name__}: {str(e)}")
+    from core.kick_channels import kick_channels
+
+    is_live = await kick_channels.is_live(channel_name)
+    if is_live is None:
+        raise Exception(f"Stream status check failed: {kick_channels.last_failure(channel_name) or 'no data'}")
+    return is_live
 
 
 async def get_channel_info(channel_name: str) -> Optional[Dict[str, Any]]:
     """
-    Get full channel information from Kick API.
+    Get full channel information from Kick API (via the shared channel cache).
 
     Args:
         channel_name: The Kick channel name/slug
@@ -269,26 +258,9 @@ async def get_channel_info(channel_name: str) -> Optional[Dict[str, Any]]:
     Returns:
         Channel data dict or None if failed
     """
-    try:
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "User-Agent": random.choice(USER_AGENTS),
-                "Accept": "application/json",
-                "Referer": "https://kick.com/",
-            }
-            async with session.get(
-                f"https://kick.com/api/v2/channels/{channel_name}",
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=10),
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    logger.info(f"[Kick] Failed to get channel info: HTTP {response.status}")
-                    return None
-    except Exception as e:
-        logger.error(f"[Kick] Error getting channel info: {type(e).__name__}: {str(e)}")
-        return None
+    from core.kick_channels import kick_channels
+
+    return await kick_channels.info(channel_name)
 
 
 async def create_clip(
@@ -321,7 +293,7 @@ async def create_clip(
         return {"error": "authentication_required", "message": "No OAuth token available for clip creation"}
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             headers = {
                 "User-Agent": random.choice(USER_AGENTS),
                 "Accept": "application/json",
@@ -404,7 +376,7 @@ async def get_clips(channel_name: str, limit: int = 10) -> Optional[list]:
         List of clip dicts or None if failed
     """
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             headers = {
                 "User-Agent": random.choice(USER_AGENTS),
                 "Accept": "application/json",
@@ -668,7 +640,6 @@ class KickHybridAPI:
         self.client_secret = client_secret or os.getenv("KICK_CLIENT_SECRET")
 
         self._official_api: Optional[KickOfficialAPI] = None
-        self._session: Optional[aiohttp.ClientSession] = None
 
     @property
     def is_authenticated(self) -> bool:
@@ -692,14 +663,10 @@ class KickHybridAPI:
         """Cleanup resources"""
         if self._official_api:
             await self._official_api.close()
-        if self._session and not self._session.closed:
-            await self._session.close()
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session for unofficial API"""
-        if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
-        return self._session
+        """The shared keep-alive session (utils/http_pool); never closed by this client."""
+        return http_pool.session()
 
     # -------------------------
     # Chat Methods
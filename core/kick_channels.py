@@ -0,0 +1,351 @@
+"""
+Kick Channel Metadata Cache
+One place that reads kick.com/api/v2/channels/{slug}.
+
+get_channel_info, check_stream_live, the giveaway and slot-call avatar lookups
+and the chat loop's chatroom/channel id fallback each fetched that endpoint on
+their own, with no cache. A burst of giveaway entries or a clip-buffer pass
+sent the same request several times at once, and duplicate lookups behind
+Cloudflare are what get us blocked. KickChannelCache answers all of them:
+
+- One response fills every field; each field has its own TTL: ids
+  (channel/chatroom/user) KICK_CHANNEL_IDS_TTL (default 24h), avatar
+  KICK_CHANNEL_AVATAR_TTL (6h), live status and the full payload
+  KICK_CHANNEL_LIVE_TTL (30s).
+- Concurrent lookups for the same slug share one in-flight request.
+- Failures are cached too: a 404 for KICK_CHANNEL_NOT_FOUND_TTL (10 min),
+  anything else (403 from Cloudflare, 5xx, timeouts) for
+  KICK_CHANNEL_NEGATIVE_TTL (60s). While a slug is failing, ids and avatar
+  fall back to their last known (stale) values.
+- With REDIS_URL set, records are written through to Redis
+  (kick:channel:<slug>) and read from there on a local miss, so the bot and
+  the gunicorn web process share one cache. Redis errors only disable that
+  layer for REDIS_RETRY_SECONDS. A record read from Redis is merged into the
+  local one, so newer local fields and ids given to remember_ids() survive.
+- remember_ids() fills gaps only; a partial id set never counts as fresh.
+- stats() reports hits, misses, shared (coalesced) fetches, negative hits and
+  the hit rate per field.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from core.kick_api import USER_AGENTS
+from utils.http_pool import http_session
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_API_URL = "https://kick.com/api/v2/channels"
+FIELD_TTLS = {
+    "ids": float(os.getenv("KICK_CHANNEL_IDS_TTL", "86400")),
+    "avatar": float(os.getenv("KICK_CHANNEL_AVATAR_TTL", "21600")),
+    "live": float(os.getenv("KICK_CHANNEL_LIVE_TTL", "30")),
+    "info": float(os.getenv("KICK_CHANNEL_LIVE_TTL", "30")),
+}
+# Fields still worth returning after they expire, while the slug is failing.
+STALE_OK_FIELDS = ("ids", "avatar")
+NEGATIVE_TTL = float(os.getenv("KICK_CHANNEL_NEGATIVE_TTL", "60"))
+NOT_FOUND_TTL = float(os.getenv("KICK_CHANNEL_NOT_FOUND_TTL", "600"))
+REDIS_KEY_PREFIX = "kick:channel:"
+REDIS_RETRY_SECONDS = 60
+FETCH_TIMEOUT_SECONDS = 10
+
+
+def _redis_url():
+    url = os.getenv("REDIS_URL")
+    if url and "://" not in url:
+        url = f"redis://{url}"
+    return url
+
+
+def _extract(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Field values from one /api/v2/channels payload."""
+    user = data.get("user") or {}
+    chatroom = data.get("chatroom") or {}
+    livestream = data.get("livestream")
+    ids = {
+        "channel_id": str(data["id"]) if data.get("id") else None,
+        "chatroom_id": str(chatroom["id"]) if chatroom.get("id") else None,
+        "user_id": str(data.get("user_id") or user.get("id") or "") or None,
+    }
+    return {
+        "ids": ids,
+        "avatar": user.get("profile_pic"),
+        "live": bool(livestream and isinstance(livestream, dict)),
+        "info": data,
+    }
+
+
+class KickChannelCache:
+    """Per-slug Kick channel metadata with per-field TTLs; see module docstring."""
+
+    def __init__(self, base_url: str = CHANNEL_API_URL, redis_url=None, client_factory=None):
+        """
+        Args:
+            base_url: Channel endpoint; the slug is appended
+            redis_url: Redis URL for the shared layer; defaults to REDIS_URL (None/"" disables it)
+            client_factory: Returns a redis.asyncio client (tests inject a fake)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.redis_url = redis_url if redis_url is not None else _redis_url()
+        self._client_factory = client_factory or self._default_client
+        self._client = None
+        self._client_loop = None
+        self._redis_down_until = 0.0
+        # slug -> {"fields": {name: [value, fetched_at]}, "failed_until": float, "failure": str}
+        self._records: Dict[str, dict] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = {name: 0 for name in FIELD_TTLS}
+        self.misses = {name: 0 for name in FIELD_TTLS}
+        self.redis_hits = 0
+        self.negative_hits = 0
+        self.stale_served = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _default_client(self):
+        import redis.asyncio as aioredis
+
+        return aioredis.from_url(self.redis_url, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    async def info(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Full channel payload (short TTL: it carries the livestream), or None."""
+        return await self._get(slug, "info")
+
+    async def ids(self, slug: str) -> Optional[Dict[str, Optional[str]]]:
+        """{"channel_id", "chatroom_id", "user_id"} as strings, or None."""
+        return await self._get(slug, "ids")
+
+    async def chatroom_id(self, slug: str) -> Optional[str]:
+        ids = await self.ids(slug)
+        return ids.get("chatroom_id") if ids else None
+
+    async def avatar(self, slug: str) -> Optional[str]:
+        """The channel owner's profile picture URL, or None."""
+        return await self._get(slug, "avatar")
+
+    async def is_live(self, slug: str) -> Optional[bool]:
+        """True/False, or None when Kick could not be asked (see last_failure)."""
+        return await self._get(slug, "live")
+
+    def last_failure(self, slug: str) -> Optional[str]:
+        record = self._records.get(self._key(slug))
+        return record.get("failure") if record else None
+
+    def remember_ids(self, slug: str, **ids):
+        """
+        Store ids learned elsewhere (e.g. the kickpython chatroom resolver).
+
+        They are usually a subset (just the chatroom id), so the field's age is
+        left alone: a lookup still fetches the full set, and the remembered ids
+        are served as stale values while the slug is failing.
+        """
+        record = self._record(self._key(slug))
+        known, fetched_at = record["fields"].get("ids") or [None, 0.0]
+        known = dict(known or {})
+        known.update({name: str(value) for name, value in ids.items() if value})
+        record["fields"]["ids"] = [known, fetched_at]
+
+    def invalidate(self, slug: str):
+        self._records.pop(self._key(slug), None)
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    @staticmethod
+    def _key(slug: str) -> str:
+        return str(slug or "").strip().lower()
+
+    def _record(self, key: str) -> dict:
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = {"fields": {}, "failed_until": 0.0, "failure": None}
+        return record
+
+    @staticmethod
+    def _fresh(record: Optional[dict], field: str, now: float) -> bool:
+        entry = record["fields"].get(field) if record else None
+        return entry is not None and now - entry[1] < FIELD_TTLS[field]
+
+    async def _get(self, slug: str, field: str):
+        key = self._key(slug)
+        if not key:
+            return None
+        now = time.time()
+        record = self._records.get(key)
+        if self._fresh(record, field, now):
+            self.hits[field] += 1
+            return record["fields"][field][0]
+
+        shared = await self._redis_load(key)
+        if shared is not None:
+            record = self._records[key] = self._merge(record, shared)
+            if self._fresh(record, field, now):
+                self.redis_hits += 1
+                self.hits[field] += 1
+                return record["fields"][field][0]
+
+        if record is None or record["failed_until"] <= now:
+            self.misses[field] += 1
+            await self._fetch_once(key)
+            record = self._records.get(key)
+            if self._fresh(record, field, time.time()):
+                return record["fields"][field][0]
+        else:
+            self.negative_hits += 1
+
+        if field in STALE_OK_FIELDS and record and record["fields"].get(field):
+            self.stale_served += 1
+            return record["fields"][field][0]
+        return None
+
+    @staticmethod
+    def _merge(local: Optional[dict], shared: dict) -> dict:
+        """The Redis record with any newer local fields (and remembered ids) kept."""
+        if local is None:
+            return shared
+        fields = dict(shared.get("fields") or {})
+        for field, entry in local["fields"].items():
+            theirs = fields.get(field)
+            if theirs is None or entry[1] > theirs[1]:
+                fields[field] = entry
+        local_ids, shared_ids = local["fields"].get("ids"), fields.get("ids")
+        if local_ids and shared_ids is not local_ids:
+            known = dict(local_ids[0] or {})
+            known.update({name: value for name, value in (shared_ids[0] or {}).items() if value})
+            fields["ids"] = [known, shared_ids[1]]
+        return {
+            "fields": fields,
+            "failed_until": max(local["failed_until"], shared.get("failed_until") or 0.0),
+            "failure": shared.get("failure") or local["failure"],
+        }
+
+    async def _fetch_once(self, key: str):
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key))
+            task.add_done_callback(lambda _done, key=key: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        await asyncio.shield(task)
+
+    async def _fetch(self, key: str):
+        self.fetches += 1
+        record = self._record(key)
+        headers = {
+            "User-Agent": random.choice(USER_AGENTS),
+            "Accept": "application/json",
+            "Referer": "https://kick.com/",
+        }
+        data, status = None, None
+        try:
+            async with http_session() as session:
+                async with session.get(
+                    f"{self.base_url}/{key}",
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS),
+                ) as response:
+                    status = response.status
+                    if status == 200:
+                        data = await response.json(content_type=None)
+        except Exception as e:
+            data, status = None, f"{type(e).__name__}: {e}"
+
+        now = time.time()
+        if isinstance(data, dict):
+            for field, value in _extract(data).items():
+                record["fields"][field] = [value, now]
+            record["failed_until"], record["failure"] = 0.0, None
+        else:
+            self.failures += 1
+            if status == 404:
+                record["failure"], ttl = "Channel not found (404)", NOT_FOUND_TTL
+            elif status == 403:
+                record["failure"], ttl = "Cloudflare blocked request (403)", NEGATIVE_TTL
+            else:
+                record["failure"], ttl = (f"HTTP {status}" if isinstance(status, int) else status), NEGATIVE_TTL
+            record["failed_until"] = now + ttl
+            logger.info(f"[Kick] ⚠️ Channel lookup for {key} failed: {record['failure']} (retry in {ttl:.0f}s)")
+        await self._redis_store(key, record)
+
+    # -------------------------
+    # Shared Redis layer
+    # -------------------------
+
+    def _redis(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = self._client_factory()
+            self._client_loop = loop
+        return self._client
+
+    def _redis_failed(self, e: Exception):
+        logger.info(f"[Kick] ⚠️ Channel cache Redis unavailable ({e}); local cache only for {REDIS_RETRY_SECONDS}s")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+        self._client = None
+
+    async def _redis_load(self, key: str) -> Optional[dict]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(REDIS_KEY_PREFIX + key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    async def _redis_store(self, key: str, record: dict):
+        client = self._redis()
+        if client is None:
+            return
+        # Keep the key as long as its longest-lived field (or the failure) is useful.
+        expires_in = max([FIELD_TTLS[field] for field in record["fields"]] + [record["failed_until"] - time.time(), 1])
+        try:
+            await client.set(REDIS_KEY_PREFIX + key, json.dumps(record), ex=int(expires_in))
+        except Exception as e:
+            self._redis_failed(e)
+
+    def stats(self) -> dict:
+        fields = {}
+        for field in FIELD_TTLS:
+            lookups = self.hits[field] + self.misses[field]
+            fields[field] = {
+                "hits": self.hits[field],
+                "misses": self.misses[field],
+                "hit_rate": round(self.hits[field] / lookups, 3) if lookups else None,
+            }
+        return {
+            "slugs": len(self._records),
+            "fields": fields,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "negative_hits": self.negative_hits,
+            "stale_served": self.stale_served,
+            "redis_hits": self.redis_hits,
+            "in_flight": len(self._inflight),
+        }
+
+
+kick_channels = KickChannelCache()
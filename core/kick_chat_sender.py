@@ -0,0 +1,97 @@
+"""
+Kick Chat Sender
+Posts one chat line to Kick's official chat endpoint as the bot.
+
+chat_outbox hands each guild's Kick lane to KickWebSocketManager.deliver,
+which delegates here. The OAuth token is loaded once per guild and kept in
+``_tokens`` (the kickpython connection objects have no token attribute of
+their own). On 401 the stored token is re-read (a proactive refresh may have
+written a new one) or refreshed, and the line is retried once, with the
+streamer's token as the final fallback.
+
+Token sources are injected by bot.py, which owns the database:
+
+- load_token(guild_id): the stored bot token, or None
+- refresh_token(guild_id, guild_name): a freshly refreshed token, or None
+- fallback_token(guild_id): the streamer's token, or None
+"""
+
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.http_pool import http_session
+
+logger = logging.getLogger(__name__)
+
+CHAT_URL = "https://api.kick.com/public/v1/chat"
+
+
+class KickChatSender:
+    """Per-guild Kick chat tokens and the send-with-retry path; see module docstring."""
+
+    def __init__(
+        self,
+        load_token: Callable[[int], Awaitable[Optional[str]]],
+        refresh_token: Callable[[int, str], Awaitable[Optional[str]]],
+        fallback_token: Callable[[int], Awaitable[Optional[str]]],
+    ):
+        self._load_token = load_token
+        self._refresh_token = refresh_token
+        self._fallback_token = fallback_token
+        self._tokens: Dict[int, str] = {}
+
+    def forget(self, guild_id: int):
+        """Drop a guild's cached token (its connection went away)."""
+        self._tokens.pop(guild_id, None)
+
+    async def deliver(self, guild_id: int, guild_name: str, message: str) -> bool:
+        token = self._tokens.get(guild_id)
+        if not token:
+            token = await self._load_token(guild_id)
+            if not token:
+                logger.warning(f"⚠️ No kick_oauth_token found - messages will fail!")
+                return False
+            self._tokens[guild_id] = token
+
+        logger.debug(f"📤 Sending Kick message: {message[:100]}")
+        status, response_text = await self._post_chat(token, message)
+        if status == 401:
+            logger.info(f"🔄 Token expired, attempting refresh...")
+            stored = await self._load_token(guild_id)
+            refreshed = stored if stored and stored != token else await self._refresh_token(guild_id, guild_name)
+            if not refreshed:
+                self.forget(guild_id)
+                logger.info(f"❌ Token refresh failed")
+                return False
+            self._tokens[guild_id] = refreshed
+            status, response_text = await self._post_chat(refreshed, message)
+            logger.info(f"📡 Retry response: HTTP {status} - {response_text[:200]}")
+            if status not in (200, 201):
+                # Try streamer OAuth as final fallback
+                logger.info(f"⚠️ Trying streamer OAuth as fallback...")
+                fallback = await self._fallback_token(guild_id)
+                if fallback:
+                    self._tokens[guild_id] = fallback
+                    status, response_text = await self._post_chat(fallback, message)
+                    logger.info(f"📡 Streamer OAuth: HTTP {status} - {response_text[:200]}")
+
+        if status in (200, 201):
+            logger.info(f"✅ Kick message sent")
+            return True
+        logger.info(f"⚠️ Send failed: HTTP {status}: {response_text[:500]}")
+        return False
+
+    @staticmethod
+    async def _post_chat(access_token: str, message: str) -> Tuple[int, str]:
+        """POST to the official chat endpoint in bot mode; returns (status, body)."""
+        headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "User-Agent": "LeleBot/1.0",
+        }
+        # Use bot mode - broadcaster_user_id not needed, message sent to channel attached to token
+        payload = {"content": message, "type": "bot"}
+        async with http_session() as session:
+            async with session.post(CHAT_URL, headers=headers, json=payload, timeout=10) as resp:
+                return resp.status, await resp.text()
@@ -33,6 +33,11 @@ from typing import Any, Callable, Dict, Optional
 
 from flask import Blueprint, abort, jsonify, request
 
+from utils.db_engines import get_engine
+
+from .event_loop_worker import get_webhook_worker
+from .webhook_subscription_cache import subscription_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -317,6 +322,40 @@ class WebhookEventHandler:
             return False
 
 
+def _load_kick_subscription(engine, subscription_id: str):
+    """Look up (discord_server_id, broadcaster_user_id, webhook_secret) for an active sub, or None."""
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                """
+            SELECT discord_server_id, broadcaster_user_id, webhook_secret
+            FROM kick_webhook_subscriptions
+            WHERE subscription_id = :sub_id AND status = 'active'
+        """
+            ),
+            {"sub_id": subscription_id},
+        ).fetchone()
+    return tuple(row) if row else None
+
+
+def _forget_processed(engine, message_id: str):
+    """Remove a delivery's idempotency mark after refusing it, so the provider's retry is processed."""
+    if engine is None or not message_id:
+        return
+    try:
+        from sqlalchemy import text
+
+        with engine.begin() as conn:
+            conn.execute(
+                text("DELETE FROM processed_webhook_messages WHERE message_id = :msg_id"),
+                {"msg_id": message_id},
+            )
+    except Exception as e:
+        logger.info(f"[Webhook] ⚠️ Failed to clear dedup mark for {message_id}: {e}")
+
+
 # -------------------------
 # Flask Routes
 # -------------------------
@@ -345,13 +384,8 @@ def handle_kick_webhook():
     if request.method != "POST":
         return "", 204
 
-    # 0.5️⃣ ENSURE TABLES EXIST
-    from sqlalchemy import create_engine
-
-    DATABASE_URL = os.getenv("DATABASE_URL")
-    if DATABASE_URL:
-        engine = create_engine(DATABASE_URL)
-        ensure_webhook_tables(engine)
+    # 0.5️⃣ SHARED POOLED ENGINE (webhook tables are created at startup by oauth_server)
+    engine = get_engine()
 
     # 1️⃣ GET RAW BODY FIRST (CRITICAL: before ANY json parsing)
     raw_body: bytes = request.get_data(cache=True)
@@ -404,39 +438,24 @@ def handle_kick_webhook():
         webhook_secret = None
 
         try:
-            from sqlalchemy import create_engine, text
-
-            db_url = os.getenv("DATABASE_URL")
-            if db_url:
-                engine = create_engine(db_url, pool_pre_ping=True)
-                with engine.connect() as conn:
-                    result = conn.execute(
-                        text(
-                            """
-                        SELECT discord_server_id, broadcaster_user_id, webhook_secret
-                        FROM kick_webhook_subscriptions
-                        WHERE subscription_id = :sub_id AND status = 'active'
-                    """
-                        ),
-                        {"sub_id": subscription_id},
-                    ).fetchone()
+            if engine is not None:
+                # Served from the in-process subscription cache; the DB is only hit on a miss.
+                result = subscription_cache.resolve(
+                    "kick", subscription_id, lambda: _load_kick_subscription(engine, subscription_id)
+                )
 
-                    if result:
-                        discord_server_id = result[0]
-                        broadcaster_user_id = result[1]
-                        webhook_secret = result[2]
-
-                        if os.getenv("DEBUG_WEBHOOKS") == "true":
-                            logger.info(
-                                f"[Webhook] ✅ Resolved subscription: server={discord_server_id}, broadcaster={broadcaster_user_id}"
-                            )
-                    else:
-                        # Unknown subscription (legacy/old webhook still firing)
-                        # Return 200 OK to prevent Kick retry storms, but do NOT process
+                if result:
+                    discord_server_id, broadcaster_user_id, webhook_secret = result
+
+                    if os.getenv("DEBUG_WEBHOOKS") == "true":
                         logger.info(
-                            f"[Webhook] ⚠️  Unknown subscription ID: {subscription_id} (legacy webhook, ignoring)"
+                            f"[Webhook] ✅ Resolved subscription: server={discord_server_id}, broadcaster={broadcaster_user_id}"
                         )
-                        return jsonify({"status": "ok", "message": "unknown subscription"}), 200
+                else:
+                    # Unknown subscription (legacy/old webhook still firing)
+                    # Return 200 OK to prevent Kick retry storms, but do NOT process
+                    logger.info(f"[Webhook] ⚠️  Unknown subscription ID: {subscription_id} (legacy webhook, ignoring)")
+                    return jsonify({"status": "ok", "message": "unknown subscription"}), 200
         except Exception as db_err:
             logger.info(f"[Webhook] ❌ Database error: {db_err}")
             return jsonify({"error": "Database error"}), 500
@@ -492,7 +511,7 @@ def handle_kick_webhook():
 
         # 6️⃣ IDEMPOTENCY CHECK (Kick retries webhooks on failure)
         # Check if we've already processed this message_id
-        if message_id:
+        if message_id and engine is not None:
             try:
                 from sqlalchemy import text as sql_text
 
@@ -530,16 +549,12 @@ def handle_kick_webhook():
                 # If deduplication fails, continue anyway (better to process twice than not at all)
                 logger.info(f"[Webhook] ⚠️ Deduplication check failed: {dedup_err}")
 
-        # 8️⃣ HANDLE EVENT
+        # 8️⃣ HANDLE EVENT (acknowledge now; handler runs on the worker's long-lived event loop)
         if _event_handler:
-            import asyncio
-
-            # Run async handler in event loop
-            loop = asyncio.new_event_loop()
-            try:
-                loop.run_until_complete(_event_handler.handle(event_type, event_data))
-            finally:
-                loop.close()
+            if not get_webhook_worker().submit(_event_handler.handle(event_type, event_data), label=event_type):
+                # Saturated: let Kick retry, and clear the dedup mark so the retry isn't skipped.
+                _forget_processed(engine, message_id)
+                return jsonify({"error": "Busy, retry later"}), 503
         else:
             _log_event(event_type, event_data)
 
@@ -748,13 +763,12 @@ def simulate_real_webhook_event():
 
     # Look up real subscription ID and secret from database
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
-        db_url = os.getenv("DATABASE_URL")
-        if not db_url:
+        engine = get_engine()
+        if engine is None:
             return jsonify({"error": "DATABASE_URL not configured"}), 500
 
-        engine = create_engine(db_url, pool_pre_ping=True)
         with engine.connect() as conn:
             result = conn.execute(
                 text(
@@ -959,13 +973,10 @@ def create_discord_notifier(discord_bot, channel_id: int):
         # per-server reward rate itself and dedups on event_id.
         if discord_server_id and count > 0:
             try:
-                from sqlalchemy import create_engine
-
                 from raffle_system.gifted_sub_tracker import track_gifted_sub
 
-                db_url = os.getenv("DATABASE_URL")
-                if db_url:
-                    engine = create_engine(db_url, pool_pre_ping=True)
+                engine = get_engine()
+                if engine is not None:
                     # Prefer Kick's own event id for dedup; fall back to a
                     # stable composite so re-delivery of the same event is a
                     # duplicate, not a double-award.
@@ -0,0 +1,132 @@
+"""
+Event Loop Lag Monitor
+Measures how late the bot's event loop runs and which code is blocking it.
+
+A heartbeat task sleeps for a short interval and records how late it wakes
+(the loop lag). A watchdog thread checks that heartbeat independently. When the
+loop has not ticked for LOOP_LAG_THRESHOLD_MS (default 100 ms), the thread
+samples the loop thread's current stack and charges the elapsed time to the
+innermost frame in this repository, e.g. "bot.py:1234 in confirm_button".
+Every LOOP_LAG_REPORT_SECONDS (default 300) the lag percentiles and the call
+sites that blocked longest are logged, then the window resets.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from utils.percentiles import percentile
+
+logger = logging.getLogger(__name__)
+
+THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+REPORT_SECONDS = float(os.getenv("LOOP_LAG_REPORT_SECONDS", "300"))
+TICK_SECONDS = 0.05
+TOP_SITES = 5
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _call_site(frame) -> str:
+    """Innermost frame that belongs to this repo (not the stdlib, site-packages or this module)."""
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_REPO_ROOT)
+            and "site-packages" not in filename
+            and os.path.abspath(filename) != os.path.abspath(__file__)
+        ):
+            return f"{os.path.relpath(filename, _REPO_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    if innermost is None:
+        return "unknown"
+    return f"{os.path.basename(innermost.f_code.co_filename)}:{innermost.f_lineno} in {innermost.f_code.co_name}"
+
+
+class LoopLagMonitor:
+    """Heartbeat task + watchdog thread; see module docstring."""
+
+    def __init__(self, threshold_ms: float = THRESHOLD_MS, report_seconds: float = REPORT_SECONDS):
+        self.threshold = threshold_ms / 1000
+        self.report_seconds = report_seconds
+        self._loop_thread_id = None
+        self._last_tick = time.monotonic()
+        self._lag_ms = deque(maxlen=5000)
+        self._blocked = {}  # call site -> seconds blocked in this window
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop (idempotent; call from the loop)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True).start()
+        logger.debug(f"✅ Loop lag monitor started (threshold {self.threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        window_start = time.monotonic()
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(TICK_SECONDS)
+            now = time.monotonic()
+            self._last_tick = now
+            self._lag_ms.append(max(0.0, (now - before - TICK_SECONDS) * 1000))
+            if now - window_start >= self.report_seconds:
+                self._report()
+                window_start = now
+
+    def _watchdog(self):
+        while not self._stop.wait(TICK_SECONDS):
+            if time.monotonic() - self._last_tick < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            site = _call_site(frame)
+            with self._lock:
+                self._blocked[site] = self._blocked.get(site, 0.0) + TICK_SECONDS
+
+    def top_sites(self, limit: int = TOP_SITES):
+        """[(call site, seconds blocked)] for the current window, longest first."""
+        with self._lock:
+            return sorted(self._blocked.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def stats(self) -> dict:
+        samples = list(self._lag_ms)
+        return {
+            "lag_p50_ms": round(percentile(samples, 50), 1) if samples else None,
+            "lag_p99_ms": round(percentile(samples, 99), 1) if samples else None,
+            "lag_max_ms": round(max(samples), 1) if samples else None,
+            "top_blocking_sites": self.top_sites(),
+        }
+
+    def _report(self):
+        stats = self.stats()
+        sites = ", ".join(f"{site} ({seconds * 1000:.0f}ms)" for site, seconds in stats["top_blocking_sites"])
+        message = (
+            f"📊 Event loop lag p50={stats['lag_p50_ms']}ms p99={stats['lag_p99_ms']}ms max={stats['lag_max_ms']}ms"
+        )
+        if sites:
+            logger.warning(f"{message}; blocked longest by: {sites}")
+        else:
+            logger.info(message)
+        self._lag_ms.clear()
+        with self._lock:
+            self._blocked.clear()
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -20,7 +20,7 @@ from urllib.parse import urlencode, urlparse
 
 from authlib.integrations.requests_client import OAuth2Session
 from flask import Flask, jsonify, redirect, render_template_string, request
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 # Configure logging early. This module is the gunicorn entrypoint (core.oauth_server:app)
 # in combined_server.py, a separate process from bot.py, so it must install the root
@@ -35,26 +35,35 @@ logger = logging.getLogger(__name__)
 # Sign bot_events messages so the bot's redis_subscriber can reject forged chat.
 from utils.redis_signing import sign_payload  # noqa: E402
 
+# One pooled engine per worker process, shared with the webhook blueprints.
+from utils.db_engines import get_engine  # noqa: E402
+
+from .webhook_subscription_cache import publish_subscription_change  # noqa: E402
+
 # Import webhook handlers
 try:
     from .kick_official_api import OAUTH_SCOPES, WEBHOOK_EVENTS, KickOfficialAPI
     from .kick_webhooks import WebhookEventHandler, register_webhook_routes
+    from .kick_webhooks import ensure_webhook_tables as ensure_kick_webhook_tables
 
     HAS_KICK_OFFICIAL = True
 except ImportError:
     HAS_KICK_OFFICIAL = False
     register_webhook_routes = None
     WebhookEventHandler = None
+    ensure_kick_webhook_tables = None
 
 # Import Twitch webhook handlers (independent of Kick availability)
 try:
     from .twitch_webhooks import create_twitch_event_handler, register_twitch_webhook_routes
+    from .twitch_webhooks import ensure_webhook_tables as ensure_twitch_webhook_tables
 
     HAS_TWITCH = True
 except ImportError:
     HAS_TWITCH = False
     register_twitch_webhook_routes = None
     create_twitch_event_handler = None
+    ensure_twitch_webhook_tables = None
 
 # -------------------------
 # 🔒 Security: OAuth Token Signing
@@ -565,7 +574,7 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///watchtime.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+engine = get_engine(DATABASE_URL)
 
 # Initialize database tables
 with engine.begin() as conn:
@@ -598,6 +607,12 @@ with engine.begin() as conn:
 
     # kick_oauth_tokens table is created by the dashboard - no need to create bot_tokens here
 
+# Webhook dedup table: created once per worker at startup, not on every delivery.
+if ensure_kick_webhook_tables:
+    ensure_kick_webhook_tables(engine)
+if ensure_twitch_webhook_tables:
+    ensure_twitch_webhook_tables(engine)
+
 # Note: OAuth states are stored in database, not in-memory
 # This is necessary because Gunicorn workers don't share memory
 
@@ -759,6 +774,7 @@ def create_webhook_subscription():
         finally:
             loop.close()
 
+        publish_subscription_change("kick")
         return jsonify({"subscription": subscription}), 201
 
     except Exception as e:
@@ -802,6 +818,7 @@ def delete_webhook_subscription(subscription_id):
         finally:
             loop.close()
 
+        publish_subscription_change("kick", subscription_id)
         return jsonify({"status": "deleted", "id": subscription_id}), 200
 
     except Exception as e:
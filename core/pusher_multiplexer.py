@@ -0,0 +1,281 @@
+"""
+Kick Pusher Connection Multiplexer
+Packs every guild's Pusher channel subscriptions onto a few shared WebSockets.
+
+kick_chat_loop used to open one Pusher socket per guild (each subscribed to
+chatrooms.{id}.v2 + channel.{id}) with its own heartbeat and reconnect backoff,
+so N guilds meant N sockets. Pusher happily carries many subscriptions per
+socket, so guilds now register their channel names here instead:
+
+- Channels are packed onto shards of up to KICK_PUSHER_CHANNELS_PER_SOCKET
+  (default 200) subscriptions. A guild's channels always live on one shard.
+- Each shard owns one socket, answers pusher:ping, keeps the connection alive
+  and reconnects with backoff, resubscribing everything it owns.
+- Frames are routed by their "channel" field to the owning guild's queue, so the
+  per-guild chat handling in bot.py is unchanged (it just reads a queue instead
+  of a socket).
+- register() on an already-registered guild diffs its channel set and sends only
+  the pusher:unsubscribe / pusher:subscribe messages that changed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+CHANNELS_PER_SOCKET = int(os.getenv("KICK_PUSHER_CHANNELS_PER_SOCKET", "200"))
+
+# Frames buffered per guild before the oldest is dropped (a stalled handler must
+# not grow memory without bound or stall the other guilds on the socket).
+GUILD_QUEUE_SIZE = 1000
+
+# Send a pusher:ping after this many idle seconds; reconnect if the socket is dead.
+PING_INTERVAL_SECONDS = 30
+
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+
+def _subscribe_frame(channel: str) -> str:
+    return json.dumps({"event": "pusher:subscribe", "data": {"auth": "", "channel": channel}})
+
+
+def _unsubscribe_frame(channel: str) -> str:
+    return json.dumps({"event": "pusher:unsubscribe", "data": {"channel": channel}})
+
+
+class _PusherShard:
+    """One Pusher socket and the channels subscribed on it."""
+
+    def __init__(self, mux: "PusherMultiplexer", index: int):
+        self.mux = mux
+        self.index = index
+        self.channels: Dict[str, int] = {}  # channel name -> guild_id
+        self.ws = None
+        self.connected = False
+        self.reconnects = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run(), name=f"kick-pusher-shard-{self.index}")
+
+    async def stop(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def send(self, frame: str):
+        """Send on the live socket; if we're between connections, _run resubscribes on connect."""
+        if self.connected and self.ws is not None:
+            try:
+                await self.ws.send(frame)
+            except Exception as e:
+                logger.info(f"[Kick][Pusher {self.index}] ⚠️ Send failed, will resync on reconnect: {e}")
+
+    async def _run(self):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async with self.mux.connect() as ws:
+                    established = json.loads(await ws.recv())
+                    if established.get("event") == "pusher:error":
+                        error = established.get("data") or {}
+                        raise ConnectionError(f"Pusher error {error.get('code')}: {error.get('message')}")
+
+                    self.ws = ws
+                    self.connected = True
+                    delay = RECONNECT_MIN_DELAY
+                    for channel in list(self.channels):
+                        await ws.send(_subscribe_frame(channel))
+                    logger.info(f"[Kick][Pusher {self.index}] ✅ Connected, subscribed {len(self.channels)} channel(s)")
+
+                    while True:
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=self.mux.ping_interval)
+                        except asyncio.TimeoutError:
+                            await ws.send(json.dumps({"event": "pusher:ping"}))
+                            continue
+                        await self._route(ws, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info(f"[Kick][Pusher {self.index}] Connection error: {e}. Reconnecting in {delay}s.")
+            finally:
+                self.connected = False
+                self.ws = None
+
+            self.reconnects += 1
+            await asyncio.sleep(delay * (0.5 + random.random() / 2))
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _route(self, ws, raw):
+        try:
+            frame = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        event = frame.get("event")
+        if event == "pusher:ping":
+            await ws.send(json.dumps({"event": "pusher:pong"}))
+            return
+        if event == "pusher:pong":
+            return
+        if event == "pusher:error":
+            logger.info(f"[Kick][Pusher {self.index}] ⚠️ {frame.get('data')}")
+            return
+
+        guild_id = self.channels.get(frame.get("channel"))
+        if guild_id is not None:
+            self.mux._deliver(guild_id, raw)
+
+
+class PusherMultiplexer:
+    """Shared Pusher sockets for all guilds; see module docstring."""
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        channels_per_socket: int = CHANNELS_PER_SOCKET,
+        queue_size: int = GUILD_QUEUE_SIZE,
+        ping_interval: float = PING_INTERVAL_SECONDS,
+        connect: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            url: Pusher WebSocket URL (including protocol/version query string)
+            channels_per_socket: Max subscriptions packed onto one socket
+            queue_size: Frames buffered per guild before dropping the oldest
+            ping_interval: Idle seconds before sending pusher:ping
+            connect: Factory returning an async context manager yielding a socket;
+                defaults to websockets.connect(url)
+        """
+        self.url = url
+        self.channels_per_socket = max(1, channels_per_socket)
+        self.queue_size = queue_size
+        self.ping_interval = ping_interval
+        self.connect = connect or (lambda: websockets.connect(url, max_size=None))
+        self._shards = []
+        self._guild_shard: Dict[int, _PusherShard] = {}
+        self._guild_channels: Dict[int, set] = {}
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._lock = asyncio.Lock()
+        self._next_shard_index = 0
+        self.dropped_frames = 0
+
+    async def register(self, guild_id: int, channels: Iterable[str]) -> asyncio.Queue:
+        """
+        Subscribe a guild's channels (or update them) and return its frame queue.
+
+        Re-registering diffs against the current set: unchanged channels stay
+        subscribed, removed ones are unsubscribed and new ones subscribed. If the
+        guild's shard can't fit the new set it moves to one that can.
+
+        Returns:
+            asyncio.Queue: Raw Pusher frames (JSON strings) for this guild's channels
+        """
+        wanted = {c for c in channels if c}
+        async with self._lock:
+            queue = self._queues.get(guild_id)
+            if queue is None:
+                queue = self._queues[guild_id] = asyncio.Queue(maxsize=self.queue_size)
+
+            current = self._guild_channels.get(guild_id, set())
+            shard = self._guild_shard.get(guild_id)
+            if shard is not None and len(shard.channels) - len(current) + len(wanted) > self.channels_per_socket:
+                await self._release(guild_id)
+                current, shard = set(), None
+            if shard is None:
+                shard = self._pick_shard(len(wanted))
+                self._guild_shard[guild_id] = shard
+
+            for channel in current - wanted:
+                shard.channels.pop(channel, None)
+                await shard.send(_unsubscribe_frame(channel))
+            for channel in wanted - current:
+                shard.channels[channel] = guild_id
+                await shard.send(_subscribe_frame(channel))
+            self._guild_channels[guild_id] = wanted
+            return queue
+
+    @asynccontextmanager
+    async def subscription(self, guild_id: int, channels: Iterable[str]):
+        """
+        register() for the duration of a block, yielding the guild's frame queue.
+
+        Leaving the block normally keeps the subscriptions, so the caller's next
+        register()/subscription() only sends the channels that changed. Leaving
+        on an error or cancellation (e.g. the guild was removed) unregisters.
+        """
+        queue = await self.register(guild_id, channels)
+        try:
+            yield queue
+        except BaseException:
+            await self.unregister(guild_id)
+            raise
+
+    async def unregister(self, guild_id: int):
+        """Unsubscribe all of a guild's channels and drop its queue."""
+        async with self._lock:
+            await self._release(guild_id)
+            self._queues.pop(guild_id, None)
+
+    async def close(self):
+        """Stop every shard (bot shutdown)."""
+        async with self._lock:
+            for shard in self._shards:
+                await shard.stop()
+            self._shards.clear()
+            self._guild_shard.clear()
+            self._guild_channels.clear()
+
+    async def _release(self, guild_id):
+        shard = self._guild_shard.pop(guild_id, None)
+        channels = self._guild_channels.pop(guild_id, set())
+        if shard is None:
+            return
+        for channel in channels:
+            shard.channels.pop(channel, None)
+            await shard.send(_unsubscribe_frame(channel))
+        if not shard.channels:
+            await shard.stop()
+            self._shards.remove(shard)
+
+    def _pick_shard(self, needed: int) -> _PusherShard:
+        for shard in self._shards:
+            if len(shard.channels) + needed <= self.channels_per_socket:
+                return shard
+        shard = _PusherShard(self, self._next_shard_index)
+        self._next_shard_index += 1
+        self._shards.append(shard)
+        shard.start()
+        return shard
+
+    def _deliver(self, guild_id, raw):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            return
+        if queue.full():
+            queue.get_nowait()
+            self.dropped_frames += 1
+        queue.put_nowait(raw)
+
+    def stats(self) -> dict:
+        """Socket/subscription counters for logging and tests."""
+        return {
+            "sockets": len(self._shards),
+            "connected": sum(1 for s in self._shards if s.connected),
+            "guilds": len(self._guild_shard),
+            "channels": sum(len(s.channels) for s in self._shards),
+            "reconnects": sum(s.reconnects for s in self._shards),
+            "dropped_frames": self.dropped_frames,
+        }
@@ -0,0 +1,360 @@
+"""
+Watchtime Role Sync
+Grants watchtime roles from a persistent per-guild queue instead of a periodic full scan.
+
+update_roles_task used to re-read watchtime_roles every
+ROLE_UPDATE_INTERVAL_SECONDS, walk every linked viewer of every guild, and
+await each add_roles() and DM one at a time. Now:
+
+- The watchtime tick queues a job only for linked viewers whose minutes crossed
+  a role's minutes_required during that tick. This happens in the same
+  statement as the upsert (utils/watchtime_accrual.py,
+  bulk_upsert_watchtime_queue_roles).
+- Jobs live in role_sync_queue, keyed (discord_server_id, discord_id,
+  role_name). Queuing a job twice coalesces into one row, and rows left over
+  when the bot stops are picked up after a restart.
+- One worker task per guild drains the queue. A member's pending roles go out
+  in a single add_roles() call, followed by one DM listing them. Role adds
+  draw from a per-guild token bucket, since Discord rate-limits the member
+  role route per guild. DMs draw from one shared bucket. A 429 or 5xx keeps
+  the job for a later retry, up to ROLE_SYNC_MAX_ATTEMPTS.
+- A new account link queues the roles the member's existing watchtime already
+  earns (queue_member_watchtime_roles, from the OAuth notification task), since
+  no later tick will cross those thresholds.
+- update_roles_task still runs a full reconcile, but only every
+  ROLE_RECONCILE_INTERVAL_SECONDS (default 6h). It catches roles created after
+  the threshold was crossed and members who rejoined. It also queues its
+  findings instead of calling Discord inline.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import discord
+from sqlalchemy import text
+
+from core.db_executor import db_executor
+
+logger = logging.getLogger(__name__)
+
+# Jobs fetched per worker pass
+BATCH_SIZE = int(os.getenv("ROLE_SYNC_BATCH", "50"))
+# Role adds per second per guild (Discord buckets the member role route per guild)
+ROLE_ADDS_PER_SECOND = float(os.getenv("ROLE_SYNC_ADDS_PER_SECOND", "1"))
+ROLE_ADD_BURST = int(os.getenv("ROLE_SYNC_ADD_BURST", "5"))
+# Role-unlocked DMs per second across all guilds (DM channel creation is limited globally)
+DMS_PER_SECOND = float(os.getenv("ROLE_SYNC_DMS_PER_SECOND", "0.5"))
+DM_BURST = int(os.getenv("ROLE_SYNC_DM_BURST", "3"))
+# Retriable failures (429 / 5xx) before a job is dropped, and the wait between retries
+MAX_ATTEMPTS = int(os.getenv("ROLE_SYNC_MAX_ATTEMPTS", "5"))
+RETRY_DELAY_SECONDS = float(os.getenv("ROLE_SYNC_RETRY_DELAY", "30"))
+
+QUEUE_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS role_sync_queue (
+    discord_server_id BIGINT NOT NULL,
+    discord_id BIGINT NOT NULL,
+    role_name TEXT NOT NULL,
+    kick_name TEXT,
+    minutes INTEGER,
+    attempts INTEGER DEFAULT 0,
+    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (discord_server_id, discord_id, role_name)
+);
+"""
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self, tokens: int = 1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+def enqueue(conn, server_id: int, jobs: Iterable[dict]) -> int:
+    """
+    Queue role grants; a job already queued for the same member and role is updated in place.
+
+    Args:
+        conn: SQLAlchemy connection (inside the caller's transaction)
+        server_id: Discord guild/server ID
+        jobs: Dicts with discord_id, role_name, kick_name and minutes
+
+    Returns:
+        int: Number of jobs written
+    """
+    params = [{"sid": server_id, **job} for job in jobs]
+    if not params:
+        return 0
+    conn.execute(
+        text(
+            """
+        INSERT INTO role_sync_queue (discord_server_id, discord_id, role_name, kick_name, minutes)
+        VALUES (:sid, :discord_id, :role_name, :kick_name, :minutes)
+        ON CONFLICT (discord_server_id, discord_id, role_name) DO UPDATE SET
+            kick_name = EXCLUDED.kick_name,
+            minutes = EXCLUDED.minutes
+    """
+        ),
+        params,
+    )
+    return len(params)
+
+
+def _role_embed(role_names: List[str], minutes: float, kick_name: Optional[str]) -> discord.Embed:
+    if len(role_names) == 1:
+        earned = f"the **{role_names[0]}** role"
+    else:
+        earned = ", ".join(f"**{name}**" for name in role_names[:-1]) + f" and **{role_names[-1]}** roles"
+    embed = discord.Embed(
+        title="🎉 New Role Unlocked!",
+        description=f"Congratulations! You've earned {earned}!",
+        color=0x53FC18,
+    )
+    embed.add_field(
+        name="Your Watchtime",
+        value=f"{minutes:.0f} minutes ({minutes / 60:.1f} hours)",
+        inline=False,
+    )
+    embed.add_field(
+        name="Keep Watching",
+        value="Continue watching to unlock more exclusive roles!",
+        inline=False,
+    )
+    if kick_name:
+        embed.set_footer(text=f"Kick: {kick_name}")
+    return embed
+
+
+class RoleSyncQueue:
+    """Per-guild workers draining role_sync_queue; see module docstring."""
+
+    def __init__(self, executor=db_executor, batch_size: int = BATCH_SIZE):
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self._engine = None
+        self._bot = None
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._wakeups: Dict[int, asyncio.Event] = {}
+        self._role_buckets: Dict[int, TokenBucket] = {}
+        self._dm_bucket = TokenBucket(DMS_PER_SECOND, DM_BURST)
+        self.granted = 0
+        self.dms_sent = 0
+        self.dropped = 0
+        self.retried = 0
+
+    def bind(self, engine, bot):
+        """Attach to the bot's engine and client. Workers start on the first wake()."""
+        self._engine = engine
+        self._bot = bot
+
+    # -------------------------
+    # Scheduling
+    # -------------------------
+
+    def wake(self, guild_id: int):
+        """Have the guild's worker drain its queue; starts the worker if needed. Event loop only."""
+        if self._engine is None:
+            return
+        wakeup = self._wakeups.get(guild_id)
+        if wakeup is None:
+            wakeup = self._wakeups[guild_id] = asyncio.Event()
+        wakeup.set()
+        worker = self._workers.get(guild_id)
+        if worker is None or worker.done():
+            self._workers[guild_id] = asyncio.create_task(self._worker(guild_id), name=f"role-sync-{guild_id}")
+
+    async def drain(self, guild_id: int):
+        """Process the guild's queue until it is empty or blocked (retries pending, no permission)."""
+        while await self._process_batch(guild_id):
+            pass
+
+    async def _worker(self, guild_id: int):
+        wakeup = self._wakeups[guild_id]
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            try:
+                await self.drain(guild_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Role sync worker error: {e}")
+
+    def _role_bucket(self, guild_id: int) -> TokenBucket:
+        bucket = self._role_buckets.get(guild_id)
+        if bucket is None:
+            bucket = self._role_buckets[guild_id] = TokenBucket(ROLE_ADDS_PER_SECOND, ROLE_ADD_BURST)
+        return bucket
+
+    # -------------------------
+    # Queue storage (runs on db_executor)
+    # -------------------------
+
+    def _fetch(self, guild_id: int) -> List[tuple]:
+        with self._engine.connect() as conn:
+            return conn.execute(
+                text(
+                    """
+                SELECT discord_id, role_name, kick_name, minutes, attempts
+                FROM role_sync_queue
+                WHERE discord_server_id = :sid
+                ORDER BY attempts, queued_at
+                LIMIT :limit
+            """
+                ),
+                {"sid": guild_id, "limit": self.batch_size},
+            ).fetchall()
+
+    def _settle(self, guild_id: int, done: List[dict], retry: List[dict]):
+        with self._engine.begin() as conn:
+            if done:
+                conn.execute(
+                    text(
+                        """
+                    DELETE FROM role_sync_queue
+                    WHERE discord_server_id = :sid AND discord_id = :discord_id AND role_name = :role_name
+                """
+                    ),
+                    [{"sid": guild_id, **key} for key in done],
+                )
+            if retry:
+                conn.execute(
+                    text(
+                        """
+                    UPDATE role_sync_queue SET attempts = attempts + 1
+                    WHERE discord_server_id = :sid AND discord_id = :discord_id AND role_name = :role_name
+                """
+                    ),
+                    [{"sid": guild_id, **key} for key in retry],
+                )
+
+    def _enqueue(self, guild_id: int, jobs: List[dict]) -> int:
+        with self._engine.begin() as conn:
+            return enqueue(conn, guild_id, jobs)
+
+    async def enqueue(self, guild_id: int, jobs: List[dict]) -> int:
+        """Queue jobs from the event loop (reconcile) and wake the guild's worker."""
+        queued = await self.executor.run(guild_id, self._enqueue, guild_id, jobs, label="role_sync_enqueue")
+        if queued:
+            self.wake(guild_id)
+        return queued
+
+    # -------------------------
+    # Applying jobs
+    # -------------------------
+
+    async def _process_batch(self, guild_id: int) -> bool:
+        """Apply one batch of queued jobs; True when another batch may be waiting."""
+        guild = self._bot.get_guild(guild_id) if self._bot else None
+        if guild is None:
+            return False  # not connected to this guild (yet); rows wait for the next wake
+        if not guild.me.guild_permissions.manage_roles:
+            logger.warning(f"⚠️ Bot lacks manage_roles permission!")
+            return False
+
+        rows = await self.executor.run(guild_id, self._fetch, guild_id, label="role_sync_fetch")
+        if not rows:
+            return False
+
+        jobs_by_member: Dict[int, List[tuple]] = {}
+        for row in rows:
+            jobs_by_member.setdefault(int(row[0]), []).append(row)
+
+        roles_by_name = {}
+        for role in guild.roles:
+            roles_by_name.setdefault(role.name, role)
+
+        done, retry = [], []
+        for discord_id, jobs in jobs_by_member.items():
+            outcome, retry_after = await self._apply(guild, discord_id, jobs, roles_by_name)
+            for _, role_name, _, _, attempts in jobs:
+                key = {"discord_id": discord_id, "role_name": role_name}
+                if outcome == "retry" and attempts + 1 < MAX_ATTEMPTS:
+                    retry.append(key)
+                else:
+                    if outcome == "retry":
+                        self.dropped += 1
+                    done.append(key)
+            if retry_after:
+                await asyncio.sleep(retry_after)
+
+        await self.executor.run(guild_id, self._settle, guild_id, done, retry, label="role_sync_settle")
+        if retry:
+            self.retried += len(retry)
+            asyncio.get_running_loop().call_later(RETRY_DELAY_SECONDS, self.wake, guild_id)
+            return False
+        return len(rows) == self.batch_size
+
+    async def _apply(self, guild, discord_id: int, jobs: List[tuple], roles_by_name: dict):
+        """Grant a member's queued roles; returns (outcome, seconds to back off)."""
+        member = guild.get_member(discord_id)
+        if member is None:
+            return "done", 0  # left the server; the reconcile re-queues them if they return
+
+        missing = []
+        for _, role_name, _, _, _ in jobs:
+            role = roles_by_name.get(role_name)
+            if role is None:
+                logger.warning(f"⚠️ Role {role_name} not found in server!")
+            elif member.get_role(role.id) is None:
+                missing.append(role)
+        if not missing:
+            return "done", 0
+
+        minutes = max(job[3] or 0 for job in jobs)
+        kick_name = jobs[0][2]
+        await self._role_bucket(guild.id).acquire(len(missing))
+        try:
+            await member.add_roles(*missing, reason=f"Reached {minutes} min watchtime")
+        except discord.Forbidden:
+            logger.warning(f"Missing permission to assign {', '.join(role.name for role in missing)}")
+            return "done", 0
+        except discord.HTTPException as e:
+            if e.status == 429 or e.status >= 500:
+                logger.info(f"⏳ Role assignment for {member.display_name} deferred ({e.status})")
+                return "retry", getattr(e, "retry_after", 0) or 0
+            logger.warning(f"Error assigning role: {e}")
+            return "done", 0
+
+        self.granted += len(missing)
+        role_names = [role.name for role in missing]
+        logger.info(f"Assigned {', '.join(role_names)} to {member.display_name} ({kick_name})")
+
+        await self._dm_bucket.acquire()
+        try:
+            await member.send(embed=_role_embed(role_names, minutes, kick_name))
+            self.dms_sent += 1
+        except discord.Forbidden:
+            pass  # User has DMs disabled
+        except Exception as dm_error:
+            logger.debug(f"Error sending DM: {dm_error}")
+        return "done", 0
+
+    def stats(self) -> dict:
+        return {
+            "workers": sum(1 for worker in self._workers.values() if not worker.done()),
+            "granted": self.granted,
+            "dms_sent": self.dms_sent,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
+
+
+role_sync = RoleSyncQueue()
@@ -14,6 +14,8 @@ import logging
 
 from sqlalchemy import text
 
+from core.identity_index import identity_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,6 +33,7 @@ def upsert_link(engine, discord_id: int, username: str, guild_id: int, platform:
             ),
             {"d": discord_id, "u": username.lower(), "gid": guild_id, "platform": platform},
         )
+    identity_index.on_link(guild_id, discord_id, username, platform)
 
 
 def remove_link(engine, discord_id: int, guild_id: int, platform: str = None):
@@ -47,10 +50,13 @@ def remove_link(engine, discord_id: int, guild_id: int, platform: str = None):
                 text("DELETE FROM links WHERE discord_id = :d AND discord_server_id = :gid AND platform = :p"),
                 {"d": discord_id, "gid": guild_id, "p": platform},
             )
+    identity_index.on_unlink(guild_id, discord_id, platform)
 
 
 def resolve_discord_id(engine, username: str, guild_id: int, platform: str):
     """Resolve a chat username on a given platform to the linked discord_id, or None."""
+    if identity_index.is_bound_to(engine):
+        return identity_index.discord_id(guild_id, username, platform)
     with engine.connect() as conn:
         row = conn.execute(
             text(
@@ -80,6 +86,8 @@ def resolve_canonical_identity(engine, username: str, guild_id: int, platform: s
     discord_id = resolve_discord_id(engine, username, guild_id, platform)
     if discord_id is None:
         return None, None
+    if identity_index.is_bound_to(engine):
+        return discord_id, identity_index.primary_username(guild_id, discord_id) or username.lower()
     with engine.connect() as conn:
         row = conn.execute(
             text(
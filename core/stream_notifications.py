@@ -17,6 +17,8 @@ import os
 from typing import Optional
 
 from utils.clip_auth import get_clip_api_key
+from utils.db_engines import get_engine
+from utils.http_pool import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -309,10 +311,10 @@ async def send_stream_notification(
 async def _post_discord_notification(discord_server_id, streamer, title, category, platform):
     try:
         import aiohttp
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
-        db_url = os.getenv("DATABASE_URL")
-        if not db_url:
+        engine = get_engine()
+        if engine is None:
             return
         # Read this platform's live-alert settings (new keys; Kick falls back to
         # the legacy shared stream_notification_* keys).
@@ -320,7 +322,6 @@ async def _post_discord_notification(discord_server_id, streamer, title, categor
         placeholders = ", ".join(f":k{i}" for i in range(len(cols)))
         params = {"guild_id": discord_server_id}
         params.update({f"k{i}": c for i, c in enumerate(cols)})
-        engine = create_engine(db_url, pool_pre_ping=True)
         with engine.connect() as conn:
             rows = conn.execute(
                 text(
@@ -355,7 +356,7 @@ async def _post_discord_notification(discord_server_id, streamer, title, categor
         headers = {"Authorization": f"Bot {bot_token}", "Content-Type": "application/json"}
         channel_url = f"https://discord.com/api/v10/channels/{notification_channel_id}/messages"
         timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             # Built inside the session so app:<name> emoji tokens can be resolved
             # against the bot's application emojis over the same connection.
             components = await build_alert_components(settings, platform, stream_url, session, bot_token)
@@ -406,12 +407,11 @@ async def _control_clip_buffer(discord_server_id, streamer, is_live, platform):
         return
     try:
         import aiohttp
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
-        db_url = os.getenv("DATABASE_URL")
-        if not db_url:
+        engine = get_engine()
+        if engine is None:
             return
-        engine = create_engine(db_url, pool_pre_ping=True)
         with engine.connect() as conn:
             rows = conn.execute(
                 text(
@@ -436,7 +436,7 @@ async def _control_clip_buffer(discord_server_id, streamer, is_live, platform):
 
         if not (dashboard_url and api_key and kick_channel):
             return
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             if is_live:
                 if not auto_start_buffer:
                     logger.info(f"[StreamNotify] ⏸️ Auto-start disabled — skipping clip buffer for {streamer}")
@@ -35,6 +35,7 @@ per-subscription secret, compared against the "Twitch-Eventsub-Message-Signature
 header (prefixed "sha256="). NOTE: Twitch uses HMAC, unlike Kick's RSA scheme.
 """
 
+import asyncio
 import hashlib
 import hmac
 import logging
@@ -97,6 +98,10 @@ EVENTSUB_VERSIONS = {
 # Stream events registrable with an app access token (no user scope required).
 APP_TOKEN_STREAM_EVENTS = ["stream.online", "stream.offline", "channel.update"]
 
+# Renew a cached app token this long before Twitch says it expires, so no send
+# ever races the expiry (app tokens live ~60 days; the margin is generous).
+APP_TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv("TWITCH_APP_TOKEN_REFRESH_MARGIN", "3600"))
+
 
 @dataclass
 class TwitchTokens:
@@ -116,8 +121,12 @@ class TwitchTokens:
     @property
     def is_expired(self) -> bool:
         """True if the access token is at/near expiry (60s safety margin)."""
+        return self.expires_within(60)
+
+    def expires_within(self, seconds: float) -> bool:
+        """True if the access token expires within `seconds` from now."""
         age = (datetime.now(timezone.utc) - self.created_at).total_seconds()
-        return age >= max(self.expires_in - 60, 0)
+        return age >= max(self.expires_in - seconds, 0)
 
     def to_dict(self) -> dict:
         return {
@@ -154,6 +163,12 @@ class TwitchAPI:
         self.access_token = access_token
         self.refresh_token = refresh_token
         self._session: Optional[aiohttp.ClientSession] = None
+        # Set once ensure_app_token() is used: this client then runs on a cached,
+        # self-renewing app token instead of a caller-supplied one.
+        self._app_token_mode = False
+        self._app_tokens: Optional[TwitchTokens] = None
+        self._app_token_lock: Optional[asyncio.Lock] = None
+        self._stats = {"token_refreshes": 0, "reauths": 0, "requests": 0, "sends": 0}
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
@@ -191,8 +206,41 @@ class TwitchAPI:
             )
             self.access_token = tokens.access_token
             self.refresh_token = None  # app tokens have no refresh token
+            self._stats["token_refreshes"] += 1
             return tokens
 
+    async def ensure_app_token(self, force: bool = False) -> str:
+        """
+        Return a valid app access token, fetching one only when the cached token is
+        missing or within APP_TOKEN_REFRESH_MARGIN_SECONDS of expiry.
+
+        Concurrent callers share a single client_credentials request. `force`
+        discards the cached token (used after Helix answers 401); a token renewed
+        by another caller while we waited is reused rather than fetched again.
+        """
+        self._app_token_mode = True
+        stale = self._app_tokens.access_token if (force and self._app_tokens) else None
+        if self._app_tokens_valid(stale):
+            return self._app_tokens.access_token
+        if self._app_token_lock is None:
+            self._app_token_lock = asyncio.Lock()
+        async with self._app_token_lock:
+            if not self._app_tokens_valid(stale):
+                self._app_tokens = await self.get_app_token()
+                logger.info(f"[Twitch API] 🔑 App token refreshed (expires in {self._app_tokens.expires_in}s)")
+            self.access_token = self._app_tokens.access_token
+            return self.access_token
+
+    def _app_tokens_valid(self, stale: Optional[str] = None) -> bool:
+        tokens = self._app_tokens
+        if tokens is None or tokens.access_token == stale:
+            return False
+        return not tokens.expires_within(APP_TOKEN_REFRESH_MARGIN_SECONDS)
+
+    def stats(self) -> dict:
+        """Token refreshes vs Helix requests/sends made by this client."""
+        return dict(self._stats)
+
     # -------------------------
     # OAuth — user access token (authorization_code)
     # -------------------------
@@ -288,17 +336,26 @@ class TwitchAPI:
     # -------------------------
 
     async def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
-        """Make an authenticated Helix request. Retries once after refreshing a
-        user token on 401. App tokens (no refresh token) just re-raise."""
+        """Make an authenticated Helix request. Retries once on 401 after refreshing
+        a user token, or after re-fetching the cached app token (ensure_app_token).
+        A caller-supplied app token (no refresh token) just re-raises."""
         session = await self._get_session()
+        if self._app_token_mode:
+            await self.ensure_app_token()
         headers = kwargs.pop("headers", {})
         headers["Authorization"] = f"Bearer {self.access_token}"
         headers["Client-Id"] = self.client_id
         headers.setdefault("Accept", "application/json")
 
+        self._stats["requests"] += 1
         async with session.request(method, url, headers=headers, **kwargs) as response:
-            if response.status == 401 and self.refresh_token:
-                await self.refresh_user_token()
+            if response.status == 401 and (self.refresh_token or self._app_token_mode):
+                if self.refresh_token:
+                    await self.refresh_user_token()
+                else:
+                    await self.ensure_app_token(force=True)
+                self._stats["reauths"] += 1
+                self._stats["requests"] += 1
                 headers["Authorization"] = f"Bearer {self.access_token}"
                 async with session.request(method, url, headers=headers, **kwargs) as retry:
                     retry.raise_for_status()
@@ -400,6 +457,7 @@ class TwitchAPI:
         }
         if reply_parent_message_id:
             payload["reply_parent_message_id"] = reply_parent_message_id
+        self._stats["sends"] += 1
         response = await self._post(TWITCH_CHAT_MESSAGES_URL, json=payload)
         data = response.get("data", [{}])
         return data[0] if data else {}
@@ -473,6 +531,41 @@ class TwitchAPI:
             raise
 
 
+# -------------------------
+# Process-wide app-token client
+# -------------------------
+
+_app_client: Optional[TwitchAPI] = None
+
+
+def get_app_client() -> TwitchAPI:
+    """
+    The long-lived app-token client shared by chat sends and avatar lookups.
+
+    Created on first use (after .env is loaded) and kept until
+    close_app_client() at shutdown, so its token and keep-alive connections
+    are reused across calls.
+    """
+    global _app_client
+    if _app_client is None:
+        _app_client = TwitchAPI()
+        _app_client._app_token_mode = True
+    return _app_client
+
+
+def app_client_stats() -> Optional[dict]:
+    """stats() of the app-token client, or None if nothing has used it yet."""
+    return _app_client.stats() if _app_client is not None else None
+
+
+async def close_app_client():
+    """Close the app-token client's session (bot shutdown); the next get_app_client() starts fresh."""
+    global _app_client
+    client, _app_client = _app_client, None
+    if client is not None:
+        await client.close()
+
+
 # -------------------------
 # Signature verification (module-level: the webhook handler has no client)
 # -------------------------
@@ -23,12 +23,14 @@ Usage:
 import asyncio
 import json
 import logging
-import os
 from datetime import datetime, timedelta, timezone
 from typing import Any, Callable, Dict, Optional
 
 from flask import Blueprint, jsonify, request
 
+from utils.db_engines import get_engine
+
+from .event_loop_worker import get_webhook_worker
 from .twitch_api import (
     HDR_MESSAGE_ID,
     HDR_MESSAGE_SIGNATURE,
@@ -40,6 +42,7 @@ from .twitch_api import (
     MSG_TYPE_VERIFICATION,
     verify_eventsub_signature,
 )
+from .webhook_subscription_cache import publish_subscription_change, subscription_cache
 
 logger = logging.getLogger(__name__)
 
@@ -157,7 +160,25 @@ def _timestamp_too_old(timestamp: str) -> bool:
         return False
 
 
-def _resolve_subscription(subscription_id: str, broadcaster_user_id: str = None):
+def _resolve_subscription(subscription_id: str, broadcaster_user_id: str = None, cache_negative: bool = True):
+    """(discord_server_id, broadcaster_user_id, webhook_secret) for a sub, via the subscription cache.
+
+    Returns (None, None, None) if unknown. Pass cache_negative=False where a miss
+    may just be a row that hasn't committed yet (the verification challenge).
+    """
+    engine = get_engine()
+    if engine is None:
+        return None, None, None
+    row = subscription_cache.resolve(
+        "twitch",
+        subscription_id,
+        lambda: _load_subscription(engine, subscription_id, broadcaster_user_id),
+        cache_negative=cache_negative,
+    )
+    return row if row else (None, None, None)
+
+
+def _load_subscription(engine, subscription_id: str, broadcaster_user_id: str = None):
     """Look up (discord_server_id, broadcaster_user_id, webhook_secret) for a sub.
 
     Does NOT filter on status: the verification challenge arrives while the sub is
@@ -168,14 +189,10 @@ def _resolve_subscription(subscription_id: str, broadcaster_user_id: str = None)
     our DB yet (a row-commit race right after creation). All of a broadcaster's
     subs share one secret, so the secret + server resolve correctly either way.
 
-    Returns (None, None, None) if unknown.
+    Returns None if unknown.
     """
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        return None, None, None
-    from sqlalchemy import create_engine, text
+    from sqlalchemy import text
 
-    engine = create_engine(db_url, pool_pre_ping=True)
     with engine.connect() as conn:
         row = conn.execute(
             text(
@@ -202,22 +219,19 @@ def _resolve_subscription(subscription_id: str, broadcaster_user_id: str = None)
                 ),
                 {"bid": str(broadcaster_user_id)},
             ).fetchone()
-    if not row:
-        return None, None, None
-    return row[0], row[1], row[2]
+    return (row[0], row[1], row[2]) if row else None
 
 
 def _already_processed(message_id: str, broadcaster_user_id: str, event_type: str) -> bool:
     """Idempotency check + record. True if this message_id was already handled."""
     if not message_id:
         return False
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
+    engine = get_engine()
+    if engine is None:
         return False
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
-        engine = create_engine(db_url, pool_pre_ping=True)
         with engine.begin() as conn:
             existing = conn.execute(
                 text(
@@ -252,13 +266,18 @@ def _already_processed(message_id: str, broadcaster_user_id: str, event_type: st
         return False
 
 
-def _run_async(coro):
-    """Run a coroutine to completion from this sync Flask handler."""
-    loop = asyncio.new_event_loop()
+def _forget_processed(message_id: str):
+    """Undo the idempotency mark for a delivery we could not accept, so Twitch's retry is processed."""
     try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+        from sqlalchemy import text
+
+        with get_engine().begin() as conn:
+            conn.execute(
+                text("DELETE FROM processed_webhook_messages WHERE message_id = :msg_id"),
+                {"msg_id": message_id},
+            )
+    except Exception as e:
+        logger.info(f"[Twitch Webhook] ⚠️ Failed to clear dedup mark for {message_id}: {e}")
 
 
 # -------------------------
@@ -303,7 +322,7 @@ def handle_twitch_webhook():
     # 1️⃣ Resolve subscription context + secret from our DB.
     try:
         discord_server_id, broadcaster_user_id, webhook_secret = _resolve_subscription(
-            subscription_id, cond_broadcaster_id
+            subscription_id, cond_broadcaster_id, cache_negative=message_type != MSG_TYPE_VERIFICATION
         )
     except Exception as db_err:
         logger.info(f"[Twitch Webhook] ❌ Database error: {db_err}")
@@ -314,8 +333,22 @@ def handle_twitch_webhook():
         logger.info(f"[Twitch Webhook] ⚠️ Unknown subscription {subscription_id}, ignoring")
         return jsonify({"status": "ok", "message": "unknown subscription"}), 200
 
-    # 2️⃣ Verify HMAC signature against the stored secret.
-    if not verify_eventsub_signature(webhook_secret, message_id, message_timestamp, raw_body, signature):
+    # 2️⃣ Verify HMAC signature against the stored secret. On failure, retry once with a
+    # fresh DB read in case the cached secret was rotated and the invalidation was missed.
+    valid = verify_eventsub_signature(webhook_secret, message_id, message_timestamp, raw_body, signature)
+    if not valid:
+        subscription_cache.invalidate("twitch", subscription_id)
+        try:
+            discord_server_id, broadcaster_user_id, webhook_secret = _resolve_subscription(
+                subscription_id, cond_broadcaster_id
+            )
+        except Exception as db_err:
+            logger.info(f"[Twitch Webhook] ❌ Database error: {db_err}")
+            return jsonify({"error": "Database error"}), 500
+        valid = bool(webhook_secret) and verify_eventsub_signature(
+            webhook_secret, message_id, message_timestamp, raw_body, signature
+        )
+    if not valid:
         logger.info(f"[Twitch Webhook] ❌ Invalid signature for {subscription_id}")
         return jsonify({"error": "Invalid signature"}), 403
 
@@ -335,10 +368,9 @@ def handle_twitch_webhook():
         status = subscription.get("status", "revoked")
         logger.info(f"[Twitch Webhook] ⚠️ Subscription {subscription_id} revoked: {status}")
         try:
-            from sqlalchemy import create_engine, text
+            from sqlalchemy import text
 
-            engine = create_engine(os.getenv("DATABASE_URL"), pool_pre_ping=True)
-            with engine.begin() as conn:
+            with get_engine().begin() as conn:
                 conn.execute(
                     text(
                         """
@@ -351,6 +383,7 @@ def handle_twitch_webhook():
                 )
         except Exception as e:
             logger.info(f"[Twitch Webhook] ⚠️ Failed to mark revoked: {e}")
+        publish_subscription_change("twitch", subscription_id)
         return jsonify({"status": "ok"}), 200
 
     if message_type != MSG_TYPE_NOTIFICATION:
@@ -371,9 +404,12 @@ def handle_twitch_webhook():
 
     logger.info(f"[Twitch Webhook] 📥 {sub_type} for server {discord_server_id}")
 
+    # Acknowledge now; the handler runs on the worker's long-lived event loop.
     try:
         if _event_handler:
-            _run_async(_event_handler.handle(sub_type, event))
+            if not get_webhook_worker().submit(_event_handler.handle(sub_type, event), label=sub_type):
+                _forget_processed(message_id)
+                return jsonify({"error": "Busy, retry later"}), 503
         else:
             logger.info(f"[Twitch Webhook] Event: {json.dumps(event, default=str)}")
         return jsonify({"status": "ok", "message_id": message_id}), 200
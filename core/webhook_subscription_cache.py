@@ -0,0 +1,177 @@
+"""
+Webhook Subscription Cache
+In-process TTL cache for resolving webhook subscription ids to
+(discord_server_id, broadcaster_user_id, webhook_secret).
+
+Every Kick/Twitch delivery used to look its subscription up in Postgres before
+signature verification, although those rows only change when webhooks are
+(re)registered. Lookups are now served from memory:
+
+- Known subscriptions are cached for WEBHOOK_SUB_CACHE_TTL seconds (default 300).
+- Unknown ids (legacy webhooks Kick keeps firing) are negatively cached for
+  WEBHOOK_SUB_NEGATIVE_TTL seconds (default 30), so a stale sender can't turn
+  into a DB query per delivery.
+- Anything that writes kick_webhook_subscriptions / twitch_webhook_subscriptions
+  (setup_webhooks.py, sync_webhook_subscriptions.py, the /api/webhooks routes,
+  the dashboard) calls publish_subscription_change(), and every gunicorn worker
+  drops its cached entries when that Redis message arrives. Without Redis the
+  TTL bounds staleness.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Redis channel carrying invalidation messages. Payload:
+#   {"action": "invalidate", "data": {"platform": "kick"|"twitch"|null, "subscription_id": ...|null}}
+# A null platform/subscription_id clears everything for that scope.
+INVALIDATION_CHANNEL = "webhook_subscriptions:invalidate"
+
+POSITIVE_TTL_SECONDS = float(os.getenv("WEBHOOK_SUB_CACHE_TTL", "300"))
+NEGATIVE_TTL_SECONDS = float(os.getenv("WEBHOOK_SUB_NEGATIVE_TTL", "30"))
+
+# Seconds to wait before reconnecting the invalidation listener.
+RECONNECT_DELAY_SECONDS = 5
+
+Resolution = Optional[Tuple[object, object, object]]
+
+
+class SubscriptionCache:
+    """TTL cache keyed by (platform, lookup key) with negative entries for unknown ids."""
+
+    def __init__(self, positive_ttl: float = POSITIVE_TTL_SECONDS, negative_ttl: float = NEGATIVE_TTL_SECONDS):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}  # {(platform, key): (expires_at, resolution or None)}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._listener_pid = None
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(
+        self, platform: str, key: str, loader: Callable[[], Resolution], cache_negative: bool = True
+    ) -> Resolution:
+        """
+        Return the cached resolution for a subscription, loading it on a miss.
+
+        Args:
+            platform: "kick" or "twitch"
+            key: Subscription id (or another stable lookup key)
+            loader: Called on a miss; returns (server_id, broadcaster_id, secret) or None
+            cache_negative: Whether a None result may be cached
+
+        Returns:
+            tuple or None: The resolution, None if the subscription is unknown
+        """
+        self._ensure_listener()
+        now = time.monotonic()
+        entry = self._entries.get((platform, key))
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            self._store(platform, key, value, now + self.positive_ttl)
+        elif cache_negative:
+            self._store(platform, key, None, now + self.negative_ttl)
+        return value
+
+    def _store(self, platform, key, value, expires_at):
+        with self._lock:
+            if len(self._entries) > 10000:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            self._entries[(platform, key)] = (expires_at, value)
+
+    def invalidate(self, platform: Optional[str] = None, key: Optional[str] = None):
+        """Drop one entry, every entry for a platform, or (no args) everything."""
+        with self._lock:
+            if platform and key:
+                self._entries.pop((platform, key), None)
+            elif platform:
+                self._entries = {k: v for k, v in self._entries.items() if k[0] != platform}
+            else:
+                self._entries.clear()
+
+    # -------------------------
+    # Redis invalidation listener
+    # -------------------------
+
+    def _ensure_listener(self):
+        """Start the Redis listener in this process (lazily, so it runs in each forked worker)."""
+        if self._listener_pid == os.getpid() and self._listener is not None and self._listener.is_alive():
+            return
+        redis_url = os.getenv("REDIS_URL")
+        if not redis_url:
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid() and self._listener is not None and self._listener.is_alive():
+                return
+            if "://" not in redis_url:
+                redis_url = f"redis://{redis_url}"
+            self._listener_pid = os.getpid()
+            self._listener = threading.Thread(
+                target=self._listen, args=(redis_url,), name="webhook-sub-invalidation", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self, redis_url):
+        import redis
+
+        while True:
+            try:
+                client = redis.from_url(redis_url, decode_responses=True, socket_connect_timeout=5)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything may have changed while we weren't subscribed.
+                self.invalidate()
+                logger.info(f"[Webhook] ✅ Subscribed to {INVALIDATION_CHANNEL}")
+                for message in pubsub.listen():
+                    self._handle_message(message.get("data"))
+            except Exception as e:
+                logger.warning(f"[Webhook] ⚠️ Subscription cache listener error: {e}; retrying")
+                time.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _handle_message(self, raw):
+        try:
+            data = json.loads(raw).get("data") or {}
+        except (TypeError, ValueError, AttributeError):
+            data = {}
+        self.invalidate(data.get("platform"), data.get("subscription_id"))
+        logger.info(
+            f"[Webhook] 🔄 Subscription cache invalidated "
+            f"(platform={data.get('platform') or 'all'}, id={data.get('subscription_id') or 'all'})"
+        )
+
+
+subscription_cache = SubscriptionCache()
+
+
+def publish_subscription_change(platform: Optional[str] = None, subscription_id: Optional[str] = None) -> bool:
+    """
+    Tell every webhook worker to drop cached subscription lookups.
+
+    Call after inserting, updating or deleting kick_webhook_subscriptions /
+    twitch_webhook_subscriptions rows. Also clears this process's cache.
+
+    Args:
+        platform: "kick", "twitch", or None for both
+        subscription_id: A single subscription id, or None for the whole platform
+
+    Returns:
+        bool: True if the message was published to Redis
+    """
+    subscription_cache.invalidate(platform, subscription_id)
+    from utils.redis_publisher import bot_redis_publisher
+
+    return bot_redis_publisher.publish(
+        INVALIDATION_CHANNEL, "invalidate", {"platform": platform, "subscription_id": subscription_id}
+    )
@@ -1,5 +1,5 @@
 """Custom commands feature"""
 
-from .manager import CustomCommandsManager
+from .manager import CustomCommandsManager, bind_write_hook, invalidate_variable_caches
 
-__all__ = ["CustomCommandsManager"]
+__all__ = ["CustomCommandsManager", "bind_write_hook", "invalidate_variable_caches"]
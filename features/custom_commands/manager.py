@@ -1,17 +1,136 @@
 """
 Custom Commands Manager
 Handles dynamic custom commands loaded from database
+
+Variable contexts ({points}, {tickets}, {watchtime}, ...) are cached for
+CUSTOM_COMMANDS_VARIABLE_CACHE_TTL seconds per (server, user, token set).
+Once bind_write_hook() attached the bot's engine, a commit that writes
+points, tickets or watchtime drops every cached context, so spends, awards
+and admin edits show up on the next command. Writers in other processes
+(the dashboard) are only bounded by the TTL.
 """
 
 import asyncio
 import logging
 import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
-import psycopg2
+from psycopg2 import pool as psycopg2_pool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from raffle_system.leaderboard_cache import leaderboard_cache
+from utils.after_commit import on_commit
+from utils.percentiles import percentile
 
 logger = logging.getLogger(__name__)
 
+# Shared connection pool size (per DATABASE_URL, shared by every guild's manager).
+DB_POOL_MAX_CONNECTIONS = int(os.getenv("CUSTOM_COMMANDS_DB_POOL_SIZE", "5"))
+
+# How long a fetched variable context is reused for the same (server, user, token set).
+VARIABLE_CACHE_TTL_SECONDS = float(os.getenv("CUSTOM_COMMANDS_VARIABLE_CACHE_TTL", "5"))
+VARIABLE_CACHE_MAX_ENTRIES = 2048
+
+# Rolling window of latency samples kept per command for p50/p99.
+LATENCY_SAMPLE_WINDOW = 500
+LATENCY_LOG_EVERY = 100
+
+# How long a worker thread waits for a free pooled connection before giving up.
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("CUSTOM_COMMANDS_DB_POOL_TIMEOUT", "30"))
+
+_pools = {}  # database_url -> (ThreadedConnectionPool, BoundedSemaphore sized to its maxconn)
+_pools_lock = threading.Lock()
+
+# Tables whose writes change what the balance tokens show
+BALANCE_TABLES = ("user_points", "raffle_tickets", "watchtime")
+
+# Bumped after every committed balance write; cached contexts from an older generation are refetched.
+_data_generation = 0
+_hook_installed = False
+
+
+def invalidate_variable_caches():
+    """Drop every manager's cached variable contexts (the next command refetches)."""
+    global _data_generation
+    _data_generation += 1
+
+
+def _writes_balances(statement: str) -> bool:
+    if statement.lstrip()[:6].upper() not in ("INSERT", "UPDATE", "DELETE"):
+        return False
+    return any(table in statement for table in BALANCE_TABLES)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _writes_balances(statement):
+        conn.info["custom_commands_balances_written"] = True
+
+
+def _after_commit(engine, info, committed):
+    if info.pop("custom_commands_balances_written", False) and committed:
+        invalidate_variable_caches()
+
+
+def _after_rollback(conn):
+    conn.info.pop("custom_commands_balances_written", None)
+
+
+def bind_write_hook(engine):
+    """Drop cached variable contexts whenever a commit on ``engine`` writes points, tickets or watchtime."""
+    global _hook_installed
+    if not _hook_installed:
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "rollback", _after_rollback)
+        _hook_installed = True
+    on_commit(engine, _after_commit)
+
+
+def _get_pool(database_url):
+    """Return the process-wide connection pool and its slot semaphore, creating them on first use."""
+    with _pools_lock:
+        entry = _pools.get(database_url)
+        if entry is None or entry[0].closed:
+            entry = (
+                psycopg2_pool.ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, database_url),
+                threading.BoundedSemaphore(DB_POOL_MAX_CONNECTIONS),
+            )
+            _pools[database_url] = entry
+        return entry
+
+
+@contextmanager
+def _pooled_connection(database_url):
+    """Borrow a pooled connection (blocking - run in thread pool).
+
+    ThreadedConnectionPool raises PoolError rather than waiting when all its
+    connections are out, so callers first take a slot from a semaphore sized to
+    the pool and wait there when more to_thread calls overlap than it holds.
+    Rolls back on error so the connection goes back clean, and discards it
+    instead if the server dropped it.
+    """
+    db_pool, slots = _get_pool(database_url)
+    if not slots.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT_SECONDS):
+        raise psycopg2_pool.PoolError(
+            f"no custom-commands DB connection free after {DB_POOL_ACQUIRE_TIMEOUT_SECONDS:.0f}s"
+        )
+    try:
+        conn = db_pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            db_pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        slots.release()
+
 
 _DATABASE_VARIABLES = frozenset(
     {
@@ -71,6 +190,11 @@ class CustomCommandsManager:
         self.commands = {}  # {command_name: {response, cooldown, enabled, use_count}}
         self.last_used = {}  # {command_name: last_used_timestamp}
         self.database_url = os.getenv("DATABASE_URL")
+        self._variable_cache = {}  # {(server, user, name, platform, tokens): (expires_at, generation, data)}
+        self._latency_ms = {}  # {command_name: deque of recent execution latencies}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._executions = 0
 
         logger.debug(f"🔧 Custom Commands Manager initialized for server {discord_server_id}")
 
@@ -102,44 +226,39 @@ class CustomCommandsManager:
 
     def _fetch_commands_from_db(self):
         """Fetch commands from database (blocking - run in thread pool)"""
-        conn = psycopg2.connect(self.database_url)
-        cursor = conn.cursor()
-
-        if self.discord_server_id:
-            cursor.execute(
-                """
-                SELECT id, command, response, cooldown, enabled, use_count
-                FROM custom_commands
-                WHERE discord_server_id = %s
-                ORDER BY command
-            """,
-                (self.discord_server_id,),
-            )
-        else:
-            # Fallback for backward compatibility
-            cursor.execute(
+        with _pooled_connection(self.database_url) as conn, conn.cursor() as cursor:
+            if self.discord_server_id:
+                cursor.execute(
+                    """
+                    SELECT id, command, response, cooldown, enabled, use_count
+                    FROM custom_commands
+                    WHERE discord_server_id = %s
+                    ORDER BY command
+                """,
+                    (self.discord_server_id,),
+                )
+            else:
+                # Fallback for backward compatibility
+                cursor.execute(
+                    """
+                    SELECT id, command, response, cooldown, enabled, use_count
+                    FROM custom_commands
+                    ORDER BY command
                 """
-                SELECT id, command, response, cooldown, enabled, use_count
-                FROM custom_commands
-                ORDER BY command
-            """
-            )
-
-        commands = []
-        for row in cursor.fetchall():
-            commands.append(
-                {
-                    "id": row[0],
-                    "command": row[1],
-                    "response": row[2],
-                    "cooldown": row[3],
-                    "enabled": row[4],
-                    "use_count": row[5] or 0,
-                }
-            )
+                )
 
-        cursor.close()
-        conn.close()
+            commands = []
+            for row in cursor.fetchall():
+                commands.append(
+                    {
+                        "id": row[0],
+                        "command": row[1],
+                        "response": row[2],
+                        "cooldown": row[3],
+                        "enabled": row[4],
+                        "use_count": row[5] or 0,
+                    }
+                )
 
         return commands
 
@@ -198,6 +317,7 @@ class CustomCommandsManager:
         try:
             if self.send_message_callback:
                 response = cmd_data["response"]
+                started = time.perf_counter()
 
                 # Apply variable replacements
                 next_use_count = int(cmd_data.get("use_count") or 0) + 1
@@ -213,6 +333,7 @@ class CustomCommandsManager:
                 )
 
                 await self.send_message_callback(response)
+                self._record_latency(command, (time.perf_counter() - started) * 1000)
                 logger.info(f"✅ Custom command !{command} executed by {username}")
 
                 # Update last used
@@ -353,13 +474,8 @@ class CustomCommandsManager:
         server_id = self.discord_server_id
         if server_id and self.database_url:
             try:
-                fetched = await asyncio.to_thread(
-                    self._fetch_variable_context,
-                    server_id,
-                    username,
-                    native_name,
-                    platform_key,
-                    requested_tokens,
+                fetched = await self._get_variable_context(
+                    server_id, username, native_name, platform_key, requested_tokens
                 )
                 if fetched:
                     data.update(fetched)
@@ -420,6 +536,62 @@ class CustomCommandsManager:
         }
         return self._replace_tokens(text, {**basic_replacements, **database_replacements})
 
+    async def _get_variable_context(self, server_id, username, display_name, platform, requested_tokens):
+        """Return the variable context, reusing a recent fetch for the same user and token set.
+
+        Chat spam of the same command by the same viewer within the TTL costs no
+        database round-trip; misses run on a pooled connection off the event loop.
+        """
+        key = (server_id, username.lower(), display_name.lower(), platform, frozenset(requested_tokens))
+        now = time.monotonic()
+        cached = self._variable_cache.get(key)
+        if cached and cached[0] > now and cached[1] == _data_generation:
+            self.cache_hits += 1
+            return dict(cached[2])
+
+        self.cache_misses += 1
+        # Taken before the fetch: a write committed while it runs leaves the entry already stale.
+        generation = _data_generation
+        fetched = await asyncio.to_thread(
+            self._fetch_variable_context, server_id, username, display_name, platform, requested_tokens
+        )
+        if len(self._variable_cache) >= VARIABLE_CACHE_MAX_ENTRIES:
+            self._variable_cache = {k: v for k, v in self._variable_cache.items() if v[0] > now}
+            if len(self._variable_cache) >= VARIABLE_CACHE_MAX_ENTRIES:
+                self._variable_cache.clear()
+        self._variable_cache[key] = (now + VARIABLE_CACHE_TTL_SECONDS, generation, fetched)
+        return dict(fetched)
+
+    def _record_latency(self, command, elapsed_ms):
+        samples = self._latency_ms.get(command)
+        if samples is None:
+            samples = self._latency_ms[command] = deque(maxlen=LATENCY_SAMPLE_WINDOW)
+        samples.append(elapsed_ms)
+        self._executions += 1
+        if self._executions % LATENCY_LOG_EVERY == 0:
+            stats = self.get_latency_stats().get(command)
+            logger.info(
+                f"📊 Custom command !{command} latency p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms "
+                f"(n={stats['count']}, variable cache {self.cache_hits} hits / {self.cache_misses} misses)"
+            )
+
+    def get_latency_stats(self):
+        """
+        Per-command execution latency over the recent sample window
+
+        Returns:
+            dict: {command_name: {"count", "p50_ms", "p99_ms"}}
+        """
+        return {
+            command: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 50), 2),
+                "p99_ms": round(percentile(samples, 99), 2),
+            }
+            for command, samples in self._latency_ms.items()
+            if samples
+        }
+
     @staticmethod
     def _replace_tokens(text, replacements):
         """Replace template tokens once, without expanding tokens inside values.
@@ -510,10 +682,10 @@ class CustomCommandsManager:
                 "{giveaway_entered}",
             }
         )
+        # {raffle_rank} is answered by the in-memory standings when the bot bound them.
+        rank_from_cache = "{raffle_rank}" in requested_tokens and leaderboard_cache.is_bound()
 
-        conn = psycopg2.connect(self.database_url)
-        cursor = conn.cursor()
-        try:
+        with _pooled_connection(self.database_url) as conn, conn.cursor() as cursor:
             cursor.execute(
                 """
                 WITH matched_link AS (
@@ -752,6 +924,8 @@ class CustomCommandsManager:
                         WHERE discord_id = identity.discord_id
                         LIMIT 1
                     ) AS raffle_rank,
+                    identity.discord_id AS viewer_discord_id,
+                    (SELECT id FROM active_period) AS raffle_period_id,
                     (SELECT total_tickets FROM raffle_stats) AS raffle_pool_tickets,
                     (SELECT participants FROM raffle_stats) AS raffle_participants,
                     CASE
@@ -825,7 +999,7 @@ class CustomCommandsManager:
                         raffle_viewer_tokens.intersection(requested_tokens)
                         or raffle_stat_tokens.intersection(requested_tokens)
                     ),
-                    "need_raffle_rank": "{raffle_rank}" in requested_tokens,
+                    "need_raffle_rank": "{raffle_rank}" in requested_tokens and not rank_from_cache,
                     "need_raffle_stats": bool(raffle_stat_tokens.intersection(requested_tokens)),
                     "need_raffle_end": "{raffle_ends_in}" in requested_tokens,
                     "need_slot": bool({"{current_slot}", "{current_provider}"}.intersection(requested_tokens)),
@@ -843,10 +1017,12 @@ class CustomCommandsManager:
             if not row:
                 return {}
             columns = [description[0] for description in cursor.description]
-            return dict(zip(columns, row))
-        finally:
-            cursor.close()
-            conn.close()
+            context = dict(zip(columns, row))
+        if rank_from_cache and context["viewer_discord_id"] and context["raffle_period_id"]:
+            context["raffle_rank"] = leaderboard_cache.rank(
+                server_id, context["raffle_period_id"], context["viewer_discord_id"]
+            )
+        return context
 
     async def _increment_use_count(self, command_id):
         """Increment use count in database"""
@@ -857,21 +1033,16 @@ class CustomCommandsManager:
 
     def _increment_use_count_db(self, command_id):
         """Increment use count in database (blocking)"""
-        conn = psycopg2.connect(self.database_url)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            UPDATE custom_commands
-            SET use_count = use_count + 1
-            WHERE id = %s
-        """,
-            (command_id,),
-        )
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with _pooled_connection(self.database_url) as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE custom_commands
+                SET use_count = use_count + 1
+                WHERE id = %s
+            """,
+                (command_id,),
+            )
+            conn.commit()
 
     def get_all_commands(self):
         """Get list of all enabled commands"""
@@ -12,6 +12,7 @@ from discord.ui import Button, Modal, TextInput, View
 from sqlalchemy import text
 
 from features.games.guess_the_balance import gtb_rank_marker, parse_amount
+from utils.panel_render import SAFETY_REFRESH_SECONDS, panel_renderer
 
 logger = logging.getLogger(__name__)
 
@@ -175,6 +176,12 @@ class GTBPanel:
         self.last_update_time = None
         self.update_cooldown = 30  # Minimum 30 seconds between updates
         self._load_panel_info()
+        # GuessTheBalanceManager marks this dirty on guesses/open/close; see utils/panel_render.py
+        panel_renderer.register(self.render_key, lambda: self.update_panel(force=True), self.update_cooldown)
+
+    @property
+    def render_key(self):
+        return ("gtb_panel", self.guild_id)
 
     def _load_panel_info(self):
         """Load panel message ID and channel from database"""
@@ -335,6 +342,7 @@ class GTBPanel:
             view = GTBPanelView(self.bot)  # Pass bot for guild lookup
 
             message = await channel.send(embed=embed, view=view)
+            panel_renderer.remember(self.render_key, embed, view)
 
             self.panel_message_id = message.id
             self.panel_channel_id = channel.id
@@ -366,17 +374,19 @@ class GTBPanel:
             if not channel:
                 return False
 
-            message = await channel.fetch_message(self.panel_message_id)
             embed = self._create_panel_embed()
             view = GTBPanelView(self.bot)  # Pass bot for guild lookup
 
-            await message.edit(embed=embed, view=view)
+            # Partial message: no fetch round-trip, and no edit at all when nothing changed
+            message = channel.get_partial_message(self.panel_message_id)
+            await panel_renderer.edit(self.render_key, message, embed=embed, view=view)
             self.last_update_time = datetime.utcnow()
 
             return True
 
         except discord.NotFound:
             logger.warning("GTB panel message not found, needs to be recreated")
+            panel_renderer.forget(self.render_key)
             self.panel_message_id = None
             self.panel_channel_id = None
             return False
@@ -453,9 +463,9 @@ class GTBPanel:
         if not self.auto_update.is_running():
             self.auto_update.start()
 
-    @tasks.loop(minutes=3)
+    @tasks.loop(seconds=SAFETY_REFRESH_SECONDS)
     async def auto_update(self):
-        """Automatically update the panel every 3 minutes"""
+        """Safety-net refresh; data changes refresh the panel through panel_renderer.mark_dirty()"""
         await self.update_panel()
 
     @auto_update.before_loop
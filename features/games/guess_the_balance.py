@@ -14,6 +14,8 @@ import redis as _redis
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
+from utils.panel_render import panel_renderer
+
 logger = logging.getLogger(__name__)
 
 
@@ -115,6 +117,7 @@ class GuessTheBalanceManager:
 
                 session_id = result.fetchone()[0]
                 logger.info(f"GTB session #{session_id} opened by {opened_by}")
+                panel_renderer.mark_dirty("gtb_panel", self.server_id)
                 return True, f"Session #{session_id} opened! Users can now guess with !gtb <amount>"
         except Exception as e:
             logger.error(f"Failed to open session: {e}")
@@ -160,6 +163,7 @@ class GuessTheBalanceManager:
                 ).fetchone()[0]
 
                 logger.info(f"GTB session #{session_id} closed with {guess_count} guesses")
+                panel_renderer.mark_dirty("gtb_panel", self.server_id)
                 return (
                     True,
                     f"Session #{session_id} closed with {guess_count} guesses. Use !gtbresult <amount> to set the result.",
@@ -243,6 +247,9 @@ class GuessTheBalanceManager:
                 except Exception as pub_err:
                     logger.debug(f"Failed to publish GTB guess event: {pub_err}")
 
+                # Guess count on the Discord panel (coalesced; see utils/panel_render.py)
+                panel_renderer.mark_dirty("gtb_panel", self.server_id)
+
                 return True, f"Guess recorded: ${guess_amount:,.2f}"
         except Exception as e:
             logger.error(f"Failed to add guess: {e}")
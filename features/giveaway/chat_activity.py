@@ -0,0 +1,175 @@
+"""
+Active Chatter Tracker
+In-memory qualification for "active_chatter" giveaways.
+
+GiveawayManager.track_message used to run three statements per chat message:
+a SELECT for a duplicate message hash, an INSERT into giveaway_chat_activity
+and a COUNT(DISTINCT message_hash) over the user's time window. A busy chat
+made the giveaway the heaviest writer in the bot. The tracker keeps that state
+in memory:
+
+- One ordered hash set per chatter holding the messages seen in the last
+  time_window_minutes; older hashes are evicted as the window moves, and idle
+  chatters are swept once per window. A message already in the set is a
+  duplicate; the set's size is the distinct-message count.
+- Activity rows are still written to giveaway_chat_activity for auditing, but
+  in batches: once GIVEAWAY_ACTIVITY_FLUSH_ROWS are buffered or the first
+  message after GIVEAWAY_ACTIVITY_FLUSH_SECONDS, and always before an entry is
+  recorded and when the giveaway ends.
+- Chatters who can no longer gain an entry (already entered without multiple
+  entries, or at max_entries_per_user) are remembered and no longer tracked,
+  so their messages cost nothing.
+
+Progress toward the threshold lives in memory, so after a bot restart chatters
+start counting again (the window is minutes long).
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS = int(os.getenv("GIVEAWAY_ACTIVITY_FLUSH_ROWS", "500"))
+FLUSH_SECONDS = float(os.getenv("GIVEAWAY_ACTIVITY_FLUSH_SECONDS", "5"))
+# Rows kept for retry when a flush fails; the oldest are dropped beyond this.
+MAX_PENDING_ROWS = FLUSH_ROWS * 20
+
+INSERT_ACTIVITY_SQL = """
+    INSERT INTO giveaway_chat_activity
+    (giveaway_id, discord_server_id, kick_username, message, message_hash, timestamp)
+    VALUES (:giveaway_id, :server_id, :username, :message, :hash, :timestamp)
+"""
+
+
+class ActiveChatterTracker:
+    """Per-giveaway duplicate detection and windowed message counts; see module docstring."""
+
+    def __init__(self, engine, guild_id, giveaway_id, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, clock=None):
+        self.engine = engine
+        self.guild_id = guild_id
+        self.giveaway_id = giveaway_id
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._clock = clock or time.monotonic
+        # username -> OrderedDict(hash key -> seen at), oldest first
+        self._recent: Dict[str, OrderedDict] = {}
+        self._closed = set()
+        self._pending: List[dict] = []
+        self._last_flush = self._clock()
+        self._last_sweep = self._clock()
+        self.messages = 0
+        self.duplicates = 0
+        self.qualified = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.flush_failures = 0
+
+    def observe(self, username: str, message: str, messages_required: int, window_seconds: float) -> Optional[int]:
+        """
+        Record one chat message.
+
+        Returns:
+            The chatter's distinct-message count if it meets ``messages_required``
+            (the caller should try to add an entry), otherwise None
+        """
+        self.messages += 1
+        if username in self._closed:
+            return None
+
+        now = self._clock()
+        if now - self._last_sweep >= window_seconds:
+            self._sweep(now - window_seconds)
+        digest = hashlib.sha256(message.encode()).digest()
+        key = digest[:8]
+        recent = self._recent.get(username)
+        if recent is None:
+            recent = self._recent[username] = OrderedDict()
+        else:
+            self._evict(recent, now - window_seconds)
+
+        if key in recent:
+            self.duplicates += 1
+            return None
+        recent[key] = now
+        self._pending.append(
+            {
+                "giveaway_id": self.giveaway_id,
+                "server_id": self.guild_id,
+                "username": username,
+                "message": message[:500],
+                "hash": digest.hex(),
+                "timestamp": datetime.utcnow(),
+            }
+        )
+
+        if len(recent) >= messages_required:
+            self.qualified += 1
+            return len(recent)
+        return None
+
+    def close(self, username: str):
+        """Stop counting a chatter who cannot gain another entry."""
+        self._closed.add(username)
+        self._recent.pop(username, None)
+
+    def flush_due(self) -> bool:
+        return bool(self._pending) and (
+            len(self._pending) >= self.flush_rows or self._clock() - self._last_flush >= self.flush_seconds
+        )
+
+    def flush(self):
+        """Write buffered activity rows in one batch (blocking, like the rest of GiveawayManager)."""
+        self._last_flush = self._clock()
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text(INSERT_ACTIVITY_SQL), rows)
+                conn.commit()
+        except Exception as e:
+            self.flush_failures += 1
+            self._pending = (rows + self._pending)[-MAX_PENDING_ROWS:]
+            logger.warning(f"Failed to write {len(rows)} giveaway activity rows (will retry): {e}")
+            return
+        self.flushes += 1
+        self.rows_written += len(rows)
+
+    @staticmethod
+    def _evict(recent: OrderedDict, cutoff: float):
+        while recent:
+            key, seen_at = next(iter(recent.items()))
+            if seen_at > cutoff:
+                break
+            del recent[key]
+
+    def _sweep(self, cutoff: float):
+        # Chatters who went quiet are only evicted here, once per window.
+        self._last_sweep = self._clock()
+        for username in list(self._recent):
+            recent = self._recent[username]
+            self._evict(recent, cutoff)
+            if not recent:
+                del self._recent[username]
+
+    def stats(self) -> dict:
+        return {
+            "giveaway_id": self.giveaway_id,
+            "chatters": len(self._recent),
+            "tracked_hashes": sum(len(recent) for recent in self._recent.values()),
+            "closed": len(self._closed),
+            "messages": self.messages,
+            "duplicates": self.duplicates,
+            "qualified": self.qualified,
+            "pending_rows": len(self._pending),
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+        }
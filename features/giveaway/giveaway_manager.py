@@ -5,12 +5,15 @@ Handles giveaway lifecycle, entry tracking, and winner selection.
 """
 
 import asyncio
-import hashlib
 import logging
+from bisect import bisect_right
 from datetime import datetime
+from itertools import accumulate
 
 from sqlalchemy import text
 
+from .chat_activity import ActiveChatterTracker
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,8 +47,17 @@ class GiveawayManager:
             else:
                 self.active_giveaway = None
 
+        active_id = self.active_giveaway["id"] if self.active_giveaway else None
+        if self.chat_tracker and self.chat_tracker.giveaway_id != active_id:
+            self._release_chat_tracker()
         return self.active_giveaway
 
+    def _release_chat_tracker(self):
+        """Write out the ended giveaway's buffered chat activity and drop its state."""
+        if self.chat_tracker:
+            self.chat_tracker.flush()
+            self.chat_tracker = None
+
     async def start_giveaway(self, giveaway_id):
         """Start a giveaway"""
         with self.engine.connect() as conn:
@@ -90,6 +102,7 @@ class GiveawayManager:
 
         if self.active_giveaway and self.active_giveaway["id"] == giveaway_id:
             self.active_giveaway = None
+            self._release_chat_tracker()
 
         logger.info(f"Stopped giveaway {giveaway_id}")
         return True
@@ -99,23 +112,16 @@ class GiveawayManager:
         returns None on any failure (entry still records without a picture)."""
         try:
             if platform == "twitch":
-                from core.twitch_api import TwitchAPI
-
-                # Resolve via Helix /users using an app token. Fall back silently.
-                api = TwitchAPI()
-                try:
-                    tokens = await api.get_app_token()
-                    api.access_token = tokens.access_token
-                    user = await api.get_user(login=username)
-                    return user.get("profile_image_url") if user else None
-                finally:
-                    await api.close()
+                from core.twitch_api import get_app_client
+
+                # Resolve via Helix /users on the shared app-token client. Fall back silently.
+                user = await get_app_client().get_user(login=username)
+                return user.get("profile_image_url") if user else None
             else:
-                from core.kick_api import get_channel_info
+                from core.kick_channels import kick_channels
 
-                channel_data = await get_channel_info(username)
-                if channel_data and "user" in channel_data:
-                    return channel_data["user"].get("profile_pic")
+                # Cached for hours per entrant; repeat entries cost no request.
+                return await kick_channels.avatar(username)
         except Exception as e:
             logger.warning(f"Failed to fetch {platform} profile pic for {username}: {e}")
         return None
@@ -226,76 +232,29 @@ class GiveawayManager:
             return False
 
         giveaway_id = giveaway["id"]
-        messages_required = giveaway["messages_required"]
-        time_window = giveaway["time_window_minutes"]
-
-        # Create message hash for duplicate detection
-        message_hash = hashlib.sha256(message.encode()).hexdigest()
-
-        with self.engine.connect() as conn:
-            # Check if this exact message was already sent by this user
-            existing = conn.execute(
-                text(
-                    """
-                SELECT id FROM giveaway_chat_activity
-                WHERE giveaway_id = :giveaway_id
-                AND kick_username = :username
-                AND message_hash = :hash
-            """
-                ),
-                {"giveaway_id": giveaway_id, "username": kick_username, "hash": message_hash},
-            ).fetchone()
+        if self.chat_tracker is None or self.chat_tracker.giveaway_id != giveaway_id:
+            self._release_chat_tracker()
+            self.chat_tracker = ActiveChatterTracker(self.engine, self.guild_id, giveaway_id)
+        tracker = self.chat_tracker
 
-            if existing:
-                logger.debug(f"Duplicate message from {kick_username}, not tracking")
-                return False
-
-            # Track the message
-            conn.execute(
-                text(
-                    """
-                INSERT INTO giveaway_chat_activity
-                (giveaway_id, discord_server_id, kick_username, message, message_hash)
-                VALUES (:giveaway_id, :server_id, :username, :message, :hash)
-            """
-                ),
-                {
-                    "giveaway_id": giveaway_id,
-                    "server_id": self.guild_id,
-                    "username": kick_username,
-                    "message": message[:500],  # Limit message length
-                    "hash": message_hash,
-                },
-            )
-
-            # Check if user qualifies for auto-entry.
-            # Compute the time window entirely in the DB (CURRENT_TIMESTAMP - INTERVAL)
-            # so both sides of the comparison use the DB server clock. Comparing the
-            # DB-populated `timestamp` against a Python `datetime.utcnow()` cutoff would
-            # silently return 0 if the DB session timezone were ever behind UTC.
-            message_count = conn.execute(
-                text(
-                    """
-                SELECT COUNT(DISTINCT message_hash) as count
-                FROM giveaway_chat_activity
-                WHERE giveaway_id = :giveaway_id
-                AND kick_username = :username
-                AND timestamp >= CURRENT_TIMESTAMP - (:window_minutes * INTERVAL '1 minute')
-            """
-                ),
-                {"giveaway_id": giveaway_id, "username": kick_username, "window_minutes": time_window},
-            ).fetchone()
-
-            conn.commit()
-
-            if message_count and message_count[0] >= messages_required:
-                # User qualifies! Add entry
-                logger.info(f"{kick_username} qualified for auto-entry with {message_count[0]} unique messages")
-                return await self.add_entry(
-                    kick_username, entry_method="active_chatter", platform=platform, display_name=display_name
-                )
+        message_count = tracker.observe(
+            kick_username, message, giveaway["messages_required"], giveaway["time_window_minutes"] * 60
+        )
+        if message_count is None:
+            if tracker.flush_due():
+                tracker.flush()
+            return False
 
-        return False
+        # User qualifies! Record their activity, then add the entry.
+        tracker.flush()
+        logger.info(f"{kick_username} qualified for auto-entry with {message_count} unique messages")
+        added = await self.add_entry(
+            kick_username, entry_method="active_chatter", platform=platform, display_name=display_name
+        )
+        if not added:
+            # Already entered (single entry) or at max_entries_per_user: nothing more to earn.
+            tracker.close(kick_username)
+        return added
 
     async def get_entries(self):
         """Get all entries for active giveaway"""
@@ -310,7 +269,7 @@ class GiveawayManager:
                        COALESCE(display_name, kick_username) AS display_name
                 FROM giveaway_entries
                 WHERE giveaway_id = :giveaway_id
-                ORDER BY created_at ASC
+                ORDER BY created_at ASC, id ASC
             """
                 ),
                 {"giveaway_id": self.active_giveaway["id"]},
@@ -320,35 +279,29 @@ class GiveawayManager:
 
     async def draw_winner(self):
         """Randomly select a winner using provably fair algorithm (weighted by entry_count if multiple entries allowed)"""
-        import secrets
-
-        from utils.provably_fair import generate_provably_fair_result
+        from utils.provably_fair import INDEX_ALGORITHM, generate_provably_fair_result, provably_fair_index
 
         if not self.active_giveaway:
             return None
 
+        self._release_chat_tracker()
         entries = await self.get_entries()
         if not entries:
             logger.warning("No entries to draw winner from")
             return None
 
-        # Build weighted list based on entry_count
-        weighted_entries = []
-        for entry in entries:
-            for _ in range(entry["entry_count"]):
-                weighted_entries.append(entry["kick_username"])
+        # Prefix sums of entry_count: ticket t (0-based) belongs to the first entry
+        # whose running total exceeds t. O(entrants) memory however many entries.
+        cumulative = list(accumulate(entry["entry_count"] for entry in entries))
+        total_tickets = cumulative[-1]
 
         # Generate provably fair selection
         giveaway_id = self.active_giveaway["id"]
 
         # Use first entry as client seed base, combined with giveaway data
-        client_seed = f"giveaway:{giveaway_id}:{len(weighted_entries)}"
+        client_seed = f"giveaway:{giveaway_id}:{total_tickets}"
 
-        # Generate server seed
-        server_seed = secrets.token_hex(32)
-
-        # Create provably fair result to get random value
-        # We'll use the random value to select from weighted entries
+        # Create provably fair result; its proof hash picks the winning ticket
         result = generate_provably_fair_result(
             kick_username=client_seed,  # Use giveaway data as client seed
             slot_request_id=giveaway_id,
@@ -356,19 +309,16 @@ class GiveawayManager:
             chance_percent=100.0,  # Always "wins" to generate random value
         )
 
-        # Use random_value (0.00-99.99) to select winner
-        # Scale to index: int(random_value / 100 * len(weighted_entries))
-        winner_index = int((result["random_value"] / 100.0) * len(weighted_entries))
-        winner_index = min(winner_index, len(weighted_entries) - 1)  # Ensure within bounds
-        winner_username = weighted_entries[winner_index]
+        # Full 32-bit hash words with rejection sampling: every ticket equally likely
+        winning_ticket = provably_fair_index(result["proof_hash"], total_tickets)
+        winner_entry = entries[bisect_right(cumulative, winning_ticket)]
+        winner_username = winner_entry["kick_username"]
         # Map the canonical winner back to their native display name for the announcement.
-        winner_display = next(
-            (e.get("display_name") or e["kick_username"] for e in entries if e["kick_username"] == winner_username),
-            winner_username,
-        )
+        winner_display = winner_entry.get("display_name") or winner_username
 
         logger.info(
-            f"Provably fair draw - Random value: {result['random_value']}, Index: {winner_index}/{len(weighted_entries)}, Winner: {winner_username}"
+            f"Provably fair draw - Ticket: {winning_ticket}/{total_tickets}, Winner: {winner_username} "
+            f"(proof hash {result['proof_hash']})"
         )
 
         # Save winner and provably fair data to database
@@ -385,7 +335,10 @@ class GiveawayManager:
                     client_seed = :client_seed,
                     nonce = :nonce,
                     proof_hash = :proof_hash,
-                    random_value = :random_value
+                    random_value = NULL,
+                    winning_ticket = :winning_ticket,
+                    total_tickets = :total_tickets,
+                    draw_algorithm = :draw_algorithm
                 WHERE id = :giveaway_id
             """
                 ),
@@ -397,7 +350,11 @@ class GiveawayManager:
                     "client_seed": result["client_seed"],
                     "nonce": result["nonce"],
                     "proof_hash": result["proof_hash"],
-                    "random_value": result["random_value"],
+                    # The winner is entry-ordered ticket `winning_ticket` (0-based) of `total_tickets`,
+                    # picked by provably_fair_index(proof_hash, total_tickets); random_value played no part.
+                    "winning_ticket": winning_ticket,
+                    "total_tickets": total_tickets,
+                    "draw_algorithm": INDEX_ALGORITHM,
                 },
             )
             conn.commit()
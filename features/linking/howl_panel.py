@@ -20,12 +20,13 @@ import asyncio
 import logging
 from datetime import datetime
 
-import aiohttp
 import discord
 from discord.ext import commands
 from discord.ui import Modal, TextInput, View
 from sqlalchemy import text
 
+from utils.http_pool import http_session
+
 logger = logging.getLogger(__name__)
 
 EMBED_COLOR = 0x00E0A4  # Howl teal/green
@@ -60,7 +61,7 @@ async def _fetch_howl_affiliate_data(affiliate_url: str, api_key: str):
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(affiliate_url, headers=headers, params=params, timeout=30) as response:
                 if response.status != 200:
                     logger.error(f"Howl affiliate API returned status {response.status}")
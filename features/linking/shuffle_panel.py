@@ -16,11 +16,12 @@ import asyncio
 import logging
 import os
 
-import aiohttp
 import discord
 from discord.ext import commands
 from sqlalchemy import text
 
+from utils.http_pool import http_session
+
 try:
     from discord import MediaGalleryItem
 except Exception:  # pragma: no cover - compatibility with older discord.py versions
@@ -164,7 +165,7 @@ async def _fetch_affiliate_data(affiliate_url: str):
     GET the URL, expect a JSON array, return None on any failure.
     """
     try:
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.get(affiliate_url, timeout=30) as response:
                 if response.status != 200:
                     logger.error(f"Affiliate API returned status {response.status}")
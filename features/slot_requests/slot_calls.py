@@ -417,11 +417,7 @@ class SlotCallTracker:
 
         # Update panel if available
         if self.panel:
-            try:
-                await self.panel.update_panel()
-                logger.info("Updated slot request panel after status change")
-            except Exception as e:
-                logger.error(f"Failed to update panel: {e}")
+            self.panel.mark_dirty()
 
     async def handle_slot_call(
         self,
@@ -847,11 +843,7 @@ class SlotCallTracker:
 
         # Update panel if available
         if self.panel:
-            try:
-                await self.panel.update_panel()
-                logger.debug("Updated slot request panel after new request")
-            except Exception as panel_error:
-                logger.error(f"Failed to update panel: {panel_error}")
+            self.panel.mark_dirty()
 
     def _tournament_autofill_slot(self, kick_username: str, slot_call: str) -> None:
         """Fill a !call slot into the chatter's CURRENT tournament match side, if
@@ -1123,11 +1115,7 @@ class SlotCallCommands(commands.Cog):
 
                 # Update panel if available
                 if tracker.panel:
-                    try:
-                        await tracker.panel.update_panel()
-                        logger.info("Updated slot request panel after pick")
-                    except Exception as panel_error:
-                        logger.error(f"Failed to update panel: {panel_error}")
+                    tracker.panel.mark_dirty()
 
         except Exception as e:
             logger.error(f"Failed to pick random slot: {e}")
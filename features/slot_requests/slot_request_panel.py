@@ -12,6 +12,8 @@ from discord.ext import commands, tasks
 from discord.ui import Button, Modal, TextInput, View
 from sqlalchemy import text
 
+from utils.panel_render import SAFETY_REFRESH_SECONDS, panel_renderer
+
 logger = logging.getLogger(__name__)
 
 # Emojis
@@ -159,6 +161,16 @@ class SlotRequestPanel:
         self.last_update_time = None  # Track last update time for rate limiting
         self.update_cooldown = 30  # Minimum 30 seconds between updates
         self._load_panel_info()
+        # SlotCallTracker calls mark_dirty() on new requests, picks and toggles; see utils/panel_render.py
+        panel_renderer.register(self.render_key, lambda: self.update_panel(force=True), self.update_cooldown)
+
+    @property
+    def render_key(self):
+        return ("slot_panel", self.guild_id)
+
+    def mark_dirty(self):
+        """Refresh the panel shortly (coalesced, cooldown respected) because its data changed."""
+        panel_renderer.mark_dirty("slot_panel", self.guild_id)
 
     def _load_panel_info(self):
         """Load panel message ID and channel from database"""
@@ -365,6 +377,7 @@ class SlotRequestPanel:
             view = SlotPanelView(self.bot)  # Pass bot for guild lookup
 
             message = await channel.send(embed=embed, view=view)
+            panel_renderer.remember(self.render_key, embed, view)
 
             # Save panel info
             self.panel_message_id = message.id
@@ -403,21 +416,19 @@ class SlotRequestPanel:
                 logger.error(f"Panel channel {self.panel_channel_id} not found")
                 return False
 
-            message = await channel.fetch_message(self.panel_message_id)
-            if not message:
-                logger.error(f"Panel message {self.panel_message_id} not found")
-                return False
-
             embed = self._create_panel_embed()
             view = SlotPanelView(self.bot)  # Pass bot for guild lookup
 
-            await message.edit(embed=embed, view=view)
+            # Partial message: no fetch round-trip, and no edit at all when nothing changed
+            message = channel.get_partial_message(self.panel_message_id)
+            await panel_renderer.edit(self.render_key, message, embed=embed, view=view)
             self.last_update_time = datetime.utcnow()  # Update timestamp
 
             return True
 
         except discord.NotFound:
             logger.warning("Panel message not found, needs to be recreated")
+            panel_renderer.forget(self.render_key)
             self.panel_message_id = None
             self.panel_channel_id = None
             return False
@@ -796,9 +807,9 @@ class SlotRequestPanelCommands(commands.Cog):
         """Clean up when cog is unloaded"""
         self.auto_update_task.cancel()
 
-    @tasks.loop(minutes=3)
+    @tasks.loop(seconds=SAFETY_REFRESH_SECONDS)
     async def auto_update_task(self):
-        """Auto-update panels every 3 minutes"""
+        """Safety-net refresh; data changes refresh panels through mark_dirty()"""
         # Update all guild panels
         if hasattr(self.bot, "slot_panels_by_guild"):
             for guild_id, panel in self.bot.slot_panels_by_guild.items():
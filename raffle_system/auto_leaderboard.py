@@ -11,7 +11,9 @@ import discord
 from discord.ext import tasks
 from sqlalchemy import text
 
-from .config import AUTO_LEADERBOARD_UPDATE_INTERVAL
+from utils.panel_render import panel_renderer
+
+from .config import AUTO_LEADERBOARD_MIN_REFRESH, AUTO_LEADERBOARD_UPDATE_INTERVAL
 from .reward_settings import platform_display_name
 
 logger = logging.getLogger(__name__)
@@ -27,6 +29,12 @@ class AutoLeaderboard:
         self.server_id = server_id  # Discord server ID for multiserver support
         self.message_id = None
         self.channel = None
+        # Ticket writes mark this dirty (raffle_system/leaderboard_cache.py); see utils/panel_render.py
+        panel_renderer.register(self.render_key, self.update_leaderboard, AUTO_LEADERBOARD_MIN_REFRESH)
+
+    @property
+    def render_key(self):
+        return ("raffle_leaderboard", self.server_id)
 
     async def initialize(self):
         """Initialize the leaderboard system"""
@@ -78,6 +86,7 @@ class AutoLeaderboard:
         try:
             embed = await self.create_leaderboard_embed()
             message = await self.channel.send(embed=embed)
+            panel_renderer.remember(self.render_key, embed)
             self.message_id = message.id
             logger.debug(f"[Auto-Leaderboard] Posted new message: {self.message_id}")
 
@@ -87,25 +96,29 @@ class AutoLeaderboard:
     async def update_leaderboard(self):
         """Update the existing leaderboard message"""
         try:
+            if not self.channel:
+                return  # not initialized yet
+
             if not self.message_id:
                 logger.debug("[Auto-Leaderboard] No message ID, posting new leaderboard...")
                 await self.post_new_leaderboard()
                 return
 
-            # Fetch the message
+            # Create updated embed
+            embed = await self.create_leaderboard_embed()
+
+            # Edit through a partial message (no fetch round-trip); skipped when nothing changed
+            message = self.channel.get_partial_message(self.message_id)
             try:
-                message = await self.channel.fetch_message(self.message_id)
+                edited = await panel_renderer.edit(self.render_key, message, embed=embed)
             except discord.NotFound:
                 logger.debug("[Auto-Leaderboard] Message not found, posting new one...")
+                panel_renderer.forget(self.render_key)
                 await self.post_new_leaderboard()
                 return
 
-            # Create updated embed
-            embed = await self.create_leaderboard_embed()
-
-            # Edit the message
-            await message.edit(embed=embed)
-            logger.debug(f"[Auto-Leaderboard] ✅ Updated message: {self.message_id}")
+            if edited:
+                logger.debug(f"[Auto-Leaderboard] ✅ Updated message: {self.message_id}")
 
         except Exception as e:
             logger.error(f"[Auto-Leaderboard] ❌ Failed to update: {e}", exc_info=True)
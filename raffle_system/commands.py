@@ -11,6 +11,7 @@ from discord.ext import commands
 from sqlalchemy import text
 
 from utils.bot_settings import BotSettingsManager
+from utils.http_pool import http_session
 from utils.log_context import set_server
 from utils.server_urls import get_server_public_page_url
 
@@ -1304,11 +1305,9 @@ Use `!rafflestats @user` to see individual stats
             await ctx.send("🔍 Fetching Shuffle affiliate data...")
 
             # Fetch raw data
-            import aiohttp
-
             from .config import SHUFFLE_AFFILIATE_URL, SHUFFLE_CAMPAIGN_CODE
 
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.get(SHUFFLE_AFFILIATE_URL, timeout=30) as response:
                     if response.status != 200:
                         await ctx.send(f"❌ API returned status {response.status}")
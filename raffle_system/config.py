@@ -47,4 +47,7 @@ REQUIRE_SHUFFLE_VERIFICATION = True  # Require admin verification for Shuffle li
 # Leaderboard settings
 DEFAULT_LEADERBOARD_SIZE = 10
 MAX_LEADERBOARD_SIZE = 25
-AUTO_LEADERBOARD_UPDATE_INTERVAL = 300  # 5 minutes in seconds (was 3600 = 1 hour)
+# Ticket changes refresh the auto-leaderboard directly (utils/panel_render.py), at most
+# once per AUTO_LEADERBOARD_MIN_REFRESH seconds; the timer is only a safety net.
+AUTO_LEADERBOARD_UPDATE_INTERVAL = 900  # 15 minutes in seconds (was 300 on a blind timer)
+AUTO_LEADERBOARD_MIN_REFRESH = 60
@@ -164,6 +164,7 @@ CREATE TABLE IF NOT EXISTS raffle_draws (
 CREATE INDEX IF NOT EXISTS idx_raffle_tickets_period ON raffle_tickets(period_id);
 CREATE INDEX IF NOT EXISTS idx_raffle_tickets_discord ON raffle_tickets(discord_id);
 CREATE INDEX IF NOT EXISTS idx_raffle_tickets_total ON raffle_tickets(total_tickets DESC);
+CREATE INDEX IF NOT EXISTS idx_raffle_tickets_period_total ON raffle_tickets(period_id, total_tickets DESC);
 CREATE INDEX IF NOT EXISTS idx_raffle_ticket_log_period ON raffle_ticket_log(period_id);
 CREATE INDEX IF NOT EXISTS idx_raffle_ticket_log_discord ON raffle_ticket_log(discord_id);
 CREATE INDEX IF NOT EXISTS idx_raffle_gifted_subs_period ON raffle_gifted_subs(period_id);
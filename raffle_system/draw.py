@@ -7,24 +7,135 @@ import hashlib
 import logging
 import os
 import secrets
+import time
+from bisect import bisect_left
 from datetime import datetime
 
 from sqlalchemy import text
 
+from .leaderboard_cache import leaderboard_cache
+
 # Import bot redis publisher for notifications
 try:
     from utils.redis_publisher import bot_redis_publisher
 except ImportError:
     bot_redis_publisher = None
 
+# Optional: vectorized fairness simulation (falls back to bisect without it)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
+# How long a period's win-probability table is reused by get_user_win_probability
+# (ticket writes seen by leaderboard_cache drop it sooner)
+PROBABILITY_TABLE_TTL = float(os.getenv("RAFFLE_PROBABILITY_TTL", "30"))
+
+# Simulated draws per NumPy batch (bounds memory for very large runs)
+SIMULATION_CHUNK = 1_000_000
+
+ELIGIBLE_PARTICIPANTS_SQL = """
+    SELECT rt.discord_id, rt.kick_name, rt.total_tickets
+    FROM raffle_tickets rt
+    WHERE rt.period_id = :period_id
+      AND rt.total_tickets > 0
+      AND NOT EXISTS (
+          SELECT 1 FROM raffle_exclusions re
+          WHERE re.discord_server_id = :server_id
+            AND (
+                (re.kick_username IS NOT NULL AND LOWER(re.kick_username) = LOWER(rt.kick_name))
+                OR (re.discord_id IS NOT NULL AND re.discord_id != '' AND re.discord_id = CAST(rt.discord_id AS TEXT))
+            )
+      )
+"""
+
+
+def cumulative_tickets(ticket_counts):
+    """
+    Prefix sums of ticket counts: entry i is the last ticket number owned by participant i.
+
+    Example: counts [10, 25, 5] -> [10, 35, 40]; tickets 1-10 belong to participant 0,
+    11-35 to participant 1 and 36-40 to participant 2.
+    """
+    cumulative = []
+    running = 0
+    for count in ticket_counts:
+        running += count
+        cumulative.append(running)
+    return cumulative
+
+
+def ticket_owner(cumulative, ticket_number):
+    """Index of the participant holding ``ticket_number`` (1-based), in O(log n)."""
+    return bisect_left(cumulative, ticket_number)
+
+
+def simulate_wins(cumulative, num_simulations):
+    """Win counts per participant over ``num_simulations`` random draws (pure Python)."""
+    wins = [0] * len(cumulative)
+    total_tickets = cumulative[-1]
+    for _ in range(num_simulations):
+        wins[bisect_left(cumulative, secrets.randbelow(total_tickets) + 1)] += 1
+    return wins
+
+
+def simulate_wins_vectorized(cumulative, num_simulations):
+    """simulate_wins() with NumPy: batched ticket draws located via searchsorted."""
+    bounds = np.asarray(cumulative, dtype=np.int64)
+    rng = np.random.default_rng(secrets.randbits(128))
+    wins = np.zeros(len(bounds), dtype=np.int64)
+    remaining = num_simulations
+    while remaining > 0:
+        batch = min(remaining, SIMULATION_CHUNK)
+        tickets = rng.integers(1, bounds[-1] + 1, size=batch, dtype=np.int64)
+        wins += np.bincount(np.searchsorted(bounds, tickets, side="left"), minlength=len(bounds))
+        remaining -= batch
+    return wins.tolist()
+
 
 class RaffleDraw:
     """Handles raffle drawing and winner selection"""
 
     def __init__(self, engine):
         self.engine = engine
+        self._probability_tables = {}  # period_id -> (expires_at, leaderboard version, table)
+
+    @staticmethod
+    def _fetch_eligible_participants(conn, period_id, server_id, excluded_discord_ids=None):
+        """
+        (discord_id, kick_name, total_tickets) rows eligible for a draw, in ticket order.
+
+        Applies raffle_exclusions and the optional already-drawn winners. Ordered by
+        raffle_tickets.id so ticket numbering is reproducible for provably fair checks.
+        """
+        query = ELIGIBLE_PARTICIPANTS_SQL
+        params = {"period_id": period_id, "server_id": server_id}
+
+        # Add exclusion for already drawn winners
+        if excluded_discord_ids:
+            placeholders = ", ".join([f":excluded_{i}" for i in range(len(excluded_discord_ids))])
+            query += f" AND rt.discord_id NOT IN ({placeholders})"
+            for i, discord_id in enumerate(excluded_discord_ids):
+                params[f"excluded_{i}"] = discord_id
+
+        query += " ORDER BY rt.id"  # Deterministic ordering for reproducibility
+        return list(conn.execute(text(query), params))
+
+    @staticmethod
+    def _fetch_user_tickets(conn, period_id, server_id, discord_id):
+        """A single user's eligible tickets for a period (0 if none or excluded)."""
+        query = ELIGIBLE_PARTICIPANTS_SQL + " AND rt.discord_id = :discord_id"
+        params = {"period_id": period_id, "server_id": server_id, "discord_id": discord_id}
+        return sum(row[2] for row in conn.execute(text(query), params))
+
+    @staticmethod
+    def _period_server_id(conn, period_id):
+        row = conn.execute(
+            text("SELECT discord_server_id FROM raffle_periods WHERE id = :period_id"), {"period_id": period_id}
+        ).fetchone()
+        return row[0] if row else None
 
     def draw_winner(
         self, period_id, drawn_by_discord_id=None, prize_description=None, excluded_discord_ids=None, update_period=True
@@ -87,57 +198,16 @@ class RaffleDraw:
                         logger.warning(f"Could not read global raffle_prize for draw: {e}")
 
                 # Get all participants with tickets (excluding those in raffle_exclusions and excluded_discord_ids)
-                query = """
-                    SELECT rt.discord_id, rt.kick_name, rt.total_tickets
-                    FROM raffle_tickets rt
-                    WHERE rt.period_id = :period_id
-                      AND rt.total_tickets > 0
-                      AND NOT EXISTS (
-                          SELECT 1 FROM raffle_exclusions re
-                          WHERE re.discord_server_id = :server_id
-                            AND (
-                                (re.kick_username IS NOT NULL AND LOWER(re.kick_username) = LOWER(rt.kick_name))
-                                OR (re.discord_id IS NOT NULL AND re.discord_id != '' AND re.discord_id = CAST(rt.discord_id AS TEXT))
-                            )
-                      )
-                """
-
-                params = {"period_id": period_id, "server_id": server_id}
-
-                # Add exclusion for already drawn winners
-                if excluded_discord_ids:
-                    placeholders = ", ".join([f":excluded_{i}" for i in range(len(excluded_discord_ids))])
-                    query += f" AND rt.discord_id NOT IN ({placeholders})"
-                    for i, discord_id in enumerate(excluded_discord_ids):
-                        params[f"excluded_{i}"] = discord_id
-
-                query += " ORDER BY rt.id"  # Deterministic ordering for reproducibility
-
-                result = conn.execute(text(query), params)
-
-                participants = list(result)
+                participants = self._fetch_eligible_participants(conn, period_id, server_id, excluded_discord_ids)
 
                 if not participants:
                     logger.warning(f"No participants found for period {period_id}")
                     return None
 
-                # Build ticket number ranges
-                ticket_ranges = []
-                current_ticket = 1
-
-                for discord_id, kick_name, ticket_count in participants:
-                    ticket_ranges.append(
-                        {
-                            "discord_id": discord_id,
-                            "kick_name": kick_name,
-                            "ticket_count": ticket_count,
-                            "start_ticket": current_ticket,
-                            "end_ticket": current_ticket + ticket_count - 1,
-                        }
-                    )
-                    current_ticket += ticket_count
-
-                total_tickets = current_ticket - 1
+                # Ticket numbers run sequentially in participant order; the prefix
+                # sums let the winning ticket be located by binary search.
+                cumulative = cumulative_tickets(ticket_count for _, _, ticket_count in participants)
+                total_tickets = cumulative[-1]
                 total_participants = len(participants)
 
                 # Draw winning ticket using provably fair SHA-256 hashing.
@@ -182,15 +252,12 @@ class RaffleDraw:
                 logger.info(f"   Winning ticket: #{winning_ticket}")
 
                 # Find the winner
-                winner = None
-                for entry in ticket_ranges:
-                    if entry["start_ticket"] <= winning_ticket <= entry["end_ticket"]:
-                        winner = entry
-                        break
-
-                if not winner:
+                winner_index = ticket_owner(cumulative, winning_ticket)
+                if winner_index >= total_participants:
                     logger.error("Failed to determine winner (should never happen)")
                     return None
+                discord_id, kick_name, ticket_count = participants[winner_index]
+                winner = {"discord_id": discord_id, "kick_name": kick_name, "ticket_count": ticket_count}
 
                 # Get Shuffle username if linked
                 shuffle_result = conn.execute(
@@ -365,10 +432,54 @@ class RaffleDraw:
             logger.error(f"Failed to get draw history: {e}")
             return []
 
+    def get_win_probability_table(self, period_id):
+        """
+        Exact win probability for every eligible participant of a period, in one query.
+
+        Uses the same eligibility rules as draw_winner (raffle_exclusions applied), so
+        excluded users are absent and the odds match what a draw would actually use.
+
+        Args:
+            period_id: Raffle period ID
+
+        Returns:
+            dict: discord_id -> {user_tickets, total_tickets, probability_percent, odds}
+        """
+        with self.engine.begin() as conn:
+            server_id = self._period_server_id(conn, period_id)
+            if server_id is None:
+                return {}
+            participants = self._fetch_eligible_participants(conn, period_id, server_id)
+
+        tickets_by_user = {}
+        for discord_id, _kick_name, ticket_count in participants:
+            tickets_by_user[discord_id] = tickets_by_user.get(discord_id, 0) + ticket_count
+        total_tickets = sum(tickets_by_user.values())
+        if total_tickets == 0:
+            return {}
+
+        return {
+            discord_id: {
+                "user_tickets": user_tickets,
+                "total_tickets": total_tickets,
+                "probability_percent": (user_tickets / total_tickets) * 100,
+                "odds": f"{user_tickets}/{total_tickets}",
+            }
+            for discord_id, user_tickets in tickets_by_user.items()
+        }
+
     def get_user_win_probability(self, discord_id, period_id):
         """
         Calculate a user's probability of winning
 
+        Reads the period's probability table, rebuilt after any ticket write
+        leaderboard_cache sees for the period and otherwise at most every
+        RAFFLE_PROBABILITY_TTL seconds (default 30) per RaffleDraw instance.
+        A user missing from a cached table is looked up on their own (same
+        exclusion rules), in case their tickets came from a write this process
+        did not see; the cached table is kept and their tickets are added to
+        its total.
+
         Args:
             discord_id: Discord user ID
             period_id: Raffle period ID
@@ -377,157 +488,106 @@ class RaffleDraw:
             dict: Win probability info or None
         """
         try:
-            with self.engine.begin() as conn:
-                # Get user's tickets
-                user_result = conn.execute(
-                    text(
-                        """
-                    SELECT total_tickets FROM raffle_tickets
-                    WHERE period_id = :period_id AND discord_id = :discord_id
-                """
-                    ),
-                    {"period_id": period_id, "discord_id": discord_id},
-                )
-                user_row = user_result.fetchone()
-
-                if not user_row or user_row[0] == 0:
-                    return None
-
-                user_tickets = user_row[0]
-
-                # Get total tickets
-                total_result = conn.execute(
-                    text(
-                        """
-                    SELECT COALESCE(SUM(total_tickets), 0) FROM raffle_tickets
-                    WHERE period_id = :period_id
-                """
-                    ),
-                    {"period_id": period_id},
-                )
-                total_tickets = total_result.scalar()
-
-                if total_tickets == 0:
-                    return None
-
-                probability = (user_tickets / total_tickets) * 100
-
-                return {
-                    "user_tickets": user_tickets,
-                    "total_tickets": total_tickets,
-                    "probability_percent": probability,
-                    "odds": f"{user_tickets}/{total_tickets}",
-                }
+            now = time.monotonic()
+            version = leaderboard_cache.version(period_id)
+            cached = self._probability_tables.get(period_id)
+            if cached is not None and cached[0] > now and cached[1] == version:
+                probability = cached[2].get(discord_id)
+                if probability is not None:
+                    return probability
+                return self._get_uncached_user_probability(discord_id, period_id, cached[2])
+            table = self.get_win_probability_table(period_id)
+            self._probability_tables[period_id] = (now + PROBABILITY_TABLE_TTL, version, table)
+            return table.get(discord_id)
 
         except Exception as e:
             logger.error(f"Failed to calculate win probability: {e}")
             return None
 
-    def simulate_draw(self, period_id, num_simulations=1000):
+    def _get_uncached_user_probability(self, discord_id, period_id, table):
+        """Odds for a user absent from ``table``, from one single-user query."""
+        with self.engine.connect() as conn:
+            server_id = self._period_server_id(conn, period_id)
+            if server_id is None:
+                return None
+            user_tickets = self._fetch_user_tickets(conn, period_id, server_id, discord_id)
+        if user_tickets == 0:
+            return None
+
+        total_tickets = next(iter(table.values()))["total_tickets"] if table else 0
+        total_tickets += user_tickets
+        return {
+            "user_tickets": user_tickets,
+            "total_tickets": total_tickets,
+            "probability_percent": (user_tickets / total_tickets) * 100,
+            "odds": f"{user_tickets}/{total_tickets}",
+        }
+
+    def simulate_draw(self, period_id, num_simulations=1000, vectorized=None):
         """
         Simulate multiple draws to verify fairness (testing purposes)
 
+        Each simulated ticket is located by binary search over the cumulative ticket
+        array. With NumPy installed the draws are generated and searched in batches
+        (searchsorted + bincount), which handles a million simulations in well under
+        a second.
+
         Args:
             period_id: Raffle period ID
             num_simulations: Number of simulations to run
+            vectorized: Force (True) or disable (False) the NumPy path; None = use it if installed
 
         Returns:
             dict: Simulation results
         """
         try:
             with self.engine.begin() as conn:
-                # Get server_id from the period
-                period_result = conn.execute(
-                    text(
-                        """
-                    SELECT discord_server_id FROM raffle_periods WHERE id = :period_id
-                """
-                    ),
-                    {"period_id": period_id},
-                )
-                period_row = period_result.fetchone()
-                if not period_row:
+                server_id = self._period_server_id(conn, period_id)
+                if server_id is None:
                     return None
-                server_id = period_row[0]
-
                 # Get participants excluding those in raffle_exclusions
-                result = conn.execute(
-                    text(
-                        """
-                    SELECT rt.discord_id, rt.kick_name, rt.total_tickets
-                    FROM raffle_tickets rt
-                    WHERE rt.period_id = :period_id
-                      AND rt.total_tickets > 0
-                      AND NOT EXISTS (
-                          SELECT 1 FROM raffle_exclusions re
-                          WHERE re.discord_server_id = :server_id
-                            AND (
-                                (re.kick_username IS NOT NULL AND LOWER(re.kick_username) = LOWER(rt.kick_name))
-                                OR (re.discord_id IS NOT NULL AND re.discord_id != '' AND re.discord_id = CAST(rt.discord_id AS TEXT))
-                            )
-                      )
-                    ORDER BY rt.id
-                """
-                    ),
-                    {"period_id": period_id, "server_id": server_id},
-                )
+                participants = self._fetch_eligible_participants(conn, period_id, server_id)
 
-                participants = list(result)
+            if not participants:
+                return None
 
-                if not participants:
-                    return None
+            ticket_counts = [ticket_count for _, _, ticket_count in participants]
+            cumulative = cumulative_tickets(ticket_counts)
+            total_tickets = cumulative[-1]
 
-                # Build ticket ranges
-                ticket_ranges = []
-                current_ticket = 1
+            if vectorized is None:
+                vectorized = np is not None
+            if vectorized and np is None:
+                raise RuntimeError("numpy is not installed")
 
-                for discord_id, kick_name, ticket_count in participants:
-                    ticket_ranges.append(
-                        {
-                            "discord_id": discord_id,
-                            "kick_name": kick_name,
-                            "ticket_count": ticket_count,
-                            "start_ticket": current_ticket,
-                            "end_ticket": current_ticket + ticket_count - 1,
-                            "wins": 0,
-                        }
-                    )
-                    current_ticket += ticket_count
-
-                total_tickets = current_ticket - 1
+            if vectorized:
+                wins = simulate_wins_vectorized(cumulative, num_simulations)
+            else:
+                wins = simulate_wins(cumulative, num_simulations)
 
-                # Run simulations
-                for _ in range(num_simulations):
-                    winning_ticket = secrets.randbelow(total_tickets) + 1
+            # Calculate results
+            results = []
+            for (_discord_id, kick_name, ticket_count), actual_wins in zip(participants, wins):
+                expected_wins = (ticket_count / total_tickets) * num_simulations
+                variance = ((actual_wins - expected_wins) / expected_wins * 100) if expected_wins > 0 else 0
 
-                    for entry in ticket_ranges:
-                        if entry["start_ticket"] <= winning_ticket <= entry["end_ticket"]:
-                            entry["wins"] += 1
-                            break
-
-                # Calculate results
-                results = []
-                for entry in ticket_ranges:
-                    expected_wins = (entry["ticket_count"] / total_tickets) * num_simulations
-                    actual_wins = entry["wins"]
-                    variance = ((actual_wins - expected_wins) / expected_wins * 100) if expected_wins > 0 else 0
-
-                    results.append(
-                        {
-                            "kick_name": entry["kick_name"],
-                            "tickets": entry["ticket_count"],
-                            "expected_wins": expected_wins,
-                            "actual_wins": actual_wins,
-                            "variance_percent": variance,
-                        }
-                    )
+                results.append(
+                    {
+                        "kick_name": kick_name,
+                        "tickets": ticket_count,
+                        "expected_wins": expected_wins,
+                        "actual_wins": actual_wins,
+                        "variance_percent": variance,
+                    }
+                )
 
-                return {
-                    "num_simulations": num_simulations,
-                    "total_tickets": total_tickets,
-                    "participants": len(participants),
-                    "results": results,
-                }
+            return {
+                "num_simulations": num_simulations,
+                "total_tickets": total_tickets,
+                "participants": len(participants),
+                "mode": "numpy" if vectorized else "bisect",
+                "results": results,
+            }
 
         except Exception as e:
             logger.error(f"Failed to simulate draw: {e}")
@@ -0,0 +1,325 @@
+"""
+Raffle Leaderboard Cache
+Per-(server, period) ticket standings kept in memory and updated as tickets change.
+
+TicketManager.get_leaderboard() ran RANK() over the whole period on every call,
+and get_user_rank() ranked it again through the raffle_leaderboard view.
+AutoLeaderboard, !raffleboard, !tickets and the {raffle_rank} custom-command
+token all call these repeatedly. Once bound to the bot's engine, they read
+from here instead:
+
+- A board is loaded with one query the first time it is read. The query uses
+  idx_raffle_tickets_period_total (period_id, total_tickets DESC), which is
+  also what a rebuild after a restart uses.
+- Each board keeps its rows in a list sorted by (-total_tickets, discord_id).
+  Top-N is a slice. A user's rank is a bisect: 1 + the number of holders with
+  strictly more tickets, the same as RANK().
+- TicketManager's writes (award_tickets, award_tickets_batch, remove_tickets)
+  stage their RETURNING rows on the connection. The rows are applied once the
+  transaction has committed (utils/after_commit.py) and dropped on rollback
+  or a failed commit. Each commit that changes a
+  board publishes a coalesced bot:raffle_leaderboard "changed" event so the
+  dashboard can drop its own copy. It also marks the guild's auto-leaderboard
+  embed dirty (utils/panel_render.py).
+- Other raw-SQL writes to raffle_tickets in this process invalidate every
+  board on commit, through a SQLAlchemy engine hook. Dashboard writes arrive
+  as dashboard:management events, and redis_subscriber invalidates for them.
+- A board older than RAFFLE_LEADERBOARD_MAX_AGE seconds (default 300) reloads
+  on read. A load that raced an apply or invalidation of its period is
+  returned to its reader but not kept, since it may miss that change.
+- version(period_id) changes whenever a period's tickets do (applied rows or
+  an invalidation). RaffleDraw keys its cached win-probability table on it.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from utils.after_commit import on_commit
+from utils.panel_render import panel_renderer
+
+# Import bot redis publisher for dashboard invalidation
+try:
+    from utils.redis_publisher import bot_redis_publisher
+except ImportError:
+    bot_redis_publisher = None
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = float(os.getenv("RAFFLE_LEADERBOARD_MAX_AGE", "300"))
+
+# Columns of a leaderboard row, in the order TicketManager's RETURNING clauses use
+ROW_COLUMNS = (
+    "discord_id",
+    "kick_name",
+    "watchtime_tickets",
+    "gifted_sub_tickets",
+    "shuffle_wager_tickets",
+    "bonus_tickets",
+    "total_tickets",
+)
+RETURNING_COLUMNS = ", ".join(ROW_COLUMNS)
+
+# Execution option TicketManager sets on the writes it stages itself
+TRACKED_OPTION = "raffle_leaderboard_tracked"
+
+
+class _Board:
+    """One (server, period) standings: rows by discord_id plus the sorted rank keys."""
+
+    __slots__ = ("rows", "keys", "loaded_at")
+
+    def __init__(self, rows: List[dict]):
+        self.rows = {row["discord_id"]: row for row in rows if row["total_tickets"] > 0}
+        self.keys = sorted((-row["total_tickets"], discord_id) for discord_id, row in self.rows.items())
+        self.loaded_at = time.monotonic()
+
+    def apply(self, row: dict):
+        discord_id = row["discord_id"]
+        old = self.rows.pop(discord_id, None)
+        if old is not None:
+            key = (-old["total_tickets"], discord_id)
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        if row["total_tickets"] > 0:
+            self.rows[discord_id] = row
+            insort(self.keys, (-row["total_tickets"], discord_id))
+
+    def rank_of_total(self, total_tickets: int) -> int:
+        return bisect_left(self.keys, (-total_tickets,)) + 1
+
+    def rank(self, discord_id: int) -> Optional[int]:
+        row = self.rows.get(discord_id)
+        return self.rank_of_total(row["total_tickets"]) if row else None
+
+    def top(self, limit: int) -> List[dict]:
+        return [
+            {**self.rows[discord_id], "rank": self.rank_of_total(-negative_total)}
+            for negative_total, discord_id in self.keys[:limit]
+        ]
+
+
+class RaffleLeaderboardCache:
+    """Raffle standings per (server, period), updated on ticket writes; see module docstring."""
+
+    def __init__(self, max_age: float = MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._engine: Optional[Engine] = None
+        self._boards: Dict[Tuple[Optional[int], int], _Board] = {}
+        # period_id -> change counter; _all_version covers invalidations of every period
+        self._versions: Dict[int, int] = {}
+        self._all_version = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+        self.stale_reloads = 0
+        self.applied = 0
+        self.invalidations = 0
+        self.discarded_loads = 0
+
+    # -------------------------
+    # Binding / loading
+    # -------------------------
+
+    def bind(self, engine: Engine):
+        """Attach to the bot's engine. Boards load lazily on first read."""
+        self._engine = engine
+        _install_write_hook()
+        on_commit(engine, _after_commit)
+
+    def is_bound_to(self, engine) -> bool:
+        return self._engine is not None and engine is self._engine
+
+    def is_bound(self) -> bool:
+        """True once bind() ran; for readers on their own connections (custom commands)."""
+        return self._engine is not None
+
+    def _load(self, server_id: Optional[int], period_id: int) -> _Board:
+        if server_id is None:
+            where_clause = "WHERE period_id = :period_id AND total_tickets > 0"
+            params = {"period_id": period_id}
+        else:
+            where_clause = "WHERE period_id = :period_id AND discord_server_id = :server_id AND total_tickets > 0"
+            params = {"period_id": period_id, "server_id": server_id}
+        version = self.version(period_id)
+        with self._engine.connect() as conn:
+            rows = conn.execute(
+                text(f"SELECT {RETURNING_COLUMNS} FROM raffle_tickets {where_clause} ORDER BY total_tickets DESC"),
+                params,
+            ).fetchall()
+        board = _Board([dict(zip(ROW_COLUMNS, row)) for row in rows])
+        with self._lock:
+            self.loads += 1
+            if self.version(period_id) != version:
+                # An apply/invalidate landed during the SELECT; the next read loads again.
+                self.discarded_loads += 1
+                return board
+            self._boards[(server_id, period_id)] = board
+        logger.debug(f"[RaffleLeaderboard] Loaded period {period_id} (server {server_id}): {len(board.rows)} holders")
+        return board
+
+    def _board(self, server_id: Optional[int], period_id: int) -> _Board:
+        board = self._boards.get((server_id, period_id))
+        if board is None:
+            return self._load(server_id, period_id)
+        if time.monotonic() - board.loaded_at > self.max_age:
+            self.stale_reloads += 1
+            return self._load(server_id, period_id)
+        self.hits += 1
+        return board
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def top(self, server_id: Optional[int], period_id: int, limit: int = 10) -> List[dict]:
+        """Top ``limit`` holders as get_leaderboard() dicts (with RANK()-style ``rank``)."""
+        board = self._board(server_id, period_id)
+        with self._lock:
+            return board.top(limit)
+
+    def rank(self, server_id: Optional[int], period_id: int, discord_id: int) -> Optional[int]:
+        """A user's RANK() in the period, or None without tickets."""
+        board = self._board(server_id, period_id)
+        with self._lock:
+            return board.rank(int(discord_id))
+
+    # -------------------------
+    # Writes
+    # -------------------------
+
+    def apply(self, server_id: Optional[int], period_id: int, rows: List[dict]):
+        """Apply committed raffle_tickets rows to the loaded boards they belong to."""
+        with self._lock:
+            for key in ((server_id, period_id), (None, period_id)):
+                board = self._boards.get(key)
+                if board is None:
+                    continue
+                for row in rows:
+                    board.apply(row)
+            self.applied += len(rows)
+            self._versions[period_id] = self._versions.get(period_id, 0) + 1
+
+    def invalidate(self, server_id: Optional[int] = None, period_id: Optional[int] = None):
+        """Drop boards for a server and/or period (reloaded on next read); no arguments drops all."""
+        server_id = int(server_id) if server_id is not None else None
+        period_id = int(period_id) if period_id is not None else None
+        with self._lock:
+            self.invalidations += 1
+            if period_id is None:
+                self._all_version += 1
+            else:
+                self._versions[period_id] = self._versions.get(period_id, 0) + 1
+            for key in list(self._boards):
+                if server_id is not None and key[0] not in (server_id, None):
+                    continue
+                if period_id is not None and key[1] != period_id:
+                    continue
+                del self._boards[key]
+        panel_renderer.mark_dirty("raffle_leaderboard", server_id)
+
+    def version(self, period_id: int) -> Tuple[int, int]:
+        """Changes whenever the period's tickets are written in this process (any server)."""
+        return self._all_version, self._versions.get(int(period_id), 0)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        boards = list(self._boards.values())
+        return {
+            "boards": len(boards),
+            "holders": sum(len(board.rows) for board in boards),
+            "hits": self.hits,
+            "loads": self.loads,
+            "stale_reloads": self.stale_reloads,
+            "applied_rows": self.applied,
+            "invalidations": self.invalidations,
+            "discarded_loads": self.discarded_loads,
+            "oldest_board_seconds": round(max((now - board.loaded_at for board in boards), default=0), 1),
+        }
+
+
+leaderboard_cache = RaffleLeaderboardCache()
+
+
+def stage_rows(conn, server_id: Optional[int], period_id: int, rows):
+    """
+    Queue raffle_tickets rows (RETURNING_COLUMNS order) to apply when ``conn`` commits.
+
+    Args:
+        conn: Connection whose transaction wrote the rows
+        server_id: Discord server that owns the period
+        period_id: Raffle period ID
+        rows: Result rows selected/returned as RETURNING_COLUMNS
+    """
+    pending = conn.info.setdefault("raffle_leaderboard_pending", {})
+    pending.setdefault((server_id, period_id), []).extend(dict(zip(ROW_COLUMNS, row)) for row in rows)
+
+
+def _publish_change(server_id: Optional[int], period_id: int):
+    panel_renderer.mark_dirty("raffle_leaderboard", server_id)
+    if bot_redis_publisher is None or server_id is None:
+        return
+    bot_redis_publisher.publish(
+        "bot:raffle_leaderboard",
+        "changed",
+        {"discord_server_id": server_id, "period_id": period_id},
+        coalesce_key=f"raffle_leaderboard:{server_id}:{period_id}",
+    )
+
+
+# -------------------------
+# Commit hook
+# -------------------------
+# Staged rows are applied once their transaction has committed, so a
+# rolled-back award (or a failed commit) never shows up on the board. Writes TicketManager didn't stage (admin
+# resets, watchtime backfills, ...) flag the connection and invalidate every
+# board on commit instead.
+
+_hook_installed = False
+
+
+def _is_untracked_write(statement: str, context) -> bool:
+    if "raffle_tickets" not in statement:
+        return False
+    if statement.lstrip()[:6].upper() not in ("INSERT", "UPDATE", "DELETE"):
+        return False
+    return not (context is not None and context.execution_options.get(TRACKED_OPTION))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _is_untracked_write(statement, context):
+        conn.info["raffle_tickets_written"] = True
+
+
+def _after_commit(engine, info, committed):
+    pending = info.pop("raffle_leaderboard_pending", None)
+    written = info.pop("raffle_tickets_written", False)
+    if not committed or not leaderboard_cache.is_bound_to(engine):
+        return
+    if written:
+        leaderboard_cache.invalidate()
+    for (server_id, period_id), rows in (pending or {}).items():
+        if not written:
+            leaderboard_cache.apply(server_id, period_id, rows)
+        _publish_change(server_id, period_id)
+
+
+def _after_rollback(conn):
+    conn.info.pop("raffle_leaderboard_pending", None)
+    conn.info.pop("raffle_tickets_written", None)
+
+
+def _install_write_hook():
+    global _hook_installed
+    if _hook_installed:
+        return
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "rollback", _after_rollback)
+    _hook_installed = True
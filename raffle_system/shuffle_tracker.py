@@ -13,9 +13,10 @@ import logging
 import os
 from datetime import datetime
 
-import aiohttp
 from sqlalchemy import text
 
+from utils.http_pool import http_session
+
 from .tickets import TicketManager
 
 logger = logging.getLogger(__name__)
@@ -801,7 +802,7 @@ class ShuffleWagerTracker:
             fetch_url = self._shuffle_wager_url(self.affiliate_url)
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.get(fetch_url, headers=headers, params=params, timeout=30) as response:
                     try:
                         data = await response.json(content_type=None)
@@ -8,6 +8,8 @@ from datetime import datetime
 
 from sqlalchemy import text
 
+from .leaderboard_cache import RETURNING_COLUMNS, TRACKED_OPTION, leaderboard_cache, stage_rows
+
 logger = logging.getLogger(__name__)
 
 
@@ -131,7 +133,7 @@ class TicketManager:
                 discord_server_id = period_row[0]
 
                 # Insert or update user's ticket balance
-                conn.execute(
+                updated = conn.execute(
                     text(
                         f"""
                     INSERT INTO raffle_tickets
@@ -143,8 +145,9 @@ class TicketManager:
                         {source_column} = raffle_tickets.{source_column} + :tickets,
                         total_tickets = raffle_tickets.total_tickets + :tickets,
                         last_updated = CURRENT_TIMESTAMP
+                    RETURNING {RETURNING_COLUMNS}
                 """
-                    ),
+                    ).execution_options(**{TRACKED_OPTION: True}),
                     {
                         "period_id": period_id,
                         "server_id": discord_server_id,
@@ -153,6 +156,8 @@ class TicketManager:
                         "tickets": tickets,
                     },
                 )
+                # Applied to the leaderboard cache when this transaction commits
+                stage_rows(conn, discord_server_id, period_id, updated.fetchall())
 
                 # Log the transaction
                 conn.execute(
@@ -181,6 +186,94 @@ class TicketManager:
             logger.error(f"Failed to award tickets: {e}")
             return False
 
+    def award_tickets_batch(self, conn, awards, source, period_id, discord_server_id):
+        """
+        Award tickets to many users in two set-based statements
+
+        Unlike award_tickets this runs on the caller's connection, so the batch
+        commits (or rolls back) atomically with whatever else the caller writes.
+
+        Args:
+            conn: SQLAlchemy connection inside the caller's transaction
+            awards: List of dicts with discord_id, kick_name, tickets, description
+            source: Source of tickets ('watchtime', 'gifted_sub', 'shuffle_wager', 'bonus')
+            period_id: Raffle period ID
+            discord_server_id: Discord server that owns the period
+
+        Returns:
+            int: Number of raffle_tickets rows inserted or updated
+        """
+        source_column_map = {
+            "watchtime": "watchtime_tickets",
+            "gifted_sub": "gifted_sub_tickets",
+            "shuffle_wager": "shuffle_wager_tickets",
+            "bonus": "bonus_tickets",
+        }
+        source_column = source_column_map.get(source)
+        if not source_column:
+            raise ValueError(f"Invalid ticket source: {source}")
+
+        awards = [award for award in awards if award["tickets"] > 0]
+        if not awards:
+            return 0
+
+        params = {
+            "period_id": period_id,
+            "server_id": discord_server_id,
+            "source": source,
+            "discord_ids": [award["discord_id"] for award in awards],
+            "kick_names": [award["kick_name"] for award in awards],
+            "tickets": [award["tickets"] for award in awards],
+            "descriptions": [
+                award.get("description") or f"Awarded {award['tickets']} tickets from {source}" for award in awards
+            ],
+        }
+
+        # Grouped by discord_id: one person can have several linked usernames
+        # (Kick + Twitch), and ON CONFLICT can't touch the same row twice.
+        result = conn.execute(
+            text(
+                f"""
+            INSERT INTO raffle_tickets
+                (period_id, discord_server_id, discord_id, kick_name, {source_column}, total_tickets, last_updated)
+            SELECT :period_id, :server_id, v.discord_id, MIN(v.kick_name), SUM(v.tickets), SUM(v.tickets),
+                   CURRENT_TIMESTAMP
+            FROM unnest(CAST(:discord_ids AS BIGINT[]), CAST(:kick_names AS TEXT[]), CAST(:tickets AS INTEGER[]))
+                AS v(discord_id, kick_name, tickets)
+            GROUP BY v.discord_id
+            ON CONFLICT (period_id, discord_id)
+            DO UPDATE SET
+                {source_column} = raffle_tickets.{source_column} + EXCLUDED.{source_column},
+                total_tickets = raffle_tickets.total_tickets + EXCLUDED.total_tickets,
+                last_updated = CURRENT_TIMESTAMP
+            RETURNING {RETURNING_COLUMNS}
+        """
+            ).execution_options(**{TRACKED_OPTION: True}),
+            params,
+        )
+        updated = result.fetchall()
+        stage_rows(conn, discord_server_id, period_id, updated)
+
+        conn.execute(
+            text(
+                """
+            INSERT INTO raffle_ticket_log
+                (period_id, discord_id, kick_name, ticket_change, source, description)
+            SELECT :period_id, v.discord_id, v.kick_name, v.tickets, :source, v.description
+            FROM unnest(
+                CAST(:discord_ids AS BIGINT[]),
+                CAST(:kick_names AS TEXT[]),
+                CAST(:tickets AS INTEGER[]),
+                CAST(:descriptions AS TEXT[])
+            ) AS v(discord_id, kick_name, tickets, description)
+        """
+            ),
+            params,
+        )
+
+        logger.info(f"✅ Awarded {sum(params['tickets'])} {source} tickets to {len(awards)} user(s) in one batch")
+        return len(updated)
+
     def remove_tickets(self, discord_id, kick_name, tickets, reason, period_id=None):
         """
         Remove tickets from a user (for violations, etc.)
@@ -212,7 +305,7 @@ class TicketManager:
                 result = conn.execute(
                     text(
                         """
-                    SELECT total_tickets FROM raffle_tickets
+                    SELECT total_tickets, discord_server_id FROM raffle_tickets
                     WHERE period_id = :period_id AND discord_id = :discord_id
                 """
                     ),
@@ -224,14 +317,14 @@ class TicketManager:
                     logger.warning(f"User {discord_id} has no tickets to remove")
                     return False
 
-                current_total = row[0]
+                current_total, discord_server_id = row
                 new_total = max(0, current_total - tickets)  # Don't go negative
                 actual_removed = current_total - new_total
 
                 # Update total tickets (proportionally reduce all sources)
-                conn.execute(
+                updated = conn.execute(
                     text(
-                        """
+                        f"""
                     UPDATE raffle_tickets
                     SET
                         watchtime_tickets = GREATEST(0, CAST(watchtime_tickets * :ratio AS INTEGER)),
@@ -241,8 +334,9 @@ class TicketManager:
                         total_tickets = :new_total,
                         last_updated = CURRENT_TIMESTAMP
                     WHERE period_id = :period_id AND discord_id = :discord_id
+                    RETURNING {RETURNING_COLUMNS}
                 """
-                    ),
+                    ).execution_options(**{TRACKED_OPTION: True}),
                     {
                         "period_id": period_id,
                         "discord_id": discord_id,
@@ -250,6 +344,7 @@ class TicketManager:
                         "new_total": new_total,
                     },
                 )
+                stage_rows(conn, discord_server_id, period_id, updated.fetchall())
 
                 # Log the removal
                 conn.execute(
@@ -297,6 +392,9 @@ class TicketManager:
                 if not period_id:
                     return []
 
+            if leaderboard_cache.is_bound_to(self.engine):
+                return leaderboard_cache.top(self.server_id, period_id, limit)
+
             with self.engine.begin() as conn:
                 # Build WHERE clause based on multiserver support
                 if self.server_id:
@@ -368,6 +466,9 @@ class TicketManager:
                 if not period_id:
                     return None
 
+            if leaderboard_cache.is_bound_to(self.engine):
+                return leaderboard_cache.rank(self.server_id, period_id, discord_id)
+
             with self.engine.begin() as conn:
                 # Build WHERE clause based on multiserver support
                 if self.server_id:
@@ -39,7 +39,7 @@ class WatchtimeConverter:
             # Fall back to config default
             self.watchtime_tickets_per_hour = WATCHTIME_TICKETS_PER_HOUR
 
-    async def convert_watchtime_to_tickets(self):
+    async def convert_watchtime_to_tickets(self, batch=True):
         """
         Convert accumulated watchtime into raffle tickets
 
@@ -50,6 +50,11 @@ class WatchtimeConverter:
         4. Updates the raffle_tickets table
         5. Logs the conversion in raffle_watchtime_converted
 
+        Args:
+            batch: Convert every user with one query + set-based writes in a
+                single transaction (default). False runs the original per-user
+                loop, kept as a fallback and for benchmarking.
+
         Returns:
             dict: Summary of conversions performed
         """
@@ -65,152 +70,295 @@ class WatchtimeConverter:
                 logger.warning("No active raffle period - skipping watchtime conversion")
                 return {"status": "no_active_period", "conversions": 0}
 
-            conversions = []
+            if batch:
+                return self._convert_batch(period_id)
+            return self._convert_per_user(period_id)
 
-            with self.engine.begin() as conn:
-                # Get period start date to filter conversions
-                period_result = conn.execute(
-                    text(
-                        """
-                    SELECT start_date, created_at FROM raffle_periods WHERE id = :period_id
-                """
-                    ),
-                    {"period_id": period_id},
+        except Exception as e:
+            logger.error(f"Failed to convert watchtime to tickets: {e}")
+            return {"status": "error", "error": str(e), "conversions": 0}
+
+    def _convert_batch(self, period_id):
+        """
+        Set-based conversion: one read computes every linked user's convertible
+        hours for the period, then raffle_tickets, raffle_ticket_log,
+        raffle_watchtime_converted and watchtime_conversion_logs are each written
+        with a single statement. Everything commits atomically on one connection.
+        """
+        with self.engine.begin() as conn:
+            period_row = conn.execute(
+                text("SELECT discord_server_id FROM raffle_periods WHERE id = :period_id"),
+                {"period_id": period_id},
+            ).fetchone()
+            if not period_row:
+                return {"status": "no_active_period", "conversions": 0}
+            period_server_id = period_row[0]
+            self.discord_server_id = self.server_id
+
+            # Every linked user with watchtime, netted against the period's
+            # running conversion total (raffle_conversion_totals).
+            rows = conn.execute(
+                text(
+                    """
+                WITH linked AS (
+                    -- One discord_id per lowercased name: the same handle linked
+                    -- on Kick and Twitch must not convert (and award) twice.
+                    SELECT DISTINCT ON (LOWER(kick_name)) LOWER(kick_name) AS uname, discord_id
+                    FROM links
+                    WHERE discord_server_id = :server_id
+                    ORDER BY LOWER(kick_name), discord_id
                 )
-                period_row = period_result.fetchone()
-                if not period_row:
-                    return {"status": "no_active_period", "conversions": 0}
+                SELECT
+                    w.username AS kick_name,
+                    l.discord_id,
+                    (w.minutes - COALESCE(t.minutes_converted, 0)) / 60 AS hours_to_convert
+                FROM watchtime w
+                JOIN linked l ON l.uname = LOWER(w.username)
+                LEFT JOIN raffle_conversion_totals t
+                    ON t.period_id = :period_id AND t.kick_name = w.username
+                WHERE w.minutes > 0
+                    AND w.discord_server_id = :server_id
+            """
+                ),
+                {"server_id": self.server_id, "period_id": period_id},
+            ).fetchall()
+
+            logger.debug(f"🔍 [WATCHTIME] Found {len(rows)} linked users with watchtime")
+
+            if not rows:
+                logger.debug("No linked users with watchtime found")
+                return {"status": "no_users", "conversions": 0}
 
-                period_start = period_row[0]
-                period_created = period_row[1]
-                self.discord_server_id = self.server_id
+            conversions = []
+            for kick_name, discord_id, hours_to_convert in rows:
+                # Need at least 1 hour to convert
+                if hours_to_convert < 1:
+                    continue
+                tickets_to_award = hours_to_convert * self.watchtime_tickets_per_hour
+                if tickets_to_award == 0:
+                    continue
+                conversions.append(
+                    {
+                        "kick_name": kick_name,
+                        "discord_id": discord_id,
+                        "hours_converted": hours_to_convert,
+                        "tickets_awarded": tickets_to_award,
+                    }
+                )
 
-                # Get all users with watchtime and their Discord IDs from links table (per-guild)
-                # Use LOWER() for case-insensitive comparison
-                result = conn.execute(
+            if not conversions:
+                return {"status": "success", "conversions": 0, "details": []}
+
+            self.ticket_manager.award_tickets_batch(
+                conn,
+                [
+                    {
+                        "discord_id": c["discord_id"],
+                        "kick_name": c["kick_name"],
+                        "tickets": c["tickets_awarded"],
+                        "description": f"Converted {c['hours_converted']}h watchtime to {c['tickets_awarded']} tickets",
+                    }
+                    for c in conversions
+                ],
+                source="watchtime",
+                period_id=period_id,
+                discord_server_id=period_server_id,
+            )
+
+            params = {
+                "period_id": period_id,
+                "server_id": self.discord_server_id,
+                "kick_names": [c["kick_name"] for c in conversions],
+                "discord_ids": [c["discord_id"] for c in conversions],
+                "minutes": [c["hours_converted"] * 60 for c in conversions],
+                "tickets": [c["tickets_awarded"] for c in conversions],
+            }
+
+            # Log the conversions to prevent double-counting (raffle-specific)
+            conn.execute(
+                text(
+                    """
+                INSERT INTO raffle_watchtime_converted
+                    (period_id, kick_name, minutes_converted, tickets_awarded)
+                SELECT :period_id, v.kick_name, v.minutes, v.tickets
+                FROM unnest(CAST(:kick_names AS TEXT[]), CAST(:minutes AS INTEGER[]), CAST(:tickets AS INTEGER[]))
+                    AS v(kick_name, minutes, tickets)
+            """
+                ),
+                params,
+            )
+
+            # ALSO log to permanent watchtime_conversion_logs (NEVER deleted)
+            conn.execute(
+                text(
+                    """
+                INSERT INTO watchtime_conversion_logs
+                    (discord_id, kick_name, discord_server_id, raffle_minutes, points_minutes, converted_at)
+                SELECT v.discord_id, v.kick_name, :server_id, v.minutes, 0, NOW()
+                FROM unnest(CAST(:discord_ids AS BIGINT[]), CAST(:kick_names AS TEXT[]), CAST(:minutes AS INTEGER[]))
+                    AS v(discord_id, kick_name, minutes)
+            """
+                ),
+                params,
+            )
+
+        for c in conversions:
+            logger.debug(
+                f"✅ Converted {c['hours_converted']}h watchtime → {c['tickets_awarded']} tickets for {c['kick_name']}"
+            )
+
+        return {"status": "success", "conversions": len(conversions), "details": conversions}
+
+    def _convert_per_user(self, period_id):
+        """Original conversion loop: one SUM lookup + award_tickets call per user."""
+        conversions = []
+
+        with self.engine.begin() as conn:
+            # Get period start date to filter conversions
+            period_result = conn.execute(
+                text(
+                    """
+                SELECT start_date, created_at FROM raffle_periods WHERE id = :period_id
+            """
+                ),
+                {"period_id": period_id},
+            )
+            period_row = period_result.fetchone()
+            if not period_row:
+                return {"status": "no_active_period", "conversions": 0}
+
+            period_start = period_row[0]
+            period_created = period_row[1]
+            self.discord_server_id = self.server_id
+
+            # Get all users with watchtime and their Discord IDs from links table (per-guild)
+            # Use LOWER() for case-insensitive comparison
+            result = conn.execute(
+                text(
+                    """
+                WITH linked AS (
+                    SELECT DISTINCT ON (LOWER(kick_name)) LOWER(kick_name) AS uname, discord_id
+                    FROM links
+                    WHERE discord_server_id = :server_id
+                    ORDER BY LOWER(kick_name), discord_id
+                )
+                SELECT
+                    w.username as kick_name,
+                    w.minutes as total_minutes,
+                    l.discord_id
+                FROM watchtime w
+                JOIN linked l ON l.uname = LOWER(w.username)
+                WHERE w.minutes > 0
+                    AND w.discord_server_id = :server_id
+            """
+                ),
+                {"server_id": self.server_id},
+            )
+
+            users = list(result)
+
+            logger.debug(f"🔍 [WATCHTIME] Found {len(users)} linked users with watchtime")
+
+            if not users:
+                logger.debug("No linked users with watchtime found")
+                return {"status": "no_users", "conversions": 0}
+
+            for kick_name, total_minutes, discord_id in users:
+                # Check how much watchtime has already been converted this period
+                # (running total kept in step with raffle_watchtime_converted)
+                converted_result = conn.execute(
                     text(
                         """
-                    SELECT
-                        w.username as kick_name,
-                        w.minutes as total_minutes,
-                        l.discord_id
-                    FROM watchtime w
-                    JOIN links l ON LOWER(l.kick_name) = LOWER(w.username)
-                        AND l.discord_server_id = :server_id
-                    WHERE w.minutes > 0
-                        AND w.discord_server_id = :server_id
+                    SELECT minutes_converted
+                    FROM raffle_conversion_totals
+                    WHERE period_id = :period_id AND kick_name = :kick_name
                 """
                     ),
-                    {"server_id": self.server_id},
+                    {"period_id": period_id, "kick_name": kick_name},
                 )
 
-                users = list(result)
+                minutes_already_converted_this_period = converted_result.scalar() or 0
 
-                logger.debug(f"🔍 [WATCHTIME] Found {len(users)} linked users with watchtime")
+                # Calculate new minutes to convert
+                new_minutes = total_minutes - minutes_already_converted_this_period
 
-                if not users:
-                    logger.debug("No linked users with watchtime found")
-                    return {"status": "no_users", "conversions": 0}
+                logger.debug(
+                    f"🔍 [WATCHTIME] {kick_name}: {total_minutes} total - {minutes_already_converted_this_period} this period = {new_minutes} new"
+                )
 
-                for kick_name, total_minutes, discord_id in users:
-                    # Check how much watchtime has already been converted this period
-                    converted_result = conn.execute(
+                if new_minutes < 60:
+                    # Need at least 1 hour to convert
+                    continue
+
+                # Convert to tickets (floor to whole hours)
+                hours_to_convert = new_minutes // 60
+                minutes_to_convert = hours_to_convert * 60
+                tickets_to_award = hours_to_convert * self.watchtime_tickets_per_hour
+
+                if tickets_to_award == 0:
+                    continue
+
+                # Award the tickets
+                success = self.ticket_manager.award_tickets(
+                    discord_id=discord_id,
+                    kick_name=kick_name,
+                    tickets=tickets_to_award,
+                    source="watchtime",
+                    description=f"Converted {hours_to_convert}h watchtime to {tickets_to_award} tickets",
+                    period_id=period_id,
+                )
+
+                if success:
+                    # Log the conversion to prevent double-counting (raffle-specific)
+                    conn.execute(
                         text(
                             """
-                        SELECT COALESCE(SUM(minutes_converted), 0)
-                        FROM raffle_watchtime_converted
-                        WHERE period_id = :period_id AND kick_name = :kick_name
+                        INSERT INTO raffle_watchtime_converted
+                            (period_id, kick_name, minutes_converted, tickets_awarded)
+                        VALUES
+                            (:period_id, :kick_name, :minutes, :tickets)
                     """
                         ),
-                        {"period_id": period_id, "kick_name": kick_name},
+                        {
+                            "period_id": period_id,
+                            "kick_name": kick_name,
+                            "minutes": minutes_to_convert,
+                            "tickets": tickets_to_award,
+                        },
                     )
 
-                    minutes_already_converted_this_period = converted_result.scalar() or 0
-
-                    # Calculate new minutes to convert
-                    new_minutes = total_minutes - minutes_already_converted_this_period
-
-                    logger.debug(
-                        f"🔍 [WATCHTIME] {kick_name}: {total_minutes} total - {minutes_already_converted_this_period} this period = {new_minutes} new"
+                    # ALSO log to permanent watchtime_conversion_logs (NEVER deleted)
+                    conn.execute(
+                        text(
+                            """
+                        INSERT INTO watchtime_conversion_logs
+                            (discord_id, kick_name, discord_server_id, raffle_minutes, points_minutes, converted_at)
+                        VALUES
+                            (:discord_id, :kick_name, :server_id, :minutes, 0, NOW())
+                    """
+                        ),
+                        {
+                            "discord_id": discord_id,
+                            "kick_name": kick_name,
+                            "server_id": self.discord_server_id,
+                            "minutes": minutes_to_convert,
+                        },
                     )
 
-                    if new_minutes < 60:
-                        # Need at least 1 hour to convert
-                        continue
-
-                    # Convert to tickets (floor to whole hours)
-                    hours_to_convert = new_minutes // 60
-                    minutes_to_convert = hours_to_convert * 60
-                    tickets_to_award = hours_to_convert * self.watchtime_tickets_per_hour
-
-                    if tickets_to_award == 0:
-                        continue
-
-                    # Award the tickets
-                    success = self.ticket_manager.award_tickets(
-                        discord_id=discord_id,
-                        kick_name=kick_name,
-                        tickets=tickets_to_award,
-                        source="watchtime",
-                        description=f"Converted {hours_to_convert}h watchtime to {tickets_to_award} tickets",
-                        period_id=period_id,
+                    conversions.append(
+                        {
+                            "kick_name": kick_name,
+                            "discord_id": discord_id,
+                            "hours_converted": hours_to_convert,
+                            "tickets_awarded": tickets_to_award,
+                        }
                     )
 
-                    if success:
-                        # Log the conversion to prevent double-counting (raffle-specific)
-                        conn.execute(
-                            text(
-                                """
-                            INSERT INTO raffle_watchtime_converted
-                                (period_id, kick_name, minutes_converted, tickets_awarded)
-                            VALUES
-                                (:period_id, :kick_name, :minutes, :tickets)
-                        """
-                            ),
-                            {
-                                "period_id": period_id,
-                                "kick_name": kick_name,
-                                "minutes": minutes_to_convert,
-                                "tickets": tickets_to_award,
-                            },
-                        )
-
-                        # ALSO log to permanent watchtime_conversion_logs (NEVER deleted)
-                        conn.execute(
-                            text(
-                                """
-                            INSERT INTO watchtime_conversion_logs
-                                (discord_id, kick_name, discord_server_id, raffle_minutes, points_minutes, converted_at)
-                            VALUES
-                                (:discord_id, :kick_name, :server_id, :minutes, 0, NOW())
-                        """
-                            ),
-                            {
-                                "discord_id": discord_id,
-                                "kick_name": kick_name,
-                                "server_id": self.discord_server_id,
-                                "minutes": minutes_to_convert,
-                            },
-                        )
-
-                        conversions.append(
-                            {
-                                "kick_name": kick_name,
-                                "discord_id": discord_id,
-                                "hours_converted": hours_to_convert,
-                                "tickets_awarded": tickets_to_award,
-                            }
-                        )
-
-                        logger.info(
-                            f"✅ Converted {hours_to_convert}h watchtime → {tickets_to_award} tickets for {kick_name}"
-                        )
-
-            return {"status": "success", "conversions": len(conversions), "details": conversions}
+                    logger.info(
+                        f"✅ Converted {hours_to_convert}h watchtime → {tickets_to_award} tickets for {kick_name}"
+                    )
 
-        except Exception as e:
-            logger.error(f"Failed to convert watchtime to tickets: {e}")
-            return {"status": "error", "error": str(e), "conversions": 0}
+        return {"status": "success", "conversions": len(conversions), "details": conversions}
 
     def get_unconverted_watchtime(self, kick_name, period_id=None):
         """
@@ -251,8 +399,8 @@ class WatchtimeConverter:
                 converted_result = conn.execute(
                     text(
                         """
-                    SELECT COALESCE(SUM(minutes_converted), 0)
-                    FROM raffle_watchtime_converted
+                    SELECT minutes_converted
+                    FROM raffle_conversion_totals
                     WHERE period_id = :period_id AND kick_name = :kick_name
                 """
                     ),
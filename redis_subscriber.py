@@ -24,10 +24,15 @@ import discord
 import redis
 from sqlalchemy import create_engine, text  # type: ignore
 
+from core.channel_dispatcher import ChannelDispatcher
+from core.chat_recorder import chat_recorder
 from features.games.guess_the_balance import gtb_rank_marker
+from raffle_system.leaderboard_cache import leaderboard_cache
 from utils.log_context import server_context
+from utils.http_pool import http_session
 from utils.redis_signing import signing_enabled, verify_payload
 from utils.server_urls import get_server_public_page_url
+from utils.settings_store import settings_store
 
 logger = logging.getLogger(__name__)
 
@@ -85,12 +90,37 @@ def build_raffle_kick_message(winner: dict, prize_description: str) -> str:
     return f"🎉 Raffle Winner: {name} won {prize}! Ticket #{ticket}. Congratulations! 🎊"
 
 
+# Subscribed channels (webhook events disabled - using direct WebSocket).
+SUBSCRIBED_CHANNELS = (
+    "dashboard:slot_requests",
+    "dashboard:timed_messages",
+    "dashboard:gtb",
+    "dashboard:management",
+    "dashboard:raffle",
+    "dashboard:commands",
+    "dashboard:point_shop",
+    "dashboard:notifications",
+    "dashboard:bot_settings",
+    "dashboard:giveaway",
+    "dashboard:stream_notification",
+    "dashboard:subscriptions",
+    "dashboard:tournament",
+    # bot_events: Twitch chat (via EventSub webhook in the Gunicorn process)
+    # is forwarded here for the bot to process. Kick chat still uses the
+    # direct WebSocket (not this channel).
+    "bot_events",
+)
+
+
 class RedisSubscriber:
     def __init__(self, bot, send_message_callback=None):
         self.bot = bot
         self.send_message_callback = send_message_callback
         self.redis_url = os.getenv("REDIS_URL")
         self.enabled = False
+        # Handlers run on per-channel worker lanes (see core/channel_dispatcher.py)
+        # so slow dashboard work never delays bot_events chat.
+        self.dispatcher = ChannelDispatcher("Redis Subscriber")
         self.last_shop_sync = 0  # Timestamp for debouncing shop sync
         # Per-(guild,item) cooldown for restock DM fan-outs, so a burst of
         # item edits that each cross 0->positive can't spam viewers.
@@ -135,7 +165,6 @@ class RedisSubscriber:
                     socket_connect_timeout=5,
                     socket_timeout=5,
                 )
-                self.pubsub = self.client.pubsub()
                 self.enabled = True
                 logger.debug("✅ Redis subscriber initialized")
             except Exception as e:
@@ -715,11 +744,14 @@ class RedisSubscriber:
             change = data.get("change")
             reason = data.get("reason")
             logger.info(f"Tickets adjusted for {discord_id}: {change} {ticket_source} tickets ({reason})")
+            # The dashboard wrote raffle_tickets directly; rebuild the standings on next read.
+            leaderboard_cache.invalidate(data.get("discord_server_id"), data.get("period_id"))
 
         elif action == "start_period":
             start_date = data.get("start_date")
             end_date = data.get("end_date")
             server_id = data.get("discord_server_id")
+            leaderboard_cache.invalidate(server_id)
 
             # Pull the global raffle title/prize (server-wide bot_settings) so the
             # announcement names the raffle and states the prize when configured.
@@ -1409,6 +1441,9 @@ class RedisSubscriber:
             item_type = notif_data.get("item_type", "custom")
             raffle_ticket_amount = notif_data.get("raffle_ticket_amount", 0)
             sale_status = notif_data.get("sale_status", "pending")
+            if item_type == "raffle_tickets" and sale_status == "completed":
+                # Auto-completed ticket purchases are written by the dashboard.
+                leaderboard_cache.invalidate(source_server_id_int)
 
             # Auto-completed items (like raffle tickets) get green embed
             if sale_status == "completed":
@@ -1497,6 +1532,14 @@ class RedisSubscriber:
         """Handle bot settings events from dashboard"""
         logger.info(f"📥 Bot Settings Event: {action}")
 
+        # Drop the cached snapshots first so every refresh below reads the new rows.
+        if action == "sync":
+            settings_store.invalidate()
+        elif action == "update":
+            settings_store.invalidate(data.get("discord_server_id"))
+        elif action == "reload" and data.get("guild_id") is not None:
+            settings_store.invalidate(data.get("guild_id"))
+
         if action == "sync":
             # 1. Refresh the global settings_manager (legacy / single-server).
             if hasattr(self.bot, "settings_manager") and self.bot.settings_manager:
@@ -1616,7 +1659,7 @@ class RedisSubscriber:
             # Profile settings were updated - refresh for specific guild or all
             guild_id = data.get("guild_id")
             logger.info(f"✅ Reload request for guild: {guild_id}")
-            # Settings will be reloaded automatically on next access
+            # Settings will be reloaded from the store on next access
 
             # Standalone (guild-less) workspaces: a settings save is also how
             # their Kick channel gets configured/changed — (re)build the chat
@@ -1956,7 +1999,7 @@ class RedisSubscriber:
             headers = {"Authorization": f"Bot {bot_token}", "Content-Type": "application/json"}
             channel_url = f"https://discord.com/api/v10/channels/{channel_id}/messages"
             timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 # Action-row link buttons (primary Watch Stream + any custom buttons),
                 # built from the same per-platform settings as the real go-live post.
                 # Built inside the session so app:<name> emoji tokens resolve against
@@ -2228,140 +2271,136 @@ Congratulations! Please contact an admin to claim your prize! 🎊
             guild = self.bot.get_guild(guild_id)
             guild_name = guild.name if guild else str(guild_id)
 
+            chat_recorder.record(guild_id, guild_name, msg, source="twitch")
             await kick_ws_manager._handle_incoming_message(guild_id, guild_name, msg)
             logger.info(f"[Twitch Chat] 💬 Processed {msg.get('username')} via shared handler")
         except Exception as e:
             logger.error(f"[Twitch Chat] Error handling forwarded message: {e}")
 
+    def _route(self, channel, action, data, payload):
+        """Return the handler coroutine for a channel, or None if the channel is unknown."""
+        if channel == "dashboard:slot_requests":
+            return self.handle_slot_requests_event(action, data)
+        if channel == "dashboard:timed_messages":
+            return self.handle_timed_messages_event(action, data)
+        if channel == "dashboard:gtb":
+            return self.handle_gtb_event(action, data)
+        if channel == "dashboard:management":
+            return self.handle_management_event(action, data)
+        if channel == "dashboard:raffle":
+            return self.handle_raffle_event(action, data)
+        if channel == "dashboard:commands":
+            return self.handle_commands_event(action, data)
+        if channel == "dashboard:point_shop":
+            return self.handle_point_shop_event(action, data)
+        if channel == "dashboard:notifications":
+            return self.handle_notifications_event(action, data)
+        if channel == "dashboard:bot_settings":
+            return self.handle_bot_settings_event(action, data)
+        if channel == "dashboard:giveaway":
+            return self.handle_giveaway_event(action, data)
+        if channel == "dashboard:stream_notification":
+            return self.handle_stream_notification_event(action, data)
+        if channel == "dashboard:subscriptions":
+            return self.handle_subscriptions_event(action, data)
+        if channel == "dashboard:tournament":
+            return self.handle_tournament_event(action, data)
+        if channel == "bot_events":
+            # bot_events uses {type, data} rather than {action, data}.
+            return self.handle_bot_event(payload)
+        return None
+
+    async def _handle(self, channel, action, data, payload):
+        # Tag all logging for this event with its server. Each event runs inside
+        # its own context block on a dispatcher lane, so concurrent events on
+        # other lanes keep their own tags.
+        _sid = data.get("discord_server_id") if isinstance(data, dict) else None
+        _sname = None
+        if _sid is not None:
+            try:
+                _g = self.bot.get_guild(int(_sid))
+                _sname = _g.name if _g else None
+            except (ValueError, TypeError, AttributeError):
+                _sname = None
+
+        with server_context(_sid, _sname):
+            coro = self._route(channel, action, data, payload)
+            if coro is not None:
+                await coro
+
+    def _dispatch(self, channel, raw):
+        """Decode + verify one message on the listener and queue its handler on the channel's lane."""
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.info(f"Failed to decode message: {e}")
+            return
+
+        # Reject forged commands: every publisher signs with the
+        # shared REDIS_MSG_SECRET. No-op when the secret is unset.
+        if not verify_payload(payload):
+            logger.warning(f"Dropped Redis message on {channel}: bad or missing signature")
+            return
+
+        action = payload.get("action")
+        data = payload.get("data", {})
+
+        # Events for one guild share a lane so they run in publish order.
+        key = None
+        if isinstance(data, dict):
+            key = data.get("discord_server_id") or data.get("_server_id")
+        key = str(key) if key is not None else None
+
+        if channel == "dashboard:slot_requests" and action == "slot_reveal_landed":
+            # Wakes a "pick" handler that is waiting on this guild's lane, so it
+            # must not queue behind it.
+            asyncio.create_task(self._handle(channel, action, data, payload))
+            return
+
+        self.dispatcher.submit(
+            channel,
+            key,
+            lambda: self._handle(channel, action, data, payload),
+            label=f"{action or payload.get('type')}",
+        )
+
     async def listen(self):
         """Listen for events on all dashboard channels"""
         if not self.enabled:
             logger.info("Redis subscriber not enabled, skipping...")
             return
 
-        # Subscribe to all dashboard channels (webhook events disabled - using direct WebSocket)
-        await asyncio.to_thread(
-            self.pubsub.subscribe,
-            "dashboard:slot_requests",
-            "dashboard:timed_messages",
-            "dashboard:gtb",
-            "dashboard:management",
-            "dashboard:raffle",
-            "dashboard:commands",
-            "dashboard:point_shop",
-            "dashboard:notifications",
-            "dashboard:bot_settings",
-            "dashboard:giveaway",
-            "dashboard:stream_notification",
-            "dashboard:subscriptions",
-            "dashboard:tournament",
-            # bot_events: Twitch chat (via EventSub webhook in the Gunicorn process)
-            # is forwarded here for the bot to process. Kick chat still uses the
-            # direct WebSocket (not this channel).
-            "bot_events",
-        )
+        import redis.asyncio as aioredis
 
-        if signing_enabled():
-            logger.info("🎧 Redis subscriber listening (message signatures REQUIRED)...")
-        else:
-            logger.warning(
-                "🎧 Redis subscriber listening WITHOUT message authentication - "
-                "set REDIS_MSG_SECRET on the dashboard and bot to reject forged events."
-            )
+        # No socket_timeout: the pub/sub connection idles between messages;
+        # health_check_interval pings it so a dead link is still noticed.
+        client = aioredis.from_url(
+            self.redis_url,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            health_check_interval=30,
+        )
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(*SUBSCRIBED_CHANNELS)
 
-        while True:
-            try:
-                # Run blocking listen() in a thread to avoid blocking event loop
-                message = await asyncio.to_thread(self.pubsub.get_message, timeout=1.0)
+            if signing_enabled():
+                logger.info("🎧 Redis subscriber listening (message signatures REQUIRED)...")
+            else:
+                logger.warning(
+                    "🎧 Redis subscriber listening WITHOUT message authentication - "
+                    "set REDIS_MSG_SECRET on the dashboard and bot to reject forged events."
+                )
 
+            async for message in pubsub.listen():
                 if message and message["type"] == "message":
-                    channel = message["channel"]
-                    try:
-                        payload = json.loads(message["data"])
-
-                        # Reject forged commands: every publisher signs with the
-                        # shared REDIS_MSG_SECRET. No-op when the secret is unset.
-                        if not verify_payload(payload):
-                            logger.warning(f"Dropped Redis message on {channel}: bad or missing signature")
-                            continue
-
-                        action = payload.get("action")
-                        data = payload.get("data", {})
-
-                        # Tag all logging for this event with its server. Events are
-                        # processed sequentially, so one wrap covers every handler.
-                        _sid = data.get("discord_server_id") if isinstance(data, dict) else None
-                        _sname = None
-                        if _sid is not None:
-                            try:
-                                _g = self.bot.get_guild(int(_sid))
-                                _sname = _g.name if _g else None
-                            except (ValueError, TypeError, AttributeError):
-                                _sname = None
-
-                        with server_context(_sid, _sname):
-                            # Route to appropriate handler
-                            if channel == "dashboard:slot_requests":
-                                await self.handle_slot_requests_event(action, data)
-                            elif channel == "dashboard:timed_messages":
-                                await self.handle_timed_messages_event(action, data)
-                            elif channel == "dashboard:gtb":
-                                await self.handle_gtb_event(action, data)
-                            elif channel == "dashboard:management":
-                                await self.handle_management_event(action, data)
-                            elif channel == "dashboard:raffle":
-                                await self.handle_raffle_event(action, data)
-                            elif channel == "dashboard:commands":
-                                await self.handle_commands_event(action, data)
-                            elif channel == "dashboard:point_shop":
-                                await self.handle_point_shop_event(action, data)
-                            elif channel == "dashboard:notifications":
-                                await self.handle_notifications_event(action, data)
-                            elif channel == "dashboard:bot_settings":
-                                await self.handle_bot_settings_event(action, data)
-                            elif channel == "dashboard:giveaway":
-                                await self.handle_giveaway_event(action, data)
-                            elif channel == "dashboard:stream_notification":
-                                await self.handle_stream_notification_event(action, data)
-                            elif channel == "dashboard:subscriptions":
-                                await self.handle_subscriptions_event(action, data)
-                            elif channel == "dashboard:tournament":
-                                await self.handle_tournament_event(action, data)
-                            elif channel == "bot_events":
-                                # bot_events uses {type, data} rather than {action, data}.
-                                await self.handle_bot_event(payload)
-
-                    except json.JSONDecodeError as e:
-                        logger.info(f"Failed to decode message: {e}")
-                    except Exception as e:
-                        logger.error(f"Error handling message: {e}")
-
-                # Small delay to prevent busy loop
-                await asyncio.sleep(0.01)
-
-            except Exception as e:
-                logger.info(f"Redis listener error: {e}")
-                # Reconnect after delay
-                await asyncio.sleep(5)
-                if self.enabled:
-                    # Resubscribe after error
-                    await asyncio.to_thread(
-                        self.pubsub.subscribe,
-                        "dashboard:slot_requests",
-                        "dashboard:timed_messages",
-                        "dashboard:gtb",
-                        "dashboard:management",
-                        "dashboard:raffle",
-                        "dashboard:commands",
-                        "dashboard:point_shop",
-                        "dashboard:notifications",
-                        "dashboard:bot_settings",
-                        "dashboard:giveaway",
-                        "dashboard:stream_notification",
-                        "dashboard:subscriptions",
-                        "dashboard:tournament",
-                        # 'bot_events' removed - no longer using webhooks
-                    )
+                    self._dispatch(message["channel"], message["data"])
+        finally:
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
 
 
 async def start_redis_subscriber(bot, send_message_callback=None):
@@ -2399,32 +2438,13 @@ async def start_redis_subscriber(bot, send_message_callback=None):
             try:
                 await subscriber.listen()
             except Exception as e:
+                # listen() builds a fresh pub/sub connection each time; queued
+                # handlers keep running on the dispatcher lanes meanwhile.
                 logger.warning(f"⚠️  Redis subscriber error: {e} — retrying in {retry_delay}s")
-                # Fully recreate the Redis client and pubsub for a clean reconnect
-                try:
-                    subscriber.pubsub.close()
-                except Exception:
-                    pass
-                try:
-                    subscriber.client.close()
-                except Exception:
-                    pass
-                try:
-                    subscriber.client = redis.from_url(
-                        subscriber.redis_url,
-                        decode_responses=True,
-                        socket_connect_timeout=5,
-                        socket_timeout=5,
-                    )
-                    subscriber.pubsub = subscriber.client.pubsub()
-                    subscriber.enabled = True
-                    logger.info("🔄 Redis subscriber client recreated")
-                except Exception as re:
-                    logger.warning(f"⚠️  Failed to recreate Redis client: {re}")
                 await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, max_delay)
             else:
-                # listen() returned normally (shouldn't happen), reset delay
+                # listen() returned normally (connection closed by the server), reset delay
                 retry_delay = 5
     else:
         logger.warning("⚠️  Redis subscriber disabled, bot will poll database instead")
@@ -0,0 +1,74 @@
+"""
+Shared helpers for the scripts/benchmarks/ micro-benchmarks.
+
+Benchmarks that touch the database run against DATABASE_URL (a scratch Postgres,
+NEVER production) inside a throwaway schema that is dropped afterwards, so they
+can't collide with real tables even on a shared instance.
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+# Make the repo root importable when run as `python scripts/benchmarks/<name>.py`.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.percentiles import percentile  # noqa: E402  (re-exported for the benchmarks)
+
+
+def bench_database_url():
+    """Return the benchmark database URL or exit with a hint."""
+    load_dotenv()
+    url = os.getenv("BENCH_DATABASE_URL") or os.getenv("DATABASE_URL")
+    if not url or not url.startswith(("postgres://", "postgresql://")):
+        print("❌ Set BENCH_DATABASE_URL (or DATABASE_URL) to a scratch PostgreSQL database")
+        sys.exit(2)
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+@contextmanager
+def scratch_schema(schema):
+    """Yield an engine whose search_path is a fresh `schema`; drop it afterwards."""
+    url = bench_database_url()
+    admin = create_engine(url)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        admin.dispose()
+
+
+def run_sql_script(conn, sql):
+    """Execute a multi-statement DDL string one statement at a time."""
+    for statement in sql.split(";"):
+        if statement.strip():
+            conn.execute(text(statement))
+
+
+def time_call(fn, repeat=1):
+    """Run `fn` `repeat` times; return the list of wall-clock durations in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    """Format median/p99 of a list of ms samples."""
+    return f"median {statistics.median(samples):8.1f} ms   p99 {percentile(samples, 99):8.1f} ms"
@@ -0,0 +1,297 @@
+"""
+Load test: replay recorded chat through KickWebSocketManager._handle_incoming_message.
+
+Recordings come from core/chat_recorder.py: run the bot with
+CHAT_RECORD_PATH=chat.jsonl.gz during a stream, or build a synthetic one
+with --generate. Replaying imports bot.py against a scratch Postgres schema.
+bot.py runs its startup migrations there, and the schema is dropped
+afterwards. SQLite is not supported because those migrations use
+Postgres-only DDL. Each line is fed to _handle_incoming_message with:
+
+- send_kick_message replaced by a fake sender that only counts replies
+- Redis publishing off (REDIS_URL unset)
+- recording off, so the replay doesn't record itself
+
+--speed scales the recorded timing: 1 is real time, 100 is 100x faster.
+Lines are started as tasks at their scheduled time, the way the websocket
+delivers them. With --speed max, lines are awaited back to back, which
+measures raw throughput.
+
+Reports:
+- messages per second
+- latency per stage: total, pre-dispatch (activity tracking, giveaway,
+  publish) and command dispatch
+- how far starts lagged behind the schedule
+- DB statements per message, with the most frequent statements
+- replies sent, and the chat router's per-command stats
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_chat_replay.py --generate /tmp/chat.jsonl.gz
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_chat_replay.py /tmp/chat.jsonl.gz --speed 10
+    python scripts/benchmarks/bench_chat_replay.py /tmp/chat.jsonl.gz --speed max --guild-id 1
+"""
+
+import argparse
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+from _common import bench_database_url, percentile, scratch_schema
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.chat_recorder import read_recording, write_recording
+
+SCHEMA = "bench_chat_replay"
+
+# Milliseconds spent in chat_router.dispatch for the line being handled
+_dispatch_ms = contextvars.ContextVar("replay_dispatch_ms", default=None)
+
+COMMAND_LINES = ["!points", "!tickets", "!fair", "!current", "!call Sweet Bonanza", "!sr Gates", "!gtb 1234", "!lurk"]
+PLAIN_LINES = ["lets gooo", "KEKW", "what slot is this", "gl", "nice hit!!", "W stream", "first time here"]
+
+
+def generate(path, messages, rate, guild_id, viewers, command_ratio):
+    """Write a synthetic recording: Poisson arrivals at `rate` lines/s from `viewers` chatters."""
+    rng = random.Random(42)
+    offset = 0.0
+    entries = []
+    for i in range(messages):
+        offset += rng.expovariate(rate)
+        viewer = rng.randint(1, viewers)
+        platform = "twitch" if viewer % 10 == 0 else "kick"
+        content = rng.choice(COMMAND_LINES) if rng.random() < command_ratio else rng.choice(PLAIN_LINES)
+        entries.append(
+            {
+                "t": round(offset, 3),
+                "g": guild_id,
+                "gn": "replay",
+                "src": "twitch" if platform == "twitch" else "pusher",
+                "p": platform,
+                "u": f"viewer_{viewer}",
+                "c": content,
+                "id": f"msg-{i}",
+                "uid": str(viewer),
+            }
+        )
+    count = write_recording(path, entries)
+    print(f"wrote {count:,} lines ({offset:.0f}s of chat at ~{rate}/s) to {path}")
+
+
+class QueryCounter:
+    """Counts statements (and their time) on every engine in the process."""
+
+    _literals = re.compile(r"\s+|'[^']*'|\b\d+\b")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def install(self):
+        event.listen(Engine, "before_cursor_execute", self._before)
+        event.listen(Engine, "after_cursor_execute", self._after)
+
+    def uninstall(self):
+        event.remove(Engine, "before_cursor_execute", self._before)
+        event.remove(Engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("replay_query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["replay_query_start"].pop()
+        key = self._literals.sub(" ", statement).strip()[:90]
+        with self.lock:
+            self.count += 1
+            self.seconds += elapsed
+            self.statements[key] += 1
+
+    def reset(self):
+        with self.lock:
+            self.count = 0
+            self.seconds = 0.0
+            self.statements.clear()
+
+
+def import_bot(url):
+    """Import bot.py against the scratch schema with outbound side effects disabled."""
+    sep = "&" if "?" in url else "?"
+    os.environ["DATABASE_URL"] = f"{url}{sep}options={quote(f'-csearch_path={SCHEMA}')}"
+    os.environ.setdefault("DISCORD_TOKEN", "replay")
+    os.environ.pop("REDIS_URL", None)
+    os.environ.pop("CHAT_RECORD_PATH", None)
+    import bot as bot_module
+
+    return bot_module
+
+
+async def replay(bot_module, lines, speed, guild_override):
+    manager = bot_module.kick_ws_manager
+    router = bot_module.chat_router
+    replies = Counter()
+
+    async def fake_send(message, guild_id=None, **kwargs):
+        replies[guild_id] += 1
+        return True
+
+    bot_module.send_kick_message = fake_send
+
+    original_dispatch = router.dispatch
+
+    async def timed_dispatch(msg):
+        started = time.perf_counter()
+        try:
+            return await original_dispatch(msg)
+        finally:
+            spent = _dispatch_ms.get()
+            if spent is not None:
+                spent.append((time.perf_counter() - started) * 1000)
+
+    router.dispatch = timed_dispatch
+    totals, pre_dispatch, dispatch, lags = [], [], [], []
+
+    async def handle(line, scheduled):
+        started = time.perf_counter()
+        if scheduled is not None:
+            lags.append((started - scheduled) * 1000)
+        spent = []
+        _dispatch_ms.set(spent)
+        await manager._handle_incoming_message(guild_override or line.guild_id, line.guild_name, line.to_msg())
+        total = (time.perf_counter() - started) * 1000
+        totals.append(total)
+        dispatch.append(sum(spent))
+        pre_dispatch.append(total - sum(spent))
+
+    wall_start = time.perf_counter()
+    try:
+        if speed is None:
+            for line in lines:
+                await handle(line, None)
+        else:
+            tasks = []
+            base = lines[0].offset
+            for line in lines:
+                scheduled = wall_start + (line.offset - base) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # create_task copies the context, so each line gets its own dispatch timer
+                tasks.append(asyncio.create_task(handle(line, scheduled)))
+            await asyncio.gather(*tasks)
+    finally:
+        router.dispatch = original_dispatch
+    elapsed = time.perf_counter() - wall_start
+    return elapsed, totals, pre_dispatch, dispatch, lags, replies
+
+
+async def warm_then_replay(bot_module, queries, warmup, measured, speed, guild_override):
+    """Untimed warm-up (caches, pools), then the measured replay, on one event loop."""
+    if warmup:
+        await replay(bot_module, warmup, None, guild_override)
+    queries.reset()
+    bot_module.chat_router.reset_stats()
+    return await replay(bot_module, measured, speed, guild_override)
+
+
+def monotonic_offsets(lines):
+    """Recordings appended across restarts restart `t` at 0; make offsets increase."""
+    shift = 0.0
+    previous = 0.0
+    for line in lines:
+        if line.offset + shift < previous:
+            shift = previous - line.offset
+        line.offset += shift
+        previous = line.offset
+    return lines
+
+
+def report_stage(label, samples):
+    if not samples:
+        return
+    print(
+        f"  {label:<13} p50 {percentile(samples, 50):8.2f} ms   p99 {percentile(samples, 99):8.2f} ms   "
+        f"max {max(samples):8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", nargs="?", help="JSONL(.gz) recording to replay")
+    parser.add_argument("--generate", metavar="PATH", help="write a synthetic recording to PATH and exit")
+    parser.add_argument("--messages", type=int, default=5000, help="lines for --generate")
+    parser.add_argument("--rate", type=float, default=20.0, help="average lines/s for --generate")
+    parser.add_argument("--viewers", type=int, default=500, help="distinct chatters for --generate")
+    parser.add_argument("--command-ratio", type=float, default=0.15, help="share of '!' lines for --generate")
+    parser.add_argument("--speed", default="10", help="replay speed multiplier (1-100) or 'max'")
+    parser.add_argument("--guild-id", type=int, default=0, help="replay every line into this guild")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N lines")
+    parser.add_argument("--warmup", type=int, default=50, help="lines replayed (untimed) before measuring")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.generate, args.messages, args.rate, args.guild_id or 1, args.viewers, args.command_ratio)
+        return
+    if not args.recording:
+        parser.error("a recording path (or --generate PATH) is required")
+    if not os.getenv("BENCH_DATABASE_URL"):
+        # bot.py migrates whatever DATABASE_URL points at; never fall back to it here.
+        print("❌ Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+        sys.exit(2)
+    speed = None if args.speed == "max" else float(args.speed)
+
+    lines = monotonic_offsets(list(read_recording(args.recording)))
+    if args.limit:
+        lines = lines[: args.limit]
+    if not lines:
+        print("recording is empty")
+        return
+
+    logging.disable(logging.WARNING)
+    url = bench_database_url()
+    with scratch_schema(SCHEMA):
+        bot_module = import_bot(url)
+        queries = QueryCounter()
+        queries.install()
+
+        warmup, measured = lines[: args.warmup], lines[args.warmup :] or lines
+        elapsed, totals, pre_dispatch, dispatch, lags, replies = asyncio.run(
+            warm_then_replay(bot_module, queries, warmup, measured, speed, args.guild_id)
+        )
+        queries.uninstall()
+        bot_module.db_executor.shutdown()
+        bot_module.engine.dispose()
+
+    sources = Counter(line.source for line in measured)
+    print(
+        f"{len(measured):,} lines ({dict(sources)}) at speed {args.speed}: "
+        f"{len(measured) / elapsed:,.0f} msgs/s over {elapsed:.2f}s"
+    )
+    report_stage("total", totals)
+    report_stage("pre-dispatch", pre_dispatch)
+    report_stage("dispatch", dispatch)
+    report_stage("start lag", lags)
+    print(
+        f"  db            {queries.count:,} statements ({queries.count / len(measured):.2f}/msg), "
+        f"{queries.seconds * 1000:,.0f} ms total"
+    )
+    for statement, count in queries.statements.most_common(5):
+        print(f"    {count:>7,}  {statement}")
+    print(f"  replies       {sum(replies.values()):,} via fake sender")
+    stats = bot_module.chat_router.stats()
+    print(f"  router        plain={stats['plain_messages']:,} unknown={stats['unknown_commands']:,}")
+    for name, command in sorted(stats["commands"].items()):
+        print(f"    {name:<10} count={command['count']} errors={command['errors']} locked={command['locked']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark: chat command routing, if/elif chain vs core/chat_commands.py.
+
+Pushes N mixed chat lines (by default ~85% plain chat, the rest split across
+the built-in commands, unknown "!words" and arguments to exact-only commands)
+through:
+
+- `chain`: the old _handle_incoming_message shape. It awaits the custom
+  command tier check on a worker thread (the db_executor hop) for every
+  line, then walks the if/elif chain.
+- `router`: ChatCommandRouter with the same commands, gates and stub
+  handlers.
+
+The tier check sleeps --gate-ms on a worker thread to stand in for the hop.
+Handlers are no-ops, so this measures routing overhead only. No database
+needed.
+
+Usage:
+    python scripts/benchmarks/bench_chat_router.py
+    python scripts/benchmarks/bench_chat_router.py --messages 100000 --command-ratio 0.3
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _common import percentile
+
+from core.chat_commands import ChatCommandRouter, ChatMessage
+
+COMMAND_LINES = [
+    "!points",
+    "!current",
+    "!slot",
+    "!call Sweet Bonanza",
+    "!sr Gates of Olympus",
+    "!callWanted",
+    "!gtb 1234.56",
+    "!clip what a hit",
+    "!fair",
+    "!tickets",
+    "!points please",
+    "!hello",
+    "!lurk",
+]
+PLAIN_LINES = ["lets gooo", "KEKW", "what slot is this", "gl", "nice hit!!", "W stream", "first time here"]
+
+
+def make_messages(count, command_ratio):
+    rng = random.Random(42)
+    return [
+        rng.choice(COMMAND_LINES) if rng.random() < command_ratio else rng.choice(PLAIN_LINES) for _ in range(count)
+    ]
+
+
+async def _noop(msg):
+    return None
+
+
+def build_router(feature_check):
+    router = ChatCommandRouter(feature_check=feature_check, on_locked=None)
+
+    async def custom(msg):
+        return msg.command == "!lurk"
+
+    router.set_custom_handler(custom, feature="commands")
+    router.command("!points", feature="point_shop", exact=True)(_noop)
+    router.command("!current", "!slot", exact=True)(_noop)
+    router.command("!call", "!sr", feature="slot_requests", prefix=True)(_noop)
+    router.command("!gtb", feature="gtb", prefix=True)(_noop)
+    router.command("!clip", prefix=True)(_noop)
+    router.command("!fair", "!pf", exact=True)(_noop)
+    router.command("!tickets", exact=True)(_noop)
+    return router
+
+
+async def legacy_chain(content, feature_check):
+    content_stripped = content.strip()
+    if await feature_check(1, "commands") and content_stripped.startswith("!lurk"):
+        return
+    lowered = content_stripped.lower()
+    if lowered == "!points":
+        await feature_check(1, "point_shop")
+    elif lowered in ("!current", "!slot"):
+        pass
+    elif content_stripped.startswith(("!call", "!sr")):
+        await feature_check(1, "slot_requests")
+    elif lowered.startswith("!gtb"):
+        await feature_check(1, "gtb")
+    elif lowered.startswith("!clip"):
+        pass
+    elif lowered in ("!fair", "!pf"):
+        pass
+    elif lowered == "!tickets":
+        pass
+
+
+async def run(mode, messages, gate_ms):
+    pool = ThreadPoolExecutor(max_workers=4)
+    loop = asyncio.get_running_loop()
+
+    async def feature_check(guild_id, feature):
+        await loop.run_in_executor(pool, time.sleep, gate_ms / 1000)
+        return True
+
+    router = build_router(feature_check)
+    latencies = []
+    started = time.perf_counter()
+    for content in messages:
+        t0 = time.perf_counter()
+        if mode == "router":
+            await router.dispatch(ChatMessage(1, "bench", "viewer", content))
+        else:
+            await legacy_chain(content, feature_check)
+        latencies.append((time.perf_counter() - t0) * 1_000_000)
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+    print(
+        f"{mode:<7} {len(messages) / elapsed:>12,.0f} msgs/s   "
+        f"p50 {percentile(latencies, 50):8.1f} us   p99 {percentile(latencies, 99):8.1f} us"
+    )
+    return router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--command-ratio", type=float, default=0.15, help="fraction of lines starting with '!'")
+    parser.add_argument("--gate-ms", type=float, default=0.0, help="simulated tier-check time on the worker thread")
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.command_ratio)
+    asyncio.run(run("chain", messages, args.gate_ms))
+    router = asyncio.run(run("router", messages, args.gate_ms))
+    stats = router.stats()
+    print(f"plain={stats['plain_messages']} unknown={stats['unknown_commands']} gate_checks={stats['gate_checks']}")
+    for name, command in sorted(stats["commands"].items()):
+        print(f"  {name:<10} {command}")
+
+
+if __name__ == "__main__":
+    main()
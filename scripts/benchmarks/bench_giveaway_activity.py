@@ -0,0 +1,196 @@
+"""
+Benchmark: active-chatter giveaway tracking at 50k messages/minute, and the
+giveaway draw with large entry counts.
+
+Chat replay: N chatters send messages drawn from a small vocabulary (so
+duplicates happen) on a simulated clock running at --rate messages/minute.
+
+- `legacy`:  the old track_message statements per message (duplicate SELECT,
+  INSERT, windowed COUNT(DISTINCT)), run on a sample of messages and scaled.
+  The window uses SQLite's datetime() in place of Postgres INTERVAL.
+- `tracker`: features.giveaway.chat_activity.ActiveChatterTracker with
+  batched activity inserts.
+
+Both run against a throwaway SQLite file, so absolute numbers understate a
+networked Postgres; the statement counts carry over as-is.
+
+Draw: one list element per entry (the old draw) vs prefix sums + bisect.
+
+Usage:
+    python scripts/benchmarks/bench_giveaway_activity.py
+    python scripts/benchmarks/bench_giveaway_activity.py --rate 50000 --minutes 3 --chatters 5000
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_right
+from itertools import accumulate
+
+import _common  # noqa: F401  (puts the repo root on sys.path)
+from sqlalchemy import create_engine, text
+
+from features.giveaway.chat_activity import ActiveChatterTracker
+from utils.provably_fair import provably_fair_index
+
+ACTIVITY_DDL = (
+    "CREATE TABLE giveaway_chat_activity (id INTEGER PRIMARY KEY, giveaway_id INTEGER, discord_server_id INTEGER, "
+    "kick_username TEXT, message TEXT, message_hash TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+)
+ACTIVITY_INDEX = (
+    "CREATE INDEX idx_giveaway_chat_activity_tracking ON giveaway_chat_activity(giveaway_id, kick_username, timestamp)"
+)
+
+
+def measure(fn):
+    """(result, elapsed seconds, peak traced MB): timed untraced, then re-run under tracemalloc."""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def make_engine(directory, name):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    with engine.begin() as conn:
+        conn.execute(text(ACTIVITY_DDL))
+        conn.execute(text(ACTIVITY_INDEX))
+    return engine
+
+
+def make_messages(count, chatters, seed=42):
+    rng = random.Random(seed)
+    vocabulary = [f"message {i}" for i in range(200)] + ["gg", "lol", "W", "pog", "!points"]
+    return [(f"user{rng.randrange(chatters)}", rng.choice(vocabulary)) for _ in range(count)]
+
+
+def legacy_track(engine, username, message, window_minutes):
+    message_hash = hashlib.sha256(message.encode()).hexdigest()
+    with engine.connect() as conn:
+        existing = conn.execute(
+            text(
+                "SELECT id FROM giveaway_chat_activity WHERE giveaway_id = 1 AND kick_username = :u "
+                "AND message_hash = :h"
+            ),
+            {"u": username, "h": message_hash},
+        ).fetchone()
+        if existing:
+            return None
+        conn.execute(
+            text(
+                "INSERT INTO giveaway_chat_activity (giveaway_id, discord_server_id, kick_username, message, "
+                "message_hash) VALUES (1, 7, :u, :m, :h)"
+            ),
+            {"u": username, "m": message, "h": message_hash},
+        )
+        count = conn.execute(
+            text(
+                "SELECT COUNT(DISTINCT message_hash) FROM giveaway_chat_activity WHERE giveaway_id = 1 "
+                "AND kick_username = :u AND timestamp >= datetime('now', :window)"
+            ),
+            {"u": username, "window": f"-{window_minutes} minutes"},
+        ).scalar()
+        conn.commit()
+        return count
+
+
+def bench_tracking(args):
+    total = int(args.rate * args.minutes)
+    messages = make_messages(total, args.chatters)
+    print(f"Chat replay: {total:,} messages from {args.chatters:,} chatters at {args.rate:,}/min")
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_engine = make_engine(directory, "legacy.db")
+        sample = messages[: min(args.legacy_messages, total)]
+        start = time.perf_counter()
+        for username, message in sample:
+            legacy_track(legacy_engine, username, message, args.window)
+        legacy_elapsed = (time.perf_counter() - start) * (total / len(sample))
+        legacy_engine.dispose()
+        print(
+            f"  legacy   {legacy_elapsed:>9.2f} s  {total / legacy_elapsed:>10,.0f} msg/s   "
+            f"~{3 * total:,} statements (extrapolated from {len(sample):,})"
+        )
+
+        def replay():
+            engine = make_engine(directory, "tracker.db")
+            now = [0.0]
+            tracker = ActiveChatterTracker(engine, 7, 1, clock=lambda: now[0])
+            step = 60.0 / args.rate
+            window_seconds = args.window * 60
+            for username, message in messages:
+                now[0] += step
+                if tracker.observe(username, message, args.required, window_seconds) is not None:
+                    tracker.flush()
+                    tracker.close(username)  # single-entry giveaway: entered, stop tracking
+                elif tracker.flush_due():
+                    tracker.flush()
+            tracker.flush()
+            engine.dispose()
+            os.remove(os.path.join(directory, "tracker.db"))
+            return tracker.stats()
+
+        stats, elapsed, peak = measure(replay)
+        print(
+            f"  tracker  {elapsed:>9.2f} s  {total / elapsed:>10,.0f} msg/s   "
+            f"{stats['flushes']:,} batched inserts, {stats['rows_written']:,} rows, peak {peak:.1f} MB"
+        )
+        print(
+            f"  {stats['qualified']:,} qualified, {stats['duplicates']:,} duplicates, "
+            f"{stats['chatters']:,} chatters / {stats['tracked_hashes']:,} hashes in the window at the end"
+        )
+        budget = 60.0 / args.rate * total
+        print(f"  Real-time budget {budget:.1f} s: tracker uses {elapsed / budget:.1%} of it")
+
+
+def bench_draw(args):
+    rng = random.Random(7)
+    counts = [rng.randint(1, args.max_entries) for _ in range(args.entrants)]
+    names = [f"user{i}" for i in range(args.entrants)]
+    proof_hash = hashlib.sha256(b"bench").hexdigest()
+    print(f"\nDraw: {args.entrants:,} entrants, {sum(counts):,} entries")
+
+    def expanded():
+        weighted = []
+        for name, count in zip(names, counts):
+            weighted.extend([name] * count)
+        return weighted[min(int(int(proof_hash[:8], 16) % 10000 / 10000 * len(weighted)), len(weighted) - 1)]
+
+    def prefix():
+        cumulative = list(accumulate(counts))
+        return names[bisect_right(cumulative, provably_fair_index(proof_hash, cumulative[-1]))]
+
+    legacy_winner, legacy_elapsed, legacy_peak = measure(expanded)
+    winner, elapsed, peak = measure(prefix)
+
+    print(f"  expanded {legacy_elapsed * 1000:>9.1f} ms  peak {legacy_peak:>7.1f} MB   10,000 buckets")
+    print(f"  prefix   {elapsed * 1000:>9.1f} ms  peak {peak:>7.1f} MB   {sum(counts):,} tickets, unbiased")
+    print(f"  winners: expanded={legacy_winner} prefix={winner} (different mappings, same hash)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=50_000, help="messages per minute")
+    parser.add_argument("--minutes", type=float, default=2)
+    parser.add_argument("--chatters", type=int, default=5_000)
+    parser.add_argument("--required", type=int, default=5, help="messages_required")
+    parser.add_argument("--window", type=int, default=10, help="time_window_minutes")
+    parser.add_argument("--legacy-messages", type=int, default=5_000, help="messages actually run for `legacy`")
+    parser.add_argument("--entrants", type=int, default=100_000)
+    parser.add_argument("--max-entries", type=int, default=50)
+    args = parser.parse_args()
+
+    bench_tracking(args)
+    bench_draw(args)
+
+
+if __name__ == "__main__":
+    main()
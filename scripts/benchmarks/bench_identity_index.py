@@ -0,0 +1,139 @@
+"""
+Benchmark: identity resolutions per second, `links` queries vs core/identity_index.py.
+
+Seeds a guild with N linked people (every third also has a Twitch link) plus
+unlinked chatters, then resolves a random mix of chat usernames the way chat
+handling does: resolve_canonical_identity() for forwarded Twitch chat and the
+accrual username used by !points. Both run once against the database (index
+unbound) and once against the in-memory index. The run finishes with
+verify() to check that the index matches the table.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_identity_index.py
+    python scripts/benchmarks/bench_identity_index.py --links 50000 --lookups 5000
+"""
+
+import argparse
+import random
+import time
+
+from _common import run_sql_script, scratch_schema
+from sqlalchemy import text
+
+from core.identity_index import identity_index
+from core.stream_links import resolve_canonical_identity
+
+SERVER_ID = 1
+
+SCHEMA_SQL = """
+CREATE TABLE links (
+    discord_id BIGINT, kick_name TEXT, discord_server_id BIGINT, platform TEXT DEFAULT 'kick',
+    linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (discord_id, discord_server_id, platform)
+);
+CREATE INDEX idx_links_server ON links (discord_server_id)
+"""
+
+
+def seed(engine, people):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+            INSERT INTO links (discord_id, kick_name, discord_server_id, platform, linked_at)
+            SELECT g, 'Kick_' || g, :sid, 'kick', NOW() - (g || ' seconds')::interval FROM generate_series(1, :n) g
+            """
+            ),
+            {"sid": SERVER_ID, "n": people},
+        )
+        conn.execute(
+            text(
+                """
+            INSERT INTO links (discord_id, kick_name, discord_server_id, platform, linked_at)
+            SELECT g, 'twitch_' || g, :sid, 'twitch', NOW() FROM generate_series(3, :n, 3) g
+            """
+            ),
+            {"sid": SERVER_ID, "n": people},
+        )
+
+
+def chat_usernames(people, count):
+    names = []
+    for _ in range(count):
+        n = random.randint(1, people)
+        roll = random.random()
+        if roll < 0.2:
+            names.append(f"lurker_{n}")  # unlinked
+        elif roll < 0.4 and n % 3 == 0:
+            names.append(f"twitch_{n}")
+        else:
+            names.append(f"kick_{n}")
+    return names
+
+
+def sql_accrual_username(engine, username):
+    """The two-query !points resolution bot.py ran before the index."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT discord_id FROM links WHERE LOWER(kick_name) = :u AND discord_server_id = :g "
+                "AND discord_id IS NOT NULL LIMIT 1"
+            ),
+            {"u": username, "g": SERVER_ID},
+        ).fetchone()
+        if not row:
+            return username
+        names = conn.execute(
+            text("SELECT LOWER(kick_name) FROM links WHERE discord_id = :d AND discord_server_id = :g"),
+            {"d": row[0], "g": SERVER_ID},
+        ).fetchall()
+    return min(r[0] for r in names)
+
+
+def run(label, fn, usernames):
+    start = time.perf_counter()
+    results = [fn(name) for name in usernames]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {len(usernames) / elapsed:>12,.0f} resolutions/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=10000, help="linked people in the guild")
+    parser.add_argument("--lookups", type=int, default=2000, help="resolutions timed per mode")
+    args = parser.parse_args()
+
+    with scratch_schema("bench_identity_index") as engine:
+        with engine.begin() as conn:
+            run_sql_script(conn, SCHEMA_SQL)
+        seed(engine, args.links)
+        usernames = chat_usernames(args.links, args.lookups)
+        print(f"{args.links} linked people, {args.lookups} lookups")
+
+        sql_canonical = run(
+            "canonical identity (SQL)", lambda u: resolve_canonical_identity(engine, u, SERVER_ID, "kick"), usernames
+        )
+        sql_accrual = run("accrual username (SQL)", lambda u: sql_accrual_username(engine, u), usernames)
+
+        identity_index.bind(engine)
+        start = time.perf_counter()
+        identity_index.discord_id(SERVER_ID, "warm-up")
+        print(f"  {'index load':<36} {(time.perf_counter() - start) * 1000:>12.1f} ms")
+        index_canonical = run(
+            "canonical identity (index)",
+            lambda u: resolve_canonical_identity(engine, u, SERVER_ID, "kick"),
+            usernames,
+        )
+        index_accrual = run(
+            "accrual username (index)", lambda u: identity_index.accrual_username(SERVER_ID, u), usernames
+        )
+
+        assert index_canonical == sql_canonical, "canonical identity differs between SQL and index"
+        assert index_accrual == sql_accrual, "accrual username differs between SQL and index"
+        drift = identity_index.verify(SERVER_ID)
+        print(f"  verify: {len(drift['missing'])} missing, {len(drift['extra'])} extra; stats {identity_index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
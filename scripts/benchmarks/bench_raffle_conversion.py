@@ -0,0 +1,114 @@
+"""
+Benchmark: per-user vs batched watchtime -> raffle ticket conversion.
+
+Times WatchtimeConverter.convert_watchtime_to_tickets(batch=False) (one SUM
+lookup + award_tickets transaction per user) against batch=True (one read,
+set-based writes, one transaction) with 5k linked users who each have a few
+hours of unconverted watchtime. Also checks both modes leave identical tickets.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_raffle_conversion.py
+    python scripts/benchmarks/bench_raffle_conversion.py --users 1000 --runs 3
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from _common import run_sql_script, scratch_schema, summarize, time_call
+from sqlalchemy import text
+
+from raffle_system.database import setup_raffle_database
+from raffle_system.watchtime_converter import WatchtimeConverter
+from utils.conversion_totals import migrate_add_raffle_conversion_totals
+
+SERVER_ID = 1
+
+SCHEMA_SQL = """
+CREATE TABLE watchtime (
+    username TEXT, minutes INTEGER DEFAULT 0, last_active TIMESTAMP, discord_server_id BIGINT,
+    PRIMARY KEY (username, discord_server_id)
+);
+CREATE TABLE links (
+    discord_id BIGINT, kick_name TEXT, discord_server_id BIGINT,
+    PRIMARY KEY (discord_id, discord_server_id), UNIQUE (kick_name, discord_server_id)
+);
+CREATE TABLE watchtime_conversion_logs (
+    id SERIAL PRIMARY KEY, discord_id BIGINT, kick_name TEXT, discord_server_id BIGINT,
+    raffle_minutes INTEGER, points_minutes INTEGER, converted_at TIMESTAMP
+)
+"""
+
+
+def seed(engine, users):
+    """Fresh active period plus `users` linked viewers with 1-5h of watchtime each."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "TRUNCATE watchtime, links, watchtime_conversion_logs, raffle_tickets, raffle_ticket_log, "
+                "raffle_watchtime_converted, raffle_conversion_totals, raffle_periods CASCADE"
+            )
+        )
+        now = datetime.utcnow()
+        conn.execute(
+            text(
+                "INSERT INTO raffle_periods (id, discord_server_id, start_date, end_date, status) "
+                "VALUES (1, :sid, :start, :end, 'active')"
+            ),
+            {"sid": SERVER_ID, "start": now - timedelta(days=1), "end": now + timedelta(days=30)},
+        )
+        conn.execute(
+            text(
+                """
+            INSERT INTO links (discord_id, kick_name, discord_server_id)
+            SELECT g, 'viewer' || g, :sid FROM generate_series(1, :n) g
+        """
+            ),
+            {"n": users, "sid": SERVER_ID},
+        )
+        conn.execute(
+            text(
+                """
+            INSERT INTO watchtime (username, minutes, discord_server_id)
+            SELECT 'viewer' || g, 60 + (g % 5) * 60 + g % 60, :sid FROM generate_series(1, :n) g
+        """
+            ),
+            {"n": users, "sid": SERVER_ID},
+        )
+
+
+def ticket_state(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT discord_id, watchtime_tickets, total_tickets FROM raffle_tickets ORDER BY discord_id")
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=3, help="timed conversions per mode (re-seeded each run)")
+    args = parser.parse_args()
+
+    with scratch_schema("bench_raffle_conversion") as engine:
+        with engine.begin() as conn:
+            run_sql_script(conn, SCHEMA_SQL)
+        setup_raffle_database(engine)
+        migrate_add_raffle_conversion_totals(engine)
+        converter = WatchtimeConverter(engine, server_id=SERVER_ID)
+
+        print(f"{args.users} linked users, {args.runs} run(s) per mode")
+        states = {}
+        for mode, batch in (("per-user", False), ("batch", True)):
+            samples = []
+            for _ in range(args.runs):
+                seed(engine, args.users)
+                samples += time_call(lambda: asyncio.run(converter.convert_watchtime_to_tickets(batch=batch)))
+            states[mode] = ticket_state(engine)
+            print(f"  {mode:<9} {summarize(samples)}   ({len(states[mode])} users ticketed)")
+
+        print(f"  identical results: {states['per-user'] == states['batch']}")
+
+
+if __name__ == "__main__":
+    main()
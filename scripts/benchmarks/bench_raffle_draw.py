@@ -0,0 +1,102 @@
+"""
+Benchmark: raffle fairness simulation, linear range scan vs bisect vs NumPy.
+
+Builds a period of N participants with random ticket counts and times:
+
+- `linear`: the old simulate_draw loop (walks the ticket ranges for every
+  simulated draw), run on a reduced number of simulations and scaled.
+- `bisect`: raffle_system.draw.simulate_wins (binary search per draw).
+- `numpy`:  raffle_system.draw.simulate_wins_vectorized (batched
+  searchsorted + bincount), when NumPy is installed.
+
+Also checks that ticket_owner() agrees with the range scan on sampled tickets.
+No database needed.
+
+Usage:
+    python scripts/benchmarks/bench_raffle_draw.py
+    python scripts/benchmarks/bench_raffle_draw.py --participants 10000 --simulations 1000000
+"""
+
+import argparse
+import random
+import secrets
+import time
+
+import _common  # noqa: F401  (puts the repo root on sys.path)
+
+from raffle_system.draw import cumulative_tickets, np, simulate_wins, simulate_wins_vectorized, ticket_owner
+
+
+def legacy_simulation(ticket_counts, num_simulations):
+    ranges = []
+    current = 1
+    for count in ticket_counts:
+        ranges.append([current, current + count - 1, 0])
+        current += count
+    total_tickets = current - 1
+    for _ in range(num_simulations):
+        winning_ticket = secrets.randbelow(total_tickets) + 1
+        for entry in ranges:
+            if entry[0] <= winning_ticket <= entry[1]:
+                entry[2] += 1
+                break
+    return [entry[2] for entry in ranges]
+
+
+def timed(label, fn, simulations, scale=1):
+    start = time.perf_counter()
+    wins = fn()
+    elapsed = (time.perf_counter() - start) * scale
+    note = f" (extrapolated from {simulations // scale:,})" if scale > 1 else ""
+    print(f"  {label:<8} {elapsed:>10.3f} s for {simulations:,} simulations   {simulations / elapsed:>14,.0f}/s{note}")
+    return wins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", type=int, default=10_000)
+    parser.add_argument("--simulations", type=int, default=1_000_000)
+    parser.add_argument("--linear-simulations", type=int, default=2_000, help="draws actually run for `linear`")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    ticket_counts = [rng.randint(1, 500) for _ in range(args.participants)]
+    cumulative = cumulative_tickets(ticket_counts)
+    print(f"{args.participants:,} participants, {cumulative[-1]:,} tickets")
+
+    ranges = []
+    current = 1
+    for count in ticket_counts:
+        ranges.append((current, current + count - 1))
+        current += count
+    for ticket in rng.sample(range(1, cumulative[-1] + 1), 1000):
+        start, end = ranges[ticket_owner(cumulative, ticket)]
+        assert start <= ticket <= end, "ticket_owner disagrees with the range scan"
+
+    linear_runs = min(args.linear_simulations, args.simulations)
+    timed(
+        "linear",
+        lambda: legacy_simulation(ticket_counts, linear_runs),
+        args.simulations,
+        scale=args.simulations // linear_runs,
+    )
+    wins = timed("bisect", lambda: simulate_wins(cumulative, args.simulations), args.simulations)
+    assert sum(wins) == args.simulations
+    if np is None:
+        print("  numpy    not installed, skipped")
+        return
+    wins = timed("numpy", lambda: simulate_wins_vectorized(cumulative, args.simulations), args.simulations)
+    assert sum(wins) == args.simulations
+
+    # Largest relative deviation from expected among the biggest ticket holders
+    top = sorted(range(len(ticket_counts)), key=ticket_counts.__getitem__)[-10:]
+    worst = max(
+        abs(wins[i] - ticket_counts[i] / cumulative[-1] * args.simulations)
+        / (ticket_counts[i] / cumulative[-1] * args.simulations)
+        for i in top
+    )
+    print(f"  max deviation among top-10 holders: {worst * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
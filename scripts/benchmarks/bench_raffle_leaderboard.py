@@ -0,0 +1,128 @@
+"""
+Benchmark: raffle leaderboard reads, RANK() queries vs raffle_system/leaderboard_cache.py.
+
+Seeds one active period with N ticket holders, then times the reads the bot
+repeats (the auto-leaderboard / !raffleboard top 10 and !tickets /
+{raffle_rank} single-user ranks) against the database (cache unbound) and
+against the bound cache. Between rounds it applies a stream of
+award_tickets / remove_tickets / award_tickets_batch writes. The run
+finishes by checking that the cache still matches RANK() over the table.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_raffle_leaderboard.py
+    python scripts/benchmarks/bench_raffle_leaderboard.py --holders 50000 --reads 2000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from _common import scratch_schema
+from sqlalchemy import text
+
+from raffle_system.database import setup_raffle_database
+from raffle_system.leaderboard_cache import leaderboard_cache
+from raffle_system.tickets import TicketManager
+
+SERVER_ID = 1
+PERIOD_ID = 1
+
+
+def seed(engine, holders):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO raffle_periods (id, discord_server_id, start_date, end_date, status) "
+                "VALUES (:pid, :sid, :start, :end, 'active')"
+            ),
+            {"pid": PERIOD_ID, "sid": SERVER_ID, "start": now - timedelta(days=1), "end": now + timedelta(days=30)},
+        )
+        conn.execute(
+            text(
+                """
+            INSERT INTO raffle_tickets (period_id, discord_server_id, discord_id, kick_name, watchtime_tickets,
+                                        total_tickets)
+            SELECT :pid, :sid, g, 'viewer' || g, (g * 7919) % 5000, (g * 7919) % 5000
+            FROM generate_series(1, :n) g
+        """
+            ),
+            {"pid": PERIOD_ID, "sid": SERVER_ID, "n": holders},
+        )
+
+
+def apply_writes(manager, engine, holders, count, rng):
+    for _ in range(count):
+        discord_id = rng.randint(1, holders)
+        if rng.random() < 0.8:
+            manager.award_tickets(
+                discord_id, f"viewer{discord_id}", rng.randint(1, 50), "watchtime", period_id=PERIOD_ID
+            )
+        else:
+            manager.remove_tickets(discord_id, f"viewer{discord_id}", rng.randint(1, 200), "bench", period_id=PERIOD_ID)
+    awards = [
+        {"discord_id": d, "kick_name": f"viewer{d}", "tickets": rng.randint(1, 20)}
+        for d in rng.sample(range(1, holders + 1), min(500, holders))
+    ]
+    with engine.begin() as conn:
+        manager.award_tickets_batch(conn, awards, "watchtime", PERIOD_ID, SERVER_ID)
+
+
+def time_reads(label, manager, ids):
+    start = time.perf_counter()
+    for discord_id in ids:
+        manager.get_user_rank(discord_id, period_id=PERIOD_ID)
+    rank_rate = len(ids) / (time.perf_counter() - start)
+    rounds = max(1, len(ids) // 10)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        manager.get_leaderboard(limit=10, period_id=PERIOD_ID)
+    top_ms = (time.perf_counter() - start) * 1000 / rounds
+    print(f"  {label:<6} rank {rank_rate:>12,.0f}/s   top-10 {top_ms:>9.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holders", type=int, default=20000)
+    parser.add_argument("--reads", type=int, default=1000, help="rank lookups per round")
+    parser.add_argument("--writes", type=int, default=200, help="single-user writes between rounds")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with scratch_schema("bench_raffle_leaderboard") as engine:
+        setup_raffle_database(engine)
+        seed(engine, args.holders)
+        manager = TicketManager(engine, server_id=SERVER_ID)
+        ids = [rng.randint(1, args.holders) for _ in range(args.reads)]
+        print(f"{args.holders:,} holders, {args.reads:,} rank reads per round")
+
+        time_reads("sql", manager, ids)
+        leaderboard_cache.bind(engine)
+        start = time.perf_counter()
+        manager.get_leaderboard(limit=1, period_id=PERIOD_ID)
+        print(f"  {'board load':<36} {(time.perf_counter() - start) * 1000:>9.1f} ms")
+        time_reads("cache", manager, ids)
+
+        start = time.perf_counter()
+        apply_writes(manager, engine, args.holders, args.writes, rng)
+        print(f"  {args.writes} writes + 1 batch of 500 in {(time.perf_counter() - start) * 1000:.0f} ms")
+        time_reads("cache", manager, ids)
+
+        with engine.connect() as conn:
+            expected = dict(
+                conn.execute(
+                    text(
+                        "SELECT discord_id, RANK() OVER (ORDER BY total_tickets DESC) FROM raffle_tickets "
+                        "WHERE period_id = :pid AND total_tickets > 0"
+                    ),
+                    {"pid": PERIOD_ID},
+                ).fetchall()
+            )
+        cached = {discord_id: leaderboard_cache.rank(SERVER_ID, PERIOD_ID, discord_id) for discord_id in expected}
+        assert cached == expected, "cached ranks differ from RANK()"
+        print(f"  ranks match RANK() for all {len(expected):,} holders; stats {leaderboard_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: per-row vs set-based watchtime accrual tick.
+
+Compares one update_watchtime_task tick (watchtime upsert + points conversion)
+using the legacy per-viewer statements against utils/watchtime_accrual.py at
+100, 1k and 10k synthetic viewers. Every tick credits a full 5-minute interval
+so each viewer converts to points every tick (the worst case).
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_watchtime_accrual.py
+    python scripts/benchmarks/bench_watchtime_accrual.py --sizes 100 1000 --ticks 3
+"""
+
+import argparse
+from datetime import datetime, timezone
+
+from _common import run_sql_script, scratch_schema, summarize, time_call
+from sqlalchemy import text
+
+from utils.conversion_totals import migrate_add_points_conversion_totals
+from utils.watchtime_accrual import bulk_award_points, bulk_upsert_watchtime
+
+SERVER_ID = 1
+POINTS_PER_5MIN = 1
+
+SCHEMA_SQL = """
+CREATE TABLE watchtime (
+    username TEXT, minutes INTEGER DEFAULT 0, last_active TIMESTAMP, discord_server_id BIGINT,
+    PRIMARY KEY (username, discord_server_id)
+);
+CREATE TABLE links (
+    discord_id BIGINT, kick_name TEXT, discord_server_id BIGINT,
+    PRIMARY KEY (discord_id, discord_server_id), UNIQUE (kick_name, discord_server_id)
+);
+CREATE TABLE user_points (
+    id SERIAL PRIMARY KEY, kick_username TEXT NOT NULL, discord_id BIGINT, points INTEGER DEFAULT 0,
+    total_earned INTEGER DEFAULT 0, total_spent INTEGER DEFAULT 0, discord_server_id BIGINT,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE (kick_username, discord_server_id)
+);
+CREATE TABLE points_watchtime_converted (
+    id SERIAL PRIMARY KEY, kick_username TEXT NOT NULL, minutes_converted INTEGER NOT NULL,
+    points_awarded INTEGER NOT NULL, discord_server_id BIGINT, converted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_pwc_user ON points_watchtime_converted (discord_server_id, kick_username);
+CREATE TABLE watchtime_conversion_logs (
+    id SERIAL PRIMARY KEY, discord_id BIGINT, kick_name TEXT, discord_server_id BIGINT,
+    raffle_minutes INTEGER, points_minutes INTEGER, converted_at TIMESTAMP
+)
+"""
+
+
+def seed(engine, viewers):
+    """Reset tables and create `viewers` synthetic users, half of them linked."""
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "TRUNCATE watchtime, links, user_points, points_watchtime_converted, points_conversion_totals, "
+                "watchtime_conversion_logs"
+            )
+        )
+        conn.execute(
+            text(
+                """
+            INSERT INTO links (discord_id, kick_name, discord_server_id)
+            SELECT g, 'viewer' || g, :sid FROM generate_series(1, :n) g WHERE g % 2 = 0
+        """
+            ),
+            {"n": viewers, "sid": SERVER_ID},
+        )
+    return {f"viewer{i}": datetime.now(timezone.utc) for i in range(1, viewers + 1)}
+
+
+def legacy_tick(engine, active_users, minutes):
+    """The pre-bulk tick: one upsert per viewer, then ~6 statements per viewer for points."""
+    with engine.begin() as conn:
+        for user, last_seen in active_users.items():
+            conn.execute(
+                text(
+                    """
+                INSERT INTO watchtime (username, minutes, last_active, discord_server_id)
+                VALUES (:u, :m, :t, :sid)
+                ON CONFLICT(username, discord_server_id) DO UPDATE SET
+                    minutes = watchtime.minutes + :m, last_active = :t
+            """
+                ),
+                {"u": user, "m": minutes, "t": last_seen.isoformat(), "sid": SERVER_ID},
+            )
+    with engine.begin() as conn:
+        for user in active_users:
+            total = conn.execute(
+                text("SELECT minutes FROM watchtime WHERE username = :u AND discord_server_id = :sid"),
+                {"u": user, "sid": SERVER_ID},
+            ).scalar()
+            converted = conn.execute(
+                text(
+                    "SELECT COALESCE(SUM(minutes_converted), 0) FROM points_watchtime_converted "
+                    "WHERE kick_username = :u AND discord_server_id = :sid"
+                ),
+                {"u": user, "sid": SERVER_ID},
+            ).scalar()
+            discord_id = conn.execute(
+                text("SELECT discord_id FROM links WHERE LOWER(kick_name) = LOWER(:u) AND discord_server_id = :sid"),
+                {"u": user, "sid": SERVER_ID},
+            ).scalar()
+            intervals = (total - converted) // 5
+            if intervals <= 0:
+                continue
+            pts = intervals * POINTS_PER_5MIN
+            conn.execute(
+                text(
+                    """
+                INSERT INTO user_points (kick_username, discord_id, points, total_earned, discord_server_id)
+                VALUES (:u, :d, :p, :p, :sid)
+                ON CONFLICT (kick_username, discord_server_id) DO UPDATE SET
+                    points = user_points.points + :p, total_earned = user_points.total_earned + :p
+            """
+                ),
+                {"u": user, "d": discord_id, "p": pts, "sid": SERVER_ID},
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO points_watchtime_converted (kick_username, minutes_converted, points_awarded, "
+                    "discord_server_id) VALUES (:u, :m, :p, :sid)"
+                ),
+                {"u": user, "m": intervals * 5, "p": pts, "sid": SERVER_ID},
+            )
+            if discord_id:
+                conn.execute(
+                    text(
+                        "INSERT INTO watchtime_conversion_logs (discord_id, kick_name, discord_server_id, "
+                        "raffle_minutes, points_minutes, converted_at) VALUES (:d, :u, :sid, 0, :m, NOW())"
+                    ),
+                    {"d": discord_id, "u": user, "sid": SERVER_ID, "m": intervals * 5},
+                )
+
+
+def bulk_tick(engine, active_users, minutes):
+    """The set-based tick used by update_watchtime_task."""
+    with engine.begin() as conn:
+        bulk_upsert_watchtime(conn, active_users, SERVER_ID, minutes)
+    with engine.begin() as conn:
+        bulk_award_points(conn, list(active_users), SERVER_ID, POINTS_PER_5MIN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=5, help="ticks timed per size/mode")
+    parser.add_argument("--minutes", type=int, default=5, help="minutes credited per tick")
+    args = parser.parse_args()
+
+    with scratch_schema("bench_watchtime_accrual") as engine:
+        with engine.begin() as conn:
+            run_sql_script(conn, SCHEMA_SQL)
+        migrate_add_points_conversion_totals(engine)
+
+        print(f"{'viewers':>8}  {'mode':<7}  tick latency ({args.ticks} ticks)")
+        for size in args.sizes:
+            for mode, tick in (("legacy", legacy_tick), ("bulk", bulk_tick)):
+                active_users = seed(engine, size)
+                tick(engine, active_users, args.minutes)  # warm-up: first tick inserts every row
+                samples = time_call(lambda: tick(engine, active_users, args.minutes), repeat=args.ticks)
+                print(f"{size:>8}  {mode:<7}  {summarize(samples)}")
+
+
+if __name__ == "__main__":
+    main()
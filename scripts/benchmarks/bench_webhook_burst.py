@@ -0,0 +1,241 @@
+"""
+Load test: burst of signed Kick + Twitch webhooks against the Flask handlers.
+
+Fires N correctly signed deliveries (half Kick RSA-signed, half Twitch
+HMAC-signed) at /webhooks/kick and /webhooks/twitch from a thread pool, and
+reports per-request latency plus the peak number of open Postgres backends
+during the burst.
+
+`--mode shared` uses the utils/db_engines.py registry (what production runs);
+`--mode per-request` patches the handlers back to a fresh create_engine() per
+call, which is what they did before. Each delivery does the real subscription
+lookup and the processed_webhook_messages dedup insert. With --handler-ms, a
+handler that sleeps that long is registered for both platforms; it runs on the
+core/event_loop_worker.py loop, so it should not show up in request latency.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://... python scripts/benchmarks/bench_webhook_burst.py
+    python scripts/benchmarks/bench_webhook_burst.py --webhooks 500 --concurrency 16 --mode per-request
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from _common import bench_database_url, percentile, run_sql_script, scratch_schema
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_webhook_burst"
+SERVER_ID = 1
+KICK_SUB_ID = "kick-sub-1"
+TWITCH_SUB_ID = "twitch-sub-1"
+TWITCH_SECRET = "bench-twitch-secret"
+
+SCHEMA_SQL = """
+CREATE TABLE kick_webhook_subscriptions (
+    id SERIAL PRIMARY KEY, discord_server_id BIGINT, broadcaster_user_id TEXT, subscription_id TEXT,
+    event_type TEXT, webhook_secret TEXT, status TEXT
+);
+CREATE TABLE twitch_webhook_subscriptions (
+    id SERIAL PRIMARY KEY, discord_server_id BIGINT, broadcaster_user_id TEXT, subscription_id TEXT,
+    webhook_secret TEXT, status TEXT, updated_at TIMESTAMP DEFAULT NOW()
+)
+"""
+
+
+def seed(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO kick_webhook_subscriptions "
+                "(discord_server_id, broadcaster_user_id, subscription_id, event_type, webhook_secret, status) "
+                "VALUES (:sid, '1001', :sub, 'channel.followed', 'unused', 'active')"
+            ),
+            {"sid": SERVER_ID, "sub": KICK_SUB_ID},
+        )
+        conn.execute(
+            text(
+                "INSERT INTO twitch_webhook_subscriptions "
+                "(discord_server_id, broadcaster_user_id, subscription_id, webhook_secret, status) "
+                "VALUES (:sid, '2002', :sub, :secret, 'enabled')"
+            ),
+            {"sid": SERVER_ID, "sub": TWITCH_SUB_ID, "secret": TWITCH_SECRET},
+        )
+
+
+def kick_request(private_key):
+    message_id = uuid.uuid4().hex
+    timestamp = datetime.now(timezone.utc).isoformat()
+    body = json.dumps({"follower": {"username": "viewer"}, "broadcaster": {"user_id": 1001}})
+    signature = private_key.sign(f"{message_id}.{timestamp}.{body}".encode(), padding.PKCS1v15(), hashes.SHA256())
+    headers = {
+        "Kick-Event-Type": "channel.followed",
+        "Kick-Event-Message-Id": message_id,
+        "Kick-Event-Message-Timestamp": timestamp,
+        "Kick-Event-Subscription-Id": KICK_SUB_ID,
+        "Kick-Event-Signature": base64.b64encode(signature).decode(),
+    }
+    return "/webhooks/kick", body, headers
+
+
+def twitch_request():
+    message_id = uuid.uuid4().hex
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    body = json.dumps(
+        {
+            "subscription": {"id": TWITCH_SUB_ID, "condition": {"broadcaster_user_id": "2002"}},
+            "event": {"broadcaster_user_id": "2002", "type": "live"},
+        }
+    )
+    digest = hmac.new(TWITCH_SECRET.encode(), (message_id + timestamp + body).encode(), hashlib.sha256).hexdigest()
+    headers = {
+        "Twitch-Eventsub-Message-Id": message_id,
+        "Twitch-Eventsub-Message-Timestamp": timestamp,
+        "Twitch-Eventsub-Message-Signature": f"sha256={digest}",
+        "Twitch-Eventsub-Message-Type": "notification",
+        "Twitch-Eventsub-Subscription-Type": "stream.online",
+    }
+    return "/webhooks/twitch", body, headers
+
+
+class BackendSampler(threading.Thread):
+    """Poll pg_stat_activity and remember the peak number of backends for this database."""
+
+    def __init__(self, url, interval=0.01):
+        super().__init__(daemon=True)
+        self.engine = create_engine(url, pool_size=1)
+        self.interval = interval
+        self.peak = 0
+        self.stop_event = threading.Event()
+
+    def current(self):
+        with self.engine.connect() as conn:
+            # Exclude this sampler's own connection.
+            return conn.execute(
+                text(
+                    "SELECT COUNT(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'"
+                )
+            ).scalar()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.peak = max(self.peak, self.current())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--webhooks", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent in-flight deliveries")
+    parser.add_argument("--mode", choices=("shared", "per-request"), default="shared")
+    parser.add_argument("--handler-ms", type=float, default=0, help="simulated downstream handler time")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    url = bench_database_url()
+    # The handlers read DATABASE_URL; point it at the scratch schema.
+    sep = "&" if "?" in url else "?"
+    os.environ["DATABASE_URL"] = f"{url}{sep}options={quote(f'-csearch_path={SCHEMA}')}"
+
+    from core import kick_webhooks, stream_notifications, twitch_webhooks
+    from core.event_loop_worker import get_webhook_worker
+
+    with scratch_schema(SCHEMA) as engine:
+        with engine.begin() as conn:
+            run_sql_script(conn, SCHEMA_SQL)
+        kick_webhooks.ensure_webhook_tables(engine)
+        seed(engine)
+
+        if args.mode == "per-request":
+
+            def fresh_engine(database_url=None):
+                return create_engine(os.environ["DATABASE_URL"], pool_pre_ping=True)
+
+            for module in (kick_webhooks, twitch_webhooks, stream_notifications):
+                module.get_engine = fresh_engine
+
+        # Sign Kick deliveries with a throwaway key and have the handler trust it.
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        kick_webhooks._kick_public_key = private_key.public_key()
+
+        if args.handler_ms:
+
+            async def slow_handler(event_data):
+                await asyncio.sleep(args.handler_ms / 1000)
+
+            kick_handler = kick_webhooks.WebhookEventHandler()
+            kick_handler.set_default_handler(slow_handler)
+            twitch_handler = twitch_webhooks.TwitchWebhookEventHandler()
+            twitch_handler.set_default_handler(slow_handler)
+            kick_webhooks._event_handler = kick_handler
+            twitch_webhooks._event_handler = twitch_handler
+
+        app = Flask(__name__)
+        app.register_blueprint(kick_webhooks.kick_webhooks_bp)
+        app.register_blueprint(twitch_webhooks.twitch_webhooks_bp)
+        requests = [kick_request(private_key) if i % 2 else twitch_request() for i in range(args.webhooks)]
+
+        local = threading.local()
+
+        def deliver(req):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = app.test_client()
+            path, body, headers = req
+            start = time.perf_counter()
+            response = client.post(path, data=body, headers=headers, content_type="application/json")
+            return (time.perf_counter() - start) * 1000, response.status_code
+
+        sampler = BackendSampler(url)
+        baseline = sampler.current()
+        sampler.start()
+        wall = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(deliver, requests))
+        wall = time.perf_counter() - wall
+        sampler.stop()
+
+        latencies = [ms for ms, _ in results]
+        statuses = {}
+        for _, status in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        with engine.connect() as conn:
+            recorded = conn.execute(text("SELECT COUNT(*) FROM processed_webhook_messages")).scalar()
+
+        print(f"{args.webhooks} signed webhooks, concurrency {args.concurrency}, mode {args.mode}")
+        print(f"  throughput     {args.webhooks / wall:8.1f} req/s ({wall:.2f} s)")
+        print(
+            f"  latency        p50 {percentile(latencies, 50):7.1f} ms   p99 {percentile(latencies, 99):7.1f} ms   "
+            f"max {max(latencies):7.1f} ms"
+        )
+        print(f"  pg backends    peak {sampler.peak} (baseline {baseline})")
+        print(f"  status codes   {statuses}   dedup rows {recorded}")
+        if args.handler_ms:
+            worker = get_webhook_worker()
+            while worker.stats()["queue_depth"] or worker.stats()["in_flight"]:
+                time.sleep(0.05)
+            print(f"  dispatch       {worker.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -41,6 +41,7 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 try:
     from core.kick_official_api import KickOfficialAPI
+    from core.webhook_subscription_cache import publish_subscription_change
 except ImportError:
     print("❌ Error: Could not import KickOfficialAPI")
     print("Make sure you're in the Kick-dicord-bot directory")
@@ -322,6 +323,9 @@ async def setup_webhooks_for_server(discord_server_id: str):
             print(f"   ⚠️  Could not fetch subscription IDs: {fetch_err}")
             print(f"   ⚠️  Webhooks registered but IDs not stored - may cause issues")
 
+        # Drop cached subscription lookups in every webhook worker.
+        publish_subscription_change("kick")
+
         print(f"\n{'='*60}")
         print(f"✅ Webhook setup complete for {username}!")
         print(f"   Registered {registered_count}/{len(WEBHOOK_EVENTS)} events")
@@ -28,6 +28,7 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 try:
     from core.kick_official_api import KickOfficialAPI
+    from core.webhook_subscription_cache import publish_subscription_change
 except ImportError:
     print("❌ Error: Could not import KickOfficialAPI")
     sys.exit(1)
@@ -183,6 +184,10 @@ async def sync_webhooks_for_server(discord_server_id: str):
                 else:
                     print(f"   ⏭️  Different callback URL, skipping")
 
+        if synced_count:
+            # Drop cached subscription lookups (incl. negative entries) in every webhook worker.
+            publish_subscription_change("kick")
+
         print(f"\n{'='*60}")
         print(f"Sync complete: {synced_count} subscription(s) updated")
         print(f"{'='*60}\n")
@@ -0,0 +1,49 @@
+import asyncio
+
+from core.channel_dispatcher import ChannelDispatcher, parse_channel_concurrency
+
+
+def test_slow_channel_does_not_delay_other_channels_and_guild_order_is_kept():
+    async def scenario():
+        dispatcher = ChannelDispatcher("test", default_concurrency=1, channel_concurrency={"bot_events": 4})
+        handled = []
+        release_shop = asyncio.Event()
+
+        async def slow_shop():
+            await release_shop.wait()
+            handled.append(("shop", None))
+
+        def chat(guild, n):
+            async def handler():
+                await asyncio.sleep(0.001 * (n % 3))
+                handled.append((guild, n))
+
+            return handler
+
+        dispatcher.submit("dashboard:point_shop", "1", slow_shop)
+        for n in range(20):
+            for guild in ("1", "2", "3"):
+                dispatcher.submit("bot_events", guild, chat(guild, n))
+
+        for queue, _ in dispatcher._lanes["bot_events"]:
+            await asyncio.wait_for(queue.join(), timeout=5)
+
+        # Chat finished while the shop handler is still blocked.
+        assert ("shop", None) not in handled
+        for guild in ("1", "2", "3"):
+            assert [n for g, n in handled if g == guild] == list(range(20))
+
+        release_shop.set()
+        await dispatcher.drain()
+        stats = dispatcher.stats()
+        assert stats["bot_events"]["processed"] == 60 and stats["bot_events"]["lag_p99_ms"] is not None
+        assert stats["dashboard:point_shop"]["processed"] == 1
+        await dispatcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_parse_channel_concurrency():
+    parsed = parse_channel_concurrency("bot_events=3, dashboard:raffle=1,bad,dashboard:gtb=0")
+    assert parsed["bot_events"] == 3 and parsed["dashboard:raffle"] == 1
+    assert "bad" not in parsed and "dashboard:gtb" not in parsed
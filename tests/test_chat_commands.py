@@ -0,0 +1,141 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+
+from core.chat_commands import ChatCommandRouter, ChatMessage
+from utils import subscription_tier
+
+
+def test_router_matches_like_the_old_chain_and_caches_tier_gates():
+    async def scenario():
+        gate_calls = []
+        gate_cache = {}
+        locked = []
+        handled = []
+
+        async def feature_check(guild_id, feature):
+            gate_calls.append((guild_id, feature))
+            gate_cache[(guild_id, feature)] = feature != "point_shop"
+            return gate_cache[(guild_id, feature)]
+
+        async def on_locked(msg, feature):
+            locked.append((msg.username, feature))
+
+        router = ChatCommandRouter(
+            feature_check=feature_check,
+            on_locked=on_locked,
+            cached_check=lambda guild_id, feature: gate_cache.get((guild_id, feature)),
+        )
+
+        @router.command("!points", feature="point_shop", exact=True)
+        async def points(msg):
+            handled.append("points")
+
+        @router.command("!call", "!sr", feature="slot_requests", prefix=True)
+        async def slot_request(msg):
+            handled.append(msg.content[len(msg.command) :].strip())
+
+        @router.command("!tickets", exact=True)
+        async def tickets(msg):
+            raise RuntimeError("db down")
+
+        def send(content):
+            return router.dispatch(ChatMessage(1, "guild", "viewer", content))
+
+        assert await send("just chatting") is None
+        assert await send("!points please") is None  # exact-only command with arguments
+        assert await send("!points") == "!points"
+        assert await send("!callSweet Bonanza") == "!call"
+        assert await send("!SR Gates") == "!sr"
+        assert await send("!tickets") == "!tickets"
+        assert await send("!unknown") is None
+
+        assert handled == ["Sweet Bonanza", "Gates"]
+        assert locked == [("viewer", "point_shop")]
+        # Cached answers are used on the loop; only misses reach feature_check.
+        assert sorted(gate_calls) == [(1, "point_shop"), (1, "slot_requests")]
+
+        stats = router.stats()
+        assert stats["plain_messages"] == 1 and stats["unknown_commands"] == 2
+        assert stats["commands"]["!points"]["locked"] == 1
+        assert stats["commands"]["!tickets"]["errors"] == 1
+        assert sum(stats["commands"]["!call"]["latency"].values()) == 1
+
+    asyncio.run(scenario())
+
+
+def test_custom_handler_runs_first_and_is_skipped_when_gated():
+    async def scenario():
+        allowed = {"commands": False}
+
+        async def feature_check(guild_id, feature):
+            return allowed.get(feature, True)
+
+        router = ChatCommandRouter(feature_check=feature_check)
+        seen = []
+
+        async def custom(msg):
+            seen.append(msg.command)
+            return msg.command == "!points"
+
+        router.set_custom_handler(custom, feature="commands")
+
+        @router.command("!points", exact=True)
+        async def points(msg):
+            seen.append("builtin")
+
+        assert await router.dispatch(ChatMessage(1, "g", "u", "!points")) == "!points"
+        allowed["commands"] = True
+        assert await router.dispatch(ChatMessage(1, "g", "u", "!points")) == "custom"
+        assert seen == ["builtin", "!points"]
+
+    asyncio.run(scenario())
+
+
+def test_tier_gates_follow_the_tier_cache_and_skip_fail_open_answers(monkeypatch):
+    monkeypatch.setattr(subscription_tier, "_cache", {})
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE server_subscriptions (discord_server_id BIGINT, tier TEXT, status TEXT,"
+                " manual_override BOOLEAN, override_tier TEXT)"
+            )
+        )
+        conn.execute(text("INSERT INTO server_subscriptions VALUES (1, 'free', 'active', 0, NULL)"))
+
+    async def scenario():
+        async def feature_check(guild_id, feature):
+            return subscription_tier.server_has_feature(engine, guild_id, feature)
+
+        router = ChatCommandRouter(
+            feature_check=feature_check, cached_check=subscription_tier.cached_server_has_feature
+        )
+        handled = []
+
+        @router.command("!points", feature="point_shop", exact=True)
+        async def points(msg):
+            handled.append(msg.guild_id)
+
+        def send(guild_id):
+            return router.dispatch(ChatMessage(guild_id, "g", "u", "!points"))
+
+        await send(1)
+        await send(1)
+        assert handled == [] and router.gate_checks == 1
+
+        # A dashboard tier change drops the tier cache; the next line sees it.
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE server_subscriptions SET tier = 'tier2'"))
+        subscription_tier.invalidate_cache(1)
+        await send(1)
+        assert handled == [1] and router.gate_checks == 2
+
+        # A DB error fails open to "free" without caching it.
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE server_subscriptions"))
+        await send(2)
+        await send(2)
+        assert handled == [1] and router.gate_checks == 4
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+import asyncio
+
+from core.chat_outbox import PRIORITY_ANNOUNCEMENT, PRIORITY_REPLY, PRIORITY_TIMED, ChatOutbox
+
+
+def test_points_spam_is_merged_paced_and_announcements_jump_the_queue():
+    async def scenario():
+        outbox = ChatOutbox(rates={"kick": (20.0, 1)}, coalesce_window=0.1, max_depth=4)
+        sent = []
+
+        async def deliver(guild_id, text):
+            sent.append((guild_id, text, asyncio.get_running_loop().time()))
+            return True
+
+        outbox.register_sender("kick", deliver)
+        outbox.submit(7, "kick", "Stream starts soon!", priority=PRIORITY_TIMED)
+        for name, points in (("a", 120), ("b", 40), ("c", 0)):
+            outbox.submit(
+                7,
+                "kick",
+                f"@{name}, You currently have {points:,} points.",
+                coalesce_key="!points",
+                fragment=f"@{name} {points:,} pts",
+            )
+        outbox.submit(7, "kick", "@z, You have 3 tickets", priority=PRIORITY_REPLY)
+        outbox.submit(7, "kick", "🎉 Raffle winner: dave!", priority=PRIORITY_ANNOUNCEMENT)
+        # The lane is full (4 items): the oldest line of the lowest class gives way.
+        outbox.submit(7, "kick", "Last timed message", priority=PRIORITY_TIMED)
+        outbox.submit(8, "kick", "@solo, You currently have 5 points.", coalesce_key="!points", fragment="@solo 5 pts")
+        await asyncio.sleep(0.5)
+        return outbox, sent
+
+    outbox, sent = asyncio.run(scenario())
+    guild7 = [text for guild_id, text, _ in sent if guild_id == 7]
+    # By class; the merged !points line is held for the window, so the later reply overtakes it.
+    assert guild7 == [
+        "🎉 Raffle winner: dave!",
+        "@z, You have 3 tickets",
+        "@a 120 pts · @b 40 pts · @c 0 pts",
+        "Last timed message",
+    ]
+    # A lone reply keeps its full wording.
+    assert [text for guild_id, text, _ in sent if guild_id == 8] == ["@solo, You currently have 5 points."]
+    times = [at for guild_id, _, at in sent if guild_id == 7]
+    assert all(later - earlier >= 0.04 for earlier, later in zip(times, times[1:]))
+
+    stats = outbox.stats()
+    lane = stats["lanes"]["7:kick"]
+    assert lane["merged"] == 2 and lane["sent"] == 4 and lane["dropped_full"] == 1
+    assert lane["depth"] == {"announcement": 0, "reply": 0, "timed": 0}
+    assert lane["wait"]["announcement"]["max_ms"] >= 0
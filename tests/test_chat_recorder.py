@@ -0,0 +1,36 @@
+from core.chat_recorder import ChatRecorder, read_recording
+
+
+def test_recording_round_trips_to_handler_messages(tmp_path):
+    path = str(tmp_path / "chat.jsonl.gz")
+    recorder = ChatRecorder(path, flush_every=1)
+    recorder.record(
+        1, "guild", {"sender_username": "viewer", "content": "!points", "id": "m1", "user": {"id": 42}}, "pusher"
+    )
+    recorder.record(
+        1,
+        "guild",
+        {
+            "sender_username": "kickname",
+            "display_username": "TwitchName",
+            "content": "hi",
+            "chat_id": "m2",
+            "_platform": "twitch",
+        },
+        "twitch",
+    )
+    recorder.close()
+
+    first, second = read_recording(path)
+    assert (first.source, first.offset <= second.offset) == ("pusher", True)
+    assert first.to_msg() == {
+        "sender_username": "viewer",
+        "username": "viewer",
+        "content": "!points",
+        "chat_id": "m1",
+        "id": "m1",
+        "user": {"id": "42", "username": "viewer", "slug": "viewer"},
+        "_platform": "kick",
+    }
+    msg = second.to_msg()
+    assert (msg["_platform"], msg["username"], msg["display_username"]) == ("twitch", "kickname", "TwitchName")
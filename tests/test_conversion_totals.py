@@ -0,0 +1,10 @@
+from sqlalchemy import create_engine, inspect
+
+from utils.conversion_totals import migrate_add_points_conversion_totals, migrate_add_raffle_conversion_totals
+
+
+def test_migrations_skip_databases_without_postgres_triggers():
+    engine = create_engine("sqlite://")
+    assert migrate_add_points_conversion_totals(engine) is False
+    assert migrate_add_raffle_conversion_totals(engine) is False
+    assert inspect(engine).get_table_names() == []
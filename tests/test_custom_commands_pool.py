@@ -0,0 +1,52 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2 import pool as psycopg2_pool
+
+from features.custom_commands import manager
+
+
+class FakeConnection:
+    closed = 0
+
+    def rollback(self):
+        pass
+
+
+class StrictPool:
+    """Like ThreadedConnectionPool: raises PoolError instead of waiting when exhausted."""
+
+    def __init__(self, minconn, maxconn, dsn):
+        self.maxconn = maxconn
+        self.out = 0
+        self.peak = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            if self.out >= self.maxconn:
+                raise psycopg2_pool.PoolError("connection pool exhausted")
+            self.out += 1
+            self.peak = max(self.peak, self.out)
+        return FakeConnection()
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.out -= 1
+
+
+def test_overlapping_borrowers_wait_for_a_free_connection(monkeypatch):
+    monkeypatch.setattr(manager.psycopg2_pool, "ThreadedConnectionPool", StrictPool)
+    monkeypatch.setattr(manager, "_pools", {})
+
+    def borrow(_):
+        with manager._pooled_connection("postgresql://fake") as conn:
+            time.sleep(0.01)
+            return conn is not None
+
+    with ThreadPoolExecutor(max_workers=4 * manager.DB_POOL_MAX_CONNECTIONS) as executor:
+        assert all(executor.map(borrow, range(50)))
+    db_pool, _ = manager._get_pool("postgresql://fake")
+    assert db_pool.peak == manager.DB_POOL_MAX_CONNECTIONS and db_pool.out == 0
@@ -0,0 +1,36 @@
+import asyncio
+
+from sqlalchemy import create_engine, text
+
+from features.custom_commands import manager
+
+
+def test_committed_balance_writes_drop_cached_variable_contexts(monkeypatch):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE user_points (kick_username TEXT, points INTEGER)"))
+        conn.execute(text("CREATE TABLE slot_requests (id INTEGER)"))
+    manager.bind_write_hook(engine)
+
+    commands = manager.CustomCommandsManager(bot=None, discord_server_id=7)
+    fetches = []
+
+    def fetch(server_id, username, display_name, platform, requested_tokens):
+        fetches.append(username)
+        return {"points": len(fetches)}
+
+    monkeypatch.setattr(commands, "_fetch_variable_context", fetch)
+
+    def lookup():
+        return asyncio.run(commands._get_variable_context(7, "alice", "alice", "kick", {"{points}"}))
+
+    assert lookup() == lookup() == {"points": 1}
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO slot_requests VALUES (1)"))
+    assert lookup() == {"points": 1}  # unrelated write: still cached
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO user_points VALUES ('alice', 50)"))
+    assert lookup() == {"points": 2}
+    assert commands.cache_hits == 2 and commands.cache_misses == 2
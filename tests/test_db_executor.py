@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from core.db_executor import GuildFairExecutor
+from core.loop_monitor import LoopLagMonitor
+
+
+def test_noisy_guild_backlog_does_not_starve_other_guilds():
+    async def scenario():
+        executor = GuildFairExecutor(max_workers=4, per_guild_limit=1)
+        order = []
+
+        def query(guild_id, n):
+            order.append((guild_id, n))
+            time.sleep(0.02)
+            return n
+
+        noisy = [asyncio.create_task(executor.run(1, query, 1, n, label="noisy")) for n in range(40)]
+        await asyncio.sleep(0)
+        started = time.perf_counter()
+        assert await executor.run(2, query, 2, 0, label="quiet") == 0
+        quiet_ms = (time.perf_counter() - started) * 1000
+
+        # The noisy guild holds one worker at most, so the quiet guild runs right away.
+        assert quiet_ms < 200
+        assert order.index((2, 0)) < 3
+        assert await asyncio.gather(*noisy) == list(range(40))
+        # Each guild's queries start in submission order.
+        assert [n for g, n in order if g == 1] == list(range(40))
+        stats = executor.stats()
+        assert stats["completed"] == 41 and stats["in_flight"] == 0 and stats["queued"] == 0
+        executor.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_loop_lag_monitor_names_the_blocking_call_site():
+    def blocking_query():
+        time.sleep(0.4)
+
+    async def scenario():
+        monitor = LoopLagMonitor(threshold_ms=100, report_seconds=3600)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        blocking_query()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        sites = monitor.top_sites()
+        assert sites and "blocking_query" in sites[0][0]
+        assert monitor.stats()["lag_max_ms"] >= 300
+
+    asyncio.run(scenario())
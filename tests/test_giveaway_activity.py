@@ -0,0 +1,165 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy import create_engine, text
+
+from features.giveaway.chat_activity import ActiveChatterTracker
+from features.giveaway.giveaway_manager import GiveawayManager
+from utils.provably_fair import INDEX_ALGORITHM, provably_fair_index, verify_provably_fair_index
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'giveaway.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE giveaways (id INTEGER PRIMARY KEY, discord_server_id INTEGER, status TEXT, "
+                "entry_method TEXT, messages_required INTEGER, time_window_minutes INTEGER, "
+                "allow_multiple_entries BOOLEAN, max_entries_per_user INTEGER, winner_kick_username TEXT, "
+                "started_at TIMESTAMP, ended_at TIMESTAMP, updated_at TIMESTAMP, server_seed TEXT, "
+                "client_seed TEXT, nonce TEXT, proof_hash TEXT, random_value REAL, winning_ticket INTEGER, "
+                "total_tickets INTEGER, draw_algorithm TEXT)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE giveaway_entries (id INTEGER PRIMARY KEY, giveaway_id INTEGER, discord_server_id INTEGER, "
+                "discord_id TEXT, kick_username TEXT, kick_user_id TEXT, entry_method TEXT, entry_count INTEGER, "
+                "profile_pic_url TEXT, display_name TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE giveaway_chat_activity (id INTEGER PRIMARY KEY, giveaway_id INTEGER, "
+                "discord_server_id INTEGER, kick_username TEXT, message TEXT, message_hash TEXT, timestamp TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO giveaways (id, discord_server_id, status, entry_method, messages_required, "
+                "time_window_minutes, allow_multiple_entries, max_entries_per_user) "
+                "VALUES (1, 7, 'active', 'active_chatter', 3, 10, 0, 1)"
+            )
+        )
+    return engine
+
+
+def test_tracker_dedupes_within_the_window_and_batches_writes(tmp_path):
+    engine = _engine(tmp_path)
+    now = [0.0]
+    tracker = ActiveChatterTracker(engine, 7, 1, flush_rows=100, flush_seconds=60, clock=lambda: now[0])
+
+    assert tracker.observe("alice", "hi", 3, 600) is None
+    assert tracker.observe("alice", "hi", 3, 600) is None  # duplicate
+    assert tracker.observe("alice", "gg", 3, 600) is None
+    assert not tracker.flush_due()
+    now[0] = 601.0  # "hi" and "gg" fall out of the window
+    assert tracker.observe("alice", "hi", 3, 600) is None
+    assert tracker.observe("alice", "pog", 3, 600) is None
+    assert tracker.observe("alice", "nice", 3, 600) == 3
+
+    assert tracker.flush_due()  # flush_seconds have passed
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM giveaway_chat_activity")).scalar() == 0
+    tracker.flush()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM giveaway_chat_activity")).scalar() == 5
+    stats = tracker.stats()
+    assert stats["duplicates"] == 1 and stats["flushes"] == 1 and stats["tracked_hashes"] == 3
+
+
+def test_track_message_enters_once_then_stops_touching_entries(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    manager = GiveawayManager(engine, guild_id=7)
+
+    async def no_avatar(username, platform="kick"):
+        return None
+
+    monkeypatch.setattr(manager, "_fetch_avatar", no_avatar)
+
+    async def scenario():
+        await manager.load_active_giveaway()
+        results = [await manager.track_message("alice", f"message {i}") for i in range(6)]
+        await manager.stop_giveaway(1)
+        return results
+
+    assert asyncio.run(scenario()) == [False, False, True, False, False, False]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT entry_count FROM giveaway_entries")).scalar() == 1
+        # The 4th message found alice already entered; after that she is no longer tracked.
+        assert conn.execute(text("SELECT COUNT(*) FROM giveaway_chat_activity")).scalar() == 4
+    assert manager.chat_tracker is None
+
+
+def test_draw_uses_prefix_sums_over_entry_counts(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO giveaway_entries (giveaway_id, discord_server_id, kick_username, entry_count, display_name) "
+                "VALUES (1, 7, 'alice', 1, 'Alice'), (1, 7, 'bob', 1000000, 'Bob')"
+            )
+        )
+    manager = GiveawayManager(engine, guild_id=7)
+
+    async def scenario():
+        await manager.load_active_giveaway()
+        return await manager.draw_winner()
+
+    assert asyncio.run(scenario()) in ("Alice", "Bob")
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT status, winner_kick_username, proof_hash FROM giveaways")).fetchone()
+    assert row[0] == "completed"
+    assert row[1] == ("alice" if provably_fair_index(row[2], 1000001) == 0 else "bob")
+
+
+def test_stored_giveaway_proof_reproduces_the_winner(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO giveaway_entries (giveaway_id, discord_server_id, kick_username, entry_count, created_at) "
+                "VALUES (1, 7, 'alice', 3, '2024-01-01'), (1, 7, 'bob', 5, '2024-01-01'), "
+                "(1, 7, 'carol', 2, '2024-01-02')"
+            )
+        )
+    manager = GiveawayManager(engine, guild_id=7)
+
+    async def scenario():
+        await manager.load_active_giveaway()
+        return await manager.draw_winner()
+
+    asyncio.run(scenario())
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM giveaways WHERE id = 1")).mappings().one()
+        entries = conn.execute(
+            text("SELECT kick_username, entry_count FROM giveaway_entries ORDER BY created_at, id")
+        ).fetchall()
+
+    # A verifier only needs the stored row and the entry list.
+    assert row["draw_algorithm"] == INDEX_ALGORITHM and row["total_tickets"] == 10
+    assert verify_provably_fair_index(
+        row["server_seed"],
+        row["client_seed"],
+        row["nonce"],
+        row["proof_hash"],
+        row["total_tickets"],
+        row["winning_ticket"],
+    )
+    ticket = row["winning_ticket"]
+    for username, count in entries:
+        if ticket < count:
+            break
+        ticket -= count
+    assert username == row["winner_kick_username"]
+
+
+def test_provably_fair_index_is_unbiased_and_deterministic():
+    import hashlib
+
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(30000)]
+    counts = Counter(provably_fair_index(h, 3) for h in hashes)
+    assert set(counts) == {0, 1, 2} and all(9500 < c < 10500 for c in counts.values())
+    # n just above 2^31 rejects about half of all words, yet still resolves
+    assert all(0 <= provably_fair_index(h, 2**31 + 1) <= 2**31 for h in hashes[:200])
+    assert provably_fair_index(hashes[0], 10) == provably_fair_index(hashes[0], 10)
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+from aiohttp import web
+
+from utils.http_pool import HttpClientPool
+
+
+def test_requests_reuse_one_keepalive_connection_and_record_per_host_metrics():
+    connections = set()
+
+    async def ok(request):
+        connections.add(request.transport)
+        return web.json_response({"live": True})
+
+    async def broken(request):
+        return web.Response(status=503)
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/ok", ok)
+        app.router.add_get("/broken", broken)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        pool = HttpClientPool(limit_per_host=2)
+        for _ in range(10):
+            async with pool.session().get(f"http://127.0.0.1:{port}/ok") as resp:
+                assert (await resp.json())["live"]
+        async with pool.session().get(f"http://127.0.0.1:{port}/broken") as resp:
+            assert resp.status == 503
+        stats = pool.stats()
+        await pool.close()
+        closed = pool.stats()
+        await runner.cleanup()
+        return stats, closed
+
+    stats, closed = asyncio.run(scenario())
+    assert len(connections) == 1  # ten sequential calls, one TCP connection
+    host = stats["hosts"]["127.0.0.1"]
+    assert host["requests"] == 11 and host["errors"] == 1
+    assert host["statuses"] == {"2xx": 10, "5xx": 1} and host["max_ms"] >= host["avg_ms"] > 0
+    assert stats["sessions_opened"] == 1 and stats["open"] and not closed["open"]
+
+
+def test_each_loop_keeps_its_own_session_and_close_closes_them_all():
+    pool = HttpClientPool()
+    worker_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=worker_loop.run_forever)
+    thread.start()
+
+    async def open_session():
+        return pool.session()
+
+    def on_worker():
+        return asyncio.run_coroutine_threadsafe(open_session(), worker_loop).result()
+
+    async def scenario():
+        main = pool.session()
+        worker = await asyncio.to_thread(on_worker)
+        # Alternating between the loops reuses each one's session instead of replacing it.
+        assert pool.session() is main and await asyncio.to_thread(on_worker) is worker
+        assert pool.stats()["open_sessions"] == 2
+        await pool.close()
+        return main, worker
+
+    try:
+        main, worker = asyncio.run(scenario())
+    finally:
+        worker_loop.call_soon_threadsafe(worker_loop.stop)
+        thread.join()
+        worker_loop.close()
+    assert main.closed and worker.closed
+    assert pool.stats()["sessions_opened"] == 2 and not pool.stats()["open"]
@@ -0,0 +1,55 @@
+import threading
+
+from sqlalchemy import create_engine, text
+
+from core.identity_index import _GuildIdentities, identity_index
+from core.stream_links import remove_link, resolve_canonical_identity, upsert_link
+
+
+def test_index_follows_link_and_unlink_and_matches_db():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE links (discord_id INTEGER, kick_name TEXT, discord_server_id INTEGER, "
+                "platform TEXT DEFAULT 'kick', linked_at TIMESTAMP, UNIQUE (discord_id, discord_server_id, platform))"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO links VALUES (10, 'zed', 1, 'kick', '2024-01-01'), (11, 'amy', 1, 'kick', '2024-01-02')")
+        )
+    identity_index.bind(engine)
+    identity_index.invalidate()
+
+    upsert_link(engine, 10, "Alpha_TV", 1, platform="twitch")
+    assert resolve_canonical_identity(engine, "alpha_tv", 1, "twitch") == (10, "zed")
+    assert identity_index.accrual_username(1, "zed") == "alpha_tv"
+    assert identity_index.discord_ids(1, ["ZED", "nobody", "amy"]) == {"zed": 10, "amy": 11}
+
+    # Applied in place: no reload needed for the unlink.
+    loads = identity_index.loads
+    remove_link(engine, 10, 1, platform="twitch")
+    assert identity_index.discord_id(1, "alpha_tv", "twitch") is None
+    assert identity_index.accrual_username(1, "zed") == "zed"
+    assert identity_index.loads == loads
+    assert identity_index.verify(1) == {"missing": [], "extra": []}
+
+
+def test_lock_free_readers_never_see_a_half_built_guild():
+    entry = _GuildIdentities([(i, f"user{i}", "kick") for i in range(2000)])
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            by_name, names_by_did = entry.by_name, entry.names_by_did
+            if len(by_name) < 2000 or len(names_by_did) < 2000:
+                errors.append((len(by_name), len(names_by_did)))
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(20):
+        entry.link(i, f"alt{i}", "twitch")
+    stop.set()
+    thread.join()
+    assert errors == []
@@ -0,0 +1,132 @@
+import asyncio
+
+from aiohttp import web
+
+from core.kick_channels import KickChannelCache
+from utils.http_pool import http_pool
+
+CHANNEL = {
+    "id": 11,
+    "user_id": 22,
+    "chatroom": {"id": 33},
+    "user": {"id": 22, "profile_pic": "https://files.kick.com/avatar.webp"},
+    "livestream": {"id": 44, "is_live": True},
+}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/channels/{slug}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/channels"
+
+
+def test_concurrent_lookups_share_one_fetch_and_failures_are_cached():
+    calls = []
+
+    async def handler(request):
+        slug = request.match_info["slug"]
+        calls.append(slug)
+        await asyncio.sleep(0.05)
+        if slug == "blocked":
+            return web.Response(status=403)
+        return web.json_response(CHANNEL)
+
+    async def scenario():
+        runner, base_url = await _serve(handler)
+        cache = KickChannelCache(base_url=base_url, redis_url="")
+
+        results = await asyncio.gather(
+            cache.ids("Streamer"), cache.avatar("streamer"), cache.is_live("STREAMER"), cache.chatroom_id("streamer")
+        )
+        assert results[0] == {"channel_id": "11", "chatroom_id": "33", "user_id": "22"}
+        assert results[1] == CHANNEL["user"]["profile_pic"]
+        assert results[2] is True and results[3] == "33"
+        assert calls == ["streamer"]
+
+        assert (await cache.info("streamer"))["id"] == 11
+        assert calls == ["streamer"]
+
+        assert await cache.is_live("blocked") is None
+        assert await cache.avatar("blocked") is None
+        assert calls == ["streamer", "blocked"]
+        assert "403" in cache.last_failure("blocked")
+
+        await http_pool.close()
+        await runner.cleanup()
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["fetches"] == 2 and stats["coalesced"] == 3
+    assert stats["negative_hits"] == 1 and stats["failures"] == 1
+    assert stats["fields"]["info"]["hit_rate"] == 1.0
+
+
+def test_redis_layer_shares_records_between_processes():
+    redis = FakeRedis()
+    calls = []
+
+    async def handler(request):
+        calls.append(request.match_info["slug"])
+        return web.json_response(CHANNEL)
+
+    async def scenario():
+        runner, base_url = await _serve(handler)
+        bot = KickChannelCache(base_url=base_url, redis_url="redis://fake", client_factory=lambda: redis)
+        web_process = KickChannelCache(base_url=base_url, redis_url="redis://fake", client_factory=lambda: redis)
+
+        assert await bot.chatroom_id("streamer") == "33"
+        assert await web_process.avatar("streamer") == CHANNEL["user"]["profile_pic"]
+        assert calls == ["streamer"]
+        assert "kick:channel:streamer" in redis.data
+
+        await http_pool.close()
+        await runner.cleanup()
+        return web_process.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["redis_hits"] == 1 and stats["fetches"] == 0
+
+
+def test_remembered_ids_do_not_stand_in_for_a_fetch_and_survive_a_redis_read():
+    redis = FakeRedis()
+    calls = []
+
+    async def handler(request):
+        calls.append(request.match_info["slug"])
+        return web.Response(status=503) if request.match_info["slug"] == "down" else web.json_response(CHANNEL)
+
+    async def scenario():
+        runner, base_url = await _serve(handler)
+        web_process = KickChannelCache(base_url=base_url, redis_url="redis://fake", client_factory=lambda: redis)
+        bot = KickChannelCache(base_url=base_url, redis_url="redis://fake", client_factory=lambda: redis)
+
+        await web_process.avatar("streamer")
+        bot.remember_ids("streamer", chatroom_id=99)
+        bot.remember_ids("down", chatroom_id=55)
+        # A partial set is not a fresh one: the Redis copy (full ids) is used, with the
+        # remembered chatroom id only filling gaps.
+        assert await bot.ids("streamer") == {"channel_id": "11", "chatroom_id": "33", "user_id": "22"}
+        assert bot.stats()["redis_hits"] == 1
+        # No full set anywhere: fetch, and serve the remembered ids while Kick fails.
+        assert await bot.chatroom_id("down") == "55"
+        assert calls == ["streamer", "down"]
+
+        await http_pool.close()
+        await runner.cleanup()
+
+    asyncio.run(scenario())
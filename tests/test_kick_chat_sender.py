@@ -0,0 +1,68 @@
+import asyncio
+
+from core.kick_chat_sender import KickChatSender
+
+
+def _sender(stored, refreshed=None, fallback=None):
+    loads = []
+
+    async def load_token(guild_id):
+        loads.append(guild_id)
+        return stored[0]
+
+    async def refresh_token(guild_id, guild_name):
+        return refreshed
+
+    async def fallback_token(guild_id):
+        return fallback
+
+    return KickChatSender(load_token, refresh_token, fallback_token), loads
+
+
+def test_deliver_loads_the_token_once_and_reuses_it(monkeypatch):
+    sender, loads = _sender(["tok-1"])
+    posts = []
+
+    async def fake_post(token, message):
+        posts.append((token, message))
+        return 200, "{}"
+
+    monkeypatch.setattr(sender, "_post_chat", fake_post)
+
+    async def scenario():
+        return [await sender.deliver(7, "guild", "hello"), await sender.deliver(7, "guild", "again")]
+
+    assert asyncio.run(scenario()) == [True, True]
+    assert posts == [("tok-1", "hello"), ("tok-1", "again")]
+    assert loads == [7]
+
+
+def test_deliver_retries_a_401_with_the_newly_stored_token(monkeypatch):
+    stored = ["old"]
+    sender, loads = _sender(stored)
+    posts = []
+
+    async def fake_post(token, message):
+        posts.append(token)
+        return (401, "expired") if token == "old" else (201, "{}")
+
+    monkeypatch.setattr(sender, "_post_chat", fake_post)
+
+    async def scenario():
+        await sender.deliver(7, "guild", "warm-up")  # caches "old" (and fails: no refresh available)
+        sender._tokens[7] = "old"
+        stored[0] = "new"  # a proactive refresh wrote a new token
+        return await sender.deliver(7, "guild", "hi"), await sender.deliver(7, "guild", "again")
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert posts == ["old", "old", "new", "new"]
+
+
+def test_deliver_without_a_token_drops_the_line(monkeypatch):
+    sender, _ = _sender([None])
+
+    async def fake_post(token, message):
+        raise AssertionError("no token, nothing to post")
+
+    monkeypatch.setattr(sender, "_post_chat", fake_post)
+    assert asyncio.run(sender.deliver(7, "guild", "hi")) is False
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import discord
+
+from utils.panel_render import PanelRenderer
+
+
+class FakeMessage:
+    def __init__(self):
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+def _embed(guesses, updated):
+    embed = discord.Embed(title="🎮 Guess the Balance", timestamp=updated)
+    embed.add_field(name="Guesses", value=str(guesses))
+    embed.set_footer(text=f"Last updated: {updated:%H:%M:%S}")
+    return embed
+
+
+def test_unchanged_payload_skips_the_edit_and_dirty_marks_coalesce():
+    async def scenario():
+        renderer = PanelRenderer(dirty_delay=0.05)
+        message = FakeMessage()
+        key = ("gtb_panel", 7)
+        now = datetime.utcnow()
+
+        assert await renderer.edit(key, message, embed=_embed(3, now))
+        # Only the footer/timestamp moved: no edit.
+        assert not await renderer.edit(key, message, embed=_embed(3, now + timedelta(minutes=3)))
+        assert await renderer.edit(key, message, embed=_embed(4, now))
+        assert len(message.edits) == 2 and renderer.stats()["skipped_edits"] == 1
+
+        refreshes = []
+
+        async def refresh():
+            refreshes.append(asyncio.get_running_loop().time())
+
+        renderer.register(key, refresh, min_interval=0.3)
+        renderer.register(("gtb_panel", 8), refresh)
+        # A burst of guesses, one of them from a db_executor-style thread: one refresh.
+        for _ in range(20):
+            renderer.mark_dirty("gtb_panel", 7)
+        worker = threading.Thread(target=renderer.mark_dirty, args=("gtb_panel", 7))
+        worker.start()
+        worker.join()
+        await asyncio.sleep(0.15)
+        assert len(refreshes) == 1
+
+        # The next change waits out the panel's cooldown instead of being dropped.
+        renderer.mark_dirty("gtb_panel", 7)
+        await asyncio.sleep(0.1)
+        assert len(refreshes) == 1
+        await asyncio.sleep(0.3)
+        assert len(refreshes) == 2
+        assert refreshes[1] - refreshes[0] >= 0.29
+
+    asyncio.run(scenario())
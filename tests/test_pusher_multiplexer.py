@@ -0,0 +1,114 @@
+import asyncio
+import json
+import tracemalloc
+
+import websockets
+
+from core.pusher_multiplexer import PusherMultiplexer
+
+
+class FakePusher:
+    """Minimal local Pusher: handshake, subscribe/unsubscribe bookkeeping, ping/pong."""
+
+    def __init__(self):
+        self.sockets = {}  # websocket -> set of subscribed channels
+        self.frames_received = []
+
+    async def handler(self, ws):
+        self.sockets[ws] = set()
+        await ws.send(
+            json.dumps({"event": "pusher:connection_established", "data": json.dumps({"socket_id": str(id(ws))})})
+        )
+        try:
+            async for raw in ws:
+                frame = json.loads(raw)
+                self.frames_received.append(frame)
+                event, data = frame.get("event"), frame.get("data") or {}
+                if event == "pusher:subscribe":
+                    self.sockets[ws].add(data["channel"])
+                elif event == "pusher:unsubscribe":
+                    self.sockets[ws].discard(data["channel"])
+                elif event == "pusher:ping":
+                    await ws.send(json.dumps({"event": "pusher:pong"}))
+        finally:
+            self.sockets.pop(ws, None)
+
+    def subscribed(self):
+        return set().union(*self.sockets.values()) if self.sockets else set()
+
+    async def broadcast(self, channel, event, data):
+        for ws, channels in self.sockets.items():
+            if channel in channels:
+                await ws.send(json.dumps({"event": event, "channel": channel, "data": json.dumps(data)}))
+
+
+async def _wait_for(predicate, timeout=10):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def test_500_guilds_share_a_few_sockets_and_route_by_channel():
+    async def scenario():
+        fake = FakePusher()
+        async with websockets.serve(fake.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            mux = PusherMultiplexer(f"ws://127.0.0.1:{port}", channels_per_socket=200)
+
+            tracemalloc.start()
+            tasks_before = len(asyncio.all_tasks())
+            queues = {}
+            for guild_id in range(500):
+                queues[guild_id] = await mux.register(guild_id, [f"chatrooms.{guild_id}.v2", f"channel.{guild_id}"])
+
+            expected = {f"chatrooms.{g}.v2" for g in range(500)} | {f"channel.{g}" for g in range(500)}
+            await _wait_for(lambda: fake.subscribed() == expected)
+            memory_kib = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+            task_delta = len(asyncio.all_tasks()) - tasks_before
+            stats = mux.stats()
+            print(f"500 guilds: {stats['sockets']} sockets, +{task_delta} tasks, {memory_kib:.0f} KiB traced")
+
+            # 1000 channels / 200 per socket. Tasks (shard readers plus the websockets
+            # keepalive/server tasks of the test itself) scale with sockets, not guilds.
+            assert stats["sockets"] == 5 and len(fake.sockets) == 5
+            assert task_delta < 50
+
+            # Frames reach only the guild owning the channel.
+            await fake.broadcast("chatrooms.42.v2", "App\\Events\\ChatMessageEvent", {"content": "hi"})
+            frame = json.loads(await asyncio.wait_for(queues[42].get(), timeout=5))
+            assert frame["channel"] == "chatrooms.42.v2"
+            assert all(q.empty() for g, q in queues.items() if g != 42)
+
+            # A channel change resubscribes incrementally on the same socket.
+            fake.frames_received.clear()
+            await mux.register(7, ["chatrooms.9007.v2", "channel.7"])
+            await _wait_for(lambda: len(fake.frames_received) >= 2)
+            assert {(f["event"], f["data"]["channel"]) for f in fake.frames_received} == {
+                ("pusher:unsubscribe", "chatrooms.7.v2"),
+                ("pusher:subscribe", "chatrooms.9007.v2"),
+            }
+
+            await mux.unregister(7)
+            await _wait_for(lambda: "channel.7" not in fake.subscribed())
+            await mux.close()
+
+    asyncio.run(scenario())
+
+
+def test_shard_reconnects_and_resubscribes():
+    async def scenario():
+        fake = FakePusher()
+        async with websockets.serve(fake.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            mux = PusherMultiplexer(f"ws://127.0.0.1:{port}")
+            await mux.register(1, ["chatrooms.1.v2"])
+            await _wait_for(lambda: fake.subscribed() == {"chatrooms.1.v2"})
+
+            for ws in list(fake.sockets):
+                await ws.close()
+            await _wait_for(lambda: mux.stats()["reconnects"] == 1 and fake.subscribed() == {"chatrooms.1.v2"})
+            await mux.close()
+
+    asyncio.run(scenario())
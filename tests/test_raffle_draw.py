@@ -0,0 +1,88 @@
+from sqlalchemy import create_engine, text
+
+from raffle_system.draw import RaffleDraw, cumulative_tickets, simulate_wins, ticket_owner
+from raffle_system.leaderboard_cache import leaderboard_cache
+
+
+def test_ticket_owner_matches_range_scan():
+    counts = [10, 1, 25, 5, 1]
+    cumulative = cumulative_tickets(counts)
+    owners = []
+    for index, count in enumerate(counts):
+        owners.extend([index] * count)
+    assert [ticket_owner(cumulative, ticket) for ticket in range(1, cumulative[-1] + 1)] == owners
+    assert sum(simulate_wins(cumulative, 500)) == 500
+
+
+def test_probability_table_and_simulation_respect_exclusions():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE raffle_periods (id INTEGER PRIMARY KEY, discord_server_id INTEGER)"))
+        conn.execute(
+            text(
+                "CREATE TABLE raffle_tickets (id INTEGER PRIMARY KEY, period_id INTEGER, discord_id INTEGER, "
+                "kick_name TEXT, total_tickets INTEGER)"
+            )
+        )
+        conn.execute(
+            text("CREATE TABLE raffle_exclusions (discord_server_id INTEGER, kick_username TEXT, discord_id TEXT)")
+        )
+        conn.execute(text("INSERT INTO raffle_periods VALUES (1, 7)"))
+        conn.execute(
+            text(
+                "INSERT INTO raffle_tickets (period_id, discord_id, kick_name, total_tickets) VALUES "
+                "(1, 100, 'alice', 30), (1, 200, 'bob', 10), (1, 300, 'Streamer', 60), (1, 400, 'idle', 0)"
+            )
+        )
+        conn.execute(text("INSERT INTO raffle_exclusions VALUES (7, 'streamer', NULL)"))
+
+    draw = RaffleDraw(engine)
+    table = draw.get_win_probability_table(1)
+    assert set(table) == {100, 200}
+    assert table[100]["odds"] == "30/40" and table[100]["probability_percent"] == 75.0
+    assert draw.get_user_win_probability(300, 1) is None  # excluded from draws, so no odds
+
+    result = draw.simulate_draw(1, num_simulations=2000, vectorized=False)
+    assert result["mode"] == "bisect" and result["total_tickets"] == 40
+    assert sum(r["actual_wins"] for r in result["results"]) == 2000
+
+
+def test_cached_odds_follow_ticket_writes_and_new_holders():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE raffle_periods (id INTEGER PRIMARY KEY, discord_server_id INTEGER)"))
+        conn.execute(
+            text(
+                "CREATE TABLE raffle_tickets (id INTEGER PRIMARY KEY, period_id INTEGER, discord_id INTEGER, "
+                "kick_name TEXT, total_tickets INTEGER)"
+            )
+        )
+        conn.execute(
+            text("CREATE TABLE raffle_exclusions (discord_server_id INTEGER, kick_username TEXT, discord_id TEXT)")
+        )
+        conn.execute(text("INSERT INTO raffle_periods VALUES (1, 7)"))
+        conn.execute(
+            text(
+                "INSERT INTO raffle_tickets (period_id, discord_id, kick_name, total_tickets) VALUES (1, 100, 'alice', 10)"
+            )
+        )
+
+    draw = RaffleDraw(engine)
+    assert draw.get_user_win_probability(100, 1)["odds"] == "10/10"
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO raffle_tickets (period_id, discord_id, kick_name, total_tickets) VALUES (1, 200, 'bob', 30)"
+            )
+        )
+    cached = draw._probability_tables[1]
+    # A new holder is not in the cached table: looked up on their own rather than reported as None.
+    assert draw.get_user_win_probability(200, 1)["odds"] == "30/40"
+    assert draw.get_user_win_probability(999, 1) is None
+    assert draw._probability_tables[1] is cached  # misses don't rebuild or replace the table
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE raffle_tickets SET total_tickets = 60 WHERE discord_id = 200"))
+    leaderboard_cache.apply(7, 1, [{"discord_id": 200, "total_tickets": 60}])
+    assert draw.get_user_win_probability(100, 1)["odds"] == "10/70"
@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+
+from raffle_system.leaderboard_cache import RaffleLeaderboardCache, leaderboard_cache, stage_rows
+from raffle_system.tickets import TicketManager
+
+RANK_SQL = """
+    SELECT discord_id, RANK() OVER (ORDER BY total_tickets DESC)
+    FROM raffle_tickets WHERE period_id = 1 AND total_tickets > 0
+"""
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE raffle_periods (id INTEGER PRIMARY KEY, discord_server_id INTEGER)"))
+        conn.execute(
+            text(
+                "CREATE TABLE raffle_tickets (id INTEGER PRIMARY KEY, period_id INTEGER, discord_server_id INTEGER, "
+                "discord_id INTEGER, kick_name TEXT, watchtime_tickets INTEGER DEFAULT 0, "
+                "gifted_sub_tickets INTEGER DEFAULT 0, shuffle_wager_tickets INTEGER DEFAULT 0, "
+                "bonus_tickets INTEGER DEFAULT 0, total_tickets INTEGER DEFAULT 0, last_updated TIMESTAMP, "
+                "UNIQUE (period_id, discord_id))"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE raffle_ticket_log (period_id INTEGER, discord_id INTEGER, kick_name TEXT, "
+                "ticket_change INTEGER, source TEXT, description TEXT)"
+            )
+        )
+        conn.execute(text("INSERT INTO raffle_periods VALUES (1, 7)"))
+    return engine
+
+
+def test_awards_update_the_cached_ranks_like_sql_rank():
+    engine = _engine()
+    leaderboard_cache.bind(engine)
+    manager = TicketManager(engine, server_id=7)
+
+    manager.award_tickets(100, "alice", 50, "watchtime", period_id=1)
+    manager.award_tickets(200, "bob", 20, "bonus", period_id=1)
+    assert manager.get_user_rank(200, period_id=1) == 2  # board loaded here
+    loads = leaderboard_cache.loads
+
+    manager.award_tickets(300, "cara", 50, "gifted_sub", period_id=1)
+    manager.award_tickets(200, "bob", 40, "watchtime", period_id=1)
+    top = manager.get_leaderboard(limit=3, period_id=1)
+    assert [(row["kick_name"], row["total_tickets"], row["rank"]) for row in top] == [
+        ("bob", 60, 1),
+        ("alice", 50, 2),
+        ("cara", 50, 2),
+    ]
+    assert top[0]["watchtime_tickets"] == 40 and top[0]["bonus_tickets"] == 20
+    assert leaderboard_cache.loads == loads  # applied in place, no reload
+
+    with engine.connect() as conn:
+        expected = dict(conn.execute(text(RANK_SQL)).fetchall())
+    assert {did: manager.get_user_rank(did, period_id=1) for did in expected} == expected
+
+    # A raw write the cache can't follow drops the board on commit.
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE raffle_tickets SET total_tickets = 0 WHERE discord_id = 200"))
+    assert manager.get_user_rank(200, period_id=1) is None
+    assert manager.get_user_rank(100, period_id=1) == 1
+    assert leaderboard_cache.loads == loads + 1
+
+
+def test_a_load_that_races_an_apply_is_not_kept():
+    engine = _engine()
+    cache = RaffleLeaderboardCache()
+    cache.bind(engine)
+
+    class RacingEngine:
+        def connect(self):
+            # A commit lands between the load's version check and its SELECT.
+            cache.apply(7, 1, [{"discord_id": 100, "kick_name": "alice", "total_tickets": 5}])
+            return engine.connect()
+
+    cache._engine = RacingEngine()
+    assert cache.top(7, 1) == []  # the reader still gets its snapshot
+    assert cache.stats()["boards"] == 0 and cache.stats()["discarded_loads"] == 1
+
+
+def test_staged_rows_wait_for_the_commit_to_succeed():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, record):
+        dbapi_connection.execute("PRAGMA foreign_keys = ON")
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE parent (id INTEGER PRIMARY KEY)"))
+        conn.execute(
+            text("CREATE TABLE child (parent_id INTEGER REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED)")
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE raffle_tickets (period_id INTEGER, discord_server_id INTEGER, discord_id INTEGER, "
+                "kick_name TEXT, watchtime_tickets INTEGER, gifted_sub_tickets INTEGER, "
+                "shuffle_wager_tickets INTEGER, bonus_tickets INTEGER, total_tickets INTEGER)"
+            )
+        )
+    leaderboard_cache.bind(engine)
+    leaderboard_cache.invalidate()
+    assert leaderboard_cache.top(7, 1) == []
+
+    row = (100, "alice", 0, 0, 0, 9, 9)
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            stage_rows(conn, 7, 1, [row])
+            conn.execute(text("INSERT INTO child VALUES (42)"))  # fails at COMMIT, not here
+    assert leaderboard_cache.top(7, 1) == []
+
+    with engine.begin() as conn:
+        stage_rows(conn, 7, 1, [row])
+    assert [entry["kick_name"] for entry in leaderboard_cache.top(7, 1)] == ["alice"]
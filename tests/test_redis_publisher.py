@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+
+from utils.redis_publisher import BufferedRedisPublisher
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def publish(self, channel, message):
+        self.commands.append((channel, message))
+
+    async def execute(self):
+        if self.client.delay:
+            await asyncio.sleep(self.client.delay)
+        if self.client.fail:
+            raise ConnectionError("redis down")
+        self.client.pipelines.append(self.commands)
+
+
+class FakeRedis:
+    def __init__(self, delay=0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def test_events_are_flushed_in_pipelined_batches_and_coalesced():
+    async def scenario():
+        fake = FakeRedis()
+        publisher = BufferedRedisPublisher("redis://fake", batch_size=50, client_factory=lambda: fake)
+        publisher.bind()
+        for i in range(120):
+            assert publisher.publish("kick_chat", "message", {"n": i}, signed=True)
+        publisher.publish("bot:stream_status", "stream_live", {"s": 1}, coalesce_key="status:1")
+        publisher.publish("bot:stream_status", "stream_offline", {"s": 1}, coalesce_key="status:1")
+        while publisher.stats()["buffered"]:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+
+        assert [len(p) for p in fake.pipelines] == [50, 50, 21]
+        messages = [json.loads(m) for p in fake.pipelines for _, m in p]
+        assert [m["data"]["n"] for m in messages[:120]] == list(range(120))
+        assert "timestamp" in messages[0]
+        assert messages[-1]["action"] == "stream_offline"
+        assert publisher.stats() == {
+            "enqueued": 122,
+            "flushed": 121,
+            "dropped": 0,
+            "coalesced": 1,
+            "flush_failures": 0,
+            "buffered": 0,
+        }
+
+    asyncio.run(scenario())
+
+
+def test_slow_or_failing_redis_never_blocks_publish():
+    async def scenario():
+        fake = FakeRedis(delay=5)
+        publisher = BufferedRedisPublisher("redis://fake", buffer_size=100, batch_size=10, client_factory=lambda: fake)
+        publisher.bind()
+        start = time.perf_counter()
+        for i in range(1000):
+            publisher.publish("kick_chat", "message", {"n": i})
+        assert time.perf_counter() - start < 0.5
+
+        # The first batch is stuck in the slow pipeline; the rest is capped at the
+        # buffer size with the oldest events dropped.
+        await asyncio.sleep(0.05)
+        stats = publisher.stats()
+        assert stats["buffered"] <= 100
+        assert stats["dropped"] >= 1000 - 100 - 10
+        assert publisher._buffer[-1][1]["data"] == {"n": 999}
+
+    asyncio.run(scenario())
+
+
+def test_unbound_loops_are_refused_and_close_drains_the_buffer():
+    fake = FakeRedis()
+    publisher = BufferedRedisPublisher("redis://fake", client_factory=lambda: fake)
+
+    async def short_lived_script():
+        # Not the bot loop: buffering here would lose the event when asyncio.run returns.
+        return publisher.publish("bot:webhooks", "subscriptions_changed", {"s": 1})
+
+    assert asyncio.run(short_lived_script()) is False
+
+    async def bot_lifetime():
+        publisher.bind()
+        for i in range(3):
+            assert publisher.publish("kick_chat", "message", {"n": i})
+        await publisher.close()
+        return publisher.publish("kick_chat", "message", {"n": 3})
+
+    assert asyncio.run(bot_lifetime()) is False
+    assert [json.loads(m)["data"]["n"] for p in fake.pipelines for _, m in p] == [0, 1, 2]
+    assert publisher.stats()["buffered"] == 0 and publisher.stats()["dropped"] == 0
@@ -0,0 +1,90 @@
+import asyncio
+
+import discord
+from sqlalchemy import create_engine, text
+
+from core.db_executor import GuildFairExecutor
+from core.role_sync import QUEUE_TABLE_DDL, RoleSyncQueue, enqueue
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+
+
+class FakeMember:
+    def __init__(self, member_id, roles=(), forbid=False):
+        self.id = member_id
+        self.display_name = f"member{member_id}"
+        self.roles = list(roles)
+        self.forbid = forbid
+        self.add_calls = []
+        self.dms = []
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def add_roles(self, *roles, reason=None):
+        if self.forbid:
+            raise discord.Forbidden(type("Response", (), {"status": 403, "reason": "Forbidden"})(), "no")
+        self.add_calls.append([role.name for role in roles])
+        self.roles.extend(roles)
+
+    async def send(self, embed=None):
+        self.dms.append(embed.description)
+
+
+class FakeGuild:
+    def __init__(self, guild_id, roles, members):
+        self.id = guild_id
+        self.roles = roles
+        self._members = {member.id: member for member in members}
+        self.me = type("Me", (), {"guild_permissions": discord.Permissions(manage_roles=True)})()
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+
+def test_queued_crossings_coalesce_per_member_and_survive_a_restart(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'roles.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(QUEUE_TABLE_DDL))
+        # Two ticks queue the same crossing, then a later one; one row per (member, role).
+        enqueue(conn, 7, [{"discord_id": 1, "role_name": "Fan", "kick_name": "alice", "minutes": 60}])
+        enqueue(
+            conn,
+            7,
+            [
+                {"discord_id": 1, "role_name": "Fan", "kick_name": "alice", "minutes": 61},
+                {"discord_id": 1, "role_name": "Regular", "kick_name": "alice", "minutes": 61},
+                {"discord_id": 2, "role_name": "Fan", "kick_name": "bob", "minutes": 70},
+                {"discord_id": 3, "role_name": "Fan", "kick_name": "cara", "minutes": 90},
+                {"discord_id": 4, "role_name": "Deleted Role", "kick_name": "dan", "minutes": 90},
+            ],
+        )
+        assert conn.execute(text("SELECT COUNT(*) FROM role_sync_queue")).scalar() == 5
+
+    fan, regular = FakeRole(10, "Fan"), FakeRole(11, "Regular")
+    alice, bob, cara = FakeMember(1), FakeMember(2, roles=[fan]), FakeMember(3, forbid=True)
+    guild = FakeGuild(7, [fan, regular], [alice, bob, cara, FakeMember(4)])
+    bot = type("Bot", (), {"get_guild": lambda self, guild_id: guild if guild_id == 7 else None})()
+
+    async def scenario():
+        # A fresh queue object, as after a restart: everything comes from the table.
+        executor = GuildFairExecutor(max_workers=2)
+        queue = RoleSyncQueue(executor=executor, batch_size=2)
+        queue.bind(engine, bot)
+        await queue.drain(7)
+        executor.shutdown()
+        return queue.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert alice.add_calls == [["Fan", "Regular"]]  # one call for both roles
+    assert alice.dms == ["Congratulations! You've earned **Fan** and **Regular** roles!"]
+    assert bob.add_calls == [] and bob.dms == []  # already held the role
+    assert cara.dms == []  # Forbidden: dropped, no DM
+    assert stats["granted"] == 2 and stats["dms_sent"] == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM role_sync_queue")).scalar() == 0
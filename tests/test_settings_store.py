@@ -0,0 +1,80 @@
+from sqlalchemy import create_engine, text
+
+from utils.bot_settings import BotSettingsManager
+from utils.settings_store import SettingsStore, settings_store
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE bot_settings (key TEXT, value TEXT, discord_server_id INTEGER)"))
+        conn.execute(
+            text(
+                "INSERT INTO bot_settings (key, value, discord_server_id) VALUES "
+                "('kick_channel', 'global', NULL), ('kick_channel', 'one', 1), ('clip_duration', '45', 1)"
+            )
+        )
+    return engine
+
+
+def test_snapshot_merges_global_and_serves_repeat_reads_from_memory():
+    store = SettingsStore(max_age=3600)
+    store.bind(_engine())
+    assert store.stats()["db_loads"] == 1
+
+    assert store.snapshot(1) == {"kick_channel": "one", "clip_duration": "45"}
+    assert store.snapshot(1) is store.snapshot(1)
+    assert store.snapshot(2) == {"kick_channel": "global"}
+    assert store.get(2, "kick_channel") is None  # guild-scoped lookups don't inherit global rows
+    assert store.get(1, "clip_duration") == "45"
+
+    store.invalidate(1)
+    assert store.get(1, "kick_channel") == "one"
+    stats = store.stats()
+    assert stats["invalidations"] == 1 and stats["hits"] > stats["misses"]
+
+
+def test_local_write_invalidates_bound_store_on_commit():
+    engine = _engine()
+    settings_store.bind(engine)
+    manager = BotSettingsManager(engine, guild_id=1)
+    assert manager.kick_channel == "one"
+    loads = settings_store.db_loads
+
+    manager.refresh()
+    assert settings_store.db_loads == loads
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE bot_settings SET value = 'renamed' WHERE key = 'kick_channel' AND discord_server_id = 1")
+        )
+    manager.refresh()
+    assert manager.kick_channel == "renamed"
+    assert settings_store.db_loads == loads + 1
+
+
+def test_local_write_invalidates_only_the_guild_it_wrote():
+    engine = _engine()
+    settings_store.bind(engine)
+    assert settings_store.snapshot(1)["kick_channel"] == "one"
+    assert settings_store.snapshot(2) == {"kick_channel": "global"}
+    loads = settings_store.db_loads
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO bot_settings (key, value, discord_server_id) VALUES ('clip_duration', '30', :sid)"),
+            {"sid": 2},
+        )
+        # Not invalidated before the commit completes.
+        assert settings_store.snapshot(2) == {"kick_channel": "global"}
+    assert settings_store.snapshot(1)["kick_channel"] == "one"
+    assert settings_store.db_loads == loads  # guild 1 untouched
+    assert settings_store.snapshot(2) == {"kick_channel": "global", "clip_duration": "30"}
+    assert settings_store.db_loads == loads + 1
+
+    # A write to the global rows can't be pinned to one guild: everything reloads.
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE bot_settings SET value = 'g2' WHERE key = 'kick_channel' AND discord_server_id IS NULL")
+        )
+    assert settings_store.snapshot(3) == {"kick_channel": "g2"}
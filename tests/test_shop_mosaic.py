@@ -0,0 +1,67 @@
+import asyncio
+import io
+
+from aiohttp import web
+from PIL import Image
+
+from utils import shop_mosaic
+from utils.http_pool import http_pool
+
+
+def _png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_unchanged_shop_is_served_from_cache_and_images_revalidate(tmp_path, monkeypatch):
+    monkeypatch.setattr(shop_mosaic, "CACHE_DIR", str(tmp_path))
+    images = {f"/item{i}.png": _png((i * 40, 80, 120)) for i in range(5)}
+    requests = []
+    versions = {}
+
+    async def serve(request):
+        requests.append((request.path, request.headers.get("If-None-Match")))
+        etag = f'"{request.path}-v{versions.get(request.path, 1)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        return web.Response(body=images[request.path], content_type="image/png", headers={"ETag": etag})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/{name}", serve)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        items = [
+            (i, f"Item {i}", "", 100 * (i + 1), 5, f"http://127.0.0.1:{port}/item{i}.png", True, None, None)
+            for i in range(5)
+        ]
+        first = (await shop_mosaic.create_shop_mosaic_image(items)).getvalue()
+        assert len(requests) == 5 and all(etag is None for _, etag in requests)
+
+        # Same items, prices and stock: every image is a conditional 304 hit, no render.
+        again = (await shop_mosaic.create_shop_mosaic_image(items)).getvalue()
+        assert again == first
+        assert len(requests) == 10 and all(etag for _, etag in requests[5:])
+
+        # Stock changed: re-rendered from the revalidated thumbnails.
+        items[0] = items[0][:4] + (0,) + items[0][5:]
+        sold_out = (await shop_mosaic.create_shop_mosaic_image(items)).getvalue()
+        assert sold_out != first and len(requests) == 15
+
+        # A new image behind the same URL: downloaded and re-rendered, not served from cache.
+        images["/item1.png"], versions["/item1.png"] = _png((250, 250, 0)), 2
+        replaced = (await shop_mosaic.create_shop_mosaic_image(items)).getvalue()
+        assert replaced != sold_out
+        await http_pool.close()
+        await runner.cleanup()
+        return Image.open(io.BytesIO(sold_out)).size
+
+    width, height = asyncio.run(scenario())
+    assert width == 2400 and height > 0
+    stats = shop_mosaic.stats()
+    assert stats["renders"] == 3 and stats["not_modified"] == 14 and stats["mosaic_hits"] >= 1
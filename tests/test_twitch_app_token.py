@@ -0,0 +1,74 @@
+import asyncio
+
+from aiohttp import web
+
+from core import twitch_api
+from core.twitch_api import TwitchAPI
+
+
+def test_app_token_is_cached_shared_and_renewed_on_401(monkeypatch):
+    issued = []
+    connections = set()
+    sent = []
+
+    async def token(request):
+        await asyncio.sleep(0.05)  # give concurrent callers a chance to pile up
+        issued.append(f"app-{len(issued) + 1}")
+        return web.json_response({"access_token": issued[-1], "expires_in": 5_000_000, "token_type": "bearer"})
+
+    async def chat(request):
+        connections.add(request.transport)
+        if request.headers["Authorization"] != f"Bearer {issued[-1]}":
+            return web.json_response({"message": "Invalid OAuth token"}, status=401)
+        sent.append((await request.json())["message"])
+        return web.json_response({"data": [{"message_id": str(len(sent)), "is_sent": True}]})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/token", token)
+        app.router.add_post("/chat", chat)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        monkeypatch.setattr(twitch_api, "TWITCH_TOKEN_URL", f"http://127.0.0.1:{port}/token")
+        monkeypatch.setattr(twitch_api, "TWITCH_CHAT_MESSAGES_URL", f"http://127.0.0.1:{port}/chat")
+
+        api = TwitchAPI(client_id="id", client_secret="secret")
+        # A burst of concurrent token requests shares one client_credentials call.
+        tokens = await asyncio.gather(*(api.ensure_app_token() for _ in range(10)))
+        assert set(tokens) == {"app-1"} and len(issued) == 1
+
+        for i in range(5):
+            result = await api.send_chat_message("100", "200", f"line {i}")
+            assert result["is_sent"]
+        warm = api.stats()
+        assert warm["token_refreshes"] == 1 and warm["sends"] == 5 and warm["requests"] == 5
+        assert len(connections) == 1  # every reply rode the same keep-alive connection
+
+        # Twitch revoked the token: the next send re-authenticates and goes through.
+        issued.append("revoked-elsewhere")
+        assert (await api.send_chat_message("100", "200", "after revoke"))["is_sent"]
+        await api.close()
+        await runner.cleanup()
+        return api.stats()
+
+    stats = asyncio.run(scenario())
+    assert sent == [f"line {i}" for i in range(5)] + ["after revoke"]
+    assert stats["token_refreshes"] == 2 and stats["reauths"] == 1 and stats["sends"] == 6
+
+
+def test_app_client_is_closed_at_shutdown(monkeypatch):
+    monkeypatch.setattr(twitch_api, "_app_client", None)
+    assert twitch_api.app_client_stats() is None  # never used: nothing to report or close
+
+    async def scenario():
+        client = twitch_api.get_app_client()
+        session = await client._get_session()
+        assert twitch_api.app_client_stats() == {"token_refreshes": 0, "reauths": 0, "requests": 0, "sends": 0}
+        await twitch_api.close_app_client()
+        assert session.closed and twitch_api._app_client is None
+        await twitch_api.close_app_client()  # idempotent
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+"""
+After-Commit Hooks
+Run in-process cache updates only once a transaction has really committed.
+
+SQLAlchemy's Connection "commit" event fires before the DBAPI commit, so a
+cache updated from it can change (or be reloaded by another thread) while the
+transaction is still open, or even though the commit then fails. on_commit()
+wraps the engine dialect's do_commit instead:
+
+- handler(engine, info, True) runs after the DBAPI commit returned, with the
+  connection's ``info`` dict (the same dict as ``conn.info``), so state staged
+  there during the transaction can be applied.
+- handler(engine, info, False) runs when the commit raised, so staged state
+  can be dropped before the error propagates.
+- A handler that raises is logged and skipped; the commit itself already
+  happened and the caller should not see the error.
+
+Used by raffle_system/leaderboard_cache.py, utils/settings_store.py and
+features/custom_commands/manager.py.
+"""
+
+import logging
+from typing import Callable
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Engine, dict, bool], None]
+
+
+def _run(handlers, engine: Engine, info: dict, committed: bool):
+    for handler in list(handlers):
+        try:
+            handler(engine, info, committed)
+        except Exception as e:
+            logger.warning(f"⚠️ After-commit hook {getattr(handler, '__qualname__', handler)} failed: {e}")
+
+
+def on_commit(engine: Engine, handler: Handler):
+    """Call ``handler`` after every outermost commit on ``engine`` (see module docstring). Idempotent."""
+    dialect = engine.dialect
+    handlers = dialect.__dict__.get("_after_commit_handlers")
+    if handlers is None:
+        handlers = []
+        do_commit = dialect.do_commit
+
+        def do_commit_then_run_hooks(dbapi_connection):
+            # dbapi_connection is the pool's proxied connection; its info is conn.info.
+            info = getattr(dbapi_connection, "info", None)
+            try:
+                do_commit(dbapi_connection)
+            except BaseException:
+                if info is not None:
+                    _run(handlers, engine, info, False)
+                raise
+            if info is not None:
+                _run(handlers, engine, info, True)
+
+        dialect.do_commit = do_commit_then_run_hooks
+        dialect._after_commit_handlers = handlers
+    if handler not in handlers:
+        handlers.append(handler)
@@ -12,6 +12,8 @@ from typing import Any, Dict, Optional, Union
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
+from utils.settings_store import settings_store
+
 logger = logging.getLogger(__name__)
 
 
@@ -83,6 +85,17 @@ class BotSettingsManager:
         # Use provided guild_id or instance's guild_id
         active_guild_id = guild_id if guild_id is not None else self._guild_id
 
+        # The bot's engine is backed by the process-wide snapshot store, so
+        # frequent refreshes only hit the database after an invalidation.
+        if settings_store.is_bound_to(self._engine):
+            try:
+                self._cache = dict(settings_store.snapshot(active_guild_id or None))
+                self._last_loaded = datetime.now(timezone.utc)
+                return True
+            except Exception as e:
+                logger.warning(f"[Settings] Error loading settings: {e}")
+                return False
+
         try:
             with self._engine.connect() as conn:
                 if active_guild_id:
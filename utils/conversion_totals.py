@@ -0,0 +1,327 @@
+"""
+Conversion Running Totals
+Materialized per-user totals for the append-only watchtime conversion logs.
+
+Both conversion paths need "how many minutes has this user already converted":
+  - points: SUM(points_watchtime_converted) per (server, username)
+  - raffle: SUM(raffle_watchtime_converted) per (period, username)
+
+Those logs only grow, so summing them every tick gets slower for the life of a
+deployment. These tables keep the running totals instead, so the hot paths read
+one row per active user.
+
+The totals are maintained by statement-level AFTER triggers on the log tables,
+so they change in the same transaction as every conversion insert — including
+writes from admin commands, the rename handler and the dashboard, which all
+touch the logs directly. reconcile_conversion_totals() checks them against the
+logs (the source of truth) and can rebuild them.
+
+The migrations need PostgreSQL (transition-table triggers, LOCK TABLE,
+to_regclass) and are skipped on any other database.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Closed set of ledgers; every identifier interpolated into SQL below comes from here.
+LEDGERS = {
+    "points": {
+        "log": "points_watchtime_converted",
+        "totals": "points_conversion_totals",
+        "scope": "discord_server_id",
+        "user": "kick_username",
+        "amount": "points_awarded",
+        "scope_type": "BIGINT NOT NULL",
+        # How to restrict a ledger to one Discord server.
+        "server_filter": "discord_server_id = :sid",
+    },
+    "raffle": {
+        "log": "raffle_watchtime_converted",
+        "totals": "raffle_conversion_totals",
+        "scope": "period_id",
+        "user": "kick_name",
+        "amount": "tickets_awarded",
+        "scope_type": "INTEGER NOT NULL REFERENCES raffle_periods(id) ON DELETE CASCADE",
+        "server_filter": "period_id IN (SELECT id FROM raffle_periods WHERE discord_server_id = :sid)",
+    },
+}
+
+
+def _sync_function_sql(spec):
+    """plpgsql body that folds a statement's transition tables into the totals."""
+    scope, user, amount, totals = spec["scope"], spec["user"], spec["amount"], spec["totals"]
+    return f"""
+    CREATE OR REPLACE FUNCTION {totals}_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            UPDATE {totals} t
+            SET minutes_converted = t.minutes_converted - d.minutes,
+                {amount} = t.{amount} - d.amount,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT {scope}, {user}, SUM(minutes_converted) AS minutes, SUM({amount}) AS amount
+                FROM old_rows
+                WHERE {scope} IS NOT NULL AND {user} IS NOT NULL
+                GROUP BY {scope}, {user}
+            ) d
+            WHERE t.{scope} = d.{scope} AND t.{user} = d.{user};
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO {totals} ({scope}, {user}, minutes_converted, {amount}, updated_at)
+            SELECT {scope}, {user}, SUM(minutes_converted), SUM({amount}), CURRENT_TIMESTAMP
+            FROM new_rows
+            WHERE {scope} IS NOT NULL AND {user} IS NOT NULL
+            GROUP BY {scope}, {user}
+            ON CONFLICT ({scope}, {user}) DO UPDATE SET
+                minutes_converted = {totals}.minutes_converted + EXCLUDED.minutes_converted,
+                {amount} = {totals}.{amount} + EXCLUDED.{amount},
+                updated_at = CURRENT_TIMESTAMP;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+
+
+def _rebuild(conn, spec, server_id=None):
+    """Recompute totals from the log. Caller must hold the log lock."""
+    scope, user, amount = spec["scope"], spec["user"], spec["amount"]
+    where = f"AND {spec['server_filter']}" if server_id is not None else ""
+    params = {"sid": server_id} if server_id is not None else {}
+
+    conn.execute(text(f"DELETE FROM {spec['totals']} WHERE TRUE {where}"), params)
+    result = conn.execute(
+        text(
+            f"""
+        INSERT INTO {spec['totals']} ({scope}, {user}, minutes_converted, {amount}, updated_at)
+        SELECT {scope}, {user}, SUM(minutes_converted), SUM({amount}), CURRENT_TIMESTAMP
+        FROM {spec['log']}
+        WHERE {scope} IS NOT NULL AND {user} IS NOT NULL {where}
+        GROUP BY {scope}, {user}
+    """
+        ),
+        params,
+    )
+    return result.rowcount
+
+
+def _is_postgres(engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _migrate_ledger(engine, name):
+    spec = LEDGERS[name]
+    log, totals = spec["log"], spec["totals"]
+    scope, user, amount = spec["scope"], spec["user"], spec["amount"]
+
+    with engine.begin() as conn:
+        # Block concurrent conversion writes (bot ticks, dashboard) until the
+        # totals and the triggers that keep them current exist together, so no
+        # insert can land between the backfill and the trigger going live.
+        conn.execute(text(f"LOCK TABLE {log} IN SHARE ROW EXCLUSIVE MODE"))
+
+        created = conn.execute(text("SELECT to_regclass(:t) IS NULL"), {"t": totals}).scalar()
+        conn.execute(
+            text(
+                f"""
+            CREATE TABLE IF NOT EXISTS {totals} (
+                {scope} {spec['scope_type']},
+                {user} TEXT NOT NULL,
+                minutes_converted BIGINT NOT NULL DEFAULT 0,
+                {amount} BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY ({scope}, {user})
+            )
+        """
+            )
+        )
+        conn.execute(text(_sync_function_sql(spec)))
+
+        existing = {
+            row[0]
+            for row in conn.execute(
+                text("SELECT tgname FROM pg_trigger WHERE tgrelid = CAST(:t AS regclass)"), {"t": log}
+            )
+        }
+        triggers = {
+            f"trg_{totals}_ins": "AFTER INSERT ON {log} REFERENCING NEW TABLE AS new_rows",
+            f"trg_{totals}_upd": "AFTER UPDATE ON {log} REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+            f"trg_{totals}_del": "AFTER DELETE ON {log} REFERENCING OLD TABLE AS old_rows",
+        }
+        for trigger, timing in triggers.items():
+            if trigger in existing:
+                continue
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {trigger} {timing.format(log=log)} "
+                    f"FOR EACH STATEMENT EXECUTE FUNCTION {totals}_sync()"
+                )
+            )
+
+        if created:
+            rows = _rebuild(conn, spec)
+            logger.info(f"✅ Created {totals} and backfilled {rows} row(s) from {log}")
+        else:
+            logger.debug(f"✓ {totals} present and trigger-maintained")
+
+
+def migrate_add_points_conversion_totals(engine):
+    """
+    Migration: create points_conversion_totals (+ sync triggers) and backfill it.
+
+    Must run before the first watchtime tick, which reads it.
+    """
+    if not _is_postgres(engine):
+        logger.warning(f"⚠️ Skipping points_conversion_totals migration: needs PostgreSQL, not {engine.dialect.name}")
+        return False
+    try:
+        _migrate_ledger(engine, "points")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Migration failed (points_conversion_totals): {e}")
+        return False
+
+
+def migrate_add_raffle_conversion_totals(engine):
+    """
+    Migration: create raffle_conversion_totals (+ sync triggers) and backfill it.
+
+    Must run after setup_raffle_database (needs raffle_periods).
+    """
+    if not _is_postgres(engine):
+        logger.warning(f"⚠️ Skipping raffle_conversion_totals migration: needs PostgreSQL, not {engine.dialect.name}")
+        return False
+    try:
+        _migrate_ledger(engine, "raffle")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Migration failed (raffle_conversion_totals): {e}")
+        return False
+
+
+def find_conversion_drift(conn, name, server_id=None, limit=None) -> List[dict]:
+    """
+    Compare one ledger's totals against SUM() of its append-only log.
+
+    Args:
+        conn: SQLAlchemy connection
+        name: 'points' or 'raffle'
+        server_id: Restrict to one Discord server (None = all)
+        limit: Max rows to return (None = all)
+
+    Returns:
+        list: One dict per mismatched key (logged vs materialized values)
+    """
+    spec = LEDGERS[name]
+    scope, user, amount = spec["scope"], spec["user"], spec["amount"]
+    where = f"AND {spec['server_filter']}" if server_id is not None else ""
+    params = {"sid": server_id} if server_id is not None else {}
+    limit_sql = f"LIMIT {int(limit)}" if limit else ""
+
+    rows = conn.execute(
+        text(
+            f"""
+        WITH logged AS (
+            SELECT {scope}, {user}, SUM(minutes_converted) AS minutes, SUM({amount}) AS amount
+            FROM {spec['log']}
+            WHERE {scope} IS NOT NULL AND {user} IS NOT NULL {where}
+            GROUP BY {scope}, {user}
+        ),
+        materialized AS (
+            SELECT {scope}, {user}, minutes_converted AS minutes, {amount} AS amount
+            FROM {spec['totals']}
+            WHERE TRUE {where}
+        )
+        SELECT COALESCE(l.{scope}, m.{scope}), COALESCE(l.{user}, m.{user}),
+               COALESCE(l.minutes, 0), COALESCE(m.minutes, 0),
+               COALESCE(l.amount, 0), COALESCE(m.amount, 0)
+        FROM logged l
+        FULL OUTER JOIN materialized m ON m.{scope} = l.{scope} AND m.{user} = l.{user}
+        WHERE COALESCE(l.minutes, 0) <> COALESCE(m.minutes, 0)
+           OR COALESCE(l.amount, 0) <> COALESCE(m.amount, 0)
+        ORDER BY 1, 2
+        {limit_sql}
+    """
+        ),
+        params,
+    ).fetchall()
+
+    return [
+        {
+            scope: row[0],
+            "username": row[1],
+            "logged_minutes": int(row[2]),
+            "materialized_minutes": int(row[3]),
+            "logged_amount": int(row[4]),
+            "materialized_amount": int(row[5]),
+        }
+        for row in rows
+    ]
+
+
+def reconcile_conversion_totals(engine, server_id: Optional[int] = None, repair: bool = False) -> Dict[str, dict]:
+    """
+    Check (and optionally rebuild) both running-total tables against their logs.
+
+    Args:
+        engine: SQLAlchemy engine
+        server_id: Restrict to one Discord server (None = all servers)
+        repair: Rebuild mismatched scopes from the logs
+
+    Returns:
+        dict: {'points': {...}, 'raffle': {...}} with drift count, sample rows
+              and how many totals rows were rebuilt
+    """
+    report = {}
+    for name, spec in LEDGERS.items():
+        with engine.begin() as conn:
+            if repair:
+                conn.execute(text(f"LOCK TABLE {spec['log']} IN SHARE ROW EXCLUSIVE MODE"))
+            drift = find_conversion_drift(conn, name, server_id=server_id)
+            rebuilt = 0
+            if repair and drift:
+                rebuilt = _rebuild(conn, spec, server_id=server_id)
+        report[name] = {"drift": len(drift), "sample": drift[:10], "rebuilt": rebuilt}
+        if drift:
+            logger.warning(f"[Conversions] {spec['totals']}: {len(drift)} key(s) out of sync with {spec['log']}")
+    return report
+
+
+if __name__ == "__main__":
+    """
+    Backfill/reconcile from the command line:
+        python -m utils.conversion_totals            # report drift
+        python -m utils.conversion_totals --repair   # rebuild mismatched totals
+    """
+    import argparse
+    import os
+
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    load_dotenv()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server-id", type=int, default=None)
+    parser.add_argument("--repair", action="store_true")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        logger.error("❌ DATABASE_URL not found in environment variables")
+        exit(1)
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+    engine = create_engine(database_url)
+    migrate_add_points_conversion_totals(engine)
+    migrate_add_raffle_conversion_totals(engine)
+    for ledger, result in reconcile_conversion_totals(engine, server_id=args.server_id, repair=args.repair).items():
+        logger.info(f"{ledger}: drift={result['drift']} rebuilt={result['rebuilt']}")
+        for row in result["sample"]:
+            logger.info(f"   {row}")
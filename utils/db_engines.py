@@ -0,0 +1,75 @@
+"""
+Shared SQLAlchemy Engine Registry
+One engine (and therefore one connection pool) per database URL per process.
+
+The gunicorn side (core/oauth_server.py, core/kick_webhooks.py,
+core/twitch_webhooks.py, core/stream_notifications.py) used to call
+create_engine() inside request handlers, so every webhook built a brand-new
+pool and paid a fresh TCP + auth handshake. Handlers now ask this registry
+instead; engines live for the life of the worker process.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Per-process pool sizing. Gunicorn runs several workers, each with its own pool,
+# so keep these modest: workers * (size + overflow) must fit max_connections.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def normalize_database_url(database_url: str) -> str:
+    """Rewrite Heroku/Railway-style postgres:// URLs to the scheme SQLAlchemy expects."""
+    if database_url.startswith("postgres://"):
+        return database_url.replace("postgres://", "postgresql://", 1)
+    return database_url
+
+
+def get_engine(database_url: Optional[str] = None) -> Optional[Engine]:
+    """
+    Return the shared engine for a database URL, creating it on first use.
+
+    Args:
+        database_url: Connection URL; defaults to the DATABASE_URL env var
+
+    Returns:
+        Engine, or None if no URL is configured
+    """
+    database_url = database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        return None
+    database_url = normalize_database_url(database_url)
+
+    engine = _engines.get(database_url)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _engines.get(database_url)
+        if engine is None:
+            kwargs = {"pool_pre_ping": True}
+            if not database_url.startswith("sqlite"):
+                kwargs.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE_SECONDS)
+            engine = create_engine(database_url, **kwargs)
+            _engines[database_url] = engine
+            logger.debug(f"🔌 Created shared database engine (pid {os.getpid()})")
+        return engine
+
+
+def dispose_engines():
+    """Dispose every registered engine (e.g. in a gunicorn post_fork hook or on shutdown)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -0,0 +1,209 @@
+"""
+Shared HTTP Client Pool
+One process-wide aiohttp session for outbound HTTP.
+
+The Kick API helpers, the Shuffle/Howl wager polls, the shop mosaic image
+fetches and the stream-notification poster each opened their own
+aiohttp.ClientSession per call: a fresh TCP + TLS handshake every time and no
+connection reuse. They now borrow the pool's session:
+
+    async with http_session() as session:
+        async with session.get(url) as resp:
+            ...
+
+Leaving the ``async with http_session()`` block does not close anything; the
+connection goes back to the pool and stays alive for the next caller.
+
+- One TCPConnector: at most HTTP_POOL_LIMIT connections in total and
+  HTTP_POOL_LIMIT_PER_HOST per host, idle connections kept for
+  HTTP_KEEPALIVE_SECONDS, DNS answers cached for HTTP_DNS_TTL_SECONDS.
+- Default timeout HTTP_TIMEOUT_SECONDS total / HTTP_CONNECT_TIMEOUT_SECONDS to
+  connect; a request's own ``timeout=`` still wins.
+- stats() reports per-host request counts, error counts (exceptions and
+  5xx), status classes and average/max latency, gathered with an aiohttp
+  TraceConfig so no call site has to record anything.
+- A session belongs to the event loop that created it, so the pool keeps one
+  per loop (the bot's loop, the event-loop worker threads, one-off
+  asyncio.run scripts). Sessions of loops that have since closed are dropped
+  on the next lookup.
+- close() closes every session: the one on the calling loop directly, the
+  others on their own loops. The bot calls it on shutdown.
+
+The Kick hybrid client (core/kick_api.KickAPI) uses the pool as well.
+TwitchAPI and KickOfficialAPI keep a session per instance: the OAuth web
+server builds them inside short-lived event loops and closes them afterwards,
+and the bot's Twitch app client is already a single long-lived instance.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+DNS_TTL_SECONDS = int(os.getenv("HTTP_DNS_TTL_SECONDS", "300"))
+TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10"))
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "statuses", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.requests += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "avg_ms": round(self.total_ms / self.requests, 1) if self.requests else 0.0,
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class HttpClientPool:
+    """Process-wide aiohttp session with per-host metrics; see module docstring."""
+
+    def __init__(
+        self,
+        limit: int = POOL_LIMIT,
+        limit_per_host: int = POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = KEEPALIVE_SECONDS,
+        dns_ttl: int = DNS_TTL_SECONDS,
+        timeout: float = TIMEOUT_SECONDS,
+        connect_timeout: float = CONNECT_TIMEOUT_SECONDS,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        # Not weak-keyed: each session holds its loop, so the loop would never be collected
+        # anyway. Closed loops are pruned in session() instead.
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._hosts: Dict[str, _HostStats] = {}
+        self.sessions_opened = 0
+
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session for the running event loop (opened on first use). Do not close it."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            self._prune()
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_ttl,
+            )
+            # No cookie jar: callers share the session but not each other's cookies,
+            # as when every call had a session of its own.
+            session = self._sessions[loop] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._trace_config()],
+            )
+            self.sessions_opened += 1
+        return session
+
+    def _prune(self):
+        for loop in [loop for loop, session in self._sessions.items() if loop.is_closed() or session.closed]:
+            session = self._sessions.pop(loop)
+            if not session.closed:
+                # Its loop is gone, and its sockets with it; nothing left to close cleanly.
+                session.detach()
+
+    async def close(self):
+        """Close every loop's session and its connections (bot shutdown)."""
+        current = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        closed = 0
+        for loop, session in sessions.items():
+            if session.closed:
+                continue
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                try:
+                    await asyncio.wait_for(
+                        asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop)),
+                        CONNECT_TIMEOUT_SECONDS,
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not close an HTTP session on another loop: {e}")
+                    continue
+            else:
+                # A stopped or closed loop cannot run the close; let go of the session instead.
+                session.detach()
+                continue
+            closed += 1
+        if closed:
+            logger.info(f"🔌 Closed shared HTTP client pool ({closed} session(s))")
+
+    def _host(self, url) -> _HostStats:
+        host = url.host or "unknown"
+        stats = self._hosts.get(host)
+        if stats is None:
+            stats = self._hosts[host] = _HostStats()
+        return stats
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_start(session, ctx, params):
+            ctx.started = time.perf_counter()
+
+        async def on_end(session, ctx, params):
+            stats = self._host(params.url)
+            stats.observe((time.perf_counter() - ctx.started) * 1000)
+            status_class = f"{params.response.status // 100}xx"
+            stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+            if params.response.status >= 500:
+                stats.errors += 1
+
+        async def on_exception(session, ctx, params):
+            stats = self._host(params.url)
+            stats.observe((time.perf_counter() - ctx.started) * 1000)
+            stats.errors += 1
+
+        trace.on_request_start.append(on_start)
+        trace.on_request_end.append(on_end)
+        trace.on_request_exception.append(on_exception)
+        return trace
+
+    def stats(self) -> dict:
+        open_sessions = sum(1 for session in self._sessions.values() if not session.closed)
+        return {
+            "sessions_opened": self.sessions_opened,
+            "open": open_sessions > 0,
+            "open_sessions": open_sessions,
+            "hosts": {host: stats.as_dict() for host, stats in sorted(self._hosts.items())},
+        }
+
+
+http_pool = HttpClientPool()
+
+
+@asynccontextmanager
+async def http_session() -> AsyncIterator[aiohttp.ClientSession]:
+    """Borrow the shared session for a block; leaving the block keeps it open."""
+    yield http_pool.session()
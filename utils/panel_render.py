@@ -0,0 +1,173 @@
+"""
+Panel Render Cache
+Skips Discord message edits whose payload hasn't changed, and refreshes panels when their data changes.
+
+The slot request panel, the GTB panel and the raffle auto-leaderboard rebuilt
+their embed from the DB and edited their message on a timer for every guild,
+whether or not anything had changed. Each edit spent Discord rate-limit budget,
+and so did the fetch_message() before it. With this module:
+
+- edit() hashes the rendered payload (embed dict plus the view's component
+  layout) and skips the edit when the hash matches the last one sent for that
+  panel. The footer and timestamp are left out of the hash. They only carry
+  "Last updated ..." decoration, so they now show when the content last
+  changed.
+- Panels register() a refresh coroutine under (kind, guild_id). Code that
+  changes a panel's data calls mark_dirty(kind, guild_id): a new slot request,
+  a pick, a GTB guess, a ticket award. Bursts coalesce into one refresh after
+  PANEL_DIRTY_DELAY seconds (default 3). The panel's own min_interval cooldown
+  is still respected. mark_dirty() is safe to call from db_executor threads.
+- The panels' timers run every PANEL_SAFETY_REFRESH_SECONDS (default 900) as a
+  safety net for changes made outside this process.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRTY_DELAY_SECONDS = float(os.getenv("PANEL_DIRTY_DELAY", "3"))
+SAFETY_REFRESH_SECONDS = int(os.getenv("PANEL_SAFETY_REFRESH_SECONDS", "900"))
+
+PanelKey = Tuple[str, Optional[int]]
+
+
+def payload_digest(embed=None, view=None, content: Optional[str] = None) -> str:
+    """Stable hash of what a message edit would send, ignoring footer/timestamp decoration."""
+    embed_data = None
+    if embed is not None:
+        embed_data = {k: v for k, v in embed.to_dict().items() if k not in ("footer", "timestamp")}
+    components = view.to_components() if view is not None else None
+    payload = json.dumps(
+        {"content": content, "embed": embed_data, "components": components}, sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class PanelRenderer:
+    """Last-sent payload hashes plus dirty-flag scheduling for panels; see module docstring."""
+
+    def __init__(self, dirty_delay: float = DIRTY_DELAY_SECONDS):
+        self.dirty_delay = dirty_delay
+        self._digests: Dict[PanelKey, str] = {}
+        self._refreshers: Dict[PanelKey, Tuple[Callable[[], Awaitable], float]] = {}
+        self._last_refresh: Dict[PanelKey, float] = {}
+        self._pending: Dict[PanelKey, asyncio.TimerHandle] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.edits = 0
+        self.skipped = 0
+        self.dirty_marks = 0
+        self.dirty_refreshes = 0
+
+    # -------------------------
+    # Edits
+    # -------------------------
+
+    async def edit(self, key: PanelKey, message, *, embed=None, view=None, force: bool = False) -> bool:
+        """
+        Edit ``message`` unless the payload matches the last one sent for ``key``.
+
+        Args:
+            key: (kind, guild_id) of the panel
+            message: Message or PartialMessage to edit
+            embed: Embed to send
+            view: Optional View to send
+            force: Edit even when the payload is unchanged
+
+        Returns:
+            bool: True if an edit was sent, False if it was skipped
+        """
+        digest = payload_digest(embed, view)
+        if not force and self._digests.get(key) == digest:
+            self.skipped += 1
+            return False
+        kwargs = {"embed": embed}
+        if view is not None:
+            kwargs["view"] = view
+        await message.edit(**kwargs)
+        self._digests[key] = digest
+        self.edits += 1
+        return True
+
+    def remember(self, key: PanelKey, embed=None, view=None):
+        """Record the payload of a freshly posted panel message."""
+        self._digests[key] = payload_digest(embed, view)
+
+    def forget(self, key: PanelKey):
+        """Drop the stored hash (message deleted or replaced), so the next edit always goes out."""
+        self._digests.pop(key, None)
+
+    # -------------------------
+    # Dirty flags
+    # -------------------------
+
+    def register(self, key: PanelKey, refresh: Callable[[], Awaitable], min_interval: float = 0):
+        """Set the coroutine function that refreshes panel ``key`` when it is marked dirty."""
+        self._refreshers[key] = (refresh, min_interval)
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+    def unregister(self, key: PanelKey):
+        self._refreshers.pop(key, None)
+        self._digests.pop(key, None)
+        handle = self._pending.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+
+    def mark_dirty(self, kind: str, guild_id: Optional[int] = None):
+        """Schedule a refresh of the ``kind`` panel for ``guild_id`` (every guild when None). Any thread."""
+        keys = [key for key in list(self._refreshers) if key[0] == kind and (guild_id is None or key[1] == guild_id)]
+        if not keys or self._loop is None or self._loop.is_closed():
+            return
+        self.dirty_marks += 1
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for key in keys:
+            if running is self._loop:
+                self._schedule(key)
+            else:
+                self._loop.call_soon_threadsafe(self._schedule, key)
+
+    def _schedule(self, key: PanelKey):
+        if key in self._pending or key not in self._refreshers:
+            return  # a refresh is already coming; it will render the latest data
+        _, min_interval = self._refreshers[key]
+        since_last = time.monotonic() - self._last_refresh.get(key, float("-inf"))
+        delay = max(self.dirty_delay, min_interval - since_last)
+        self._pending[key] = self._loop.call_later(delay, self._fire, key)
+
+    def _fire(self, key: PanelKey):
+        self._pending.pop(key, None)
+        entry = self._refreshers.get(key)
+        if entry is not None:
+            self._loop.create_task(self._refresh(key, entry[0]))
+
+    async def _refresh(self, key: PanelKey, refresh: Callable[[], Awaitable]):
+        self._last_refresh[key] = time.monotonic()
+        self.dirty_refreshes += 1
+        try:
+            await refresh()
+        except Exception as e:
+            logger.error(f"Failed to refresh {key[0]} panel: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "panels": len(self._refreshers),
+            "edits": self.edits,
+            "skipped_edits": self.skipped,
+            "dirty_marks": self.dirty_marks,
+            "dirty_refreshes": self.dirty_refreshes,
+            "pending": len(self._pending),
+        }
+
+
+panel_renderer = PanelRenderer()
@@ -0,0 +1,16 @@
+"""
+Percentiles
+Nearest-rank percentile shared by the stats() of the bot's executors and
+monitors and by the scripts/benchmarks/ reports.
+"""
+
+import math
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples`` (pct in 0-100); 0.0 when there are none."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
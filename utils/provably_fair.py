@@ -7,6 +7,12 @@ import hashlib
 import secrets
 from typing import Any, Dict
 
+# Largest range provably_fair_index can draw from (one 32-bit hash word)
+MAX_INDEX_RANGE = 2**32
+
+# Stored next to draws made with provably_fair_index, so verifiers know which mapping to apply
+INDEX_ALGORITHM = "sha256-u32-rejection-v1"
+
 
 def generate_provably_fair_result(
     kick_username: str, slot_request_id: int, slot_call: str, chance_percent: float
@@ -111,3 +117,62 @@ def verify_provably_fair_result(
         return True
     except Exception:
         return False
+
+
+def provably_fair_index(proof_hash: str, n: int) -> int:
+    """
+    Map a SHA-256 proof hash to an unbiased index in [0, n).
+
+    Unlike random_value (10,000 buckets), this uses the hash's full 32-bit words
+    with rejection sampling, so every index is exactly equally likely for any n:
+
+    1. Split the 64-char hex digest into eight 32-bit words
+    2. Take the first word below the largest multiple of n that fits in 2^32
+    3. Return word % n
+    4. If all eight words are rejected, re-hash the digest and repeat
+
+    Anyone holding proof_hash can recompute the index.
+
+    Args:
+        proof_hash: Hex SHA-256 digest from generate_provably_fair_result
+        n: Size of the range (1 to 2^32)
+
+    Returns:
+        Index between 0 and n - 1
+    """
+    if not 0 < n <= MAX_INDEX_RANGE:
+        raise ValueError(f"n must be between 1 and {MAX_INDEX_RANGE}, got {n}")
+    limit = MAX_INDEX_RANGE - MAX_INDEX_RANGE % n
+    digest = proof_hash
+    while True:
+        for offset in range(0, 64, 8):
+            word = int(digest[offset : offset + 8], 16)
+            if word < limit:
+                return word % n
+        digest = hashlib.sha256(digest.encode()).hexdigest()
+
+
+def verify_provably_fair_index(
+    server_seed: str, client_seed: str, nonce: str, expected_hash: str, n: int, expected_index: int
+) -> bool:
+    """
+    Verify a draw made with provably_fair_index by recomputing the hash and index.
+
+    Args:
+        server_seed: Original server seed
+        client_seed: Original client seed
+        nonce: Original nonce
+        expected_hash: Expected proof hash
+        n: Range the index was drawn from (e.g. total tickets)
+        expected_index: Expected index (e.g. winning ticket, 0-based)
+
+    Returns:
+        True if verification succeeds, False otherwise
+    """
+    try:
+        computed_hash = hashlib.sha256(f"{server_seed}:{client_seed}:{nonce}".encode()).hexdigest()
+        if computed_hash != expected_hash:
+            return False
+        return provably_fair_index(computed_hash, int(n)) == int(expected_index)
+    except Exception:
+        return False
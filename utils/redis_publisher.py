@@ -1,16 +1,247 @@
 """
 Redis Publisher for Bot Events
 Publishes events to Redis channels for dashboard notifications
+
+Two publishers live here:
+
+- BufferedRedisPublisher: non-blocking. publish() appends to an in-memory ring
+  buffer and returns; a task on the bot's event loop flushes the buffer
+  through one redis.asyncio pipeline every REDIS_PUBLISH_FLUSH_MS milliseconds
+  (default 5) or as soon as REDIS_PUBLISH_BATCH_SIZE events (default 200) are
+  waiting. When Redis is slow or down the buffer (REDIS_PUBLISH_BUFFER_SIZE,
+  default 10000) drops its oldest events instead of blocking chat handling.
+  It only buffers once bind() has been called on the bot's loop at startup;
+  close() drains it on shutdown. Unbound, publish() returns False.
+- BotRedisPublisher: the original synchronous publisher. While the bot's loop
+  is bound it hands events to the buffered publisher; everywhere else
+  (gunicorn request threads, short-lived asyncio.run scripts whose loop would
+  exit before a flush) it publishes directly.
 """
 
+import asyncio
 import json
 import logging
 import os
+import time
+from collections import deque
+from datetime import datetime, timezone
 
 import redis
 
+from utils.redis_signing import sign_payload
+
 logger = logging.getLogger(__name__)
 
+BUFFER_SIZE = int(os.getenv("REDIS_PUBLISH_BUFFER_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("REDIS_PUBLISH_BATCH_SIZE", "200"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("REDIS_PUBLISH_FLUSH_MS", "5")) / 1000
+
+# A pipeline that takes longer than this counts as failed (its events are dropped).
+FLUSH_TIMEOUT_SECONDS = 2
+
+# Backoff between flush attempts while Redis is failing.
+RETRY_MIN_DELAY = 0.5
+RETRY_MAX_DELAY = 30
+
+
+def _redis_url():
+    url = os.getenv("REDIS_URL")
+    if url and "://" not in url:
+        url = f"redis://{url}"
+    return url
+
+
+class BufferedRedisPublisher:
+    """Ring buffer of pending events flushed to Redis in pipelined batches."""
+
+    def __init__(
+        self,
+        redis_url=None,
+        buffer_size=BUFFER_SIZE,
+        batch_size=BATCH_SIZE,
+        flush_interval=FLUSH_INTERVAL_SECONDS,
+        client_factory=None,
+    ):
+        """
+        Args:
+            redis_url: Redis URL; defaults to REDIS_URL
+            buffer_size: Pending events kept before the oldest are dropped
+            batch_size: Max events per pipeline (a full batch flushes immediately)
+            flush_interval: Seconds to wait for more events before flushing a partial batch
+            client_factory: Returns a redis.asyncio client (tests inject a fake)
+        """
+        self.redis_url = redis_url if redis_url is not None else _redis_url()
+        self.buffer_size = max(1, buffer_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._client_factory = client_factory or self._default_client
+        self._buffer = deque()  # entries: [channel, payload dict, signed, coalesce_key]
+        self._coalesce = {}  # coalesce_key -> entry still waiting in the buffer
+        self._loop = None
+        self._task = None
+        self._wake = None
+        self._client = None
+        self._flushing = False
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.flush_failures = 0
+
+    def _default_client(self):
+        import redis.asyncio as aioredis
+
+        return aioredis.from_url(self.redis_url, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
+
+    @property
+    def enabled(self):
+        return bool(self.redis_url)
+
+    def publish(self, channel, action, data=None, *, signed=False, coalesce_key=None):
+        """
+        Queue an event for publishing. Never blocks on Redis.
+
+        Args:
+            channel: Redis channel
+            action: Event action name
+            data: Event data dict
+            signed: Add a timestamp and HMAC signature (see utils/redis_signing.py)
+            coalesce_key: If an event with this key is still waiting, replace it
+                instead of queueing another one (for "latest state" events)
+
+        Returns:
+            bool: True if queued, False if Redis isn't configured or no bound loop
+            is running to flush it (publish synchronously instead)
+        """
+        if not self.redis_url:
+            return False
+        payload = {"action": action, "data": data or {}}
+        if signed:
+            payload["timestamp"] = datetime.now(timezone.utc).isoformat()
+
+        loop = self._loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._enqueue(channel, payload, signed, coalesce_key)
+        else:
+            # Called from another thread: hand the event to the flushing loop.
+            loop.call_soon_threadsafe(self._enqueue, channel, payload, signed, coalesce_key)
+        return True
+
+    def bind(self, loop=None):
+        """Buffer events and flush them on ``loop`` (the bot's, at startup; default: the running loop)."""
+        self._loop = loop or asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._client = None
+        self._task = self._loop.create_task(self._run(), name="redis-publish-flush")
+
+    async def close(self):
+        """Flush what is still buffered, then stop (bot shutdown). publish() returns False afterwards."""
+        deadline = time.monotonic() + FLUSH_TIMEOUT_SECONDS
+        while (self._buffer or self._flushing) and self._task is not None and time.monotonic() < deadline:
+            self._wake.set()
+            await asyncio.sleep(self.flush_interval or 0.001)
+        task, self._task, self._loop = self._task, None, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._buffer:
+            self.dropped += len(self._buffer)
+            logger.warning(f"⚠️ Redis publisher closed with {len(self._buffer)} events unsent")
+            self._buffer.clear()
+            self._coalesce.clear()
+
+    def _enqueue(self, channel, payload, signed, coalesce_key):
+        self.enqueued += 1
+        if coalesce_key is not None:
+            entry = self._coalesce.get(coalesce_key)
+            if entry is not None:
+                entry[0], entry[1], entry[2] = channel, payload, signed
+                self.coalesced += 1
+                return
+        if len(self._buffer) >= self.buffer_size:
+            self._forget(self._buffer.popleft())
+            self.dropped += 1
+        entry = [channel, payload, signed, coalesce_key]
+        self._buffer.append(entry)
+        if coalesce_key is not None:
+            self._coalesce[coalesce_key] = entry
+        self._wake.set()
+
+    def _forget(self, entry):
+        if entry[3] is not None and self._coalesce.get(entry[3]) is entry:
+            del self._coalesce[entry[3]]
+
+    def _take_batch(self):
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            entry = self._buffer.popleft()
+            self._forget(entry)
+            batch.append(entry)
+        return batch
+
+    async def _run(self):
+        delay = RETRY_MIN_DELAY
+        while True:
+            if not self._buffer:
+                self._wake.clear()
+                await self._wake.wait()
+            if len(self._buffer) < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+
+            batch = self._take_batch()
+            self._flushing = True
+            try:
+                await self._flush(batch)
+                self.flushed += len(batch)
+                delay = RETRY_MIN_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.flush_failures += 1
+                self.dropped += len(batch)
+                self._client = None
+                if self.flush_failures == 1 or self.flush_failures % 100 == 0:
+                    logger.warning(
+                        f"⚠️ Redis publish flush failed ({self.flush_failures} failures, "
+                        f"{self.dropped} events dropped): {e}"
+                    )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+            finally:
+                self._flushing = False
+
+    async def _flush(self, batch):
+        if self._client is None:
+            self._client = self._client_factory()
+        pipe = self._client.pipeline(transaction=False)
+        for channel, payload, signed, _ in batch:
+            pipe.publish(channel, json.dumps(sign_payload(payload) if signed else payload))
+        await asyncio.wait_for(pipe.execute(), timeout=FLUSH_TIMEOUT_SECONDS)
+
+    def stats(self):
+        """Counters for logging and tests."""
+        return {
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "flush_failures": self.flush_failures,
+            "buffered": len(self._buffer),
+        }
+
+
+buffered_redis_publisher = BufferedRedisPublisher()
+
 
 class BotRedisPublisher:
     def __init__(self):
@@ -41,11 +272,18 @@ class BotRedisPublisher:
             self.client = None
             self.enabled = False
 
-    def publish(self, channel, action, data=None):
-        """Publish an event to a Redis channel, reconnecting if needed"""
+    def publish(self, channel, action, data=None, coalesce_key=None):
+        """Publish an event to a Redis channel, reconnecting if needed.
+
+        While the bot's loop is bound the event is buffered (see
+        BufferedRedisPublisher) rather than sent inline.
+        """
         if not self.redis_url:
             return False
 
+        if buffered_redis_publisher.publish(channel, action, data, coalesce_key=coalesce_key):
+            return True
+
         # Lazy reconnect if not connected
         if not self.enabled or not self.client:
             self._connect()
@@ -55,7 +293,7 @@ class BotRedisPublisher:
         try:
             message = json.dumps({"action": action, "data": data or {}})
             self.client.publish(channel, message)
-            logger.info(f"📤 Bot published to {channel}: {action}")
+            logger.debug(f"📤 Bot published to {channel}: {action}")
             return True
         except Exception as e:
             logger.error(f"❌ Failed to publish to {channel}: {e}")
@@ -85,12 +323,16 @@ class BotRedisPublisher:
             "bot:stream_status",
             "stream_live",
             {"discord_server_id": discord_server_id, "streamer": streamer, "stream_url": stream_url},
+            coalesce_key=f"stream_status:{discord_server_id}",
         )
 
     def publish_stream_offline(self, discord_server_id, streamer):
         """Publish stream offline event to dashboard"""
         return self.publish(
-            "bot:stream_status", "stream_offline", {"discord_server_id": discord_server_id, "streamer": streamer}
+            "bot:stream_status",
+            "stream_offline",
+            {"discord_server_id": discord_server_id, "streamer": streamer},
+            coalesce_key=f"stream_status:{discord_server_id}",
         )
 
     def publish_wager(self, discord_server_id, shuffle_username, kick_name, platform, wager_delta, total_wager_usd):
@@ -0,0 +1,288 @@
+"""
+Settings Store
+Process-wide, versioned snapshot of the bot_settings table for every guild.
+
+BotSettingsManager.refresh() used to re-read a guild's settings on every call
+(kick_chat_loop every 30s, a fresh manager per forwarded Twitch chat message),
+and many tasks ran their own `SELECT key, value FROM bot_settings`. Once bound
+to an engine (bot.py does this at startup), the store answers all of those
+from memory:
+
+- bind() loads every row in one query.
+- Guild snapshots are rebuilt only when something changed. The
+  dashboard:bot_settings Redis events call invalidate() for the affected
+  guild (or all guilds). Commits in this process that write bot_settings
+  invalidate the guilds they wrote (read from the statement's
+  discord_server_id parameter) once the commit has completed
+  (utils/after_commit.py). A write whose guild can't be told invalidates
+  everything. A load that overlaps an invalidation is not kept.
+- A snapshot older than SETTINGS_STORE_MAX_AGE seconds (default 300) is
+  reloaded on read. This catches writers that publish nothing, e.g. one-off
+  scripts.
+- stats() exposes hit/miss/stale-reload counters and the oldest snapshot age.
+
+Snapshots are shared dicts: treat them as read-only.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from utils.after_commit import on_commit
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_SECONDS = float(os.getenv("SETTINGS_STORE_MAX_AGE", "300"))
+
+_GLOBAL = None  # entry key for discord_server_id IS NULL rows
+
+
+class _Entry:
+    __slots__ = ("values", "version", "loaded_at")
+
+    def __init__(self, values: Dict[str, str], version: int):
+        self.values = values
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+
+class SettingsStore:
+    """bot_settings rows per guild, loaded once and invalidated on change; see module docstring."""
+
+    def __init__(self, max_age: float = MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._engine: Optional[Engine] = None
+        self._entries: Dict[Optional[int], _Entry] = {}
+        self._merged = {}  # guild_id -> (global version, guild version, merged dict)
+        self._full_load_needed = True
+        self._version = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_reloads = 0
+        self.invalidations = 0
+        self.db_loads = 0
+
+    # -------------------------
+    # Binding / loading
+    # -------------------------
+
+    def bind(self, engine: Engine) -> bool:
+        """Attach to the bot's engine and load every guild's settings in one query."""
+        self._engine = engine
+        _install_write_hook()
+        on_commit(engine, _after_commit)
+        return self._load_all()
+
+    def is_bound_to(self, engine) -> bool:
+        return self._engine is not None and engine is self._engine
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def _load_all(self) -> bool:
+        seen = self.invalidations
+        try:
+            with self._engine.connect() as conn:
+                rows = conn.execute(text("SELECT discord_server_id, key, value FROM bot_settings")).fetchall()
+        except Exception as e:
+            logger.warning(f"[Settings] Error loading settings snapshot: {e}")
+            return False
+
+        grouped: Dict[Optional[int], Dict[str, str]] = {_GLOBAL: {}}
+        for guild_id, key, value in rows:
+            grouped.setdefault(int(guild_id) if guild_id is not None else _GLOBAL, {})[key] = value
+        with self._lock:
+            self.db_loads += 1
+            self._entries = {guild_id: _Entry(values, self._next_version()) for guild_id, values in grouped.items()}
+            self._merged.clear()
+            # Invalidated during the SELECT: serve this load, but read again next time.
+            self._full_load_needed = self.invalidations != seen
+        logger.debug(f"[Settings] Snapshot loaded: {len(rows)} settings across {len(grouped) - 1} guild(s)")
+        return True
+
+    def _load_guild(self, guild_id: Optional[int]) -> _Entry:
+        seen = self.invalidations
+        with self._engine.connect() as conn:
+            if guild_id is _GLOBAL:
+                rows = conn.execute(text("SELECT key, value FROM bot_settings WHERE discord_server_id IS NULL"))
+            else:
+                rows = conn.execute(
+                    text("SELECT key, value FROM bot_settings WHERE discord_server_id = :guild_id"),
+                    {"guild_id": guild_id},
+                )
+            values = {key: value for key, value in rows.fetchall()}
+        with self._lock:
+            self.db_loads += 1
+            entry = _Entry(values, self._next_version())
+            if self.invalidations == seen:
+                self._entries[guild_id] = entry
+        return entry
+
+    def _entry(self, guild_id: Optional[int]) -> _Entry:
+        if self._full_load_needed:
+            self.misses += 1
+            self._load_all()
+        entry = self._entries.get(guild_id)
+        if entry is None:
+            self.misses += 1
+            return self._load_guild(guild_id)
+        if time.monotonic() - entry.loaded_at > self.max_age:
+            self.stale_reloads += 1
+            return self._load_guild(guild_id)
+        self.hits += 1
+        return entry
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def snapshot(self, guild_id: Optional[int] = None) -> Dict[str, str]:
+        """
+        Effective settings for a guild: global rows overridden by the guild's own.
+
+        Args:
+            guild_id: Discord guild ID, or None for global settings only
+
+        Returns:
+            dict: key -> value (shared; do not mutate)
+        """
+        global_entry = self._entry(_GLOBAL)
+        if guild_id is None:
+            return global_entry.values
+        guild_id = int(guild_id)
+        guild_entry = self._entry(guild_id)
+        cached = self._merged.get(guild_id)
+        if cached is not None and cached[0] == global_entry.version and cached[1] == guild_entry.version:
+            return cached[2]
+        merged = {**global_entry.values, **guild_entry.values}
+        self._merged[guild_id] = (global_entry.version, guild_entry.version, merged)
+        return merged
+
+    def get(self, guild_id: int, key: str, default: Optional[str] = None) -> Optional[str]:
+        """A guild's own value for ``key`` (no global fallback), like `WHERE discord_server_id = :guild_id`."""
+        return self._entry(int(guild_id)).values.get(key, default)
+
+    def guild_values(self, guild_id: int) -> Dict[str, str]:
+        """All of a guild's own rows (shared; do not mutate)."""
+        return self._entry(int(guild_id)).values
+
+    # -------------------------
+    # Invalidation
+    # -------------------------
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Drop one guild's snapshot (reloaded on next read), or everything when guild_id is None."""
+        with self._lock:
+            self.invalidations += 1
+            if guild_id is None:
+                self._full_load_needed = True
+            else:
+                self._entries.pop(int(guild_id), None)
+                self._merged.pop(int(guild_id), None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        entries = list(self._entries.values())
+        return {
+            "guilds": max(0, len(entries) - 1),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_reloads": self.stale_reloads,
+            "invalidations": self.invalidations,
+            "db_loads": self.db_loads,
+            "oldest_snapshot_seconds": round(max((now - e.loaded_at for e in entries), default=0), 1),
+        }
+
+
+settings_store = SettingsStore()
+
+
+# -------------------------
+# In-process write detection
+# -------------------------
+# Writers in this process (dashboard-less admin commands, panels storing their
+# message ids, chatroom id discovery, ...) use raw SQL. Rather than invalidating
+# at each call site, record on the connection which guilds a bot_settings write
+# touched and invalidate those once the transaction has committed.
+
+_hook_installed = False
+_WRITTEN_KEY = "bot_settings_written"
+_ALL_GUILDS = "all"  # _WRITTEN_KEY value when a write's guild couldn't be told
+_SERVER_ID_EQUALS = re.compile(r"discord_server_id\s*=\s*:(\w+)", re.IGNORECASE)
+_INSERT_COLUMNS = re.compile(
+    r"INSERT\s+INTO\s+bot_settings\s*\(([^)]*)\)\s*VALUES\s*\(([^)]*)\)", re.IGNORECASE | re.DOTALL
+)
+
+
+def _is_settings_write(statement: str) -> bool:
+    if "bot_settings" not in statement:
+        return False
+    verb = statement.lstrip()[:6].upper()
+    return verb in ("INSERT", "UPDATE", "DELETE")
+
+
+def _written_guilds(context) -> Optional[set]:
+    """discord_server_ids a text() write binds, or None when they can't be told."""
+    source = getattr(getattr(context, "invoked_statement", None), "text", None)
+    if not source:
+        return None
+    match = _SERVER_ID_EQUALS.search(source)
+    name = match.group(1) if match else None
+    if name is None:
+        match = _INSERT_COLUMNS.search(source)
+        if match:
+            columns = [column.strip().lower() for column in match.group(1).split(",")]
+            values = [value.strip() for value in match.group(2).split(",")]
+            if "discord_server_id" in columns and len(values) == len(columns):
+                value = values[columns.index("discord_server_id")]
+                name = value[1:] if value.startswith(":") else None
+    if name is None:
+        return None
+    guilds = set()
+    for params in getattr(context, "compiled_parameters", None) or [{}]:
+        guild_id = params.get(name)
+        if guild_id is None:
+            return None  # global (NULL) rows feed every guild's snapshot
+        guilds.add(int(guild_id))
+    return guilds
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not _is_settings_write(statement):
+        return
+    written = conn.info.get(_WRITTEN_KEY)
+    guilds = _written_guilds(context) if written != _ALL_GUILDS else None
+    conn.info[_WRITTEN_KEY] = _ALL_GUILDS if guilds is None else (written or set()) | guilds
+
+
+def _after_commit(engine, info, committed):
+    written = info.pop(_WRITTEN_KEY, None)
+    if not written or not committed or not settings_store.is_bound_to(engine):
+        return
+    if written == _ALL_GUILDS:
+        settings_store.invalidate()
+        return
+    for guild_id in written:
+        settings_store.invalidate(guild_id)
+
+
+def _after_rollback(conn):
+    conn.info.pop(_WRITTEN_KEY, None)
+
+
+def _install_write_hook():
+    global _hook_installed
+    if _hook_installed:
+        return
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "rollback", _after_rollback)
+    _hook_installed = True
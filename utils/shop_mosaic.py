@@ -0,0 +1,518 @@
+"""
+Point Shop Mosaic
+Renders the point shop's item grid image, with every expensive step cached.
+
+create_shop_mosaic_image() used to live in bot.py and run on every shop
+repost or sync. It downloaded item images one at a time, decoded, resized and
+drew them with Pillow on the event loop, and reloaded the TrueType fonts on
+each call. Now:
+
+- The finished PNG is cached under a hash of what is drawn: each item's name,
+  price, stock, image URL and image validator (see below), plus the canvas
+  width. The cache lives in memory (MOSAIC_CACHE_SIZE entries) and on disk, so
+  an unchanged shop is never re-rendered, even after a restart. Every image is
+  revalidated before the cache is consulted, so a new image behind the same
+  URL changes the key. Concurrent requests for the same mosaic share one
+  render.
+- Item images download concurrently, at most SHOP_IMAGE_FETCH_CONCURRENCY at
+  a time.
+- Resized thumbnails are cached in an LRU (SHOP_THUMBNAIL_CACHE_SIZE) and on
+  disk, keyed by URL + validator + width. The validator is the ETag, else
+  Last-Modified, else a hash of the bytes. When a validator is known the
+  request is conditional, so an unchanged image costs one 304 and no decode.
+- Fonts load once per process.
+- Decoding, resizing, composing and PNG encoding run on a small thread pool
+  (SHOP_RENDER_THREADS, default 2); Pillow releases the GIL for most of that
+  work. A process pool was not used: thumbnails would have to be pickled back
+  and forth, and the bot process is not fork-safe.
+
+Disk caches live under SHOP_IMAGE_CACHE_DIR (default: <tmp>/shop_mosaic_cache)
+and are best-effort: an unwritable directory only disables them.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.http_pool import http_session
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("SHOP_IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "shop_mosaic_cache")
+FETCH_CONCURRENCY = int(os.getenv("SHOP_IMAGE_FETCH_CONCURRENCY", "6"))
+THUMBNAIL_CACHE_SIZE = int(os.getenv("SHOP_THUMBNAIL_CACHE_SIZE", "128"))
+MOSAIC_CACHE_SIZE = int(os.getenv("MOSAIC_CACHE_SIZE", "32"))
+RENDER_THREADS = int(os.getenv("SHOP_RENDER_THREADS", "2"))
+FETCH_TIMEOUT_SECONDS = 10
+
+# Bump when the drawing below changes, so cached mosaics from an older layout aren't reused
+LAYOUT_VERSION = 1
+
+# Layout - VERY LARGE sizes for maximum visibility
+MAX_COLS = 3
+PADDING = 30
+TITLE_HEIGHT = 100  # Title above image
+FOOTER_HEIGHT = 210  # Price + stock below image
+PLACEHOLDER_HEIGHT = 500  # Row height for an item whose image failed to load
+# Sized so text stays readable after Discord downscales the 2400px canvas ~4x to chat width
+TITLE_FONT_SIZE = 64
+PRICE_FONT_SIZE = 72
+STOCK_FONT_SIZE = 52
+BG_COLOR = (30, 30, 35)
+TITLE_BG_COLOR = (45, 45, 55)
+FOOTER_BG_COLOR = (50, 50, 60)
+TEXT_COLOR = (255, 255, 255)
+PRICE_COLOR = (255, 215, 0)  # Gold for price
+STOCK_COLOR = (100, 200, 100)  # Green for stock
+SOLDOUT_COLOR = (255, 100, 100)  # Red for sold out
+
+_render_pool = ThreadPoolExecutor(max_workers=max(1, RENDER_THREADS), thread_name_prefix="shop-render")
+
+
+class _LRU:
+    """Small LRU shared by the event loop and the render pool."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+_thumbnails = _LRU(THUMBNAIL_CACHE_SIZE)  # thumbnail key -> RGB Image
+_mosaics = _LRU(MOSAIC_CACHE_SIZE)  # mosaic hash -> PNG bytes
+_validators: Dict[str, str] = {}  # image URL -> last validator seen
+_inflight: Dict[str, asyncio.Future] = {}
+_stats = {"mosaic_hits": 0, "renders": 0, "thumbnail_hits": 0, "downloads": 0, "not_modified": 0}
+
+
+# -------------------------
+# Fonts
+# -------------------------
+
+
+@lru_cache(maxsize=1)
+def _fonts():
+    """(title, price, stock) fonts - prefer bold/semi-bold for titles. Loaded once."""
+    candidates = [
+        (
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        ),
+        ("arialbd.ttf", "arialbd.ttf", "arial.ttf"),  # Arial Bold
+        ("arial.ttf", "arial.ttf", "arial.ttf"),
+    ]
+    for title_path, price_path, stock_path in candidates:
+        try:
+            return (
+                ImageFont.truetype(title_path, TITLE_FONT_SIZE),
+                ImageFont.truetype(price_path, PRICE_FONT_SIZE),
+                ImageFont.truetype(stock_path, STOCK_FONT_SIZE),
+            )
+        except OSError:
+            continue
+    default = ImageFont.load_default()
+    return default, default, default
+
+
+# -------------------------
+# Disk cache helpers
+# -------------------------
+
+
+def _cache_path(name: str) -> Optional[str]:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+    return os.path.join(CACHE_DIR, name)
+
+
+def _read_file(name: str) -> Optional[bytes]:
+    path = _cache_path(name)
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_file(name: str, data: bytes):
+    path = _cache_path(name)
+    if not path:
+        return
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"[Point Shop Mosaic] Could not write cache file {name}: {e}")
+
+
+def _url_hash(url: str) -> str:
+    return hashlib.sha1(url.encode()).hexdigest()
+
+
+def _thumbnail_key(url: str, validator: str, width: int) -> str:
+    return hashlib.sha1(f"{url}\n{validator}\n{width}".encode()).hexdigest()
+
+
+def _known_validator(url: str) -> Optional[str]:
+    validator = _validators.get(url)
+    if validator is None:
+        data = _read_file(f"url-{_url_hash(url)}.json")
+        if data:
+            try:
+                validator = json.loads(data).get("validator")
+            except ValueError:
+                validator = None
+            if validator:
+                _validators[url] = validator
+    return validator
+
+
+# -------------------------
+# Thumbnails (pool side)
+# -------------------------
+
+
+def _decode_thumbnail(data: bytes, cell_width: int) -> Image.Image:
+    """Decode image bytes, flatten transparency onto the background and scale to the cell width."""
+    img = Image.open(io.BytesIO(data))
+
+    # Convert to RGB if necessary
+    if img.mode in ("RGBA", "P"):
+        bg = Image.new("RGB", img.size, BG_COLOR)
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        bg.paste(img, mask=img.split()[3] if len(img.split()) > 3 else None)
+        img = bg
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    # Scale image to fit cell width while preserving aspect ratio
+    orig_w, orig_h = img.size
+    new_h = int(orig_h * cell_width / orig_w)
+    return img.resize((cell_width, new_h), Image.Resampling.LANCZOS)
+
+
+def _store_thumbnail(key: str, url: str, validator: str, img: Image.Image):
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    _write_file(f"thumb-{key}.png", buffer.getvalue())
+    _write_file(f"url-{_url_hash(url)}.json", json.dumps({"url": url, "validator": validator}).encode())
+
+
+def _load_thumbnail(key: str) -> Optional[Image.Image]:
+    data = _read_file(f"thumb-{key}.png")
+    if data is None:
+        return None
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img.convert("RGB") if img.mode != "RGB" else img
+    except Exception:
+        return None
+
+
+def _process_download(url: str, data: bytes, validator: Optional[str], cell_width: int) -> Tuple[str, Image.Image]:
+    validator = validator or "sha1:" + hashlib.sha1(data).hexdigest()
+    key = _thumbnail_key(url, validator, cell_width)
+    img = _thumbnails.get(key) or _load_thumbnail(key)
+    if img is None:
+        img = _decode_thumbnail(data, cell_width)
+        _store_thumbnail(key, url, validator, img)
+    return validator, img
+
+
+# -------------------------
+# Thumbnails (event loop side)
+# -------------------------
+
+
+async def _thumbnail(session, semaphore, url: str, name: str, cell_width: int) -> Optional[Image.Image]:
+    loop = asyncio.get_running_loop()
+    validator = _known_validator(url)
+    cached = None
+    if validator:
+        key = _thumbnail_key(url, validator, cell_width)
+        cached = _thumbnails.get(key) or await loop.run_in_executor(_render_pool, _load_thumbnail, key)
+
+    headers = {}
+    if cached is not None:
+        if validator.startswith("sha1:"):
+            pass  # no HTTP validator to send; the bytes are compared after download
+        elif validator.startswith("lm:"):
+            headers["If-Modified-Since"] = validator[3:]
+        else:
+            headers["If-None-Match"] = validator
+
+    try:
+        async with semaphore:
+            async with session.get(
+                url, headers=headers, timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS)
+            ) as resp:
+                if resp.status == 304 and cached is not None:
+                    _stats["not_modified"] += 1
+                    _stats["thumbnail_hits"] += 1
+                    _thumbnails.put(_thumbnail_key(url, validator, cell_width), cached)
+                    return cached
+                if resp.status != 200:
+                    return None
+                data = await resp.read()
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+        _stats["downloads"] += 1
+        header_validator = etag or (f"lm:{last_modified}" if last_modified else None)
+        validator, img = await loop.run_in_executor(
+            _render_pool, _process_download, url, data, header_validator, cell_width
+        )
+        _validators[url] = validator
+        _thumbnails.put(_thumbnail_key(url, validator, cell_width), img)
+        return img
+    except Exception as e:
+        logger.info(f"[Point Shop Mosaic] Failed to load image for {name}: {e}")
+        return None
+
+
+# -------------------------
+# Compose (pool side)
+# -------------------------
+
+
+def _compose(cells: List[tuple], cell_width: int, cols: int) -> bytes:
+    """Draw the grid: one (name, price, stock, thumbnail-or-None) cell per item; returns PNG bytes."""
+    title_font, price_font, stock_font = _fonts()
+
+    # Group into rows and calculate height per row
+    rows_data = [cells[i : i + cols] for i in range(0, len(cells), cols)]
+    row_heights = [max(img.size[1] if img else PLACEHOLDER_HEIGHT for _, _, _, img in row) for row in rows_data]
+
+    # Calculate total canvas size (title + image + footer per row)
+    total_height = PADDING + sum(TITLE_HEIGHT + rh + FOOTER_HEIGHT + PADDING for rh in row_heights)
+    canvas_width = cols * cell_width + (cols + 1) * PADDING
+    canvas = Image.new("RGB", (canvas_width, total_height), BG_COLOR)
+    draw = ImageDraw.Draw(canvas)
+
+    current_y = PADDING
+    for row_idx, row in enumerate(rows_data):
+        row_height = row_heights[row_idx]
+
+        for col_idx, (name, price, stock, img) in enumerate(row):
+            x = PADDING + col_idx * (cell_width + PADDING)
+
+            # Draw TITLE background (above image)
+            draw.rectangle([x, current_y, x + cell_width, current_y + TITLE_HEIGHT], fill=TITLE_BG_COLOR)
+
+            # Draw item title (no item number, just the name), trimmed by
+            # measured width so it can't overflow the cell at any font size
+            name_text = name
+            if draw.textlength(name_text, font=title_font) > cell_width - 20:
+                while name_text and draw.textlength(name_text + "…", font=title_font) > cell_width - 20:
+                    name_text = name_text[:-1]
+                name_text += "…"
+            # Center the title text in its band
+            bbox = draw.textbbox((0, 0), name_text, font=title_font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            text_x = x + (cell_width - text_width) // 2
+            text_y = current_y + (TITLE_HEIGHT - text_height) // 2 - bbox[1]
+            draw.text((text_x, text_y), name_text, fill=TEXT_COLOR, font=title_font)
+
+            # IMAGE area starts after title
+            img_y = current_y + TITLE_HEIGHT
+
+            if img:
+                # Center image vertically in its cell if shorter than row height
+                img_h = img.size[1]
+                y_offset = (row_height - img_h) // 2
+                canvas.paste(img, (x, img_y + y_offset))
+
+                # Draw sold out overlay if applicable
+                if stock == 0:
+                    overlay = Image.new("RGBA", img.size, (0, 0, 0, 150))
+                    composited = Image.alpha_composite(img.convert("RGBA"), overlay).convert("RGB")
+                    canvas.paste(composited, (x, img_y + y_offset))
+
+                    # Draw "SOLD OUT" text centered on image
+                    sold_text = "SOLD OUT"
+                    bbox = draw.textbbox((0, 0), sold_text, font=price_font)
+                    tw = bbox[2] - bbox[0]
+                    th = bbox[3] - bbox[1]
+                    draw.text(
+                        (x + (cell_width - tw) // 2, img_y + y_offset + (img_h - th) // 2),
+                        sold_text,
+                        fill=SOLDOUT_COLOR,
+                        font=price_font,
+                    )
+            else:
+                # Draw placeholder
+                draw.rectangle([x, img_y, x + cell_width, img_y + row_height], fill=(60, 60, 70))
+                draw.text((x + 10, img_y + row_height // 2), "No Image", fill=TEXT_COLOR, font=title_font)
+
+            # Draw FOOTER background (below image)
+            footer_y = img_y + row_height
+            draw.rectangle([x, footer_y, x + cell_width, footer_y + FOOTER_HEIGHT], fill=FOOTER_BG_COLOR)
+
+            # Line 1: Price (big, gold)
+            draw.text((x + 10, footer_y + 18), f"{price:,} pts", fill=PRICE_COLOR, font=price_font)
+
+            # Line 2: Stock text
+            if stock < 0:
+                stock_text = "In-stock: ∞"
+                stock_color = STOCK_COLOR
+            elif stock == 0:
+                stock_text = "In-stock: SOLD OUT"
+                stock_color = SOLDOUT_COLOR
+            else:
+                stock_text = f"In-stock: {stock}"
+                stock_color = STOCK_COLOR
+
+            draw.text((x + 10, footer_y + 115), stock_text, fill=stock_color, font=stock_font)
+
+        current_y += TITLE_HEIGHT + row_height + FOOTER_HEIGHT + PADDING
+
+    # Save to bytes with high quality
+    output = io.BytesIO()
+    canvas.save(output, format="PNG", optimize=False)  # No optimization for better quality
+    return output.getvalue()
+
+
+# -------------------------
+# Public entry point
+# -------------------------
+
+
+def mosaic_key(items, max_width: int, validators: Optional[Dict[str, str]] = None) -> str:
+    """
+    Hash of everything the mosaic draws for ``items``.
+
+    Args:
+        items: Shop items; name, price, stock and image URL are drawn
+        max_width: Canvas width
+        validators: Image URL -> ETag/Last-Modified/content hash; None for the
+            URL-only key concurrent requests coalesce on
+    """
+    validators = validators or {}
+    # item[5] is image_url
+    drawn = [(item[1], item[3], item[4], item[5], validators.get(item[5])) for item in items if item[5]]
+    payload = json.dumps([LAYOUT_VERSION, max_width, drawn], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+async def _render(items_with_images, max_width: int) -> bytes:
+    loop = asyncio.get_running_loop()
+    cols = min(len(items_with_images), MAX_COLS)
+    # Calculate cell width based on max_width and columns (very large cells)
+    cell_width = (max_width - (cols + 1) * PADDING) // cols
+
+    # Revalidates every image first: unchanged ones are a 304 and a thumbnail cache hit.
+    semaphore = asyncio.Semaphore(max(1, FETCH_CONCURRENCY))
+    async with http_session() as session:
+        thumbnails = await asyncio.gather(
+            *(_thumbnail(session, semaphore, item[5], item[1], cell_width) for item in items_with_images)
+        )
+
+    # A failed fetch keeps its last known validator, so a complete earlier mosaic can still be served.
+    key = mosaic_key(items_with_images, max_width, {item[5]: _known_validator(item[5]) for item in items_with_images})
+    png = _mosaics.get(key)
+    if png is None:
+        png = await loop.run_in_executor(_render_pool, _read_file, f"mosaic-{key}.png")
+        if png is not None:
+            _mosaics.put(key, png)
+    if png is not None:
+        _stats["mosaic_hits"] += 1
+        return png
+
+    cells = [(item[1], item[3], item[4], img) for item, img in zip(items_with_images, thumbnails)]
+    png = await loop.run_in_executor(_render_pool, _compose, cells, cell_width, cols)
+    _stats["renders"] += 1
+    # Only cache complete renders; a failed download should be retried next time
+    if all(img is not None for img in thumbnails):
+        _mosaics.put(key, png)
+        await loop.run_in_executor(_render_pool, _write_file, f"mosaic-{key}.png", png)
+    return png
+
+
+async def create_shop_mosaic_image(items, max_width=2400):
+    """Create a grid mosaic image from shop item images, preserving original aspect ratios
+
+    Layout per item:
+    ┌─────────────┐
+    │ Item Name   │  <- Title above image (no number)
+    ├─────────────┤
+    │   IMAGE     │  <- Much larger, high quality image
+    │             │
+    ├─────────────┤
+    │ 500 pts     │  <- Bigger price
+    │ In-stock: 10│  <- Full stock text
+    └─────────────┘
+
+    Args:
+        items: List of shop items
+        max_width: Maximum width of the entire mosaic (default 2400px for very large images)
+
+    Returns:
+        io.BytesIO with the PNG, or None when no item has an image
+    """
+    # Filter items with images
+    items_with_images = [item for item in items if item[5]]  # item[5] is image_url
+    if not items_with_images:
+        return None
+
+    # Concurrent reposts of the same shop share one revalidation and render
+    key = mosaic_key(items_with_images, max_width)
+    pending = _inflight.get(key)
+    if pending is not None:
+        return io.BytesIO(await asyncio.shield(pending))
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        png = await _render(items_with_images, max_width)
+        future.set_result(png)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+    return io.BytesIO(png)
+
+
+def stats() -> dict:
+    return {**_stats, "cached_mosaics": len(_mosaics), "cached_thumbnails": len(_thumbnails)}
@@ -16,6 +16,7 @@ same idiom (no await).
 
 import logging
 import time
+from typing import Optional
 
 from sqlalchemy import text
 
@@ -150,6 +151,24 @@ def server_has_feature(engine, guild_id, feature_key: str) -> bool:
     return feature_key in TIER_FEATURES.get(get_server_tier(engine, guild_id), FREE)
 
 
+def cached_server_has_feature(guild_id, feature_key: str) -> Optional[bool]:
+    """server_has_feature from the local cache only; None when the tier isn't cached.
+
+    No DB access, so the chat router can call it on the event loop and only
+    hop to a worker thread on a miss. Fail-open 'free' answers are never
+    cached, so a DB error is retried on the next line.
+    """
+    if feature_key in REQUIRES_DISCORD and is_standalone_server(guild_id):
+        return False
+    try:
+        cached = _cache.get(int(guild_id))
+    except (TypeError, ValueError):
+        return None
+    if not cached or cached[1] <= time.monotonic():
+        return None
+    return feature_key in TIER_FEATURES.get(cached[0], FREE)
+
+
 # Tier ordering for picking a user's "highest" paid tier.
 _TIER_RANK = {"free": 0, "tier2": 1, "tier3": 2, "tier4": 3}
 
@@ -0,0 +1,319 @@
+"""
+Bulk Watchtime Accrual
+Set-based watchtime + points accrual used by update_watchtime_task.
+
+The legacy tick ran one watchtime upsert per active viewer, then three SELECTs
+and up to three INSERTs per viewer for points. With thousands of concurrent
+chatters that is thousands of round-trips every interval, all inside one held
+transaction. These helpers do the same work in a fixed number of statements per
+guild (array parameters + unnest), independent of how many viewers are active.
+
+Postgres only (array binds / unnest), same as the rest of the accrual path.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Points are awarded per whole block of this many unconverted watchtime minutes.
+POINTS_INTERVAL_MINUTES = 5
+
+# Defaults used when a guild has no point_settings rows.
+DEFAULT_POINTS_PER_5MIN = 1
+DEFAULT_SUB_POINTS_PER_5MIN = 2
+
+
+def load_points_rates(conn, server_id) -> Tuple[int, int]:
+    """
+    Load the per-guild points rates, falling back to the global row then defaults.
+
+    Args:
+        conn: SQLAlchemy connection
+        server_id: Discord guild/server ID
+
+    Returns:
+        tuple: (points_per_5min, sub_points_per_5min)
+    """
+    points_per_5min = DEFAULT_POINTS_PER_5MIN
+    sub_points_per_5min = DEFAULT_SUB_POINTS_PER_5MIN
+
+    # NULLS FIRST so a per-server row overrides the global (NULL server) row.
+    rows = conn.execute(
+        text(
+            """
+        SELECT key, value FROM point_settings
+        WHERE key IN ('points_per_5min', 'sub_points_per_5min')
+        AND (discord_server_id = :sid OR discord_server_id IS NULL)
+        ORDER BY discord_server_id NULLS FIRST
+    """
+        ),
+        {"sid": server_id},
+    ).fetchall()
+
+    for key, value in rows:
+        if key == "points_per_5min":
+            points_per_5min = int(value)
+        elif key == "sub_points_per_5min":
+            sub_points_per_5min = int(value)
+
+    return points_per_5min, sub_points_per_5min
+
+
+WATCHTIME_UPSERT_SQL = """
+        INSERT INTO watchtime (username, minutes, last_active, discord_server_id)
+        SELECT v.username, :m, v.last_seen, :sid
+        FROM unnest(CAST(:usernames AS TEXT[]), CAST(:last_seen AS TIMESTAMP[])) AS v(username, last_seen)
+        ON CONFLICT (username, discord_server_id) DO UPDATE SET
+            minutes = watchtime.minutes + EXCLUDED.minutes,
+            last_active = EXCLUDED.last_active
+"""
+
+
+def _upsert_params(active_users: Dict[str, object], server_id, minutes_to_add) -> dict:
+    return {
+        "usernames": list(active_users.keys()),
+        # isoformat strings, exactly what the per-row upsert used to bind.
+        "last_seen": [ts.isoformat() for ts in active_users.values()],
+        "m": minutes_to_add,
+        "sid": server_id,
+    }
+
+
+def bulk_upsert_watchtime(conn, active_users: Dict[str, object], server_id, minutes_to_add) -> int:
+    """
+    Add one interval of watchtime for every active viewer in a single statement.
+
+    Args:
+        conn: SQLAlchemy connection (inside the caller's transaction)
+        active_users: {username: last_seen datetime}, already deduped per person
+        server_id: Discord guild/server ID
+        minutes_to_add: Minutes credited to each viewer this tick
+
+    Returns:
+        int: Number of watchtime rows inserted or updated
+    """
+    if not active_users:
+        return 0
+
+    result = conn.execute(text(WATCHTIME_UPSERT_SQL), _upsert_params(active_users, server_id, minutes_to_add))
+    return result.rowcount
+
+
+def bulk_upsert_watchtime_queue_roles(
+    conn, active_users: Dict[str, object], server_id, minutes_to_add, roles: List[dict]
+) -> int:
+    """
+    Same upsert as bulk_upsert_watchtime(), also queuing role grants for thresholds crossed this tick.
+
+    A `prior` CTE reads the viewers' minutes from the statement's snapshot,
+    i.e. before the upsert. A linked viewer gets a role_sync_queue job for
+    every role in ``roles`` whose minutes lie in (prior minutes, new minutes].
+    The caller passes load_watchtime_roles(), so guilds on the built-in
+    defaults (empty watchtime_roles table) get role events too. See
+    core/role_sync.py for the worker that drains the queue.
+
+    Args:
+        conn: SQLAlchemy connection (inside the caller's transaction)
+        active_users: {username: last_seen datetime}, already deduped per person
+        server_id: Discord guild/server ID
+        minutes_to_add: Minutes credited to each viewer this tick
+        roles: Effective watchtime roles, [{"name": str, "minutes": int}, ...]
+
+    Returns:
+        int: Number of role grants queued (0 when nobody crossed a threshold)
+    """
+    if not active_users:
+        return 0
+    if not roles:
+        bulk_upsert_watchtime(conn, active_users, server_id, minutes_to_add)
+        return 0
+
+    result = conn.execute(
+        text(
+            f"""
+        WITH prior AS (
+            SELECT username, minutes FROM watchtime
+            WHERE discord_server_id = :sid AND username = ANY(CAST(:usernames AS TEXT[]))
+        ),
+        upserted AS (
+            {WATCHTIME_UPSERT_SQL}
+            RETURNING username, minutes
+        )
+        INSERT INTO role_sync_queue (discord_server_id, discord_id, role_name, kick_name, minutes)
+        SELECT DISTINCT ON (l.discord_id, r.role_name) :sid, l.discord_id, r.role_name, u.username, u.minutes
+        FROM upserted u
+        LEFT JOIN prior p ON p.username = u.username
+        JOIN links l ON l.kick_name = u.username AND l.discord_server_id = :sid
+        JOIN unnest(CAST(:role_names AS TEXT[]), CAST(:role_minutes AS INTEGER[])) AS r(role_name, minutes_required)
+            ON r.minutes_required <= u.minutes
+            AND r.minutes_required > COALESCE(p.minutes, 0)
+        ON CONFLICT (discord_server_id, discord_id, role_name) DO UPDATE SET
+            kick_name = EXCLUDED.kick_name,
+            minutes = EXCLUDED.minutes
+    """
+        ),
+        {
+            **_upsert_params(active_users, server_id, minutes_to_add),
+            "role_names": [role["name"] for role in roles],
+            "role_minutes": [int(role["minutes"]) for role in roles],
+        },
+    )
+    return result.rowcount
+
+
+def compute_points_due(
+    conn, usernames: List[str], server_id, linked: Optional[Dict[str, int]] = None
+) -> List[Tuple[str, int, object]]:
+    """
+    Find every active user with at least one whole unconverted points interval.
+
+    Args:
+        conn: SQLAlchemy connection
+        usernames: Canonical usernames active this tick
+        server_id: Discord guild/server ID
+        linked: {lowercased username: discord_id} already resolved by the caller
+            (core/identity_index.py); when given, `links` isn't joined
+
+    Returns:
+        list: (username, intervals, discord_id) tuples; discord_id may be None
+    """
+    if not usernames:
+        return []
+
+    if linked is not None:
+        rows = conn.execute(
+            text(
+                """
+            SELECT w.username, (w.minutes - COALESCE(t.minutes_converted, 0)) / :interval AS intervals
+            FROM watchtime w
+            LEFT JOIN points_conversion_totals t
+                ON t.kick_username = w.username AND t.discord_server_id = w.discord_server_id
+            WHERE w.discord_server_id = :sid AND w.username = ANY(:usernames)
+              AND w.minutes - COALESCE(t.minutes_converted, 0) >= :interval
+        """
+            ),
+            {"sid": server_id, "usernames": list(usernames), "interval": POINTS_INTERVAL_MINUTES},
+        ).fetchall()
+        return [(row[0], int(row[1]), linked.get(row[0].lower())) for row in rows]
+
+    rows = conn.execute(
+        text(
+            """
+        WITH active AS (
+            SELECT w.username, w.minutes
+            FROM watchtime w
+            WHERE w.discord_server_id = :sid AND w.username = ANY(:usernames)
+        ),
+        converted AS (
+            -- Running totals (utils/conversion_totals.py), not SUM() over the log.
+            SELECT t.kick_username, t.minutes_converted
+            FROM points_conversion_totals t
+            WHERE t.discord_server_id = :sid AND t.kick_username = ANY(:usernames)
+        ),
+        linked AS (
+            -- One discord_id per lowercased name; a set join instead of a
+            -- per-user LOWER(kick_name) probe, which can't use the plain index.
+            SELECT DISTINCT ON (LOWER(kick_name)) LOWER(kick_name) AS uname, discord_id
+            FROM links
+            WHERE discord_server_id = :sid
+            ORDER BY LOWER(kick_name), discord_id
+        )
+        SELECT a.username,
+               (a.minutes - COALESCE(c.minutes_converted, 0)) / :interval AS intervals,
+               l.discord_id
+        FROM active a
+        LEFT JOIN converted c ON c.kick_username = a.username
+        LEFT JOIN linked l ON l.uname = LOWER(a.username)
+        WHERE a.minutes - COALESCE(c.minutes_converted, 0) >= :interval
+    """
+        ),
+        {"sid": server_id, "usernames": list(usernames), "interval": POINTS_INTERVAL_MINUTES},
+    ).fetchall()
+
+    return [(row[0], int(row[1]), row[2]) for row in rows]
+
+
+def bulk_award_points(
+    conn, usernames: List[str], server_id, points_per_5min: int, linked: Optional[Dict[str, int]] = None
+) -> List[dict]:
+    """
+    Convert new watchtime to points for every active user in a handful of statements.
+
+    One SELECT computes who is due (against points_conversion_totals), then one
+    statement each writes user_points, the points_watchtime_converted ledger and
+    the permanent watchtime_conversion_logs (linked users only, as before).
+
+    Args:
+        conn: SQLAlchemy connection (inside the caller's transaction)
+        usernames: Canonical usernames active this tick
+        server_id: Discord guild/server ID
+        points_per_5min: Points awarded per 5-minute interval
+        linked: Optional pre-resolved {username: discord_id}, see compute_points_due()
+
+    Returns:
+        list: One dict per awarded user (kick_name, discord_id, minutes, points)
+    """
+    if points_per_5min <= 0:
+        return []
+
+    due = compute_points_due(conn, usernames, server_id, linked)
+    if not due:
+        return []
+
+    names = [username for username, _, _ in due]
+    discord_ids = [discord_id for _, _, discord_id in due]
+    minutes = [intervals * POINTS_INTERVAL_MINUTES for _, intervals, _ in due]
+    points = [intervals * points_per_5min for _, intervals, _ in due]
+    params = {"names": names, "discord_ids": discord_ids, "minutes": minutes, "points": points, "sid": server_id}
+
+    conn.execute(
+        text(
+            """
+        INSERT INTO user_points (kick_username, discord_id, points, total_earned, discord_server_id, last_updated)
+        SELECT v.name, v.discord_id, v.points, v.points, :sid, CURRENT_TIMESTAMP
+        FROM unnest(CAST(:names AS TEXT[]), CAST(:discord_ids AS BIGINT[]), CAST(:points AS INTEGER[]))
+            AS v(name, discord_id, points)
+        ON CONFLICT (kick_username, discord_server_id) DO UPDATE SET
+            points = user_points.points + EXCLUDED.points,
+            total_earned = user_points.total_earned + EXCLUDED.total_earned,
+            discord_id = COALESCE(EXCLUDED.discord_id, user_points.discord_id),
+            last_updated = CURRENT_TIMESTAMP
+    """
+        ),
+        params,
+    )
+
+    conn.execute(
+        text(
+            """
+        INSERT INTO points_watchtime_converted (kick_username, minutes_converted, points_awarded, discord_server_id)
+        SELECT v.name, v.minutes, v.points, :sid
+        FROM unnest(CAST(:names AS TEXT[]), CAST(:minutes AS INTEGER[]), CAST(:points AS INTEGER[]))
+            AS v(name, minutes, points)
+    """
+        ),
+        params,
+    )
+
+    # Permanent audit log (NEVER deleted) - only rows we can attribute to a Discord user.
+    conn.execute(
+        text(
+            """
+        INSERT INTO watchtime_conversion_logs
+            (discord_id, kick_name, discord_server_id, raffle_minutes, points_minutes, converted_at)
+        SELECT v.discord_id, v.name, :sid, 0, v.minutes, NOW()
+        FROM unnest(CAST(:names AS TEXT[]), CAST(:discord_ids AS BIGINT[]), CAST(:minutes AS INTEGER[]))
+            AS v(name, discord_id, minutes)
+        WHERE v.discord_id IS NOT NULL
+    """
+        ),
+        params,
+    )
+
+    return [
+        {"kick_name": name, "discord_id": discord_id, "minutes": mins, "points": pts}
+        for name, discord_id, mins, pts in zip(names, discord_ids, minutes, points)
+    ]